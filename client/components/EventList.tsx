@@ -34,7 +34,7 @@ const EventList: React.FC<EventListProps> = ({ shows = [], error }) => {
 
   const fetchShows = async () => {
     try {
-      const response = await fetch(`${process.env.NEXT_PUBLIC_API_BASE_URL}/shows`);
+      const response = await fetch(`${process.env.NEXT_PUBLIC_API_BASE_URL}/shows?all=true`, { credentials: "include" });
       if (!response.ok) throw new Error("Failed to fetch shows");
       const data = await response.json();
 
@@ -61,6 +61,7 @@ const EventList: React.FC<EventListProps> = ({ shows = [], error }) => {
 
     try {
       const response = await fetch(`${process.env.NEXT_PUBLIC_API_BASE_URL}/shows/${showId}`, {
+        credentials: "include",
         method: "DELETE",
         headers: {
           Authorization: `Bearer ${token}`,
@@ -47,6 +47,7 @@ export const UserProvider: React.FC<{ children: ReactNode }> = ({
 
     try {
       const response = await fetch(`${process.env.NEXT_PUBLIC_API_BASE_URL}/auth/me`, {
+        credentials: "include",
         headers: {
           Authorization: `Bearer ${token}`,
         },
@@ -73,6 +74,7 @@ export const UserProvider: React.FC<{ children: ReactNode }> = ({
   // Handle user login (set token and fetch user data)
   const login = async (username: string, password: string) => {
     const response = await fetch(`${process.env.NEXT_PUBLIC_API_BASE_URL}/auth/signin`, {
+      credentials: "include",
       method: "POST",
       headers: {
         "Content-Type": "application/json",
@@ -1,9 +1,14 @@
 import React from 'react';
 import { AppProps } from 'next/app';
+import axios from 'axios';
 import { UserProvider } from '../context/UserContex';
 import Header from '../components/Header';
 import '../styles/globals.css';
 
+// The API is on another origin: send its cookies (the read_primary_until pin
+// set after a write) with every axios request, as the fetch calls do
+axios.defaults.withCredentials = true;
+
 const MyApp: React.FC<AppProps> = ({ Component, pageProps }) => {
   return (
     <UserProvider>
@@ -25,6 +25,7 @@ const BandList: React.FC = () => {
     }
 
     fetch(`${process.env.NEXT_PUBLIC_API_BASE_URL}/auth/me`, {
+      credentials: 'include',
       method: 'GET',
       headers: {
         Authorization: `Bearer ${token}`,
@@ -50,7 +51,8 @@ const BandList: React.FC = () => {
   }, []);
 
   const fetchBands = (token: string) => {
-    fetch(`${process.env.NEXT_PUBLIC_API_BASE_URL}/bands`, {
+    fetch(`${process.env.NEXT_PUBLIC_API_BASE_URL}/bands?all=true`, {
+      credentials: 'include',
       method: 'GET',
       headers: {
         Authorization: `Bearer ${token}`,
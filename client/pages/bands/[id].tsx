@@ -31,7 +31,7 @@ const BandDetail: React.FC = () => {
   // Fetch band details
   const fetchBandDetails = async (bandId: string) => {
     try {
-      const response = await fetch(`${process.env.NEXT_PUBLIC_API_BASE_URL}/bands/${bandId}`);
+      const response = await fetch(`${process.env.NEXT_PUBLIC_API_BASE_URL}/bands/${bandId}`, { credentials: "include" });
       const data = await response.json();
       
       // Handle API errors
@@ -58,6 +58,7 @@ const BandDetail: React.FC = () => {
 
     try {
       const response = await fetch(`${process.env.NEXT_PUBLIC_API_BASE_URL}/bands/${band.id}`, {
+        credentials: "include",
         method: "DELETE",
         headers: {
           "Content-Type": "application/json",
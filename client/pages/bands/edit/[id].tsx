@@ -29,7 +29,7 @@ const EditBand: React.FC = () => {
 
   const fetchBandDetails = async (bandId: string) => {
     try {
-      const response = await fetch(`${process.env.NEXT_PUBLIC_API_BASE_URL}/bands/edit/${bandId}`); // Update URL structure
+      const response = await fetch(`${process.env.NEXT_PUBLIC_API_BASE_URL}/bands/edit/${bandId}`, { credentials: "include" }); // Update URL structure
       const data = await response.json();
       if (data.error) {
         setError(data.error); // Set the error if there's an issue with the data
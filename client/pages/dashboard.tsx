@@ -35,6 +35,7 @@ const Dashboard: React.FC = () => {
     }
 
     fetch(`${process.env.NEXT_PUBLIC_API_BASE_URL}/auth/me`, {
+      credentials: "include",
       method: "GET",
       headers: {
         Authorization: `Bearer ${token}`,
@@ -55,7 +56,8 @@ const Dashboard: React.FC = () => {
   }, []);
 
   const fetchUpcomingShows = (token: string) => {
-    fetch(`${process.env.NEXT_PUBLIC_API_BASE_URL}/shows`, {
+    fetch(`${process.env.NEXT_PUBLIC_API_BASE_URL}/shows?all=true`, {
+      credentials: "include",
       method: "GET",
       headers: {
         Authorization: `Bearer ${token}`,
@@ -74,6 +76,7 @@ const Dashboard: React.FC = () => {
 
   const fetchUsers = (token: string) => {
     fetch(`${process.env.NEXT_PUBLIC_API_BASE_URL}/auth/users`, {
+      credentials: "include",
       method: "GET",
       headers: {
         Authorization: `Bearer ${token}`,
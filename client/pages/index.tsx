@@ -159,7 +159,8 @@ const Index = () => {
   // const [currentIndex, setCurrentIndex] = useState(0);
 
   const fetchUpcomingShows = () => {
-    fetch(`${process.env.NEXT_PUBLIC_API_BASE_URL}/shows`, {
+    fetch(`${process.env.NEXT_PUBLIC_API_BASE_URL}/shows/upcoming?limit=200`, {
+      credentials: "include",
       method: "GET",
     })
       .then((response) => {
@@ -15,6 +15,7 @@ const Login = () => {
 
     try {
       const response = await fetch(`${process.env.NEXT_PUBLIC_API_BASE_URL}/auth/signin`, {
+        credentials: 'include',
         method: 'POST',
         headers: {
           'Content-Type': 'application/json',
@@ -5,6 +5,12 @@ import Modal from '../../components/Modal';
 import Image from 'next/image';
 import Link from "next/link";
 
+interface Band {
+  id: number;
+  bandname: string;
+  membernames: string[];
+}
+
 interface Show {
   id: number;
   showdate: string;
@@ -15,6 +21,7 @@ interface Show {
   bandPhoto: string;
   ticketprice: number;
   tourposter: string;
+  bands: Band[];
 }
 
 const ShowDetail: React.FC = () => {
@@ -32,7 +39,8 @@ const ShowDetail: React.FC = () => {
 
   const fetchShowDetails = async (showId: string) => {
     try {
-      const response = await fetch(`${process.env.NEXT_PUBLIC_API_BASE_URL}/shows/${showId}`);
+      // The lineup's band objects come embedded, so no separate /bands request
+      const response = await fetch(`${process.env.NEXT_PUBLIC_API_BASE_URL}/shows/${showId}?include=bands`, { credentials: "include" });
       const data = await response.json();
       if (data.error) {
         setError(data.error);
@@ -113,12 +121,15 @@ const ShowDetail: React.FC = () => {
 
           {/* Band Members */}
           <div className={style.bandList}>
-            {show.bandsplaying.map((band, index) => (
-              <div key={index} className={style.bandItem}>
-                <h3 className={style.bandname}>{band}</h3>
-                <p className={style.bandmembers}>Band Members Placeholder</p>
-              </div>
-            ))}
+            {show.bandsplaying.map((band, index) => {
+              const details = show.bands.find((b) => b.bandname === band);
+              return (
+                <div key={index} className={style.bandItem}>
+                  <h3 className={style.bandname}>{band}</h3>
+                  <p className={style.bandmembers}>{details ? details.membernames.join(', ') : ''}</p>
+                </div>
+              );
+            })}
           </div>
 
           {/* Actions */}
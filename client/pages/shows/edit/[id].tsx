@@ -60,8 +60,8 @@ const ShowEdit: React.FC = () => {
     const fetchVenuesAndBands = async () => {
       try {
         const [venuesResponse, bandsResponse] = await Promise.all([
-          axios.get(`${process.env.NEXT_PUBLIC_API_BASE_URL}/venues`),
-          axios.get(`${process.env.NEXT_PUBLIC_API_BASE_URL}/bands`),
+          axios.get(`${process.env.NEXT_PUBLIC_API_BASE_URL}/venues?all=true`),
+          axios.get(`${process.env.NEXT_PUBLIC_API_BASE_URL}/bands?all=true`),
         ]);
         setVenues(venuesResponse.data.venues);
         setBands(bandsResponse.data.bands);
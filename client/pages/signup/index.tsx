@@ -16,6 +16,7 @@ const Signup = () => {
 
     try {
       const response = await fetch(`${process.env.NEXT_PUBLIC_API_BASE_URL}/auth/signup`, {
+        credentials: "include",
         method: "POST",
         headers: {
           "Content-Type": "application/json",
@@ -20,6 +20,7 @@ const VenueList: React.FC = () => {
     // Check if the token exists and fetch user info
     if (token) {
       fetch(`${process.env.NEXT_PUBLIC_API_BASE_URL}/auth/me`, {
+        credentials: 'include',
         method: 'GET',
         headers: {
           Authorization: `Bearer ${token}`,
@@ -43,7 +44,8 @@ const VenueList: React.FC = () => {
   }, []);
 
   const fetchVenues = (token: string | null) => {
-    fetch(`${process.env.NEXT_PUBLIC_API_BASE_URL}/venues`, {
+    fetch(`${process.env.NEXT_PUBLIC_API_BASE_URL}/venues?all=true`, {
+      credentials: 'include',
       method: 'GET',
       headers: {
         Authorization: token ? `Bearer ${token}` : '',
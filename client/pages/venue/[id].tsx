@@ -41,12 +41,16 @@ const VenueDetail: React.FC = () => {
 
   const fetchVenueDetails = async (venueId: string) => {
     try {
-      const response = await fetch(`${process.env.NEXT_PUBLIC_API_BASE_URL}/venues/${venueId}`);
+      const response = await fetch(`${process.env.NEXT_PUBLIC_API_BASE_URL}/venues/${venueId}`, { credentials: "include" });
       const data = await response.json();
       if (data.error) {
         setError(data.error);
       } else {
-        setVenue(data.venue); // Assuming the venue object includes events
+        // Upcoming shows come from the venue's calendar endpoint
+        const today = new Date().toISOString().slice(0, 10);
+        const showsResponse = await fetch(`${process.env.NEXT_PUBLIC_API_BASE_URL}/venues/${venueId}/shows?from=${today}`, { credentials: "include" });
+        const showsData = await showsResponse.json();
+        setVenue({ ...data.venue, events: showsData.shows || [] });
       }
     } catch {
       setError('Error fetching venue details');
@@ -1,32 +1,93 @@
-from flask import Flask
-from dotenv import load_dotenv
-from auth_blueprint import authentication_blueprint
-from venuemanager_blueprint import venuemanager_blueprint
-from shows_blueprint import shows_blueprint
-from venues_blueprint import venues_blueprint
-from bands_blueprint import bands_blueprint
-from flask_cors import CORS
+import importlib
 import os
 
-load_dotenv()
+from flask import Flask
 
-app = Flask(__name__)
+# Blueprints as "module:attribute", imported by create_app() rather than when
+# this module is, so tools that only need the app's helpers don't load them all
+BLUEPRINTS = (
+    "auth_blueprint:authentication_blueprint",
+    "venuemanager_blueprint:venuemanager_blueprint",
+    "shows_blueprint:shows_blueprint",
+    "venues_blueprint:venues_blueprint",
+    "bands_blueprint:bands_blueprint",
+    "bulk_blueprint:bulk_blueprint",
+    "metrics_blueprint:metrics_blueprint",
+    "search_blueprint:search_blueprint",
+    "tickets_blueprint:tickets_blueprint",
+    "reports_blueprint:reports_blueprint",
+)
 
-# Allow only specific origins to access the API
-CORS(app, origins=[
-    "http://localhost:3000", 
+# Origins allowed to call the API from a browser; CORS_ORIGINS (comma-separated) overrides them
+DEFAULT_CORS_ORIGINS = (
+    "http://localhost:3000",
     "https://gideon-rogue-productions.vercel.app",
     "https://gideon-rogue-productions-4okewasbx-jason-harrels-projects.vercel.app",
-    ])
+)
+
+# Response headers the client may read: ETag for conditional requests,
+# Server-Timing for the timings from instrumentation.py
+CORS_EXPOSE_HEADERS = ("ETag", "Server-Timing", "Retry-After")
+
+
+def cors_origins():
+    configured = os.getenv('CORS_ORIGINS')
+    if configured:
+        return [origin.strip() for origin in configured.split(',') if origin.strip()]
+    return list(DEFAULT_CORS_ORIGINS)
+
+
+def create_app():
+    """Build the Flask app: settings, JSON encoding, instrumentation, CORS and blueprints."""
+    # .env first, so every module imported below sees its settings at import time
+    from dotenv import load_dotenv
+    load_dotenv()
+
+    from flask_cors import CORS
+    from auth_middleware import configure_tokens
+    from db_helpers import init_read_routing
+    from instrumentation import init_instrumentation
+    from json_provider import CatalogJSONProvider
+
+    # Read the JWT secret and algorithm once for the life of the process
+    configure_tokens()
+
+    app = Flask(__name__)
+
+    # Encode responses with orjson when it is installed (stdlib json otherwise)
+    app.json = CatalogJSONProvider(app)
+
+    # Request timing, SQL timing, Server-Timing headers and JSON logs
+    init_instrumentation(app)
+
+    # Reads on replicas (DATABASE_REPLICA_URLS), pinned to the primary after a client's writes
+    init_read_routing(app)
+
+    # The one CORS policy for every route
+    CORS(app, origins=cors_origins(), supports_credentials=True, expose_headers=list(CORS_EXPOSE_HEADERS))
+
+    # Register blueprints for various routes
+    for path in BLUEPRINTS:
+        module_name, attribute = path.split(':')
+        app.register_blueprint(getattr(importlib.import_module(module_name), attribute))
+
+    return app
+
+
+_app = None
+
+
+def __getattr__(name):
+    # `gunicorn app:app` and `from app import app` build the app on first access
+    global _app
+    if name == 'app':
+        if _app is None:
+            _app = create_app()
+        return _app
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
 
-# Register blueprints for various routes
-app.register_blueprint(authentication_blueprint)
-app.register_blueprint(venuemanager_blueprint)
-app.register_blueprint(shows_blueprint)
-app.register_blueprint(venues_blueprint)
-app.register_blueprint(bands_blueprint)
 
 if __name__ == "__main__":
     # Use the PORT environment variable from Render, or default to 5000
     port = int(os.environ.get("PORT", 10000))
-    app.run(host="0.0.0.0", port=port)
\ No newline at end of file
+    create_app().run(host="0.0.0.0", port=port)
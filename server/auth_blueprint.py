@@ -1,23 +1,32 @@
-import os
+import logging
+
 import jwt
-import bcrypt
 import psycopg2
 import psycopg2.extras
-from flask import Blueprint, jsonify, request
-from db_helpers import get_db_connection
-from flask_cors import CORS
+from flask import Blueprint, jsonify, request, g
+from db_helpers import db_connection
+from auth_middleware import bearer_token, encode_token, verify_token, token_required
+from password_hashing import HashingBusy, check_password, hash_password, hashing_stats, needs_rehash
+from prepared import statements
+
+logger = logging.getLogger(__name__)
 
 authentication_blueprint = Blueprint('authentication_blueprint', __name__)
 
-# Enable CORS for this blueprint
-CORS(authentication_blueprint, origins=["http://localhost:3000"], supports_credentials=True)
+USER_BY_USERNAME = statements.declare('user_by_username', "SELECT id, username, password, role FROM users WHERE username = %s")
+USER_BY_ID = statements.declare('user_by_id', "SELECT id, username, role FROM users WHERE id = %s")
 
 # --- Helper Function to Fetch User by Username ---
 def get_user_by_username(cursor, username):
     """Fetch a user from the database by username."""
-    cursor.execute("SELECT id, username, password, role FROM users WHERE username = %s;", (username,))
+    statements.execute(cursor, USER_BY_USERNAME, (username,))
     return cursor.fetchone()
 
+def hashing_busy(error):
+    response = jsonify({"error": "Too many sign-in attempts right now, please retry shortly"})
+    response.headers['Retry-After'] = str(error.retry_after)
+    return response, 503
+
 # --- Route: Signup ---
 @authentication_blueprint.route('/auth/signup', methods=['POST'])
 def signup():
@@ -28,50 +37,64 @@ def signup():
         if not new_user_data or not new_user_data.get("username") or not new_user_data.get("password"):
             return jsonify({"error": "Missing username or password"}), 400
         
-        connection = get_db_connection()
-        cursor = connection.cursor(cursor_factory=psycopg2.extras.RealDictCursor)
+        with db_connection() as connection:
+            cursor = connection.cursor(cursor_factory=psycopg2.extras.RealDictCursor)
         
-        # Check if username is taken
-        existing_user = get_user_by_username(cursor, new_user_data["username"])
-        if existing_user:
-            return jsonify({"error": "Username already taken"}), 400
+            # Check if username is taken
+            existing_user = get_user_by_username(cursor, new_user_data["username"])
+            if existing_user:
+                return jsonify({"error": "Username already taken"}), 400
         
-        # Hash password
-        hashed_password = bcrypt.hashpw(new_user_data["password"].encode('utf-8'), bcrypt.gensalt()).decode('utf-8')
+        # Hash password (outside the connection block so bcrypt doesn't hold a pooled connection)
+        hashed_password = hash_password(new_user_data["password"])
         
         # Assign role (default to 'staff' if not provided or invalid)
         role = new_user_data.get("role", "staff")
         if role not in ["admin", "staff"]:
             role = "staff"
         
-        # Insert new user
-        cursor.execute("""
-            INSERT INTO users (username, password, role)
-            VALUES (%s, %s, %s)
-            RETURNING id, username, role;
-        """, (new_user_data["username"], hashed_password, role))
+        with db_connection() as connection:
+            cursor = connection.cursor(cursor_factory=psycopg2.extras.RealDictCursor)
+
+            # Insert new user
+            cursor.execute("""
+                INSERT INTO users (username, password, role)
+                VALUES (%s, %s, %s)
+                RETURNING id, username, role;
+            """, (new_user_data["username"], hashed_password, role))
         
-        created_user = cursor.fetchone()
-        connection.commit()
+            created_user = cursor.fetchone()
+            connection.commit()
         
         # Exclude password from response
         created_user.pop('password', None)
         
         # Generate JWT token
-        token = jwt.encode({
+        token = encode_token({
             "id": created_user["id"],
             "username": created_user["username"],
             "role": created_user["role"]
-        }, os.getenv('JWT_SECRET'), algorithm="HS256")
+        })
         
         return jsonify({"token": token, "user": created_user}), 201
 
+    except HashingBusy as error:
+        return hashing_busy(error)
     except Exception as error:
-        print(f"Signup Error: {error}")
+        logger.exception("Signup Error: %s", error)
         return jsonify({"error": "Internal server error"}), 500
-    finally:
-        if 'connection' in locals():
-            connection.close()
+
+def rehash_password(user_id, password):
+    """Best effort: a busy queue or a failed update just leaves the old hash
+    in place until the next sign-in."""
+    try:
+        new_hash = hash_password(password)
+        with db_connection() as connection:
+            cursor = connection.cursor()
+            cursor.execute("UPDATE users SET password = %s WHERE id = %s;", (new_hash, user_id))
+            connection.commit()
+    except Exception as error:
+        logger.warning("Password Rehash Error: %s", error, exc_info=True)
 
 # --- Route: Signin ---
 @authentication_blueprint.route('/auth/signin', methods=['POST'])
@@ -83,40 +106,41 @@ def signin():
         if not sign_in_form_data or not sign_in_form_data.get("username") or not sign_in_form_data.get("password"):
             return jsonify({"error": "Missing username or password"}), 400
         
-        connection = get_db_connection()
-        cursor = connection.cursor(cursor_factory=psycopg2.extras.RealDictCursor)
+        with db_connection() as connection:
+            cursor = connection.cursor(cursor_factory=psycopg2.extras.RealDictCursor)
         
-        # Fetch user by username
-        existing_user = get_user_by_username(cursor, sign_in_form_data["username"])
+            # Fetch user by username
+            existing_user = get_user_by_username(cursor, sign_in_form_data["username"])
+
         if not existing_user:
             return jsonify({"error": "Invalid credentials"}), 401
         
         # Verify password
-        password_is_valid = bcrypt.checkpw(
-            sign_in_form_data["password"].encode('utf-8'), 
-            existing_user["password"].encode('utf-8')
-        )
+        password_is_valid = check_password(sign_in_form_data["password"], existing_user["password"])
         if not password_is_valid:
             return jsonify({"error": "Invalid credentials"}), 401
+
+        # Upgrade the stored hash if BCRYPT_ROUNDS changed since it was created
+        if needs_rehash(existing_user["password"]):
+            rehash_password(existing_user["id"], sign_in_form_data["password"])
         
         # Generate JWT token
-        token = jwt.encode({
+        token = encode_token({
             "id": existing_user["id"],
             "username": existing_user["username"],
             "role": existing_user["role"]
-        }, os.getenv('JWT_SECRET'), algorithm="HS256")
+        })
         
         # Exclude password from response
         existing_user.pop("password", None)
         
         return jsonify({"token": token, "user": existing_user}), 200
 
+    except HashingBusy as error:
+        return hashing_busy(error)
     except Exception as error:
-        print(f"Signin Error: {error}")
+        logger.exception("Signin Error: %s", error)
         return jsonify({"error": "Internal server error"}), 500
-    finally:
-        if 'connection' in locals():
-            connection.close()
 
 # --- Route: Get Current User ---
 @authentication_blueprint.route('/auth/me', methods=['GET'])
@@ -126,16 +150,14 @@ def get_current_user():
         return jsonify({"error": "Unauthorized"}), 401
     
     try:
-        token = token.split(" ")[1]
-        decoded_token = jwt.decode(token, os.getenv('JWT_SECRET'), algorithms=["HS256"])
+        decoded_token = verify_token(bearer_token(token))
         
-        connection = get_db_connection()
-        cursor = connection.cursor(cursor_factory=psycopg2.extras.RealDictCursor)
+        with db_connection(readonly=True) as connection:
+            cursor = connection.cursor(cursor_factory=psycopg2.extras.RealDictCursor)
         
-        # Fetch user by ID
-        cursor.execute("SELECT id, username, role FROM users WHERE id = %s;", (decoded_token["id"],))
-        user = cursor.fetchone()
-        connection.close()
+            # Fetch user by ID
+            statements.execute(cursor, USER_BY_ID, (decoded_token["id"],))
+            user = cursor.fetchone()
         
         if user:
             return jsonify(user), 200
@@ -146,7 +168,7 @@ def get_current_user():
     except jwt.InvalidTokenError:
         return jsonify({"error": "Invalid token"}), 401
     except Exception as error:
-        print(f"Get Current User Error: {error}")
+        logger.exception("Get Current User Error: %s", error)
         return jsonify({"error": "Internal server error"}), 500
 
 # --- Route: Get All Users (Admin Only) ---
@@ -158,19 +180,17 @@ def get_all_users():
 
     try:
         # Decode and validate the JWT token
-        token = token.split(" ")[1]
-        decoded_token = jwt.decode(token, os.getenv('JWT_SECRET'), algorithms=["HS256"])
+        decoded_token = verify_token(bearer_token(token))
 
         # Check if the user is an admin
         if decoded_token.get("role") != "admin":
             return jsonify({"error": "Access denied. Admins only."}), 403
 
         # Fetch all users from the database
-        connection = get_db_connection()
-        cursor = connection.cursor(cursor_factory=psycopg2.extras.RealDictCursor)
-        cursor.execute("SELECT id, username, role FROM users;")
-        users = cursor.fetchall()
-        connection.close()
+        with db_connection() as connection:
+            cursor = connection.cursor(cursor_factory=psycopg2.extras.RealDictCursor)
+            cursor.execute("SELECT id, username, role FROM users;")
+            users = cursor.fetchall()
 
         return jsonify(users), 200
 
@@ -179,6 +199,13 @@ def get_all_users():
     except jwt.InvalidTokenError:
         return jsonify({"error": "Invalid token"}), 401
     except Exception as error:
-        print(f"Get All Users Error: {error}")
+        logger.exception("Get All Users Error: %s", error)
         return jsonify({"error": "Internal server error"}), 500
 
+# --- Route: Password Hashing Stats (Admin Only) ---
+@authentication_blueprint.route('/auth/hashing/stats', methods=['GET'])
+@token_required
+def get_hashing_stats():
+    if g.user.get("role") != "admin":
+        return jsonify({"error": "Access denied. Admins only."}), 403
+    return jsonify(hashing_stats()), 200
@@ -1,8 +1,108 @@
 from functools import wraps
 from flask import request, jsonify, g
+import hashlib
+import threading
+import time
+from collections import OrderedDict
 import jwt
 import os
 
+# Secret and algorithm are read once, by configure_tokens() at startup (or
+# lazily on first use), instead of on every request.
+_token_settings = {"secret": None, "algorithm": "HS256"}
+
+
+def configure_tokens(secret=None, algorithm=None):
+    _token_settings["secret"] = secret if secret is not None else os.getenv('JWT_SECRET')
+    _token_settings["algorithm"] = algorithm or os.getenv('JWT_ALGORITHM', 'HS256')
+    token_cache.clear()
+
+
+def _secret():
+    if _token_settings["secret"] is None:
+        configure_tokens()
+    return _token_settings["secret"]
+
+
+class TokenCache:
+    """Bounded LRU of tokens whose signature has already been verified.
+
+    Keyed by a SHA-256 digest of the token so raw tokens are not kept in
+    memory. Entries never outlive the token's ``exp`` claim, and tokens
+    without one are re-verified at least every ``max_age`` seconds.
+    """
+
+    def __init__(self, max_entries=1024, max_age=300):
+        self.max_entries = max_entries
+        self.max_age = max_age
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    def get(self, digest):
+        now = time.time()
+        with self._lock:
+            entry = self._entries.get(digest)
+            if entry is None:
+                self.misses += 1
+                return None
+            claims, cache_until = entry
+            if now >= cache_until:
+                del self._entries[digest]
+                self.misses += 1
+                if 'exp' in claims and now >= claims['exp']:
+                    raise jwt.ExpiredSignatureError("Signature has expired")
+                return None
+            self._entries.move_to_end(digest)
+            self.hits += 1
+            return claims
+
+    def put(self, digest, claims):
+        cache_until = time.time() + self.max_age
+        if isinstance(claims.get('exp'), (int, float)):
+            cache_until = min(cache_until, claims['exp'])
+        with self._lock:
+            self._entries[digest] = (claims, cache_until)
+            self._entries.move_to_end(digest)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+
+    def stats(self):
+        return {"size": len(self._entries), "hits": self.hits, "misses": self.misses}
+
+
+token_cache = TokenCache(
+    max_entries=int(os.getenv('TOKEN_CACHE_SIZE', 1024)),
+    max_age=float(os.getenv('TOKEN_CACHE_MAX_AGE', 300)),
+)
+
+
+def verify_token(token):
+    """Return the claims of a valid token, raising jwt.InvalidTokenError (or
+    ExpiredSignatureError) otherwise. Repeat tokens skip signature checks."""
+    digest = hashlib.sha256(token.encode('utf-8')).digest()
+    claims = token_cache.get(digest)
+    if claims is None:
+        claims = jwt.decode(token, _secret(), algorithms=[_token_settings["algorithm"]])
+        token_cache.put(digest, claims)
+    # Hand out a copy so a handler can't alter the cached claims
+    return dict(claims)
+
+
+def encode_token(payload):
+    return jwt.encode(payload, _secret(), algorithm=_token_settings["algorithm"])
+
+
+def bearer_token(authorization_header):
+    """Extract the token from a "Bearer <token>" header."""
+    return authorization_header.split(' ')[1]
+
+
 def token_required(f):
     @wraps(f)
     def decorated_function(*args, **kwargs):
@@ -10,17 +110,17 @@ def token_required(f):
         authorization_header = request.headers.get('Authorization')
         if authorization_header is None:
             return jsonify({"error": "Unauthorized - No token provided"}), 401
-        
+
         try:
             # Extract token from the header (bearer token format)
-            token = authorization_header.split(' ')[1]
-            
-            # Decode the token and verify its validity
-            token_data = jwt.decode(token, os.getenv('JWT_SECRET'), algorithms=["HS256"])
-            
+            token = bearer_token(authorization_header)
+
+            # Verify the token (cached after the first successful check)
+            token_data = verify_token(token)
+
             # Store decoded token data in g.user for later access in route handlers
             g.user = token_data
-            
+
         except jwt.ExpiredSignatureError:
             return jsonify({"error": "Unauthorized - Token has expired"}), 401
         except jwt.InvalidTokenError:
@@ -28,8 +128,23 @@ def token_required(f):
         except Exception as error:
             # For other exceptions, return a general error message
             return jsonify({"error": f"Unauthorized - {str(error)}"}), 401
-        
+
         # Continue to the route handler
         return f(*args, **kwargs)
-    
+
+    return decorated_function
+
+
+def admin_required(f):
+    """Refuse non-admins with a 403; goes under @token_required, which sets g.user.
+
+    Checked before any response cache below it, so a cached admin-only
+    response is never served to anyone else.
+    """
+    @wraps(f)
+    def decorated_function(*args, **kwargs):
+        if g.user.get("role") != "admin":
+            return jsonify({"error": "Access denied. Admins only."}), 403
+        return f(*args, **kwargs)
+
     return decorated_function
@@ -1,23 +1,73 @@
 from flask import Blueprint, jsonify, request, g
-from db_helpers import get_db_connection
+from itertools import chain
+from db_helpers import db_connection
+from data_access import BAND_COLUMNS, BandListRecord, BandRecord, ShowListRecord, fetch_record, fetch_records, select_from, stream_records
 import psycopg2, psycopg2.extras
 from auth_middleware import token_required
+from cache import response_cache
+from conditional import conditional
+from json_provider import stream_json_list
+from pagination import PaginationError, filtered_query, paginate_query, split_page, wants_full_listing
+from shows_blueprint import paginated_shows, show_cache_namespaces, show_date_filters
+from upcoming import UPCOMING_LINKS, refresh_upcoming, upcoming_show_ids
+from guarded_writes import guarded_write, set_clause
+from prepared import statements
 
 bands_blueprint = Blueprint('bands_blueprint', __name__)
 
+BAND_ORDER_COLUMNS = {'bandname': str, 'id': int}
+
+BAND_BY_ID = statements.declare('band_by_id', select_from(BandRecord, "bands") + " WHERE id = %s")
+BAND_EXISTS = statements.declare('band_exists', "SELECT 1 FROM bands WHERE id = %s")
+
+# What PUT /bands/<id> may change
+BAND_UPDATE_COLUMNS = ('bandname', 'hometown', 'genre', 'yearstarted', 'membernames', 'bandphoto', 'banddescription')
+
+
+def band_filters(args):
+    conditions = []
+    params = []
+    if args.get('genre'):
+        conditions.append("genre = %s")
+        params.append(args['genre'])
+    if args.get('hometown'):
+        conditions.append("hometown = %s")
+        params.append(args['hometown'])
+    return conditions, params
+
+
 # GET route to fetch all bands
+# Paginated by default (?limit=&after=); ?all=true returns the legacy full listing
 @bands_blueprint.route('/bands', methods=['GET'])
+@conditional('bands')
+@response_cache.cached('bands')
 def bands_index():
     try:
-        connection = get_db_connection()
-        cursor = connection.cursor(cursor_factory=psycopg2.extras.RealDictCursor)
-
-        cursor.execute("SELECT * FROM bands ORDER BY bandname")
-        bands = cursor.fetchall()
-
-        connection.close()
-        return jsonify({"bands": bands}), 200
-
+        conditions, params = band_filters(request.args)
+
+        if wants_full_listing(request.args):
+            # Stream the full listing from a server-side cursor so memory stays flat
+            batches = stream_records(
+                filtered_query(select_from(BandListRecord, "bands"), conditions, "bandname"), params,
+                BandListRecord, readonly=True
+            )
+            first_batch = next(batches, None)
+            return stream_json_list("bands", chain([first_batch], batches) if first_batch else [])
+
+        with db_connection(readonly=True) as connection:
+            cursor = connection.cursor()
+
+            query, params, limit = paginate_query(select_from(BandListRecord, "bands"), conditions, params, BAND_ORDER_COLUMNS, request.args)
+            cursor.execute(query, params)
+            bands, next_cursor = split_page(
+                fetch_records(cursor, BandListRecord), limit,
+                lambda band: (band['bandname'], band['id'])
+            )
+
+        return jsonify({"bands": bands, "next_cursor": next_cursor}), 200
+
+    except PaginationError as error:
+        return jsonify({"error": str(error)}), 400
     except Exception as error:
         return jsonify({"error": str(error)}), 500
 
@@ -30,26 +80,29 @@ def create_band():
         new_band = request.json
 
         # Include 'banddescription' in the INSERT statement
-        connection = get_db_connection()
-        cursor = connection.cursor(cursor_factory=psycopg2.extras.DictCursor)
-
-        cursor.execute("""
-            INSERT INTO bands (bandname, hometown, genre, yearstarted, membernames, bandphoto, banddescription)
-            VALUES (%s, %s, %s, %s, %s, %s, %s)
-            RETURNING *
-        """, (
-            new_band['bandname'], 
-            new_band['hometown'], 
-            new_band['genre'], 
-            new_band['yearstarted'], 
-            new_band['membernames'],
-            new_band['bandphoto'],  
-            new_band['banddescription']  # Add the description to the insert query
-        ))
-
-        created_band = cursor.fetchone()
-        connection.commit()
-        connection.close()
+        with db_connection() as connection:
+            cursor = connection.cursor(cursor_factory=psycopg2.extras.DictCursor)
+
+            cursor.execute(f"""
+                INSERT INTO bands (bandname, hometown, genre, yearstarted, membernames, bandphoto, banddescription)
+                VALUES (%s, %s, %s, %s, %s, %s, %s)
+                RETURNING {BAND_COLUMNS}
+            """, (
+                new_band['bandname'], 
+                new_band['hometown'], 
+                new_band['genre'], 
+                new_band['yearstarted'], 
+                new_band['membernames'],
+                new_band['bandphoto'],  
+                new_band['banddescription']  # Add the description to the insert query
+            ))
+
+            created_band = cursor.fetchone()
+            # The 003 trigger links the new band to shows that already name it
+            refresh_upcoming(connection, upcoming_show_ids(connection, 'bands', [created_band['id']]))
+            connection.commit()
+
+        response_cache.invalidate('bands')
 
         return jsonify({"band": created_band}), 201
     except Exception as error:
@@ -59,18 +112,16 @@ def create_band():
 
 # GET route to fetch a single band by its ID
 @bands_blueprint.route('/bands/<band_id>', methods=['GET'])
+@conditional('bands', id_arg='band_id')
+@response_cache.cached('band:{band_id}')
 def band_show(band_id):
     try:
-        connection = get_db_connection()
-        cursor = connection.cursor(cursor_factory=psycopg2.extras.RealDictCursor)
-
-        cursor.execute("""
-            SELECT * FROM bands WHERE id = %s
-        """, (band_id,))
+        with db_connection(readonly=True) as connection:
+            cursor = connection.cursor()
 
-        band = cursor.fetchone()
+            statements.execute(cursor, BAND_BY_ID, (band_id,))
 
-        connection.close()
+            band = fetch_record(cursor, BandRecord)
 
         if band:
             return jsonify({"band": band}), 200
@@ -80,48 +131,75 @@ def band_show(band_id):
         return jsonify({"error": str(error)}), 500
 
 
-# PUT route to update a band
-@bands_blueprint.route('/bands/<band_id>', methods=['PUT'])
-@token_required
-def update_band(band_id):
+# GET route to fetch a band's shows, in date order
+# Index lookup through show_bands; paginated like /shows, with optional ?from=/?to=
+@bands_blueprint.route('/bands/<band_id>/shows', methods=['GET'])
+@response_cache.cached('shows')
+def band_shows(band_id):
     try:
-        updated_band_data = request.json  # Get the data from the request body
-        connection = get_db_connection()
-        cursor = connection.cursor(cursor_factory=psycopg2.extras.DictCursor)
+        conditions, params = show_date_filters(request.args)
+        conditions.insert(0, "show_bands.band_id = %s")
+        params.insert(0, band_id)
 
-        # Check if the band exists
-        cursor.execute("SELECT * FROM bands WHERE id = %s", (band_id,))
-        band_to_update = cursor.fetchone()
+        shows, next_cursor = paginated_shows(
+            select_from(ShowListRecord, "shows JOIN show_bands ON show_bands.show_id = shows.id"), conditions, params
+        )
 
-        if band_to_update is None:
+        if not shows and not band_exists(band_id):
             return jsonify({"error": "Band not found"}), 404
 
-        # Check if the current user has the 'admin' role
-        if g.user["role"] != "admin":
-            return jsonify({"error": "Unauthorized: Admin role required"}), 401
-
-        # Ensure that the updated fields are properly handled, using .get() to retain existing values if not provided
-        cursor.execute("""
-            UPDATE bands 
-            SET bandname = %s, hometown = %s, genre = %s, yearstarted = %s, 
-                membernames = %s, bandphoto = %s, banddescription = %s  -- Include banddescription in the update
-            WHERE id = %s
-            RETURNING *
-        """, (
-            updated_band_data.get('bandname', band_to_update['bandname']),
-            updated_band_data.get('hometown', band_to_update['hometown']),
-            updated_band_data.get('genre', band_to_update['genre']),
-            updated_band_data.get('yearstarted', band_to_update['yearstarted']),
-            updated_band_data.get('membernames', band_to_update['membernames']),
-            updated_band_data.get('bandphoto', band_to_update['bandphoto']),
-            updated_band_data.get('banddescription', band_to_update['banddescription']),  # Update description
-            band_id
-        ))
-
-        # Fetch the updated band details and commit the changes
-        updated_band = cursor.fetchone()
-        connection.commit()
-        connection.close()
+        return jsonify({"shows": shows, "next_cursor": next_cursor}), 200
+
+    except PaginationError as error:
+        return jsonify({"error": str(error)}), 400
+    except Exception as error:
+        return jsonify({"error": str(error)}), 500
+
+
+def band_exists(band_id):
+    with db_connection() as connection:
+        cursor = connection.cursor()
+        statements.execute(cursor, BAND_EXISTS, (band_id,))
+        return cursor.fetchone() is not None
+
+
+# PUT route to update a band
+# Only the fields sent are changed; the admin check is part of the UPDATE itself
+@bands_blueprint.route('/bands/<band_id>', methods=['PUT'])
+@token_required
+def update_band(band_id):
+    try:
+        assignments, params = set_clause(request.get_json(silent=True) or {}, BAND_UPDATE_COLUMNS)
+        if not assignments:
+            return jsonify({"error": f"Nothing to update (expected any of {', '.join(BAND_UPDATE_COLUMNS)})"}), 400
+
+        with db_connection() as connection:
+            cursor = connection.cursor()
+            found, updated_band, before = guarded_write(cursor, "bands", f"""
+                UPDATE bands SET {assignments}
+                WHERE id = %(id)s AND %(is_admin)s
+                RETURNING {BAND_COLUMNS}
+            """, {**params, 'id': band_id, 'is_admin': g.user["role"] == "admin"},
+                before={'bandname': "SELECT bandname FROM target"})
+
+            if updated_band is None:
+                connection.rollback()
+                if not found:
+                    return jsonify({"error": "Band not found"}), 404
+                return jsonify({"error": "Unauthorized: Admin role required"}), 401
+
+            # A rename rewrites bandsplaying on this band's shows (see migrations/003)
+            renamed_show_ids = []
+            if 'bandname' in params and params['bandname'] != before['bandname']:
+                cursor.execute("SELECT show_id FROM show_bands WHERE band_id = %s", (band_id,))
+                renamed_show_ids = [row[0] for row in cursor.fetchall()]
+
+            refresh_upcoming(connection, upcoming_show_ids(connection, 'bands', [band_id]))
+            connection.commit()
+
+        response_cache.invalidate('bands', f'band:{band_id}')
+        if renamed_show_ids:
+            response_cache.invalidate(*show_cache_namespaces(renamed_show_ids))
 
         return jsonify({"band": updated_band}), 200
 
@@ -132,24 +210,32 @@ def update_band(band_id):
 
 
 # DELETE route to delete a band
+# Admins can delete any band, other users only their own
 @bands_blueprint.route('/bands/<band_id>', methods=['DELETE'])
 @token_required
 def delete_band(band_id):
     try:
-        connection = get_db_connection()
-        cursor = connection.cursor(cursor_factory=psycopg2.extras.RealDictCursor)
-        cursor.execute("SELECT * FROM bands WHERE id = %s", (band_id,))
-        band_to_delete = cursor.fetchone()
-        if band_to_delete is None:
-            return jsonify({"error": "Band not found"}), 404
-
-        # Check if the user is an admin or if they are the owner of the band
-        if g.user['role'] != 'admin' and band_to_delete["user_id"] != g.user["id"]:
-            return jsonify({"error": "Unauthorized"}), 401
-
-        cursor.execute("DELETE FROM bands WHERE id = %s", (band_id,))
-        connection.commit()
-        connection.close()
+        with db_connection() as connection:
+            cursor = connection.cursor()
+            # Its show_bands links cascade away, so its shows are read in the same statement
+            found, deleted_band, before = guarded_write(cursor, "bands", """
+                DELETE FROM bands
+                WHERE id = %(id)s AND (%(is_admin)s OR user_id = %(user_id)s)
+                RETURNING id
+            """, {'id': band_id, 'ids': [band_id], 'is_admin': g.user['role'] == 'admin', 'user_id': g.user['id']},
+                before={'lineup_show_ids': f"ARRAY({UPCOMING_LINKS['bands']})"})
+
+            if deleted_band is None:
+                connection.rollback()
+                if not found:
+                    return jsonify({"error": "Band not found"}), 404
+                return jsonify({"error": "Unauthorized"}), 401
+
+            refresh_upcoming(connection, before['lineup_show_ids'])
+            connection.commit()
+
+        # 'shows' also covers this band's calendar (/bands/<band_id>/shows)
+        response_cache.invalidate('bands', f'band:{band_id}', 'shows')
 
         return jsonify({"message": "Band deleted successfully"}), 200
     except Exception as error:
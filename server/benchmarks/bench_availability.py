@@ -0,0 +1,189 @@
+"""Benchmark: venue availability and double-booking checks at scale.
+
+Creates --venues venues with --years of history and future bookings (a show
+on about --density of the nights, starting 18:00-22:00), then times:
+  - GET /venues/<id>/availability's query (scheduling.fetch_availability)
+    for a 30-day and a 366-day window at random venues and dates, and the
+    plan it uses
+  - a show write that fits a free slot vs one that clashes, through the
+    exclusion constraint (the clash is the 409 path: failed INSERT,
+    rollback, then the conflict lookup)
+
+Run it with different --years/--venues to see the query cost follow the
+window, not the history. Creates its own venues and shows and deletes them
+afterwards; --embedded DIR runs it against a throwaway Postgres started
+with pgserver.
+
+Usage:
+    python benchmarks/bench_availability.py [--embedded DIR] [--venues 200] [--years 5] [--density 0.5]
+"""
+import argparse
+import os
+import random
+import statistics
+import sys
+import time
+import uuid
+from datetime import date, timedelta
+
+SERVER_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, SERVER_DIR)
+
+from benchmarks.suite.database import describe, start_embedded  # noqa: E402
+
+
+def percentile(samples, fraction):
+    samples = sorted(samples)
+    return samples[min(len(samples) - 1, int(len(samples) * fraction))]
+
+
+def create_schedule(connection, prefix, venues, years, density):
+    """Venues named ``prefix-N`` and their shows; returns (venue ids, first day, last day)."""
+    cursor = connection.cursor()
+    cursor.execute("""
+        INSERT INTO venues (capacity, venuename, location, venuemanager)
+        SELECT 500, %s || '-' || n, 'Benchmark City', 'bench' FROM generate_series(1, %s) AS n
+        RETURNING id
+    """, (prefix, venues))
+    venue_ids = [row[0] for row in cursor.fetchall()]
+    first = date.today() - timedelta(days=365 * years // 2)
+    last = first + timedelta(days=365 * years)
+    # The trigger derives venue_id from location and the slot from date and time
+    cursor.execute("""
+        INSERT INTO shows (showdate, showdescription, showtime, location, bandsplaying, ticketprice)
+        SELECT day::date, 'Availability benchmark', day + make_interval(hours => 18 + (random() * 3.5)::int),
+               venues.venuename, '{}', 20
+        FROM venues
+        CROSS JOIN generate_series(%s::date, %s::date, interval '1 day') AS day
+        WHERE venues.id = ANY(%s) AND random() < %s
+    """, (first, last, venue_ids, density))
+    cursor.execute("ANALYZE shows")
+    connection.commit()
+    return venue_ids, first, last
+
+
+def time_availability(connection, venue_ids, first, last, days, repeat, rng):
+    from scheduling import fetch_availability
+
+    cursor = connection.cursor()
+    samples = []
+    slots = 0
+    for _ in range(repeat):
+        start = first + timedelta(days=rng.randrange(max(1, (last - first).days - days)))
+        venue_id = rng.choice(venue_ids)
+        started = time.perf_counter()
+        free, booked = fetch_availability(cursor, venue_id, start, start + timedelta(days=days - 1))
+        samples.append((time.perf_counter() - started) * 1000)
+        slots += len(free) + len(booked)
+    connection.rollback()
+    return samples, slots / repeat
+
+
+def availability_plan(connection, venue_id, first):
+    from scheduling import VENUE_KEY
+
+    cursor = connection.cursor()
+    cursor.execute(f"""
+        EXPLAIN SELECT id FROM shows
+        WHERE {VENUE_KEY} AND slot && tsrange(%(start)s, %(end)s)
+    """, {'venue_id': venue_id, 'start': first, 'end': first + timedelta(days=30)})
+    plan = [row[0].strip() for row in cursor.fetchall()]
+    connection.rollback()
+    return next((line for line in plan if 'Index' in line), plan[0])
+
+
+def time_writes(connection, prefix, venue_ids, first, repeat, rng):
+    """Per-write ms for a show in a free slot (then deleted) and for a clashing one."""
+    import psycopg2
+    from scheduling import is_slot_conflict, slot_conflicts
+
+    cursor = connection.cursor()
+    cursor.execute("SELECT showdate, showtime, location FROM shows WHERE location LIKE %s || '-%%' LIMIT %s",
+                   (prefix, repeat))
+    taken = cursor.fetchall()
+    connection.rollback()
+
+    free_samples = []
+    for n in range(repeat):
+        venue_number = rng.randint(1, len(venue_ids))
+        showdate = first - timedelta(days=n + 1)  # before the history, so always free
+        started = time.perf_counter()
+        cursor.execute("""
+            INSERT INTO shows (showdate, showdescription, showtime, location, bandsplaying, ticketprice)
+            VALUES (%s, 'Availability benchmark', %s, %s, '{}', 20)
+            RETURNING id
+        """, (showdate, f"{showdate} 20:00:00", f"{prefix}-{venue_number}"))
+        cursor.fetchone()
+        connection.commit()
+        free_samples.append((time.perf_counter() - started) * 1000)
+
+    clash_samples = []
+    for showdate, showtime, location in taken:
+        started = time.perf_counter()
+        try:
+            cursor.execute("""
+                INSERT INTO shows (showdate, showdescription, showtime, location, bandsplaying, ticketprice)
+                VALUES (%s, 'Availability benchmark', %s, %s, '{}', 20)
+            """, (showdate, showtime, location))
+            raise SystemExit(f"{location} {showtime} was booked twice")
+        except psycopg2.IntegrityError as error:
+            if not is_slot_conflict(error):
+                raise
+            connection.rollback()
+            if not slot_conflicts(cursor, showdate, showtime, location):
+                raise SystemExit("clash without a conflicting show")
+            connection.rollback()
+        clash_samples.append((time.perf_counter() - started) * 1000)
+    return free_samples, clash_samples
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--embedded", metavar="DIR", help="start a throwaway Postgres in DIR (needs pgserver)")
+    parser.add_argument("--venues", type=int, default=200, help="venues to book")
+    parser.add_argument("--years", type=int, default=5, help="years of bookings per venue")
+    parser.add_argument("--density", type=float, default=0.5, help="share of nights with a show")
+    parser.add_argument("--repeat", type=int, default=500, help="queries / writes per measurement")
+    args = parser.parse_args()
+
+    if args.embedded:
+        server = start_embedded(args.embedded)  # noqa: F841 (kept alive for the run)
+
+    # Imported once the embedded database's settings are in the environment
+    from db_helpers import get_db_connection
+    from migrate import run_migrations
+
+    connection = get_db_connection()
+    run_migrations(connection)
+    rng = random.Random(1)
+    prefix = f"bench-availability-{uuid.uuid4().hex[:8]}"
+
+    started = time.perf_counter()
+    venue_ids, first, last = create_schedule(connection, prefix, args.venues, args.years, args.density)
+    cursor = connection.cursor()
+    cursor.execute("SELECT count(*) FROM shows WHERE venue_id = ANY(%s)", (venue_ids,))
+    booked = cursor.fetchone()[0]
+    connection.rollback()
+    print(f"database {describe()}: {args.venues} venues, {booked} shows over {args.years} years "
+          f"(created in {time.perf_counter() - started:.1f}s)")
+    print(f"plan: {availability_plan(connection, venue_ids[0], first)}")
+
+    try:
+        print(f"\n{'measurement':<24} {'p50 ms':>8} {'p95 ms':>8} {'p99 ms':>8}  notes")
+        for days in (30, 366):
+            samples, slots = time_availability(connection, venue_ids, first, last, days, args.repeat, rng)
+            print(f"{f'availability {days}d':<24} {statistics.median(samples):8.3f} {percentile(samples, 0.95):8.3f} "
+                  f"{percentile(samples, 0.99):8.3f}  {slots:.0f} free/booked ranges per answer")
+        free_samples, clash_samples = time_writes(connection, prefix, venue_ids, first, args.repeat, rng)
+        for label, samples in (("insert, free slot", free_samples), ("insert, clash (409)", clash_samples)):
+            print(f"{label:<24} {statistics.median(samples):8.3f} {percentile(samples, 0.95):8.3f} "
+                  f"{percentile(samples, 0.99):8.3f}")
+    finally:
+        cursor.execute("DELETE FROM shows WHERE location LIKE %s || '-%%'", (prefix,))
+        cursor.execute("DELETE FROM venues WHERE id = ANY(%s)", (venue_ids,))
+        connection.commit()
+        connection.close()
+
+
+if __name__ == "__main__":
+    main()
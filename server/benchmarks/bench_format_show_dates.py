@@ -0,0 +1,87 @@
+"""Micro-benchmark: legacy per-row format_show_dates vs the batched formatter.
+
+Usage: python benchmarks/bench_format_show_dates.py [rows ...]
+"""
+import os
+import random
+import sys
+import timeit
+from datetime import date, datetime, timedelta
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from show_formatting import format_shows_dates  # noqa: E402
+
+
+def legacy_format_show_dates(show):
+    """The per-row implementation shows_index used before the batched formatter."""
+    try:
+        if isinstance(show['showdate'], (datetime, date)):
+            show['showdate'] = show['showdate'].strftime('%Y-%m-%d')
+        else:
+            show['showdate'] = datetime.strptime(show['showdate'], '%a, %d %b %Y %H:%M:%S GMT').strftime('%Y-%m-%d')
+
+        if isinstance(show['showtime'], (datetime, date)):
+            show['showtime'] = show['showtime'].strftime('%H:%M:%S')
+        else:
+            show['showtime'] = datetime.strptime(show['showtime'], '%a, %d %b %Y %H:%M:%S GMT').strftime('%H:%M:%S')
+    except Exception as e:
+        print(f"Error formatting dates: {e}")
+        show['showdate'] = None
+        show['showtime'] = None
+    return show
+
+
+def make_rows(count, seed=7):
+    rng = random.Random(seed)
+    start = date(2015, 1, 1)
+    rows = []
+    for show_id in range(count):
+        showdate = start + timedelta(days=rng.randrange(4000))
+        showtime = datetime(1970, 1, 1, rng.randrange(17, 24), rng.choice((0, 15, 30, 45)))
+        if show_id % 50 == 0:
+            # Some rows arrive as RFC 1123 strings (a client echoing a show back)
+            showdate = datetime.combine(showdate, datetime.min.time()).strftime('%a, %d %b %Y %H:%M:%S GMT')
+        rows.append({
+            "id": show_id,
+            "showdate": showdate,
+            "showtime": showtime,
+            "location": "The Roxy",
+            "bandsplaying": ["Band A", "Band B"],
+        })
+    return rows
+
+
+def check_identical(count):
+    legacy = [legacy_format_show_dates(row) for row in make_rows(count)]
+    batched = format_shows_dates(make_rows(count))
+    assert repr(legacy) == repr(batched), "batched output differs from legacy output"
+
+
+def bench(count, repeat=5):
+    template = make_rows(count)
+
+    def run_legacy():
+        rows = [dict(row) for row in template]
+        [legacy_format_show_dates(row) for row in rows]
+
+    def run_batched():
+        rows = [dict(row) for row in template]
+        format_shows_dates(rows)
+
+    def run_copy_only():
+        [dict(row) for row in template]
+
+    baseline = min(timeit.repeat(run_copy_only, number=1, repeat=repeat))
+    legacy = min(timeit.repeat(run_legacy, number=1, repeat=repeat)) - baseline
+    batched = min(timeit.repeat(run_batched, number=1, repeat=repeat)) - baseline
+    return legacy, batched
+
+
+if __name__ == "__main__":
+    sizes = [int(arg) for arg in sys.argv[1:]] or [1_000, 10_000, 100_000]
+    check_identical(5_000)
+    print(f"{'rows':>8} {'legacy ms':>10} {'batched ms':>11} {'speedup':>8}")
+    for size in sizes:
+        legacy, batched = bench(size)
+        print(f"{size:>8} {legacy * 1000:>10.2f} {batched * 1000:>11.2f} {legacy / batched:>7.1f}x")
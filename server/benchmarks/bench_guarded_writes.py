@@ -0,0 +1,161 @@
+"""Benchmark: single-statement guarded updates vs the old read-then-write.
+
+Starts two writer threads per hot band row, each on its own connection: one
+edits only genre, the other only hometown, --writes times each. Runs the
+same workload twice:
+  - read-then-write: SELECT * the row, check the role in Python, then
+    UPDATE every column with the request's fields merged over the row read
+    (what update_band did before)
+  - guarded: one guarded_write() UPDATE of just the sent field, with the
+    role check in its WHERE clause
+and reports per-write latency, total throughput, round trips per write
+(commit included), and how many rows ended up with a stale field. Each
+writer's last value should be what the row ends with; read-then-write can
+overwrite the other writer's newer value with the one it read.
+
+Creates its own bands and deletes them afterwards; --embedded DIR runs it
+against a throwaway Postgres started with pgserver.
+
+Usage:
+    python benchmarks/bench_guarded_writes.py [--embedded DIR] [--rows 8] [--writes 200]
+"""
+import argparse
+import os
+import statistics
+import sys
+import threading
+import time
+import uuid
+
+SERVER_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, SERVER_DIR)
+
+from benchmarks.suite.database import describe, start_embedded  # noqa: E402
+
+
+def percentile(samples, fraction):
+    samples = sorted(samples)
+    return samples[min(len(samples) - 1, int(len(samples) * fraction))]
+
+
+def read_then_write(connection, band_id, data):
+    from data_access import BAND_COLUMNS
+
+    cursor = connection.cursor()
+    cursor.execute("SELECT bandname, hometown, genre, yearstarted, membernames, bandphoto, banddescription "
+                   "FROM bands WHERE id = %s", (band_id,))
+    current = cursor.fetchone()
+    if current is None:
+        raise SystemExit(f"band {band_id} vanished")
+    names = ('bandname', 'hometown', 'genre', 'yearstarted', 'membernames', 'bandphoto', 'banddescription')
+    merged = [data.get(name, value) for name, value in zip(names, current)]
+    cursor.execute(f"""
+        UPDATE bands
+        SET bandname = %s, hometown = %s, genre = %s, yearstarted = %s,
+            membernames = %s, bandphoto = %s, banddescription = %s
+        WHERE id = %s
+        RETURNING {BAND_COLUMNS}
+    """, (*merged, band_id))
+    cursor.fetchone()
+    connection.commit()
+
+
+def guarded(connection, band_id, data):
+    from bands_blueprint import BAND_UPDATE_COLUMNS
+    from data_access import BAND_COLUMNS
+    from guarded_writes import guarded_write, set_clause
+
+    assignments, params = set_clause(data, BAND_UPDATE_COLUMNS)
+    found, row, _before = guarded_write(connection.cursor(), "bands", f"""
+        UPDATE bands SET {assignments}
+        WHERE id = %(id)s AND %(is_admin)s
+        RETURNING {BAND_COLUMNS}
+    """, {**params, 'id': band_id, 'is_admin': True})
+    if row is None:
+        raise SystemExit(f"band {band_id} vanished")
+    connection.commit()
+
+
+def run(write, band_ids, writes):
+    """Run the two-writers-per-row workload; (latencies in ms, seconds, stale rows)."""
+    from db_helpers import get_db_connection
+
+    latencies = []
+    lock = threading.Lock()
+    barrier = threading.Barrier(2 * len(band_ids))
+
+    def writer(band_id, field):
+        connection = get_db_connection()
+        samples = []
+        barrier.wait()
+        for n in range(1, writes + 1):
+            started = time.perf_counter()
+            write(connection, band_id, {field: f"{n:06d}"})
+            samples.append((time.perf_counter() - started) * 1000)
+        connection.close()
+        with lock:
+            latencies.extend(samples)
+
+    threads = [threading.Thread(target=writer, args=(band_id, field))
+               for band_id in band_ids for field in ('genre', 'hometown')]
+    started = time.perf_counter()
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    elapsed = time.perf_counter() - started
+
+    connection = get_db_connection()
+    cursor = connection.cursor()
+    final = f"{writes:06d}"
+    cursor.execute("SELECT count(*) FROM bands WHERE id = ANY(%s) AND (genre <> %s OR hometown <> %s)",
+                   (band_ids, final, final))
+    stale = cursor.fetchone()[0]
+    connection.close()
+    return latencies, elapsed, stale
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--embedded", metavar="DIR", help="start a throwaway Postgres in DIR (needs pgserver)")
+    parser.add_argument("--rows", type=int, default=8, help="hot band rows (two writers each)")
+    parser.add_argument("--writes", type=int, default=200, help="updates per writer")
+    args = parser.parse_args()
+
+    if args.embedded:
+        server = start_embedded(args.embedded)  # noqa: F841 (kept alive for the run)
+
+    # Imported once the embedded database's settings are in the environment
+    from db_helpers import get_db_connection
+    from migrate import run_migrations
+
+    connection = get_db_connection()
+    run_migrations(connection)
+    cursor = connection.cursor()
+    prefix = f"bench-guarded-{uuid.uuid4().hex[:8]}"
+    cursor.execute("""
+        INSERT INTO bands (bandname, hometown, genre, yearstarted, membernames, bandphoto, banddescription)
+        SELECT %s || '-' || n, 'start', 'start', 2000, ARRAY['a', 'b'], '', 'benchmark band'
+        FROM generate_series(1, %s) AS n
+        RETURNING id
+    """, (prefix, args.rows))
+    band_ids = [row[0] for row in cursor.fetchall()]
+    connection.commit()
+
+    print(f"database {describe()}: {args.rows} rows, {2 * args.rows} writers, {args.writes} writes each")
+    print(f"\n{'mode':<16} {'trips':>5} {'p50 ms':>8} {'p95 ms':>8} {'p99 ms':>8} {'writes/s':>9} {'stale rows':>11}")
+    try:
+        for label, write, round_trips in (("read-then-write", read_then_write, 3), ("guarded", guarded, 2)):
+            cursor.execute("UPDATE bands SET genre = 'start', hometown = 'start' WHERE id = ANY(%s)", (band_ids,))
+            connection.commit()
+            latencies, elapsed, stale = run(write, band_ids, args.writes)
+            print(f"{label:<16} {round_trips:>5} {statistics.median(latencies):8.2f} {percentile(latencies, 0.95):8.2f} "
+                  f"{percentile(latencies, 0.99):8.2f} {len(latencies) / elapsed:9.0f} {stale:>6}/{args.rows}")
+    finally:
+        cursor.execute("DELETE FROM bands WHERE id = ANY(%s)", (band_ids,))
+        connection.commit()
+        connection.close()
+
+
+if __name__ == "__main__":
+    main()
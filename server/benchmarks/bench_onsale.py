@@ -0,0 +1,231 @@
+"""Benchmark: an on-sale rush against the ticket engine (tickets.py).
+
+Puts one show's tickets on sale (--capacity seats) and starts --buyers
+threads, each on its own connection, that hold 1..--max-quantity seats and
+then buy (--purchase), release (--release) or abandon the hold and let it
+lapse after --ttl seconds. A sweeper thread runs release_expired() a few
+times a second, as the scheduled command would. A buyer that gets a 409
+waits a moment and tries again, until every seat is sold or --duration
+passes.
+
+Runs the rush twice: with the engine's FOR UPDATE SKIP LOCKED, and with a
+plain FOR UPDATE, where buyers queue on the lowest open seats. Reports hold
+latency, holds per second and the time to sell out, then checks the books:
+no more seats sold than the venue holds, every sold seat belongs to exactly
+one purchased hold, and purchased quantities add up to the seats sold.
+
+Creates its own user, venue and show and deletes them afterwards;
+--embedded DIR runs it against a throwaway Postgres started with pgserver.
+
+Usage:
+    python benchmarks/bench_onsale.py [--embedded DIR] [--capacity 2000] [--buyers 64] [--ttl 2]
+"""
+import argparse
+import os
+import random
+import statistics
+import sys
+import threading
+import time
+import uuid
+
+SERVER_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, SERVER_DIR)
+
+from benchmarks.suite.database import describe, start_embedded  # noqa: E402
+
+LOCK_CLAUSES = (("skip locked", "FOR UPDATE SKIP LOCKED"), ("for update", "FOR UPDATE"))
+
+
+def percentile(samples, fraction):
+    samples = sorted(samples)
+    return samples[min(len(samples) - 1, int(len(samples) * fraction))]
+
+
+def create_show(connection, capacity):
+    """A user, a venue of ``capacity`` seats and a show there; returns (user_id, venue_id, show_id)."""
+    cursor = connection.cursor()
+    name = f"bench-onsale-{uuid.uuid4().hex[:8]}"
+    cursor.execute("INSERT INTO users (username, password) VALUES (%s, '') RETURNING id", (name,))
+    user_id = cursor.fetchone()[0]
+    cursor.execute("""
+        INSERT INTO venues (capacity, venuename, location, venuemanager, user_id)
+        VALUES (%s, %s, 'Benchmark City', 'bench', %s)
+        RETURNING id
+    """, (capacity, name, user_id))
+    venue_id = cursor.fetchone()[0]
+    cursor.execute("""
+        INSERT INTO shows (showdate, showdescription, location, bandsplaying, ticketprice, user_id, venue_id)
+        VALUES (current_date + 30, 'On-sale benchmark', %s, '{}', 25, %s, %s)
+        RETURNING id
+    """, (name, user_id, venue_id))
+    show_id = cursor.fetchone()[0]
+    connection.commit()
+    return user_id, venue_id, show_id
+
+
+def rush(show_id, user_id, args):
+    """One on-sale rush; returns its counters, hold latencies (ms) and seconds to sell out."""
+    import psycopg2
+    import tickets
+    from db_helpers import get_db_connection
+
+    done = threading.Event()
+    lock = threading.Lock()
+    latencies = []
+    counts = {"holds": 0, "purchases": 0, "releases": 0, "abandoned": 0, "sold_out": 0, "errors": 0}
+    barrier = threading.Barrier(args.buyers + 1)
+
+    def count(name, samples=()):
+        with lock:
+            counts[name] += 1
+            latencies.extend(samples)
+
+    def buyer(seed):
+        rng = random.Random(seed)
+        connection = get_db_connection()
+        barrier.wait()
+        while not done.is_set():
+            started = time.perf_counter()
+            try:
+                hold = tickets.hold_seats(connection, show_id, user_id, rng.randint(1, args.max_quantity))
+            except tickets.SoldOut as error:
+                count("sold_out")
+                if not error.available and sold_out(connection):
+                    done.set()
+                time.sleep(0.05)
+                continue
+            except psycopg2.Error:
+                connection.rollback()
+                count("errors")
+                continue
+            count("holds", [(time.perf_counter() - started) * 1000])
+
+            choice = rng.random()
+            try:
+                if choice < args.purchase:
+                    tickets.purchase_hold(connection, hold.id, user_id)
+                    count("purchases")
+                elif choice < args.purchase + args.release:
+                    tickets.release_hold(connection, hold.id, user_id)
+                    count("releases")
+                else:
+                    count("abandoned")
+            except tickets.HoldUnavailable:
+                count("errors")
+            except psycopg2.Error:
+                connection.rollback()
+                count("errors")
+        connection.close()
+
+    def sold_out(connection):
+        inventory = tickets.fetch_inventory(connection.cursor(), show_id)
+        connection.rollback()
+        return inventory.sold == inventory.total
+
+    def sweeper():
+        connection = get_db_connection()
+        while not done.wait(0.25):
+            tickets.release_expired(connection)
+        connection.close()
+
+    threads = [threading.Thread(target=buyer, args=(seed,)) for seed in range(args.buyers)]
+    threads.append(threading.Thread(target=sweeper))
+    for thread in threads:
+        thread.start()
+    barrier.wait()
+    started = time.perf_counter()
+    finished = done.wait(args.duration)
+    elapsed = time.perf_counter() - started
+    done.set()
+    for thread in threads:
+        thread.join()
+    return counts, latencies, elapsed if finished else None
+
+
+def check_books(cursor, show_id, capacity):
+    """Problems with the show's seats and holds after a rush (empty when consistent)."""
+    cursor.execute("""
+        SELECT
+            (SELECT count(*) FROM seats WHERE show_id = %(show_id)s),
+            (SELECT count(*) FROM seats WHERE show_id = %(show_id)s AND status = 'sold'),
+            (SELECT coalesce(sum(quantity), 0) FROM ticket_holds WHERE show_id = %(show_id)s AND status = 'purchased'),
+            (SELECT count(*) FROM seats
+             LEFT JOIN ticket_holds ON ticket_holds.id = seats.hold_id
+             WHERE seats.show_id = %(show_id)s AND seats.status = 'sold'
+               AND ticket_holds.status IS DISTINCT FROM 'purchased'),
+            (SELECT count(*) FROM seats
+             LEFT JOIN ticket_holds ON ticket_holds.id = seats.hold_id
+             WHERE seats.show_id = %(show_id)s AND seats.status = 'held'
+               AND ticket_holds.status IS DISTINCT FROM 'active')
+    """, {'show_id': show_id})
+    total, sold, purchased, orphan_sold, orphan_held = cursor.fetchone()
+    problems = []
+    if total > capacity or sold > capacity:
+        problems.append(f"{sold} sold / {total} seats for a venue of {capacity}")
+    if purchased != sold:
+        problems.append(f"purchased holds add up to {purchased} seats, {sold} are sold")
+    if orphan_sold:
+        problems.append(f"{orphan_sold} sold seat(s) without a purchased hold")
+    if orphan_held:
+        problems.append(f"{orphan_held} held seat(s) without an active hold")
+    return sold, problems
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--embedded", metavar="DIR", help="start a throwaway Postgres in DIR (needs pgserver)")
+    parser.add_argument("--capacity", type=int, default=2000, help="seats on sale")
+    parser.add_argument("--buyers", type=int, default=64, help="concurrent buyers, a connection each")
+    parser.add_argument("--max-quantity", type=int, default=4, help="most seats per hold")
+    parser.add_argument("--purchase", type=float, default=0.7, help="share of holds bought")
+    parser.add_argument("--release", type=float, default=0.1, help="share of holds released (the rest lapse)")
+    parser.add_argument("--ttl", type=int, default=2, help="hold lifetime in seconds")
+    parser.add_argument("--duration", type=float, default=60, help="give up on a rush after this many seconds")
+    args = parser.parse_args()
+
+    if args.embedded:
+        server = start_embedded(args.embedded)  # noqa: F841 (kept alive for the run)
+
+    # Imported once the embedded database's settings are in the environment
+    import tickets
+    from db_helpers import get_db_connection
+    from migrate import run_migrations
+
+    tickets.HOLD_TTL_SECONDS = args.ttl
+    connection = get_db_connection()
+    run_migrations(connection)
+    user_id, venue_id, show_id = create_show(connection, args.capacity)
+    cursor = connection.cursor()
+
+    print(f"database {describe()}: {args.capacity} seats, {args.buyers} buyers, "
+          f"holds of 1-{args.max_quantity} lapse after {args.ttl}s")
+    print(f"\n{'hold lock':<12} {'holds':>6} {'p50 ms':>8} {'p99 ms':>8} {'holds/s':>8} {'sell-out s':>11} "
+          f"{'409s':>6} {'errors':>7} {'sold':>6}  books")
+    try:
+        for label, clause in LOCK_CLAUSES:
+            cursor.execute("DELETE FROM seats WHERE show_id = %s", (show_id,))
+            cursor.execute("DELETE FROM ticket_holds WHERE show_id = %s", (show_id,))
+            connection.commit()
+            tickets.stock_show(connection, show_id, user_id)
+            tickets.HOLD_SQL = tickets.hold_sql(clause)
+
+            counts, latencies, elapsed = rush(show_id, user_id, args)
+            sold, problems = check_books(cursor, show_id, args.capacity)
+            connection.rollback()
+            rate = counts["holds"] / elapsed if elapsed else float('nan')
+            print(f"{label:<12} {counts['holds']:>6} {statistics.median(latencies):8.2f} "
+                  f"{percentile(latencies, 0.99):8.2f} {rate:8.0f} "
+                  f"{'n/a' if elapsed is None else f'{elapsed:.2f}':>11} {counts['sold_out']:>6} "
+                  f"{counts['errors']:>7} {sold:>6}  {'; '.join(problems) or 'ok'}")
+    finally:
+        tickets.HOLD_SQL = tickets.hold_sql()
+        cursor.execute("DELETE FROM shows WHERE id = %s", (show_id,))
+        cursor.execute("DELETE FROM venues WHERE id = %s", (venue_id,))
+        cursor.execute("DELETE FROM users WHERE id = %s", (user_id,))
+        connection.commit()
+        connection.close()
+
+
+if __name__ == "__main__":
+    main()
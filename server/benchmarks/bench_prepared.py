@@ -0,0 +1,150 @@
+"""Benchmark: the prepared-statement registry on the catalog and auth paths.
+
+Two measurements, each with PREPARED_STATEMENTS off and on:
+  - per statement: every statement declared on prepared.statements, run
+    --repeat times on one connection with ids/usernames from the data, plus
+    the planning time Postgres reports for it (EXPLAIN ANALYZE of the plain
+    SQL vs of the EXECUTE once the generic plan is cached)
+  - per route: GET /shows/<id>, /bands/<id>, /venues/<id> (each behind a
+    conditional row-version lookup) and /auth/me through the app, with the
+    response cache off
+
+Reads only; run it against a seeded database (see benchmarks/suite), or pass
+--embedded DIR --seed for a throwaway one.
+
+Usage:
+    python benchmarks/bench_prepared.py [--embedded DIR] [--seed] [--repeat 2000]
+"""
+import argparse
+import json
+import os
+import statistics
+import sys
+import time
+import uuid
+
+SERVER_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, SERVER_DIR)
+
+from benchmarks.suite.database import describe, start_embedded  # noqa: E402
+from benchmarks.suite.seed import seed_database  # noqa: E402
+
+
+def sample_params(cursor, username):
+    """Arguments for each declared statement, taken from existing rows."""
+    params = {}
+    for table, singular in (('shows', 'show'), ('bands', 'band'), ('venues', 'venue')):
+        cursor.execute(f"SELECT id FROM {table} ORDER BY id OFFSET (SELECT count(*) / 2 FROM {table}) LIMIT 1")
+        row_id = cursor.fetchone()[0]
+        params.update({f"{table}_list_version": (), f"{table}_row_version": (row_id,),
+                       f"{singular}_by_id": (row_id,), f"{singular}_exists": (row_id,)})
+    params.pop("show_exists")
+    cursor.execute("SELECT id FROM users WHERE username = %s", (username,))
+    params.update({"user_by_username": (username,), "user_by_id": (cursor.fetchone()[0],)})
+    return params
+
+
+def planning_ms(cursor, sql, params):
+    cursor.execute("EXPLAIN (ANALYZE, FORMAT JSON) " + sql, params)
+    return cursor.fetchone()[0][0]["Planning Time"]
+
+
+def time_statements(connection, registry, params, repeat):
+    """{name: (plain µs, prepared µs, plain planning ms, prepared planning ms)}"""
+    from prepared import StatementRegistry
+
+    cursor = connection.cursor()
+    results = {}
+    for name, statement_params in params.items():
+        statement = registry.get(name)
+        timings = []
+        for enabled in (False, True):
+            local = StatementRegistry(enabled=enabled)
+            local.declare(name, statement.sql)
+            for _ in range(10):  # warm up (and let Postgres switch to the generic plan)
+                local.execute(cursor, name, statement_params)
+                cursor.fetchall()
+            started = time.perf_counter()
+            for _ in range(repeat):
+                local.execute(cursor, name, statement_params)
+                cursor.fetchall()
+            timings.append((time.perf_counter() - started) / repeat * 1e6)
+        plain_plan = planning_ms(cursor, statement.sql, statement_params)
+        prepared_plan = planning_ms(cursor, statement.execute_sql, statement_params)
+        results[name] = (*timings, plain_plan, prepared_plan)
+        cursor.execute(f"DEALLOCATE {name}")
+    connection.rollback()
+    return results
+
+
+def time_routes(client, registry, routes, headers, repeat):
+    """{path: (plain p50 ms, prepared p50 ms)}"""
+    results = {}
+    for path in routes:
+        medians = []
+        for enabled in (False, True):
+            registry.enabled = enabled
+            samples = []
+            for _ in range(repeat):
+                started = time.perf_counter()
+                response = client.get(path, headers=headers)
+                samples.append((time.perf_counter() - started) * 1000)
+                if response.status_code != 200:
+                    raise SystemExit(f"{path} -> {response.status_code}")
+            medians.append(statistics.median(samples))
+        results[path] = tuple(medians)
+    registry.enabled = True
+    return results
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--embedded", metavar="DIR", help="start a throwaway Postgres in DIR (needs pgserver)")
+    parser.add_argument("--seed", action="store_true", help="truncate and reseed the catalog first")
+    parser.add_argument("--repeat", type=int, default=2000, help="executions per statement")
+    parser.add_argument("--route-repeat", type=int, default=300, help="requests per route")
+    args = parser.parse_args()
+
+    if args.embedded:
+        server = start_embedded(args.embedded)  # noqa: F841 (kept alive for the run)
+    os.environ["CACHE_TTL"] = "0"
+    os.environ.setdefault("JWT_SECRET", "benchmark-secret")
+
+    # Imported once the embedded database's settings are in the environment
+    from app import app
+    from db_helpers import get_db_connection
+    from migrate import run_migrations
+    from prepared import statements
+
+    connection = get_db_connection()
+    run_migrations(connection)
+    if args.seed:
+        print(f"seeded {seed_database(connection, reset=True)}")
+
+    client = app.test_client()
+    username = f"bench-{uuid.uuid4().hex[:8]}"
+    signup = client.post('/auth/signup', json={"username": username, "password": "bench"})
+    headers = {"Authorization": f"Bearer {signup.get_json()['token']}"}
+
+    cursor = connection.cursor()
+    params = sample_params(cursor, username)
+    connection.rollback()
+    print(f"database {describe()}")
+
+    print(f"\n{'statement':<22} {'plain µs':>9} {'prepared µs':>12} {'plan ms':>8} {'prepared plan ms':>17}")
+    for name, (plain, prepared, plain_plan, prepared_plan) in time_statements(
+            connection, statements, params, args.repeat).items():
+        print(f"{name:<22} {plain:9.1f} {prepared:12.1f} {plain_plan:8.3f} {prepared_plan:17.3f}")
+
+    routes = [f"/shows/{params['show_by_id'][0]}", f"/bands/{params['band_by_id'][0]}",
+              f"/venues/{params['venue_by_id'][0]}", "/auth/me"]
+    print(f"\n{'route':<22} {'plain p50 ms':>13} {'prepared p50 ms':>16}")
+    for path, (plain, prepared) in time_routes(client, statements, routes, headers, args.route_repeat).items():
+        print(f"{path:<22} {plain:13.3f} {prepared:16.3f}")
+
+    print("\nregistry usage (executions, prepares):", json.dumps(statements.usage()))
+    connection.close()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,232 @@
+"""Benchmark: /reports rollups (reports.py) as the show history grows.
+
+Creates --venues venues and --bands bands, then books --years of shows in
+steps (a show on about --density of the nights at each venue, two bands
+each), and after each step times:
+  - the 12-month month, venue and band reports from the rollup tables
+  - the same venue report computed straight from shows, as it would be
+    without the rollups
+  - a single show insert, update and delete, with the 008 report triggers
+    and with them disabled, i.e. what the rollups add to each write
+  - `python reports.py rebuild`
+
+The rollup reports should stay flat while the direct query and the rebuild
+grow with the history. Creates its own venues, bands and shows and deletes
+them afterwards (then rebuilds the rollups); --embedded DIR runs it against
+a throwaway Postgres started with pgserver.
+
+Usage:
+    python benchmarks/bench_reports.py [--embedded DIR] [--venues 100] [--bands 500] [--years 1,5,10]
+"""
+import argparse
+import os
+import random
+import statistics
+import sys
+import time
+import uuid
+from datetime import date, timedelta
+
+SERVER_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, SERVER_DIR)
+
+from benchmarks.suite.database import describe, start_embedded  # noqa: E402
+
+REPORT_TRIGGERS = ("shows_reports_insert", "shows_reports_update", "shows_reports_delete")
+
+# /reports/venues without the rollups: aggregate the window's shows directly
+DIRECT_VENUE_REPORT = """
+    SELECT shows.venue_id, venues.venuename, count(*), count(ticketprice), sum(ticketprice),
+           min(ticketprice), max(ticketprice)
+    FROM shows
+    JOIN venues ON venues.id = shows.venue_id
+    WHERE shows.showdate >= %(first)s AND shows.showdate < %(end)s
+    GROUP BY shows.venue_id, venues.venuename
+    ORDER BY 3 DESC, venues.venuename
+    LIMIT 50
+"""
+
+
+def percentile(samples, fraction):
+    samples = sorted(samples)
+    return samples[min(len(samples) - 1, int(len(samples) * fraction))]
+
+
+def create_catalog(connection, prefix, venues, bands):
+    """Venues and bands named ``prefix-N``; returns (venue names, band names)."""
+    cursor = connection.cursor()
+    cursor.execute("""
+        INSERT INTO venues (capacity, venuename, location, venuemanager)
+        SELECT 500, %s || '-venue-' || n, 'Benchmark City', 'bench' FROM generate_series(1, %s) AS n
+        RETURNING venuename
+    """, (prefix, venues))
+    venue_names = [row[0] for row in cursor.fetchall()]
+    cursor.execute("""
+        INSERT INTO bands (bandname, hometown, genre, yearstarted, membernames, bandphoto, banddescription)
+        SELECT %s || '-band-' || n, 'Benchmark City', 'rock', 2000, '{}', '', '' FROM generate_series(1, %s) AS n
+        RETURNING bandname
+    """, (prefix, bands))
+    band_names = [row[0] for row in cursor.fetchall()]
+    connection.commit()
+    return venue_names, band_names
+
+
+def book_history(connection, venue_names, band_names, first, last, density):
+    """Shows at every venue from ``first`` up to ``last``, one statement per month
+    (the report triggers run once per statement, as they would for a bulk import)."""
+    cursor = connection.cursor()
+    month = first
+    while month < last:
+        following = min(last, (month.replace(day=1) + timedelta(days=32)).replace(day=1))
+        cursor.execute("""
+            INSERT INTO shows (showdate, showdescription, showtime, location, bandsplaying, ticketprice)
+            SELECT day::date, 'Reports benchmark', day + interval '20 hours', venue,
+                   ARRAY[(%(bands)s::text[])[1 + (random() * (%(band_count)s - 1))::int],
+                         (%(bands)s::text[])[1 + (random() * (%(band_count)s - 1))::int]],
+                   CASE WHEN random() < 0.9 THEN (10 + random() * 90)::numeric(10, 2) END
+            FROM unnest(%(venues)s::text[]) AS venue
+            CROSS JOIN generate_series(%(first)s::date, %(last)s::date - 1, interval '1 day') AS day
+            WHERE random() < %(density)s
+        """, {'bands': band_names, 'band_count': len(band_names), 'venues': venue_names,
+              'first': month, 'last': following, 'density': density})
+        month = following
+    cursor.execute("ANALYZE shows; ANALYZE show_bands")
+    connection.commit()
+
+
+def time_reports(connection, first, last, repeat, rng):
+    """ms per 12-month report, from the rollups and straight from the base tables."""
+    from reports import add_months, fetch_band_report, fetch_month_report, fetch_venue_report
+
+    cursor = connection.cursor()
+    months = (last.year - first.year) * 12 + last.month - first.month
+    samples = {"months": [], "venues": [], "bands": [], "venues, direct": []}
+    for _ in range(repeat):
+        start = add_months(first.replace(day=1), rng.randrange(max(1, months - 11)))
+        end = add_months(start, 11)
+        for label, run in (
+            ("months", lambda: fetch_month_report(cursor, start, end)),
+            ("venues", lambda: fetch_venue_report(cursor, start, end, 50)),
+            ("bands", lambda: fetch_band_report(cursor, start, end, 50)),
+            ("venues, direct", lambda: cursor.execute(
+                DIRECT_VENUE_REPORT, {'first': start, 'end': add_months(end, 1)}) or cursor.fetchall()),
+        ):
+            started = time.perf_counter()
+            run()
+            samples[label].append((time.perf_counter() - started) * 1000)
+    connection.rollback()
+    return samples
+
+
+def time_writes(connection, venue_names, band_names, first, repeat, rng):
+    """ms per show insert, update (new month and lineup) and delete, each its own transaction."""
+    cursor = connection.cursor()
+    samples = {"insert": [], "update": [], "delete": []}
+    for n in range(repeat):
+        showdate = first - timedelta(days=n + 1)  # before the history, so the slot is free
+        venue = rng.choice(venue_names)
+        started = time.perf_counter()
+        cursor.execute("""
+            INSERT INTO shows (showdate, showdescription, showtime, location, bandsplaying, ticketprice)
+            VALUES (%s, 'Reports benchmark', %s, %s, %s, 25)
+            RETURNING id
+        """, (showdate, f"{showdate} 20:00:00", venue, rng.sample(band_names, 2)))
+        show_id = cursor.fetchone()[0]
+        connection.commit()
+        samples["insert"].append((time.perf_counter() - started) * 1000)
+
+        started = time.perf_counter()
+        cursor.execute("UPDATE shows SET showdate = showdate - 60, showtime = showtime - interval '60 days', "
+                       "bandsplaying = %s, ticketprice = 30 WHERE id = %s", (rng.sample(band_names, 2), show_id))
+        connection.commit()
+        samples["update"].append((time.perf_counter() - started) * 1000)
+
+        started = time.perf_counter()
+        cursor.execute("DELETE FROM shows WHERE id = %s", (show_id,))
+        connection.commit()
+        samples["delete"].append((time.perf_counter() - started) * 1000)
+    return samples
+
+
+def set_report_triggers(connection, enabled):
+    cursor = connection.cursor()
+    for trigger in REPORT_TRIGGERS:
+        cursor.execute(f"ALTER TABLE shows {'ENABLE' if enabled else 'DISABLE'} TRIGGER {trigger}")
+    connection.commit()
+
+
+def print_row(label, samples, note=''):
+    print(f"  {label:<28} {statistics.median(samples):8.3f} {percentile(samples, 0.95):8.3f} "
+          f"{percentile(samples, 0.99):8.3f}  {note}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--embedded", metavar="DIR", help="start a throwaway Postgres in DIR (needs pgserver)")
+    parser.add_argument("--venues", type=int, default=100, help="venues to book")
+    parser.add_argument("--bands", type=int, default=500, help="bands to book")
+    parser.add_argument("--years", default="1,5,10", help="history sizes to measure at, in years")
+    parser.add_argument("--density", type=float, default=0.3, help="share of nights with a show at a venue")
+    parser.add_argument("--repeat", type=int, default=100, help="reports / writes per measurement")
+    args = parser.parse_args()
+
+    if args.embedded:
+        server = start_embedded(args.embedded)  # noqa: F841 (kept alive for the run)
+
+    # Imported once the embedded database's settings are in the environment
+    import reports
+    from db_helpers import get_db_connection
+    from migrate import run_migrations
+
+    connection = get_db_connection()
+    run_migrations(connection)
+    rng = random.Random(1)
+    prefix = f"bench-reports-{uuid.uuid4().hex[:8]}"
+    venue_names, band_names = create_catalog(connection, prefix, args.venues, args.bands)
+    cursor = connection.cursor()
+    print(f"database {describe()}: {args.venues} venues, {args.bands} bands, "
+          f"a show on {args.density:.0%} of nights per venue")
+
+    first = date.today().replace(day=1)
+    booked_until = first
+    try:
+        for years in sorted(int(value) for value in args.years.split(',')):
+            target = first + timedelta(days=365 * years)
+            started = time.perf_counter()
+            book_history(connection, venue_names, band_names, booked_until, target, args.density)
+            booked_until = target
+            cursor.execute("SELECT count(*) FROM shows WHERE location LIKE %s || '-%%'", (prefix,))
+            booked = cursor.fetchone()[0]
+            connection.rollback()
+            print(f"\n{years} year(s), {booked} shows (booked in {time.perf_counter() - started:.1f}s)")
+            print(f"  {'measurement (ms)':<28} {'p50':>8} {'p95':>8} {'p99':>8}")
+
+            for label, samples in time_reports(connection, first, booked_until, args.repeat, rng).items():
+                print_row(f"report {label}", samples, "12 months" if label != "venues, direct" else
+                          "12 months, GROUP BY over shows")
+
+            for enabled in (True, False):
+                set_report_triggers(connection, enabled)
+                try:
+                    writes = time_writes(connection, venue_names, band_names, first, args.repeat, rng)
+                finally:
+                    set_report_triggers(connection, True)
+                for label, samples in writes.items():
+                    print_row(f"show {label}, {'with' if enabled else 'no'} rollups", samples)
+
+            started = time.perf_counter()
+            months = reports.rebuild(connection)
+            print(f"  rebuild: {(time.perf_counter() - started) * 1000:.0f} ms for {months} month(s)")
+    finally:
+        connection.rollback()
+        cursor.execute("DELETE FROM shows WHERE location LIKE %s || '-%%'", (prefix,))
+        cursor.execute("DELETE FROM venues WHERE venuename LIKE %s || '-%%'", (prefix,))
+        cursor.execute("DELETE FROM bands WHERE bandname LIKE %s || '-%%'", (prefix,))
+        connection.commit()
+        # The writes with the triggers disabled left the rollups behind
+        reports.rebuild(connection)
+        connection.close()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,100 @@
+"""Memory/CPU benchmark: RealDictCursor rows from SELECT * vs projected __slots__ records.
+
+Synthetic mode (default) builds the rows in Python, which isolates the
+per-row container cost. With BENCH_DATABASE_URL set it also runs both read
+paths against a real shows table.
+
+Usage: python benchmarks/bench_row_memory.py [rows]
+"""
+import os
+import sys
+import time
+import tracemalloc
+from datetime import date, datetime, timedelta
+from decimal import Decimal
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import psycopg2  # noqa: E402
+import psycopg2.extras  # noqa: E402
+
+from data_access import ShowListRecord, fetch_records, select_from  # noqa: E402
+
+POSTER = "https://example.com/posters/" + "x" * 80 + ".jpg"
+DESCRIPTION = "An evening of loud guitars. " * 20
+
+
+def synthetic_rows(count):
+    start = date(2020, 1, 1)
+    for show_id in range(count):
+        yield (
+            show_id, start + timedelta(days=show_id % 3000), DESCRIPTION,
+            datetime(1970, 1, 1, 20, 0), "The Roxy", ["Band A", "Band B"],
+            Decimal("25.00"), 1, POSTER, 1,
+        )
+
+
+LEGACY_COLUMNS = ("id", "showdate", "showdescription", "showtime", "location",
+                  "bandsplaying", "ticketprice", "user_id", "tourposter", "venue_id")
+
+
+def as_legacy(rows):
+    # What RealDictCursor builds for every row of SELECT * FROM shows
+    return [psycopg2.extras.RealDictRow(zip(LEGACY_COLUMNS, row)) for row in rows]
+
+
+def as_records(rows):
+    return [
+        ShowListRecord(bandsplaying, show_id, location, showdate, description, showtime, price, poster, venue_id)
+        for show_id, showdate, description, showtime, location, bandsplaying, price, _user_id, poster, venue_id in rows
+    ]
+
+
+def measure(build, rows):
+    tracemalloc.start()
+    started = time.perf_counter()
+    result = build(rows)
+    elapsed = time.perf_counter() - started
+    current, _peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    del result
+    return current, elapsed
+
+
+def run_synthetic(count):
+    rows = list(synthetic_rows(count))
+    legacy_bytes, legacy_seconds = measure(as_legacy, rows)
+    record_bytes, record_seconds = measure(as_records, rows)
+    print(f"synthetic, {count} rows (container overhead only)")
+    print(f"  RealDictRow   {legacy_bytes / count:8.0f} B/row  {legacy_seconds * 1000:8.1f} ms")
+    print(f"  slots record  {record_bytes / count:8.0f} B/row  {record_seconds * 1000:8.1f} ms")
+
+
+def run_database(dsn):
+    connection = psycopg2.connect(dsn)
+    try:
+        def legacy(_):
+            cursor = connection.cursor(cursor_factory=psycopg2.extras.RealDictCursor)
+            cursor.execute("SELECT * FROM shows ORDER BY showdate, showtime")
+            return cursor.fetchall()
+
+        def projected(_):
+            cursor = connection.cursor()
+            cursor.execute(select_from(ShowListRecord, "shows") + " ORDER BY showdate, showtime, id")
+            return fetch_records(cursor, ShowListRecord)
+
+        count = len(projected(None))
+        legacy_bytes, legacy_seconds = measure(legacy, None)
+        record_bytes, record_seconds = measure(projected, None)
+    finally:
+        connection.close()
+
+    print(f"database, {count} shows (fetch + row construction)")
+    print(f"  SELECT * / RealDictCursor   {legacy_bytes / max(count, 1):8.0f} B/row  {legacy_seconds * 1000:8.1f} ms")
+    print(f"  projection / slots records  {record_bytes / max(count, 1):8.0f} B/row  {record_seconds * 1000:8.1f} ms")
+
+
+if __name__ == "__main__":
+    run_synthetic(int(sys.argv[1]) if len(sys.argv) > 1 else 100_000)
+    if os.getenv('BENCH_DATABASE_URL'):
+        run_database(os.getenv('BENCH_DATABASE_URL'))
@@ -0,0 +1,141 @@
+"""Benchmark: GET /search against a 100k-row catalog.
+
+Seeds shows, bands and venues with the suite's synthetic data (75% / 20% /
+5% of --rows), then times a mix of searches through the app with the
+response cache off, so every request runs the ranked query. The query plan
+of each search is checked for the search_vector (and, with pg_trgm, the
+trigram) indexes. For comparison it also times what the client did before
+/search existed: download /shows and /bands in full and filter in Python.
+
+--seed truncates the catalog tables first, so point it at a throwaway
+database; --embedded DIR starts one with pgserver.
+
+Usage:
+    python benchmarks/bench_search.py [--embedded DIR] [--seed] [--rows 100000] [--repeat 30]
+"""
+import argparse
+import os
+import statistics
+import sys
+import time
+from urllib.parse import parse_qs
+
+SERVER_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, SERVER_DIR)
+
+from benchmarks.suite.database import describe, start_embedded  # noqa: E402
+from benchmarks.suite.seed import seed_database  # noqa: E402
+
+
+def searches(cursor):
+    """(label, query string) pairs built from names that exist in the data."""
+    cursor.execute("SELECT bandname FROM bands ORDER BY id LIMIT 1 OFFSET 1234")
+    bandname = cursor.fetchone()[0]
+    return [
+        ("word", "q=velvet"),
+        ("prefix", "q=velv"),
+        ("two words", "q=neon+river"),
+        ("genre", "q=jazz"),
+        ("city", "q=nashville"),
+        ("band name", "q=" + bandname.replace(' ', '+')),
+        ("number", "q=" + bandname.rsplit(' ', 1)[-1]),
+        ("typo", "q=velvte"),
+        ("bands only", "q=golden&kind=band"),
+    ]
+
+
+def percentile(samples, fraction):
+    samples = sorted(samples)
+    return samples[min(len(samples) - 1, int(len(samples) * fraction))]
+
+
+def time_request(client, path, repeat):
+    samples = []
+    response = None
+    for _ in range(repeat):
+        started = time.perf_counter()
+        response = client.get(path)
+        samples.append((time.perf_counter() - started) * 1000)
+        if response.status_code != 200:
+            raise SystemExit(f"{path} -> {response.status_code}: {response.get_data(as_text=True)[:200]}")
+    return samples, response.get_json()
+
+
+def plan_indexes(connection, query_string):
+    """Index names in the EXPLAIN plan of the search a query string runs."""
+    from search_blueprint import search_kinds, search_query, search_terms, trigram_support
+
+    args = {name: values[0] for name, values in parse_qs(query_string).items()}
+    cursor = connection.cursor()
+    fuzzy = len(args['q']) >= 3 and trigram_support(cursor)
+    sql = search_query(search_kinds(args), fuzzy, None)
+    cursor.execute("EXPLAIN " + sql, {"text": args['q'], "tsquery": search_terms(args['q']), "limit": 51})
+    plan = [row[0] for row in cursor.fetchall()]
+    connection.rollback()
+    indexes = sorted({line.split(" on ", 1)[1].split()[0] for line in plan if "Index Scan on" in line})
+    return indexes or ["seq scan"]
+
+
+def client_side_baseline(client, term):
+    """The pre-/search way: fetch full listings, filter in the browser."""
+    started = time.perf_counter()
+    shows = client.get("/shows?all=true").get_json()["shows"]
+    bands = client.get("/bands?all=true").get_json()["bands"]
+    term = term.lower()
+    hits = [show for show in shows if any(term in band.lower() for band in show["bandsplaying"])]
+    hits += [band for band in bands if term in band["bandname"].lower() or term in (band["genre"] or "").lower()]
+    return (time.perf_counter() - started) * 1000, len(hits)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--embedded", metavar="DIR", help="start a throwaway Postgres in DIR (needs pgserver)")
+    parser.add_argument("--seed", action="store_true", help="truncate and reseed the catalog first")
+    parser.add_argument("--rows", type=int, default=100_000, help="catalog rows to seed (shows + bands + venues)")
+    parser.add_argument("--repeat", type=int, default=30, help="requests per search")
+    args = parser.parse_args()
+
+    if args.embedded:
+        server = start_embedded(args.embedded)  # noqa: F841 (kept alive for the run)
+    os.environ["CACHE_TTL"] = "0"
+
+    # Imported once the embedded database's settings are in the environment
+    from app import app
+    from db_helpers import get_db_connection
+    from search_blueprint import trigram_support
+
+    connection = get_db_connection()
+    if args.seed:
+        started = time.perf_counter()
+        counts = seed_database(connection, users=20, bands=args.rows * 20 // 100, venues=args.rows * 5 // 100,
+                               shows=args.rows * 75 // 100, reset=True)
+        print(f"seeded {counts} in {time.perf_counter() - started:.1f}s")
+
+    cursor = connection.cursor()
+    cursor.execute("SELECT (SELECT count(*) FROM shows), (SELECT count(*) FROM bands), (SELECT count(*) FROM venues)")
+    shows, bands, venues = cursor.fetchone()
+    connection.rollback()
+    trigrams = 'yes' if trigram_support(connection.cursor()) else 'no (typo search disabled)'
+    print(f"database {describe()}: {shows} shows, {bands} bands, {venues} venues "
+          f"({shows + bands + venues} rows), pg_trgm: {trigrams}")
+
+    client = app.test_client()
+
+    print(f"\n{'search':<12} {'hits':>6} {'p50 ms':>8} {'p95 ms':>8}  indexes")
+    for label, query_string in searches(connection.cursor()):
+        samples, body = time_request(client, f"/search?{query_string}", args.repeat)
+        hits = f"{len(body['results'])}{'+' if body['next_cursor'] else ''}"
+        print(f"{label:<12} {hits:>6} {statistics.median(samples):8.2f} {percentile(samples, 0.95):8.2f}  "
+              f"{', '.join(plan_indexes(connection, query_string))}")
+
+        if label == "word" and body["next_cursor"]:
+            samples, _ = time_request(client, f"/search?{query_string}&after={body['next_cursor']}", args.repeat)
+            print(f"{'  page 2':<12} {'':>6} {statistics.median(samples):8.2f} {percentile(samples, 0.95):8.2f}")
+
+    elapsed, hits = client_side_baseline(client, "velvet")
+    print(f"\nclient-side baseline (download /shows + /bands, filter): {elapsed:.0f} ms, {hits} hits")
+    connection.close()
+
+
+if __name__ == "__main__":
+    main()
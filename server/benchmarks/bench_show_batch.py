@@ -0,0 +1,106 @@
+"""Benchmark: POST /shows/batch vs one request per show.
+
+For each batch size, times creating, updating and deleting that many shows
+with the single-show routes (POST /shows, PUT and DELETE /shows/<id>, one
+request each) and with one /shows/batch request per phase, through the app
+with a signed-up user. Reports wall time and operations per second.
+
+The shows it creates are deleted again, but it does write to the database;
+--embedded DIR runs it against a throwaway one started with pgserver.
+
+Usage:
+    python benchmarks/bench_show_batch.py [--embedded DIR] [--sizes 10,100,1000]
+"""
+import argparse
+import os
+import sys
+import time
+import uuid
+
+SERVER_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, SERVER_DIR)
+
+from benchmarks.suite.database import describe, start_embedded  # noqa: E402
+
+
+def show_body(number):
+    return {
+        "showdate": f"2031-{number % 12 + 1:02d}-{number % 28 + 1:02d}",
+        "showdescription": f"Batch benchmark show {number}",
+        "showtime": "2031-01-01 20:00:00",
+        "location": "Benchmark Hall",
+        "bandsplaying": ["Benchmark Band"],
+        "ticketprice": 20,
+        "tourposter": "",
+    }
+
+
+def expect(response, status):
+    if response.status_code != status:
+        raise SystemExit(f"expected {status}, got {response.status_code}: {response.get_data(as_text=True)[:200]}")
+    return response.get_json()
+
+
+def one_by_one(client, headers, size):
+    """Seconds spent on (create, update, delete) of ``size`` shows, a request each."""
+    started = time.perf_counter()
+    ids = [expect(client.post('/shows', json=show_body(n), headers=headers), 201)["show"][0] for n in range(size)]
+    created = time.perf_counter()
+    for n, show_id in enumerate(ids):
+        expect(client.put(f'/shows/{show_id}', json={**show_body(n), "ticketprice": 25}, headers=headers), 200)
+    updated = time.perf_counter()
+    for show_id in ids:
+        expect(client.delete(f'/shows/{show_id}', headers=headers), 200)
+    return created - started, updated - created, time.perf_counter() - updated
+
+
+def batched(client, headers, size):
+    """Seconds spent on the same three phases with one /shows/batch request each."""
+    def batch(operations):
+        body = expect(client.post('/shows/batch?strict=true', json={"operations": operations}, headers=headers), 200)
+        return [result["id"] for result in body["results"]]
+
+    started = time.perf_counter()
+    ids = batch([{"op": "create", "show": show_body(n)} for n in range(size)])
+    created = time.perf_counter()
+    batch([{"op": "update", "id": show_id, "show": {"ticketprice": 25}} for show_id in ids])
+    updated = time.perf_counter()
+    batch([{"op": "delete", "id": show_id} for show_id in ids])
+    return created - started, updated - created, time.perf_counter() - updated
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--embedded", metavar="DIR", help="start a throwaway Postgres in DIR (needs pgserver)")
+    parser.add_argument("--sizes", default="10,100,1000", help="comma-separated batch sizes")
+    args = parser.parse_args()
+
+    if args.embedded:
+        server = start_embedded(args.embedded)  # noqa: F841 (kept alive for the run)
+    os.environ.setdefault("JWT_SECRET", "benchmark-secret")
+
+    # Imported once the embedded database's settings are in the environment
+    from app import app
+    from db_helpers import get_db_connection
+    from migrate import run_migrations
+
+    connection = get_db_connection()
+    run_migrations(connection)
+    connection.close()
+
+    client = app.test_client()
+    signup = client.post('/auth/signup', json={"username": f"bench-{uuid.uuid4().hex[:8]}", "password": "bench"})
+    headers = {"Authorization": f"Bearer {expect(signup, 201)['token']}"}
+    print(f"database {describe()}")
+
+    print(f"\n{'size':>6} {'mode':<11} {'create ms':>10} {'update ms':>10} {'delete ms':>10} {'ops/s':>9}")
+    for size in (int(value) for value in args.sizes.split(',')):
+        for label, run in (("one by one", one_by_one), ("batch", batched)):
+            phases = run(client, headers, size)
+            total = sum(phases)
+            print(f"{size:>6} {label:<11} " + ' '.join(f"{seconds * 1000:10.1f}" for seconds in phases)
+                  + f" {3 * size / total:9.0f}")
+
+
+if __name__ == "__main__":
+    main()
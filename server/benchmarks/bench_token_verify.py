@@ -0,0 +1,84 @@
+"""Benchmark: authenticated request overhead with and without the verified-token cache.
+
+Times a protected no-op route through Flask's test client twice: once with
+the legacy per-request jwt.decode + os.getenv, once with token_required.
+
+Usage: python benchmarks/bench_token_verify.py [requests]
+"""
+import os
+import sys
+import time
+from functools import wraps
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import jwt  # noqa: E402
+from flask import Flask, g, jsonify, request  # noqa: E402
+
+from auth_middleware import configure_tokens, encode_token, token_cache, token_required  # noqa: E402
+
+
+def legacy_token_required(f):
+    """token_required as it was before verified tokens were cached."""
+    @wraps(f)
+    def decorated_function(*args, **kwargs):
+        authorization_header = request.headers.get('Authorization')
+        if authorization_header is None:
+            return jsonify({"error": "Unauthorized - No token provided"}), 401
+        try:
+            token = authorization_header.split(' ')[1]
+            g.user = jwt.decode(token, os.getenv('JWT_SECRET'), algorithms=["HS256"])
+        except jwt.InvalidTokenError:
+            return jsonify({"error": "Unauthorized - Invalid token"}), 401
+        return f(*args, **kwargs)
+    return decorated_function
+
+
+def build_app():
+    app = Flask(__name__)
+
+    @app.route('/legacy')
+    @legacy_token_required
+    def legacy():
+        return jsonify({"id": g.user["id"]})
+
+    @app.route('/cached')
+    @token_required
+    def cached():
+        return jsonify({"id": g.user["id"]})
+
+    @app.route('/public')
+    def public():
+        return jsonify({"id": 0})
+
+    return app
+
+
+def time_route(client, path, headers, count):
+    for _ in range(100):
+        client.get(path, headers=headers)
+    started = time.perf_counter()
+    for _ in range(count):
+        response = client.get(path, headers=headers)
+        assert response.status_code == 200, response.get_data(as_text=True)
+    return (time.perf_counter() - started) / count
+
+
+if __name__ == "__main__":
+    count = int(sys.argv[1]) if len(sys.argv) > 1 else 20_000
+    os.environ.setdefault('JWT_SECRET', 'benchmark-secret')
+    configure_tokens()
+
+    token = encode_token({"id": 1, "username": "bench", "role": "admin"})
+    headers = {"Authorization": f"Bearer {token}"}
+    client = build_app().test_client()
+
+    public = time_route(client, '/public', {}, count)
+    legacy = time_route(client, '/legacy', headers, count)
+    cached = time_route(client, '/cached', headers, count)
+
+    print(f"{count} requests per route")
+    print(f"  unauthenticated baseline  {public * 1e6:8.1f} us/request")
+    print(f"  legacy jwt.decode         {legacy * 1e6:8.1f} us/request  (+{(legacy - public) * 1e6:.1f} us auth)")
+    print(f"  cached verifier           {cached * 1e6:8.1f} us/request  (+{(cached - public) * 1e6:.1f} us auth)")
+    print(f"  token cache: {token_cache.stats()}")
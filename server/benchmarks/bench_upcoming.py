@@ -0,0 +1,127 @@
+"""Benchmark: GET /shows/upcoming (precomputed feed) vs the live queries it replaces.
+
+Times, with the response cache off, the first page and a deep page of:
+  - /shows?from=<today>                         live, shows only
+  - /shows?from=<today>&include=bands,venue     live, same payload as the feed
+  - /shows/upcoming                             the upcoming_shows feed
+and what keeping the feed current adds to writes (refresh_upcoming for one
+show, and for every upcoming show of one busy band).
+
+--seed truncates the catalog first, so point it at a throwaway database;
+--embedded DIR starts one with pgserver.
+
+Usage:
+    python benchmarks/bench_upcoming.py [--embedded DIR] [--seed] [--shows 50000] [--repeat 30] [--depth 20]
+"""
+import argparse
+import os
+import statistics
+import sys
+import time
+from datetime import date
+
+SERVER_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, SERVER_DIR)
+
+from benchmarks.suite.database import describe, start_embedded  # noqa: E402
+from benchmarks.suite.seed import seed_database  # noqa: E402
+
+
+def percentile(samples, fraction):
+    samples = sorted(samples)
+    return samples[min(len(samples) - 1, int(len(samples) * fraction))]
+
+
+def timed(function, repeat):
+    samples = []
+    for _ in range(repeat):
+        started = time.perf_counter()
+        function()
+        samples.append((time.perf_counter() - started) * 1000)
+    return statistics.median(samples), percentile(samples, 0.95)
+
+
+def page_at_depth(client, path, depth):
+    """The URL of page ``depth`` (1-based), following next_cursor."""
+    url = path
+    for _ in range(depth - 1):
+        body = client.get(url).get_json()
+        if not body.get("next_cursor"):
+            break
+        url = f"{path}&after={body['next_cursor']}"
+    return url
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--embedded", metavar="DIR", help="start a throwaway Postgres in DIR (needs pgserver)")
+    parser.add_argument("--seed", action="store_true", help="truncate and reseed the catalog first")
+    parser.add_argument("--shows", type=int, default=50_000, help="shows to seed (half of them upcoming)")
+    parser.add_argument("--repeat", type=int, default=30, help="requests per measurement")
+    parser.add_argument("--depth", type=int, default=20, help="page number for the deep-page measurement")
+    args = parser.parse_args()
+
+    if args.embedded:
+        server = start_embedded(args.embedded)  # noqa: F841 (kept alive for the run)
+    os.environ["CACHE_TTL"] = "0"
+
+    # Imported once the embedded database's settings are in the environment
+    from app import app
+    from db_helpers import get_db_connection
+    from migrate import run_migrations
+    from upcoming import refresh_upcoming, rebuild, upcoming_show_ids
+
+    connection = get_db_connection()
+    run_migrations(connection)
+    if args.seed:
+        started = time.perf_counter()
+        counts = seed_database(connection, users=20, bands=max(50, args.shows // 20), venues=max(20, args.shows // 100),
+                               shows=args.shows, reset=True)
+        print(f"seeded {counts} in {time.perf_counter() - started:.1f}s")
+    else:
+        started = time.perf_counter()
+        print(f"rebuilt feed with {rebuild(connection)} shows in {time.perf_counter() - started:.1f}s")
+
+    cursor = connection.cursor()
+    cursor.execute("SELECT count(*), count(*) FILTER (WHERE showdate >= current_date) FROM shows")
+    total, upcoming = cursor.fetchone()
+    connection.rollback()
+    print(f"database {describe()}: {total} shows, {upcoming} upcoming")
+
+    client = app.test_client()
+    today = date.today().isoformat()
+    routes = [
+        ("live", f"/shows?limit=50&from={today}"),
+        ("live + include", f"/shows?limit=50&from={today}&include=bands,venue"),
+        ("feed", "/shows/upcoming?limit=50"),
+    ]
+
+    print(f"\n{'route':<16} {'page 1 p50':>11} {'p95':>7} {f'page {args.depth} p50':>12} {'p95':>7}")
+    for label, path in routes:
+        first = timed(lambda: client.get(path), args.repeat)
+        deep_url = page_at_depth(client, path, args.depth)
+        deep = timed(lambda: client.get(deep_url), args.repeat)
+        print(f"{label:<16} {first[0]:11.2f} {first[1]:7.2f} {deep[0]:12.2f} {deep[1]:7.2f}")
+
+    cursor.execute("""
+        SELECT band_id FROM show_bands JOIN shows ON shows.id = show_id
+        WHERE showdate >= current_date GROUP BY band_id ORDER BY count(*) DESC LIMIT 1
+    """)
+    busy_band = cursor.fetchone()[0]
+    band_show_ids = upcoming_show_ids(connection, 'bands', [busy_band])
+    one_show = band_show_ids[:1]
+    connection.rollback()
+
+    def refresh(show_ids):
+        refresh_upcoming(connection, show_ids)
+        connection.rollback()
+
+    single = timed(lambda: refresh(one_show), args.repeat)
+    band = timed(lambda: refresh(band_show_ids), max(3, args.repeat // 5))
+    print(f"\nwrite overhead: one show {single[0]:.2f} ms p50; "
+          f"busiest band ({len(band_show_ids)} upcoming shows) {band[0]:.2f} ms p50")
+    connection.close()
+
+
+if __name__ == "__main__":
+    main()
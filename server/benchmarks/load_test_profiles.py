@@ -0,0 +1,238 @@
+"""Load test: gunicorn sync vs gthread vs gevent profiles on catalog reads.
+
+Starts gunicorn once per profile (GUNICORN_PROFILE, see gunicorn.conf.py)
+against the configured Postgres database, drives it with keep-alive clients
+for a fixed duration, and reports throughput, latency percentiles and the
+proportional memory (PSS) of the whole worker tree.
+
+Local Postgres answers in well under a millisecond, which hides exactly what
+the cooperative profiles are for. --db-latency-ms routes the app through a
+small TCP proxy that delays every reply from the server, approximating a
+database in another availability zone.
+
+The response cache is disabled (CACHE_TTL=0) unless --cache is given, so
+every request is a database round trip.
+
+Usage:
+    python benchmarks/load_test_profiles.py [--profiles sync,gthread,gevent]
+        [--concurrency 32] [--duration 15] [--db-latency-ms 5] [--workers N]
+"""
+import argparse
+import asyncio
+import http.client
+import json
+import os
+import signal
+import socket
+import subprocess
+import sys
+import threading
+import time
+
+SERVER_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+PATHS = ["/shows?limit=20", "/bands?limit=20", "/venues?limit=20", "/shows?limit=5&from=2024-01-01"]
+
+
+# --- Latency proxy ---
+def start_latency_proxy(upstream_port, delay):
+    """Forward a local port to Postgres, delaying every server->client chunk."""
+    loop = asyncio.new_event_loop()
+    ready = threading.Event()
+    listen = {}
+
+    async def pump(reader, writer, delay_each):
+        try:
+            while True:
+                data = await reader.read(65536)
+                if not data:
+                    break
+                if delay_each:
+                    await asyncio.sleep(delay_each)
+                writer.write(data)
+                await writer.drain()
+        except (ConnectionError, asyncio.CancelledError):
+            pass
+        finally:
+            writer.close()
+
+    async def handle(client_reader, client_writer):
+        server_reader, server_writer = await asyncio.open_connection('localhost', upstream_port)
+        await asyncio.gather(
+            pump(client_reader, server_writer, 0),
+            pump(server_reader, client_writer, delay),
+        )
+
+    async def main():
+        server = await asyncio.start_server(handle, 'localhost', 0)
+        listen['port'] = server.sockets[0].getsockname()[1]
+        ready.set()
+        async with server:
+            await server.serve_forever()
+
+    thread = threading.Thread(target=lambda: loop.run_until_complete(main()), daemon=True)
+    thread.start()
+    ready.wait()
+    return listen['port']
+
+
+# --- Gunicorn lifecycle ---
+def free_port():
+    with socket.socket() as sock:
+        sock.bind(('localhost', 0))
+        return sock.getsockname()[1]
+
+
+def start_gunicorn(profile, port, env_overrides):
+    env = dict(os.environ, GUNICORN_PROFILE=profile, PORT=str(port), **env_overrides)
+    process = subprocess.Popen(
+        [sys.executable, "-m", "gunicorn", "-c", "gunicorn.conf.py", "--access-logfile", "/dev/null", "app:app"],
+        cwd=SERVER_DIR, env=env, stdout=subprocess.DEVNULL, stderr=subprocess.PIPE,
+    )
+    deadline = time.time() + 30
+    while time.time() < deadline:
+        if process.poll() is not None:
+            raise RuntimeError(f"gunicorn ({profile}) exited:\n{process.stderr.read().decode()}")
+        try:
+            connection = http.client.HTTPConnection('localhost', port, timeout=2)
+            connection.request("GET", PATHS[0])
+            connection.getresponse().read()
+            return process
+        except OSError:
+            time.sleep(0.2)
+    process.kill()
+    raise RuntimeError(f"gunicorn ({profile}) did not start")
+
+
+def stop_gunicorn(process):
+    process.send_signal(signal.SIGTERM)
+    try:
+        process.wait(timeout=15)
+    except subprocess.TimeoutExpired:
+        process.kill()
+
+
+def tree_pss_kb(pid):
+    """PSS of a process and its children, so copy-on-write pages count once."""
+    pids = [pid]
+    try:
+        with open(f"/proc/{pid}/task/{pid}/children") as children:
+            pids += [int(child) for child in children.read().split()]
+    except OSError:
+        pass
+    total = 0
+    for member in pids:
+        try:
+            with open(f"/proc/{member}/smaps_rollup") as rollup:
+                for line in rollup:
+                    if line.startswith("Pss:"):
+                        total += int(line.split()[1])
+        except OSError:
+            pass
+    return total
+
+
+# --- Load driver ---
+def drive(port, concurrency, duration):
+    latencies = []
+    errors = []
+    lock = threading.Lock()
+    stop_at = time.perf_counter() + duration
+
+    def client(index):
+        connection = http.client.HTTPConnection('localhost', port, timeout=30)
+        local = []
+        failures = 0
+        request_number = index
+        while time.perf_counter() < stop_at:
+            path = PATHS[request_number % len(PATHS)]
+            request_number += 1
+            started = time.perf_counter()
+            try:
+                connection.request("GET", path)
+                response = connection.getresponse()
+                response.read()
+                if response.status != 200:
+                    failures += 1
+                    continue
+            except (OSError, http.client.HTTPException):
+                failures += 1
+                connection.close()
+                connection = http.client.HTTPConnection('localhost', port, timeout=30)
+                continue
+            local.append(time.perf_counter() - started)
+        with lock:
+            latencies.extend(local)
+            errors.append(failures)
+
+    threads = [threading.Thread(target=client, args=(index,)) for index in range(concurrency)]
+    started = time.perf_counter()
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    elapsed = time.perf_counter() - started
+    return latencies, sum(errors), elapsed
+
+
+def percentile(sorted_values, fraction):
+    if not sorted_values:
+        return 0.0
+    index = min(len(sorted_values) - 1, int(round(fraction * (len(sorted_values) - 1))))
+    return sorted_values[index]
+
+
+def run_profile(profile, args, env_overrides):
+    port = free_port()
+    process = start_gunicorn(profile, port, env_overrides)
+    try:
+        drive(port, args.concurrency, 2)  # warm-up: pools, caches, worker imports
+        latencies, errors, elapsed = drive(port, args.concurrency, args.duration)
+        memory_kb = tree_pss_kb(process.pid)
+    finally:
+        stop_gunicorn(process)
+    latencies.sort()
+    return {
+        "profile": profile,
+        "requests": len(latencies),
+        "errors": errors,
+        "rps": len(latencies) / elapsed,
+        "p50_ms": percentile(latencies, 0.50) * 1000,
+        "p95_ms": percentile(latencies, 0.95) * 1000,
+        "p99_ms": percentile(latencies, 0.99) * 1000,
+        "pss_mb": memory_kb / 1024,
+    }
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--profiles", default="sync,gthread,gevent")
+    parser.add_argument("--concurrency", type=int, default=32)
+    parser.add_argument("--duration", type=float, default=15)
+    parser.add_argument("--db-latency-ms", type=float, default=0)
+    parser.add_argument("--workers", type=int, help="WEB_CONCURRENCY for every profile (default: each profile's own)")
+    parser.add_argument("--cache", action="store_true", help="leave the response cache on")
+    parser.add_argument("--json", help="also write the results to this file")
+    args = parser.parse_args()
+
+    env_overrides = {}
+    if not args.cache:
+        env_overrides["CACHE_TTL"] = "0"
+    if args.workers:
+        env_overrides["WEB_CONCURRENCY"] = str(args.workers)
+    if args.db_latency_ms:
+        upstream = int(os.getenv('PGPORT', 5432))
+        env_overrides["PGPORT"] = str(start_latency_proxy(upstream, args.db_latency_ms / 1000))
+
+    print(f"{args.concurrency} clients, {args.duration:.0f}s per profile, "
+          f"+{args.db_latency_ms:.1f} ms per database reply")
+    print(f"{'profile':<9}{'req/s':>9}{'p50 ms':>9}{'p95 ms':>9}{'p99 ms':>9}{'errors':>8}{'PSS MB':>9}")
+    results = []
+    for profile in args.profiles.split(','):
+        result = run_profile(profile, args, env_overrides)
+        results.append(result)
+        print(f"{profile:<9}{result['rps']:>9.0f}{result['p50_ms']:>9.1f}{result['p95_ms']:>9.1f}"
+              f"{result['p99_ms']:>9.1f}{result['errors']:>8}{result['pss_mb']:>9.1f}")
+
+    if args.json:
+        with open(args.json, 'w') as output:
+            json.dump(results, output, indent=2)
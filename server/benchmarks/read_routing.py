@@ -0,0 +1,186 @@
+"""Check: read-replica routing in db_helpers against a primary and a replica.
+
+Points the app at the POSTGRES_* primary and --replica (a hot standby
+streaming from it, e.g. one made with `pg_basebackup -R`), then drives it
+through the test client and checks, from the ReplicaSet's counters:
+  - anonymous catalog GETs (/shows, /bands, /venues, by id) and /auth/me
+    are answered by the replica
+  - a client that just wrote reads from the primary until its
+    read_primary_until cookie runs out (--window seconds), then from the
+    replica again; a read right after the write finds the new row
+  - writes, and reads of routes that aren't routed, use the primary
+  - with a replica that is down (--dead, a DSN nothing listens on, listed
+    first) reads still succeed: it is skipped and marked down, and with
+    only dead replicas they fall back to the primary
+It also times GET /bands/<id> through the replica and with no replicas
+configured.
+The response cache is off throughout, so every read reaches a database.
+
+Creates its own user and band and deletes them afterwards. Exits non-zero
+if a check fails.
+
+Usage:
+    python benchmarks/read_routing.py --replica "host=localhost port=5433 dbname=grp user=postgres"
+"""
+import argparse
+import importlib
+import os
+import statistics
+import sys
+import time
+import uuid
+
+SERVER_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, SERVER_DIR)
+
+from benchmarks.suite.database import describe  # noqa: E402
+
+CATALOG_READS = ("/shows", "/bands", "/venues", "/shows?all=true", "/bands?all=true", "/venues?all=true")
+
+
+class Checks:
+    def __init__(self):
+        self.failures = 0
+
+    def check(self, label, passed, detail=''):
+        self.failures += not passed
+        print(f"  {'ok' if passed else 'FAIL':<5} {label}{f' ({detail})' if detail else ''}")
+
+
+def on_replica(counts):
+    """Every checkout went to a replica (a GET makes two: the ETag check and the view)."""
+    return counts["replica_checkouts"] > 0 and not counts["primary_fallbacks"] and not counts["pinned_reads"]
+
+
+def routed(replicas, run):
+    """Run ``run()`` and return the ReplicaSet counters it moved."""
+    before = replicas.stats()
+    run()
+    after = replicas.stats()
+    return {name: after[name] - before[name]
+            for name in ("replica_checkouts", "primary_fallbacks", "pinned_reads", "failures")}
+
+
+def build_app(replica_urls):
+    """A fresh app whose db_helpers read DATABASE_REPLICA_URLS=``replica_urls``."""
+    import db_helpers
+
+    os.environ['DATABASE_REPLICA_URLS'] = replica_urls
+    replicas = db_helpers.get_replicas()
+    if replicas is not None:
+        replicas.closeall()
+    db_helpers._reset_pool_after_fork()
+    app_module = importlib.import_module('app')
+    return app_module.create_app(), db_helpers.get_replicas()
+
+
+def time_reads(client, path, repeat):
+    samples = []
+    for _ in range(repeat):
+        started = time.perf_counter()
+        response = client.get(path)
+        samples.append((time.perf_counter() - started) * 1000)
+        assert response.status_code == 200, response.get_data(as_text=True)
+    return statistics.median(samples)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--replica", required=True, help="DSN of a hot standby of the POSTGRES_* database")
+    parser.add_argument("--dead", default="host=localhost port=1 dbname=grp user=postgres",
+                        help="DSN of a replica that is down")
+    parser.add_argument("--window", type=float, default=1.0, help="DB_READ_PRIMARY_SECONDS for the run")
+    parser.add_argument("--repeat", type=int, default=200, help="reads per latency measurement")
+    args = parser.parse_args()
+
+    os.environ['DB_READ_PRIMARY_SECONDS'] = str(args.window)
+    os.environ['DB_REPLICA_CONNECT_TIMEOUT'] = '1'
+    os.environ['CACHE_TTL'] = '0'
+    os.environ.setdefault('JWT_SECRET', 'read-routing-check')
+
+    from db_helpers import get_db_connection
+
+    checks = Checks()
+    name = f"read-routing-{uuid.uuid4().hex[:8]}"
+    app, replicas = build_app(args.replica)
+    client = app.test_client()
+    print(f"primary {describe()}, replica {args.replica!r}, pin window {args.window}s")
+
+    print("\nanonymous reads")
+    counts = routed(replicas, lambda: [client.get(path) for path in CATALOG_READS])
+    checks.check("catalog lists served by the replica", on_replica(counts), str(counts))
+
+    print("\nread-your-writes")
+    counts = routed(replicas, lambda: client.post('/auth/signup', json={"username": name, "password": "pw",
+                                                                        "role": "admin"}))
+    checks.check("signup (a write) uses the primary", not counts["replica_checkouts"], str(counts))
+    checks.check("the write sets the pin cookie", client.get_cookie('read_primary_until') is not None)
+    token = client.post('/auth/signin', json={"username": name, "password": "pw"}).get_json()['token']
+    headers = {"Authorization": f"Bearer {token}"}
+
+    band = {"bandname": name, "hometown": "Benchmark City", "genre": "rock", "yearstarted": 2000,
+            "membernames": [], "bandphoto": "", "banddescription": ""}
+    band_id = client.post('/bands', json=band, headers=headers).get_json()['band'][0]
+    fresh = {}
+    counts = routed(replicas, lambda: fresh.update(response=client.get(f'/bands/{band_id}')))
+    checks.check("the new band, read at once, comes from the primary",
+                 fresh["response"].status_code == 200 and counts["pinned_reads"] and not counts["replica_checkouts"],
+                 f"{fresh['response'].status_code}, {counts}")
+    counts = routed(replicas, lambda: client.get('/auth/me', headers=headers))
+    checks.check("/auth/me while pinned uses the primary", counts["pinned_reads"] == 1, str(counts))
+
+    other = app.test_client()
+    counts = routed(replicas, lambda: other.get(f'/bands/{band_id}'))
+    checks.check("another client's read goes to the replica", on_replica(counts), str(counts))
+
+    time.sleep(args.window + 0.2)
+    counts = routed(replicas, lambda: client.get('/auth/me', headers=headers))
+    checks.check("after the window the writer reads the replica again", on_replica(counts), str(counts))
+
+    client.set_cookie('read_primary_until', f"{time.time() + 3600}")
+    counts = routed(replicas, lambda: client.get(f'/bands/{band_id}'))
+    checks.check("a pin longer than the window is ignored", on_replica(counts), str(counts))
+    client.delete_cookie('read_primary_until')
+
+    counts = routed(replicas, lambda: client.get(f'/bands/{band_id}/shows'))
+    checks.check("routes that aren't routed use the primary", not counts["replica_checkouts"], str(counts))
+
+    print("\nlatency, GET /bands/<id>")
+    replica_ms = time_reads(other, f'/bands/{band_id}', args.repeat)
+    primary_app, _ = build_app('')
+    primary_ms = time_reads(primary_app.test_client(), f'/bands/{band_id}', args.repeat)
+    print(f"  replica p50 {replica_ms:.3f} ms, primary (no replicas configured) p50 {primary_ms:.3f} ms")
+
+    print("\nfailover")
+    app, replicas = build_app(f"{args.dead},{args.replica}")
+    client = app.test_client()
+    responses = []
+    counts = routed(replicas, lambda: responses.extend(client.get(path).status_code for path in CATALOG_READS))
+    checks.check("reads succeed with a replica down", all(status == 200 for status in responses), str(responses))
+    checks.check("the dead replica is marked down, once", counts["failures"] == 1
+                 and replicas.stats()["replicas_up"] == 1, str(counts))
+    checks.check("reads moved to the live replica", counts["replica_checkouts"] >= len(CATALOG_READS)
+                 and not counts["primary_fallbacks"], str(counts))
+
+    app, replicas = build_app(args.dead)
+    client = app.test_client()
+    responses = []
+    counts = routed(replicas, lambda: responses.extend(client.get(path).status_code for path in CATALOG_READS))
+    checks.check("with every replica down, reads fall back to the primary",
+                 all(status == 200 for status in responses) and counts["primary_fallbacks"] >= len(CATALOG_READS)
+                 and not counts["replica_checkouts"],
+                 f"{responses}, {counts}")
+
+    connection = get_db_connection()
+    cursor = connection.cursor()
+    cursor.execute("DELETE FROM bands WHERE bandname = %s", (name,))
+    cursor.execute("DELETE FROM users WHERE username = %s", (name,))
+    connection.commit()
+    connection.close()
+
+    print(f"\n{'all checks passed' if not checks.failures else f'{checks.failures} check(s) failed'}")
+    sys.exit(1 if checks.failures else 0)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,130 @@
+"""Startup budget: how long a worker takes to boot and how much memory it costs.
+
+Each run is a fresh interpreter that times ``import app`` and
+``create_app()``, reads its RSS, and checks that modules only needed on
+demand (the bcrypt process pool's multiprocessing, gevent) were not loaded.
+It then forks a child the way gunicorn's preload_app does, serves one
+request there, and reads the child's private (unshared) memory, i.e. what
+each extra worker really costs.
+
+Medians over --runs are compared with the budgets; any breach exits 1, so
+this doubles as a regression check for CI. Needs no database.
+
+Usage:
+    python benchmarks/startup_budget.py [--runs 5] [--max-boot-ms 900] [--max-rss-mb 80] [--max-worker-mb 12]
+"""
+import argparse
+import json
+import os
+import statistics
+import subprocess
+import sys
+
+SERVER_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+# Modules that must stay out of a freshly booted worker (imported lazily where used)
+NOT_AT_BOOT = ("multiprocessing", "concurrent.futures.process", "gevent")
+
+# Default budgets, shared with tests/test_startup.py
+MAX_BOOT_MS = 900
+MAX_RSS_MB = 80
+MAX_WORKER_MB = 12
+
+PROBE = r"""
+import gc, json, os, sys, time
+
+def memory_kb(field, path="/proc/self/status"):
+    try:
+        with open(path) as status:
+            for line in status:
+                if line.startswith(field + ":"):
+                    return int(line.split()[1])
+    except OSError:
+        return None
+    return None
+
+started = time.perf_counter()
+import app
+imported = time.perf_counter()
+application = app.create_app()
+created = time.perf_counter()
+
+result = {
+    "import_ms": (imported - started) * 1000,
+    "create_ms": (created - imported) * 1000,
+    "boot_ms": (created - started) * 1000,
+    "rss_mb": (memory_kb("VmRSS") or 0) / 1024,
+    "modules": len(sys.modules),
+    "loaded_too_early": [name for name in NOT_AT_BOOT if name in sys.modules],
+    "worker_private_mb": None,
+}
+
+# What gunicorn does with preload_app: freeze the GC, fork, serve from the child
+if hasattr(os, "fork") and os.path.exists("/proc/self/smaps_rollup"):
+    gc.freeze()
+    reader, writer = os.pipe()
+    pid = os.fork()
+    if pid == 0:
+        os.close(reader)
+        application.test_client().get("/startup-budget-probe")  # a 404: no database needed
+        private = (memory_kb("Private_Clean", "/proc/self/smaps_rollup") or 0) \
+            + (memory_kb("Private_Dirty", "/proc/self/smaps_rollup") or 0)
+        os.write(writer, str(private).encode())
+        os._exit(0)
+    os.close(writer)
+    private_kb = int(os.read(reader, 64) or 0)
+    os.waitpid(pid, 0)
+    result["worker_private_mb"] = private_kb / 1024
+
+print(json.dumps(result))
+"""
+
+
+def run_probe():
+    env = dict(os.environ, INSTRUMENTATION=os.getenv("INSTRUMENTATION", "true"))
+    env.setdefault("JWT_SECRET", "startup-budget")
+    completed = subprocess.run(
+        [sys.executable, "-c", f"NOT_AT_BOOT = {NOT_AT_BOOT!r}\n" + PROBE],
+        cwd=SERVER_DIR, env=env, capture_output=True, text=True, check=True,
+    )
+    return json.loads(completed.stdout.strip().splitlines()[-1])
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--runs", type=int, default=5, help="fresh interpreters to measure")
+    parser.add_argument("--max-boot-ms", type=float, default=MAX_BOOT_MS, help="budget for import + create_app()")
+    parser.add_argument("--max-rss-mb", type=float, default=MAX_RSS_MB, help="budget for a booted process's RSS")
+    parser.add_argument("--max-worker-mb", type=float, default=MAX_WORKER_MB,
+                        help="budget for a forked worker's private memory after one request")
+    args = parser.parse_args()
+
+    runs = [run_probe() for _ in range(args.runs)]
+
+    def median(key):
+        values = [run[key] for run in runs if run[key] is not None]
+        return statistics.median(values) if values else None
+
+    measured = {key: median(key) for key in ("import_ms", "create_ms", "boot_ms", "rss_mb", "modules", "worker_private_mb")}
+    for key, value in measured.items():
+        print(f"{key:<18} {'n/a' if value is None else f'{value:.1f}'}")
+
+    failures = []
+    if measured["boot_ms"] > args.max_boot_ms:
+        failures.append(f"boot took {measured['boot_ms']:.0f} ms (budget {args.max_boot_ms:.0f} ms)")
+    if measured["rss_mb"] > args.max_rss_mb:
+        failures.append(f"RSS is {measured['rss_mb']:.1f} MB (budget {args.max_rss_mb:.0f} MB)")
+    if measured["worker_private_mb"] is not None and measured["worker_private_mb"] > args.max_worker_mb:
+        failures.append(f"a worker's private memory is {measured['worker_private_mb']:.1f} MB "
+                        f"(budget {args.max_worker_mb:.0f} MB)")
+    loaded = sorted({name for run in runs for name in run["loaded_too_early"]})
+    if loaded:
+        failures.append(f"loaded at boot but only needed on demand: {', '.join(loaded)}")
+
+    for failure in failures:
+        print(f"OVER BUDGET: {failure}")
+    sys.exit(1 if failures else 0)
+
+
+if __name__ == "__main__":
+    main()
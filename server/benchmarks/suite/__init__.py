@@ -0,0 +1,8 @@
+"""Reusable API benchmark suite.
+
+    python -m benchmarks.suite seed      # fill a database with synthetic catalog data
+    python -m benchmarks.suite run       # drive a scenario, write per-route results as JSON
+    python -m benchmarks.suite compare   # diff two result files
+
+Run from server/. See ``python -m benchmarks.suite <command> --help``.
+"""
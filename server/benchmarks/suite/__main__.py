@@ -0,0 +1,129 @@
+"""Command line for the benchmark suite; run from server/ as ``python -m benchmarks.suite``."""
+import argparse
+import os
+import sys
+
+from dotenv import load_dotenv
+
+from benchmarks.suite import database, report
+from benchmarks.suite.scenarios import SCENARIOS
+
+RESULTS_DIR = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), 'results')
+
+
+def connect():
+    from db_helpers import get_db_connection
+    return get_db_connection()
+
+
+def seed_command(args):
+    from benchmarks.suite.seed import seed_database
+    connection = connect()
+    try:
+        counts = seed_database(connection, users=args.users, bands=args.bands, venues=args.venues,
+                               shows=args.shows, seed=args.seed, reset=args.reset)
+    finally:
+        connection.close()
+    print(f"Seeded {database.describe()}: " + ', '.join(f"{count} {table}" for table, count in counts.items()))
+
+
+def run_command(args):
+    from benchmarks.suite.drivers import HTTPDriver, WSGIDriver
+    from benchmarks.suite.runner import run_scenario
+    from benchmarks.suite.seed import load_fixture
+
+    connection = connect()
+    try:
+        fixture = load_fixture(connection)
+    finally:
+        connection.close()
+
+    if args.driver == "wsgi":
+        driver = WSGIDriver()
+    else:
+        driver = HTTPDriver(profile=args.profile)
+
+    driver.start()
+    try:
+        samples, elapsed = run_scenario(driver, SCENARIOS[args.scenario](), fixture, concurrency=args.concurrency,
+                                        duration=args.duration, warmup=args.warmup, seed=args.seed,
+                                        revalidate=not args.no_revalidate)
+        memory = driver.memory()
+    finally:
+        driver.stop()
+
+    meta = {
+        "scenario": args.scenario,
+        "driver": args.driver,
+        "profile": args.profile if args.driver == "http" else None,
+        "concurrency": args.concurrency,
+        "duration": args.duration,
+        "database": database.describe(),
+        "rows": {table: len(fixture[key]) for table, key in
+                 (("shows", "show_ids"), ("bands", "band_ids"), ("venues", "venue_ids"))},
+    }
+    result = report.build_result(samples, elapsed, meta, memory)
+    report.print_result(result)
+
+    out = args.out
+    if out is None:
+        os.makedirs(RESULTS_DIR, exist_ok=True)
+        name = '-'.join(part for part in (args.scenario, args.driver, meta["profile"], result["meta"]["revision"]) if part)
+        out = os.path.join(RESULTS_DIR, f"{name}.json")
+    report.write_result(result, out)
+    print(f"Wrote {out}")
+
+
+def compare_command(args):
+    regressions = report.compare(report.read_result(args.before), report.read_result(args.after), args.threshold)
+    if regressions:
+        print(f"{len(regressions)} regression(s) beyond {args.threshold:.0f}%")
+        sys.exit(1)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(prog="python -m benchmarks.suite", description="API benchmark suite")
+    parser.add_argument("--embedded", metavar="DIR",
+                        help="use a throwaway Postgres in DIR (needs the pgserver package) instead of POSTGRES_*")
+    commands = parser.add_subparsers(dest="command", required=True)
+
+    seed = commands.add_parser("seed", help="apply migrations and insert synthetic data")
+    seed.add_argument("--users", type=int, default=50)
+    seed.add_argument("--bands", type=int, default=500)
+    seed.add_argument("--venues", type=int, default=100)
+    seed.add_argument("--shows", type=int, default=10_000)
+    seed.add_argument("--seed", type=int, default=1)
+    seed.add_argument("--reset", action="store_true", help="TRUNCATE users, bands, venues and shows first")
+    seed.set_defaults(handler=seed_command)
+
+    run = commands.add_parser("run", help="drive a scenario and write a JSON result")
+    run.add_argument("--scenario", choices=sorted(SCENARIOS), default="catalog_browse")
+    run.add_argument("--driver", choices=["wsgi", "http"], default="wsgi")
+    run.add_argument("--profile", default=os.getenv("GUNICORN_PROFILE", "sync"),
+                     help="gunicorn profile for --driver http")
+    run.add_argument("--concurrency", type=int, default=16)
+    run.add_argument("--duration", type=float, default=10)
+    run.add_argument("--warmup", type=float, default=2)
+    run.add_argument("--seed", type=int, default=1)
+    run.add_argument("--no-revalidate", action="store_true", help="don't send If-None-Match for repeat GETs")
+    run.add_argument("--out", help="result file (default: benchmarks/results/<scenario>-<driver>-<revision>.json)")
+    run.set_defaults(handler=run_command)
+
+    diff = commands.add_parser("compare", help="diff two result files; exits 1 on regressions")
+    diff.add_argument("before")
+    diff.add_argument("after")
+    diff.add_argument("--threshold", type=float, default=10.0, help="percent change that counts as a regression")
+    diff.set_defaults(handler=compare_command)
+
+    args = parser.parse_args(argv)
+    load_dotenv()
+    server = database.start_embedded(args.embedded) if args.embedded else None
+    try:
+        args.handler(args)
+    finally:
+        if server is not None:
+            server.cleanup()
+
+
+if __name__ == "__main__":
+    main()
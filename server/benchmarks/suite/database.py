@@ -0,0 +1,36 @@
+"""Where the benchmark data lives: the configured Postgres or an embedded one.
+
+The app reads its connection settings from POSTGRES_* variables (see
+db_helpers.get_db_connection), so pointing it at a database is just a matter
+of setting those before the app is imported or gunicorn is started.
+"""
+import os
+from urllib.parse import parse_qs, urlparse
+
+
+def start_embedded(data_dir):
+    """Start (or reuse) a throwaway Postgres in ``data_dir`` via the optional
+    ``pgserver`` package, and export its settings to this process's env."""
+    try:
+        import pgserver
+    except ImportError:
+        raise SystemExit("--embedded needs the pgserver package: pip install pgserver")
+
+    server = pgserver.get_server(data_dir)
+    uri = urlparse(server.get_uri())
+    settings = {
+        "POSTGRES_HOST": parse_qs(uri.query).get("host", [uri.hostname or "localhost"])[0],
+        "POSTGRES_DATABASE": uri.path.lstrip("/") or "postgres",
+        "POSTGRES_USERNAME": uri.username or "postgres",
+        "POSTGRES_PASSWORD": uri.password or "",
+    }
+    if uri.port:
+        settings["POSTGRES_PORT"] = str(uri.port)
+    os.environ.update(settings)
+    return server
+
+
+def describe():
+    host = os.getenv("POSTGRES_HOST", "localhost")
+    port = os.getenv("POSTGRES_PORT", "")
+    return f"{os.getenv('POSTGRES_DATABASE')}@{host}{':' + port if port else ''}"
@@ -0,0 +1,91 @@
+"""Ways of sending a request to the app.
+
+WSGIDriver calls the Flask app in-process through its test client: no
+sockets, so it isolates the cost of our own code. HTTPDriver starts gunicorn
+with gunicorn.conf.py (any GUNICORN_PROFILE) and talks real HTTP/1.1 with
+keep-alive, which is what production traffic looks like.
+"""
+import http.client
+import json
+import os
+import resource
+
+from benchmarks.load_test_profiles import free_port, start_gunicorn, stop_gunicorn, tree_pss_kb
+
+
+class WSGIDriver:
+    name = "wsgi"
+
+    def __init__(self):
+        from app import app
+        self.app = app
+
+    def start(self):
+        pass
+
+    def stop(self):
+        pass
+
+    def client(self):
+        test_client = self.app.test_client()
+
+        def send(method, path, headers, body):
+            response = test_client.open(path, method=method, headers=headers,
+                                        data=json.dumps(body) if body is not None else None,
+                                        content_type='application/json' if body is not None else None)
+            data = response.get_data()
+            return response.status_code, response.headers.get('ETag'), data
+
+        return send
+
+    def memory(self):
+        with open(f"/proc/{os.getpid()}/status") as status:
+            fields = dict(line.split(':', 1) for line in status if ':' in line)
+        return {
+            "rss_mb": int(fields["VmRSS"].split()[0]) / 1024,
+            "peak_rss_mb": resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024,
+        }
+
+
+class HTTPDriver:
+    name = "http"
+
+    def __init__(self, profile="sync", env=None):
+        self.profile = profile
+        self.env = env or {}
+        self.port = None
+        self.process = None
+
+    def start(self):
+        self.port = free_port()
+        self.process = start_gunicorn(self.profile, self.port, self.env)
+
+    def stop(self):
+        if self.process is not None:
+            stop_gunicorn(self.process)
+            self.process = None
+
+    def client(self):
+        state = {"connection": http.client.HTTPConnection('localhost', self.port, timeout=60)}
+
+        def send(method, path, headers, body):
+            payload = json.dumps(body).encode('utf-8') if body is not None else None
+            if payload is not None:
+                headers = dict(headers, **{'Content-Type': 'application/json'})
+            try:
+                state["connection"].request(method, path, body=payload, headers=headers)
+                response = state["connection"].getresponse()
+                data = response.read()
+            except (OSError, http.client.HTTPException):
+                # Worker recycled (max_requests) or timed out: reconnect for the next request
+                state["connection"].close()
+                state["connection"] = http.client.HTTPConnection('localhost', self.port, timeout=60)
+                raise
+            if response.getheader('Connection', '').lower() == 'close':
+                state["connection"].close()
+            return response.status, response.getheader('ETag'), data
+
+        return send
+
+    def memory(self):
+        return {"pss_mb": tree_pss_kb(self.process.pid) / 1024}
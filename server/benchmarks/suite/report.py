@@ -0,0 +1,108 @@
+"""Summaries, JSON result files and regression diffs."""
+import json
+import platform
+import subprocess
+import sys
+from datetime import datetime, timezone
+
+METRICS = ("rps", "p50_ms", "p95_ms", "p99_ms")
+
+
+def percentile(sorted_values, fraction):
+    if not sorted_values:
+        return 0.0
+    index = min(len(sorted_values) - 1, int(round(fraction * (len(sorted_values) - 1))))
+    return sorted_values[index]
+
+
+def summarize_latencies(values, elapsed):
+    values = sorted(values)
+    return {
+        "count": len(values),
+        "rps": round(len(values) / elapsed, 2) if elapsed else 0.0,
+        "mean_ms": round(sum(values) / len(values) * 1000, 3) if values else 0.0,
+        "p50_ms": round(percentile(values, 0.50) * 1000, 3),
+        "p95_ms": round(percentile(values, 0.95) * 1000, 3),
+        "p99_ms": round(percentile(values, 0.99) * 1000, 3),
+        "max_ms": round(values[-1] * 1000, 3) if values else 0.0,
+    }
+
+
+def git_revision():
+    try:
+        return subprocess.run(["git", "rev-parse", "--short", "HEAD"], capture_output=True, text=True,
+                              check=True).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def build_result(samples, elapsed, meta, memory):
+    routes = {}
+    everything = []
+    for route in sorted(samples.latencies):
+        values = samples.latencies[route]
+        everything.extend(values)
+        routes[route] = summarize_latencies(values, elapsed)
+        routes[route]["statuses"] = {str(status): count for status, count in sorted(samples.statuses[route].items())}
+
+    return {
+        "meta": dict(meta, revision=git_revision(), python=platform.python_version(),
+                     timestamp=datetime.now(timezone.utc).isoformat(timespec='seconds')),
+        "overall": summarize_latencies(everything, elapsed),
+        "routes": routes,
+        "memory": {name: round(value, 1) for name, value in memory.items()},
+        "client_errors": dict(samples.failures),
+    }
+
+
+def print_result(result, out=sys.stdout):
+    meta = result["meta"]
+    print(f"{meta['scenario']} via {meta['driver']}"
+          f"{' (' + meta['profile'] + ')' if meta.get('profile') else ''}, "
+          f"{meta['concurrency']} clients, {meta['duration']:.0f}s, revision {meta['revision']}", file=out)
+    print(f"{'route':<28}{'count':>8}{'req/s':>9}{'p50 ms':>9}{'p95 ms':>9}{'p99 ms':>9}  statuses", file=out)
+    for route, stats in list(result["routes"].items()) + [("(all)", result["overall"])]:
+        statuses = ' '.join(f"{status}:{count}" for status, count in stats.get("statuses", {}).items())
+        print(f"{route:<28}{stats['count']:>8}{stats['rps']:>9.1f}{stats['p50_ms']:>9.2f}"
+              f"{stats['p95_ms']:>9.2f}{stats['p99_ms']:>9.2f}  {statuses}", file=out)
+    print("memory: " + ', '.join(f"{name} {value} MB" for name, value in result["memory"].items()), file=out)
+    if result["client_errors"]:
+        print(f"client errors: {result['client_errors']}", file=out)
+
+
+def compare(before, after, threshold=10.0, out=sys.stdout):
+    """Print per-route changes; returns the list of regressions beyond ``threshold`` percent."""
+    regressions = []
+    print(f"{before['meta'].get('revision')} -> {after['meta'].get('revision')} "
+          f"({after['meta']['scenario']}, threshold {threshold:.0f}%)", file=out)
+    print(f"{'route':<28}" + ''.join(f"{metric:>18}" for metric in METRICS), file=out)
+
+    routes = sorted(set(before["routes"]) | set(after["routes"])) + ["(all)"]
+    for route in routes:
+        old = before["overall"] if route == "(all)" else before["routes"].get(route)
+        new = after["overall"] if route == "(all)" else after["routes"].get(route)
+        if old is None or new is None:
+            print(f"{route:<28}  {'only in ' + ('after' if old is None else 'before'):>16}", file=out)
+            continue
+        cells = []
+        for metric in METRICS:
+            change = (new[metric] - old[metric]) / old[metric] * 100 if old[metric] else 0.0
+            # Throughput going down is the regression; for latencies it's going up
+            worse = -change if metric == "rps" else change
+            flag = '!' if worse > threshold else ' '
+            if worse > threshold:
+                regressions.append((route, metric, old[metric], new[metric]))
+            cells.append(f"{new[metric]:>9.1f} {change:>+6.1f}%{flag}")
+        print(f"{route:<28}" + ''.join(f"{cell:>18}" for cell in cells), file=out)
+    return regressions
+
+
+def write_result(result, path):
+    with open(path, 'w') as output:
+        json.dump(result, output, indent=2, sort_keys=True)
+        output.write('\n')
+
+
+def read_result(path):
+    with open(path) as result_file:
+        return json.load(result_file)
@@ -0,0 +1,109 @@
+"""Drive a scenario with N concurrent clients and collect per-route samples."""
+import json
+import random
+import threading
+import time
+from collections import Counter, defaultdict
+
+from benchmarks.suite.scenarios import Session
+from benchmarks.suite.seed import BENCH_PASSWORD
+
+
+def sign_in(send, username, attempts=20):
+    for _ in range(attempts):
+        status, _etag, body = send("POST", "/auth/signin", {}, {"username": username, "password": BENCH_PASSWORD})
+        if status == 200:
+            return json.loads(body)["token"]
+        if status != 503:
+            break
+        time.sleep(0.5)  # bcrypt admission control is shedding load; wait our turn
+    raise RuntimeError(f"Could not sign in {username}: {status} {body[:200]!r}")
+
+
+class Samples:
+    def __init__(self):
+        self.latencies = defaultdict(list)
+        self.statuses = defaultdict(Counter)
+        self.failures = Counter()
+        self._lock = threading.Lock()
+
+    def merge(self, latencies, statuses, failures):
+        with self._lock:
+            for route, values in latencies.items():
+                self.latencies[route].extend(values)
+            for route, counts in statuses.items():
+                self.statuses[route].update(counts)
+            self.failures.update(failures)
+
+
+def run_scenario(driver, steps, fixture, concurrency=16, duration=10.0, warmup=2.0, seed=1, revalidate=True):
+    """Run ``steps`` until ``duration`` elapses. Returns (Samples, elapsed seconds)."""
+    weights = [step.weight for step in steps]
+    samples = Samples()
+    timing = {}
+
+    def start_clock():
+        now = time.perf_counter()
+        timing["measure"] = now + warmup
+        timing["stop"] = now + warmup + duration
+
+    # Clients sign in first; the clock starts once every one of them is ready
+    ready = threading.Barrier(concurrency + 1, action=start_clock)
+
+    def client(index):
+        send = driver.client()
+        rng = random.Random(seed * 1000 + index)
+        session = Session(fixture=fixture, rng=rng, username=fixture["usernames"][index % len(fixture["usernames"])])
+        try:
+            session.tokens = {
+                "user": sign_in(send, session.username),
+                "admin": sign_in(send, fixture["admin"]),
+            }
+        except Exception:
+            ready.abort()
+            raise
+        ready.wait()
+
+        latencies = defaultdict(list)
+        statuses = defaultdict(Counter)
+        failures = Counter()
+        while time.perf_counter() < timing["stop"]:
+            step = rng.choices(steps, weights)[0]
+            request = step.build(session)
+            if request is None:
+                continue
+            headers = {}
+            if request.auth:
+                headers["Authorization"] = f"Bearer {session.tokens[request.auth]}"
+            if revalidate and request.method == "GET" and request.path in session.etags:
+                headers["If-None-Match"] = session.etags[request.path]
+
+            started = time.perf_counter()
+            try:
+                status, etag, body = send(request.method, request.path, headers, request.body)
+            except Exception as error:
+                failures[f"{step.route}: {type(error).__name__}"] += 1
+                continue
+            elapsed = time.perf_counter() - started
+
+            if etag and request.method == "GET":
+                session.etags[request.path] = etag
+            if step.on_response:
+                step.on_response(session, status, body)
+            if started < timing["measure"]:
+                continue  # warm-up
+            latencies[step.route].append(elapsed)
+            statuses[step.route][status] += 1
+
+        samples.merge(latencies, statuses, failures)
+
+    threads = [threading.Thread(target=client, args=(index,), daemon=True) for index in range(concurrency)]
+    for thread in threads:
+        thread.start()
+    try:
+        ready.wait()
+    except threading.BrokenBarrierError:
+        raise RuntimeError("A benchmark client failed to sign in; see the traceback above")
+    for thread in threads:
+        thread.join()
+    return samples, duration
@@ -0,0 +1,186 @@
+"""Request mixes.
+
+A scenario is a weighted list of steps. Each step has a route label (how
+results are grouped, e.g. ``GET /shows/<show_id>``) and a function that
+builds one request from the per-client ``Session``. Steps that create rows
+push their ids onto the session so later deletes have something to remove.
+"""
+import json
+import random
+import uuid
+from dataclasses import dataclass, field
+from datetime import date, timedelta
+
+from benchmarks.suite.seed import BENCH_PASSWORD
+
+
+@dataclass
+class Request:
+    method: str
+    path: str
+    body: object = None
+    auth: str = None  # None, "user" or "admin"
+
+
+@dataclass
+class Step:
+    route: str
+    weight: int
+    build: object
+    on_response: object = None
+
+
+@dataclass
+class Session:
+    """Per-client state: its own RNG, user, tokens, ETags and created rows."""
+    fixture: dict
+    rng: random.Random
+    username: str
+    tokens: dict = field(default_factory=dict)
+    etags: dict = field(default_factory=dict)
+    created: dict = field(default_factory=lambda: {"shows": [], "bands": [], "venues": []})
+
+    @property
+    def user_id(self):
+        return self.fixture["user_ids"][self.username]
+
+    def pick(self, key):
+        return self.rng.choice(self.fixture[key])
+
+    def owned(self, key):
+        return self.fixture[key].get(self.user_id) or [None]
+
+
+# --- Request bodies ---
+def show_body(session):
+    showdate = date.today() + timedelta(days=session.rng.randint(1, 180))
+    return {
+        "showdate": showdate.isoformat(),
+        "showdescription": "Benchmark show",
+        "showtime": f"{showdate.isoformat()} 20:00:00",
+        "location": "Benchmark Hall",
+        "bandsplaying": session.rng.sample(session.fixture["band_names"], k=2),
+        "ticketprice": "25.00",
+        "tourposter": "https://example.com/posters/bench.jpg",
+    }
+
+
+def band_body(session):
+    return {
+        "bandname": f"Benchmark Band {uuid.uuid4().hex[:8]}",
+        "hometown": "Nashville, TN",
+        "genre": session.pick("genres"),
+        "yearstarted": 2020,
+        "membernames": ["A", "B"],
+        "bandphoto": "https://example.com/bands/bench.jpg",
+        "banddescription": "Created by the benchmark suite",
+    }
+
+
+def venue_body(session):
+    return {
+        "capacity": 300,
+        "venuename": f"Benchmark Room {uuid.uuid4().hex[:8]}",
+        "location": "Nashville, TN",
+        "venuemanager": "Bench Manager",
+    }
+
+
+def signin_body(session):
+    return {"username": session.username, "password": BENCH_PASSWORD}
+
+
+def remember(kind, key):
+    """on_response hook: keep the id of a created row for a later delete."""
+    def hook(session, status, body):
+        if status != 201:
+            return
+        created = json.loads(body)[key]
+        # Write routes return RETURNING rows; DictRow serializes as a list with id first
+        session.created[kind].append(created["id"] if isinstance(created, dict) else created[0])
+    return hook
+
+
+def delete_created(kind, fallback):
+    def build(session):
+        if session.created[kind]:
+            return Request("DELETE", f"/{kind}/{session.created[kind].pop()}", auth=fallback)
+        return None
+    return build
+
+
+# --- Scenarios ---
+def catalog_browse():
+    """The public site: list pages, detail pages and filters, with browser revalidation."""
+    return [
+        Step("GET /shows", 25, lambda s: Request("GET", "/shows?limit=20")),
+        Step("GET /shows/upcoming", 10, lambda s: Request("GET", "/shows/upcoming?limit=20")),
+        Step("GET /shows?from", 10, lambda s: Request("GET", f"/shows?limit=20&from={date.today().isoformat()}")),
+        Step("GET /shows?band", 5, lambda s: Request("GET", "/shows?limit=20&band=" + s.pick("band_names").replace(' ', '+'))),
+        Step("GET /shows?genre", 4, lambda s: Request("GET", "/shows?limit=20&genre=" + s.pick("genres").replace(' ', '+'))),
+        Step("GET /shows/<show_id>", 20, lambda s: Request("GET", f"/shows/{s.pick('show_ids')}")),
+        Step("GET /shows/<show_id>?include", 8,
+             lambda s: Request("GET", f"/shows/{s.pick('show_ids')}?include=bands,venue")),
+        Step("GET /shows?include", 4, lambda s: Request("GET", "/shows?limit=20&include=bands,venue")),
+        Step("GET /bands", 8, lambda s: Request("GET", "/bands?limit=20")),
+        Step("GET /bands/<band_id>", 10, lambda s: Request("GET", f"/bands/{s.pick('band_ids')}")),
+        Step("GET /venues", 5, lambda s: Request("GET", "/venues?limit=20")),
+        Step("GET /venues/<venue_id>", 5, lambda s: Request("GET", f"/venues/{s.pick('venue_ids')}")),
+        Step("GET /bands/<band_id>/shows", 4, lambda s: Request("GET", f"/bands/{s.pick('band_ids')}/shows")),
+        Step("GET /venues/<venue_id>/shows", 3, lambda s: Request("GET", f"/venues/{s.pick('venue_ids')}/shows")),
+        Step("GET /search", 4, lambda s: Request("GET", "/search?limit=20&q=" + s.pick("band_names").split()[1])),
+        Step("GET /shows?all", 2, lambda s: Request("GET", "/shows?all=true")),
+        Step("GET /", 1, lambda s: Request("GET", "/")),
+    ]
+
+
+def dashboard_edit():
+    """Signed-in staff: load the dashboard, create, edit and delete their own rows."""
+    return [
+        Step("GET /auth/me", 10, lambda s: Request("GET", "/auth/me", auth="user")),
+        Step("GET /shows?all", 10, lambda s: Request("GET", "/shows?all=true")),
+        Step("GET /venues?all", 5, lambda s: Request("GET", "/venues?all=true")),
+        Step("GET /bands?all", 5, lambda s: Request("GET", "/bands?all=true")),
+        Step("POST /shows", 10, lambda s: Request("POST", "/shows", show_body(s), auth="user"),
+             remember("shows", "show")),
+        Step("PUT /shows/<show_id>", 20, lambda s: Request("PUT", f"/shows/{s.rng.choice(s.owned('shows_by_owner'))}",
+                                                           show_body(s), auth="user")),
+        Step("DELETE /shows/<show_id>", 8, delete_created("shows", "user")),
+        Step("PUT /venues/<venue_id>", 8, lambda s: Request("PUT", f"/venues/{s.rng.choice(s.owned('venues_by_owner'))}",
+                                                            venue_body(s), auth="user")),
+        Step("PUT /bands/<band_id>", 4, lambda s: Request("PUT", f"/bands/{s.pick('band_ids')}",
+                                                          {"hometown": s.rng.choice(["Austin, TX", "Denver, CO"])},
+                                                          auth="admin")),
+        Step("GET /auth/users", 2, lambda s: Request("GET", "/auth/users", auth="admin")),
+    ]
+
+
+def signin_storm():
+    """Doors open: mostly signins, with catalog reads that must not starve behind them."""
+    return [
+        Step("POST /auth/signin", 85, lambda s: Request("POST", "/auth/signin", signin_body(s))),
+        Step("GET /shows", 10, lambda s: Request("GET", "/shows?limit=20")),
+        Step("GET /shows/<show_id>", 5, lambda s: Request("GET", f"/shows/{s.pick('show_ids')}")),
+    ]
+
+
+def all_routes():
+    """Every route in the auth, venue manager, shows, bands and venues blueprints."""
+    return catalog_browse() + dashboard_edit() + [
+        Step("POST /auth/signup", 1, lambda s: Request("POST", "/auth/signup",
+                                                       {"username": f"bench_tmp_{uuid.uuid4().hex}", "password": "x"})),
+        Step("POST /auth/signin", 2, lambda s: Request("POST", "/auth/signin", signin_body(s))),
+        Step("POST /bands", 2, lambda s: Request("POST", "/bands", band_body(s), auth="admin"), remember("bands", "band")),
+        Step("DELETE /bands/<band_id>", 2, delete_created("bands", "admin")),
+        Step("POST /venues", 2, lambda s: Request("POST", "/venues", venue_body(s), auth="user"),
+             remember("venues", "venue")),
+        Step("DELETE /venues/<venue_id>", 2, delete_created("venues", "user")),
+    ]
+
+
+SCENARIOS = {
+    "catalog_browse": catalog_browse,
+    "dashboard_edit": dashboard_edit,
+    "signin_storm": signin_storm,
+    "all_routes": all_routes,
+}
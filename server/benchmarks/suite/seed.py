@@ -0,0 +1,141 @@
+"""Deterministic synthetic catalog data.
+
+Every benchmark user shares one password (BENCH_PASSWORD), hashed once at
+the app's configured BCRYPT_ROUNDS so signin costs what it costs in
+production. Usernames are bench_admin and bench_user_<n>.
+"""
+import os
+import random
+from datetime import date, datetime, time, timedelta
+
+import bcrypt
+from psycopg2.extras import execute_values
+
+from migrate import run_migrations
+from reports import rebuild as rebuild_reports
+from upcoming import rebuild as rebuild_upcoming
+
+BENCH_PASSWORD = "bench-password"
+ADMIN_USERNAME = "bench_admin"
+
+GENRES = ["punk", "rock", "metal", "indie", "folk", "jazz", "hip hop", "electronic", "country", "blues"]
+CITIES = ["Nashville, TN", "Austin, TX", "Chicago, IL", "Seattle, WA", "Denver, CO", "Atlanta, GA",
+          "Portland, OR", "Brooklyn, NY", "Athens, GA", "Minneapolis, MN", "Louisville, KY", "Omaha, NE"]
+WORDS = ["electric", "midnight", "velvet", "static", "hollow", "neon", "broken", "golden", "wild",
+         "silver", "paper", "iron", "lucky", "secret", "northern", "desert", "river", "ghost"]
+
+
+def _name(rng, count):
+    return ' '.join(rng.choice(WORDS).title() for _ in range(count))
+
+
+def seed_database(connection, users=50, bands=500, venues=100, shows=10_000, seed=1, reset=False):
+    """Apply migrations and insert the requested volumes. Returns the row counts."""
+    rng = random.Random(seed)
+    run_migrations(connection)
+    cursor = connection.cursor()
+
+    if reset:
+        cursor.execute("TRUNCATE shows, bands, venues, users RESTART IDENTITY CASCADE")
+
+    rounds = int(os.getenv('BCRYPT_ROUNDS', 12))
+    password_hash = bcrypt.hashpw(BENCH_PASSWORD.encode('utf-8'), bcrypt.gensalt(rounds)).decode('utf-8')
+    user_rows = [(ADMIN_USERNAME, password_hash, 'admin')]
+    user_rows += [(f"bench_user_{number}", password_hash, 'staff') for number in range(1, users)]
+    execute_values(cursor, """
+        INSERT INTO users (username, password, role) VALUES %s
+        ON CONFLICT (username) DO UPDATE SET password = EXCLUDED.password
+    """, user_rows)
+    cursor.execute("SELECT id FROM users WHERE username LIKE 'bench\\_%' ORDER BY id")
+    user_ids = [row[0] for row in cursor.fetchall()]
+    admin_id = user_ids[0]
+
+    band_names = [f"The {_name(rng, 2)} {number}" for number in range(bands)]
+    execute_values(cursor, """
+        INSERT INTO bands (bandname, hometown, genre, yearstarted, membernames, bandphoto, banddescription, user_id)
+        VALUES %s
+    """, [
+        (name, rng.choice(CITIES), rng.choice(GENRES), rng.randint(1965, 2024),
+         [_name(rng, 2) for _ in range(rng.randint(2, 6))],
+         f"https://example.com/bands/{number}.jpg",
+         f"{name} play {rng.choice(GENRES)} out of {rng.choice(CITIES)}. " * rng.randint(2, 8),
+         admin_id)
+        for number, name in enumerate(band_names)
+    ], page_size=1000)
+
+    venue_names = [f"The {_name(rng, 1)} {rng.choice(['Room', 'Hall', 'Theatre', 'Club', 'Ballroom'])} {number}"
+                   for number in range(venues)]
+    execute_values(cursor, """
+        INSERT INTO venues (capacity, venuename, location, venuemanager, user_id) VALUES %s
+    """, [
+        (rng.choice([150, 300, 500, 900, 1500, 3000]), name, rng.choice(CITIES), _name(rng, 2), rng.choice(user_ids))
+        for name in venue_names
+    ], page_size=1000)
+
+    today = date.today()
+    show_rows = []
+    # One show per venue per night: two at once would break the venue slot constraint (migrations/007)
+    bookings = rng.sample(range(len(venue_names) * 731), k=min(shows, len(venue_names) * 731))
+    for number, booking in enumerate(bookings):
+        venue_number, day = divmod(booking, 731)
+        showdate = today + timedelta(days=day - 365)
+        lineup = rng.sample(band_names, k=min(len(band_names), rng.randint(1, 4)))
+        show_rows.append((
+            showdate,
+            f"{lineup[0]} with special guests. " * rng.randint(1, 6),
+            datetime.combine(showdate, time(rng.choice([18, 19, 20, 21]), rng.choice([0, 30]))),
+            venue_names[venue_number],
+            lineup,
+            f"{rng.randint(10, 120)}.{rng.choice(['00', '50', '99'])}",
+            rng.choice(user_ids),
+            f"https://example.com/posters/{number}.jpg",
+        ))
+    execute_values(cursor, """
+        INSERT INTO shows (showdate, showdescription, showtime, location, bandsplaying, ticketprice, user_id, tourposter)
+        VALUES %s
+    """, show_rows, page_size=1000)
+
+    cursor.execute("ANALYZE users; ANALYZE bands; ANALYZE venues; ANALYZE shows; ANALYZE show_bands;")
+    connection.commit()
+    # Bulk inserts bypass the write routes that keep the upcoming feed current
+    rebuild_upcoming(connection)
+    # The report triggers recount every insert, but not the TRUNCATE above
+    rebuild_reports(connection)
+    return {"users": len(user_rows), "bands": bands, "venues": venues, "shows": len(show_rows)}
+
+
+def load_fixture(connection):
+    """Ids and names the scenarios pick from, read back from the database."""
+    cursor = connection.cursor()
+    cursor.execute("SELECT id, username FROM users WHERE username LIKE 'bench\\_%' ORDER BY id")
+    users = cursor.fetchall()
+    cursor.execute("SELECT id, bandname, genre FROM bands ORDER BY id")
+    bands = cursor.fetchall()
+    cursor.execute("SELECT id, user_id FROM venues ORDER BY id")
+    venues = cursor.fetchall()
+    cursor.execute("SELECT id, user_id FROM shows ORDER BY id")
+    shows = cursor.fetchall()
+    connection.rollback()
+    if not users or not shows:
+        raise SystemExit("No benchmark data found; run `python -m benchmarks.suite seed` first")
+
+    user_ids = {username: user_id for user_id, username in users}
+    return {
+        "admin": ADMIN_USERNAME,
+        "usernames": [username for _, username in users if username != ADMIN_USERNAME],
+        "user_ids": user_ids,
+        "band_ids": [band_id for band_id, _, _ in bands],
+        "band_names": [name for _, name, _ in bands],
+        "genres": sorted({genre for _, _, genre in bands if genre}),
+        "venue_ids": [venue_id for venue_id, _ in venues],
+        "venues_by_owner": _group(venues),
+        "show_ids": [show_id for show_id, _ in shows],
+        "shows_by_owner": _group(shows),
+    }
+
+
+def _group(rows):
+    grouped = {}
+    for row_id, owner in rows:
+        grouped.setdefault(owner, []).append(row_id)
+    return grouped
@@ -0,0 +1,617 @@
+import csv
+import io
+import json
+import os
+import tempfile
+from datetime import date, datetime, time
+from decimal import Decimal, InvalidOperation
+
+import psycopg2
+from flask import Blueprint, Response, jsonify, request, g, stream_with_context
+from psycopg2.extras import execute_values
+
+from auth_middleware import token_required
+from cache import response_cache
+from data_access import ShowRecord, columns
+from db_helpers import copy_allowed, db_connection, retry_on_deadlock
+from scheduling import is_slot_conflict, staged_slot_conflicts
+from show_formatting import format_show_dates
+from shows_blueprint import show_cache_namespaces
+from upcoming import refresh_upcoming
+
+bulk_blueprint = Blueprint('bulk_blueprint', __name__)
+
+MAX_IMPORT_ROWS = int(os.getenv('MAX_IMPORT_ROWS', 100000))
+MAX_BATCH_OPERATIONS = int(os.getenv('MAX_BATCH_OPERATIONS', 1000))
+EXPORT_CHUNK_SIZE = 64 * 1024
+# Exports are spooled to memory up to this size, then to a temp file
+EXPORT_SPOOL_SIZE = 8 * 1024 * 1024
+
+
+class RowError(ValueError):
+    pass
+
+
+# --- Field parsers: turn one NDJSON/CSV value into what COPY expects ---
+def _text(value):
+    return None if value in (None, '') else str(value)
+
+
+def _integer(value):
+    if value in (None, ''):
+        return None
+    if isinstance(value, bool):
+        raise RowError("expected an integer")
+    try:
+        return int(value)
+    except (TypeError, ValueError):
+        raise RowError("expected an integer")
+
+
+def _decimal(value):
+    if value in (None, ''):
+        return None
+    try:
+        return Decimal(str(value))
+    except InvalidOperation:
+        raise RowError("expected a number")
+
+
+def _date(value):
+    if value in (None, ''):
+        return None
+    try:
+        return date.fromisoformat(str(value)[:10])
+    except ValueError:
+        raise RowError("expected a date in YYYY-MM-DD format")
+
+
+def _showtime(value):
+    """Accept a full timestamp, or HH:MM[:SS] which validate_row puts on the show's date."""
+    if value in (None, ''):
+        return None
+    value = str(value)
+    try:
+        if len(value) <= 8:
+            return time.fromisoformat(value)
+        return datetime.fromisoformat(value)
+    except ValueError:
+        raise RowError("expected a time (HH:MM[:SS]) or timestamp")
+
+
+def _text_array(value):
+    """A JSON list in NDJSON, or a semicolon-separated string in CSV."""
+    if value in (None, ''):
+        return None
+    if isinstance(value, str):
+        return [item.strip() for item in value.split(';') if item.strip()]
+    if isinstance(value, list) and all(isinstance(item, str) for item in value):
+        return value
+    raise RowError("expected a list of strings")
+
+
+# (column, parser, required on insert, staging column type)
+IMPORT_SPECS = {
+    'shows': {
+        'fields': (
+            ('showdate', _date, True, 'date'),
+            ('showdescription', _text, False, 'text'),
+            ('showtime', _showtime, False, 'timestamp'),
+            ('location', _text, True, 'text'),
+            ('bandsplaying', _text_array, False, 'text[]'),
+            ('ticketprice', _decimal, False, 'numeric'),
+            ('tourposter', _text, False, 'text'),
+        ),
+        # Imported rows belong to the importer, and existing rows can only be
+        # updated by their owner (the same rule as PUT /shows/<id>)
+        'owned': True,
+    },
+    'bands': {
+        'fields': (
+            ('bandname', _text, True, 'text'),
+            ('hometown', _text, False, 'text'),
+            ('genre', _text, False, 'text'),
+            ('yearstarted', _integer, False, 'integer'),
+            ('membernames', _text_array, False, 'text[]'),
+            ('bandphoto', _text, False, 'text'),
+            ('banddescription', _text, False, 'text'),
+        ),
+        # Updating bands requires the admin role (as in PUT /bands/<id>)
+        'owned': False,
+    },
+    'venues': {
+        'fields': (
+            ('capacity', _integer, False, 'integer'),
+            ('venuename', _text, True, 'text'),
+            ('location', _text, False, 'text'),
+            ('venuemanager', _text, False, 'text'),
+        ),
+        'owned': True,
+    },
+}
+
+
+def validate_row(spec, raw_row):
+    """Parse one import row into ``{column: value}``, raising RowError on bad input."""
+    if not isinstance(raw_row, dict):
+        raise RowError("expected an object")
+
+    row = {'id': _integer(raw_row.get('id'))}
+    for column, parse, required, _sql_type in spec['fields']:
+        try:
+            row[column] = parse(raw_row.get(column))
+        except RowError as error:
+            raise RowError(f"{column}: {error}")
+        if required and row['id'] is None and row[column] is None:
+            raise RowError(f"{column} is required")
+
+    # The client stores showtime as "<showdate> HH:MM:00"; do the same for bare times
+    if isinstance(row.get('showtime'), time):
+        row['showtime'] = datetime.combine(row.get('showdate') or date(1970, 1, 1), row['showtime'])
+    return row
+
+
+def read_import_rows():
+    """Yield ``(line, raw_row_or_error)`` from an NDJSON or CSV request body."""
+    stream = io.StringIO(request.get_data(as_text=True), newline='')
+    if request.mimetype == 'text/csv':
+        reader = csv.DictReader(stream)
+        for line, raw_row in enumerate(reader, start=2):
+            yield line, raw_row
+        return
+
+    for line, text in enumerate(stream, start=1):
+        if not text.strip():
+            continue
+        try:
+            yield line, json.loads(text)
+        except ValueError:
+            yield line, RowError("invalid JSON")
+
+
+# --- COPY text format encoding ---
+def _copy_array(values):
+    items = ('"' + item.replace('\\', '\\\\').replace('"', '\\"') + '"' for item in values)
+    return '{' + ','.join(items) + '}'
+
+
+def _copy_value(value):
+    if value is None:
+        return '\\N'
+    if isinstance(value, list):
+        value = _copy_array(value)
+    elif isinstance(value, datetime):
+        value = value.isoformat(sep=' ')
+    else:
+        value = str(value)
+    return value.replace('\\', '\\\\').replace('\t', '\\t').replace('\n', '\\n').replace('\r', '\\r')
+
+
+def load_staging(cursor, table, spec, rows):
+    """COPY validated rows into a transaction-local staging table."""
+    staging = f"{table}_import"
+    columns = [column for column, _parse, _required, _sql_type in spec['fields']]
+    column_defs = ', '.join(f"{column} {sql_type}" for column, _parse, _required, sql_type in spec['fields'])
+    cursor.execute(f"CREATE TEMP TABLE {staging} (line integer, id integer, {column_defs}) ON COMMIT DROP")
+
+    buffer = io.StringIO()
+    for line, row in rows:
+        values = [line, row['id']] + [row[column] for column in columns]
+        buffer.write('\t'.join(_copy_value(value) for value in values))
+        buffer.write('\n')
+    buffer.seek(0)
+    with copy_allowed():
+        cursor.copy_expert(f"COPY {staging} (line, id, {', '.join(columns)}) FROM STDIN", buffer)
+    return staging, columns
+
+
+def merge_staging(cursor, table, spec, staging, columns):
+    """Apply staged rows: rows with an id update that row, the rest are inserted.
+
+    Returns ``(inserted_ids, updated_ids, rejected_lines)``. Columns left empty
+    in an update keep their current value.
+    """
+    owner_params = {'user_id': g.user['id'], 'is_admin': g.user.get('role') == 'admin'}
+    if spec['owned']:
+        update_allowed = "target.user_id = %(user_id)s"
+    else:
+        update_allowed = "%(is_admin)s"
+
+    assignments = ', '.join(f"{column} = COALESCE(staged.{column}, target.{column})" for column in columns)
+    cursor.execute(f"""
+        UPDATE {table} AS target
+        SET {assignments}
+        FROM {staging} AS staged
+        WHERE staged.id IS NOT NULL AND target.id = staged.id AND {update_allowed}
+        RETURNING staged.line, target.id
+    """, owner_params)
+    updated = cursor.fetchall()
+    updated_lines = {line for line, _id in updated}
+
+    cursor.execute(f"SELECT line FROM {staging} WHERE id IS NOT NULL ORDER BY line")
+    rejected_lines = [line for (line,) in cursor.fetchall() if line not in updated_lines]
+
+    insert_columns = list(columns)
+    select_columns = list(columns)
+    if spec['owned']:
+        insert_columns.append('user_id')
+        select_columns.append('%(user_id)s')
+    if table == 'shows':
+        # Same default create_show uses when no showtime is given
+        select_columns[columns.index('showtime')] = "COALESCE(showtime, '1970-01-01 00:00:00')"
+    cursor.execute(f"""
+        INSERT INTO {table} ({', '.join(insert_columns)})
+        SELECT {', '.join(select_columns)} FROM {staging}
+        WHERE id IS NULL
+        ORDER BY line
+        RETURNING id
+    """, owner_params)
+    inserted_ids = [row[0] for row in cursor.fetchall()]
+
+    return inserted_ids, [row_id for _line, row_id in updated], rejected_lines
+
+
+def reject_import_slot_conflicts(cursor, staging):
+    """Take staged shows that would double-book their venue out of the import;
+    an error entry for each (see scheduling.py)."""
+    conflicts = staged_slot_conflicts(cursor, f"SELECT line AS key, id, showdate, showtime, location FROM {staging}")
+    if not conflicts:
+        return []
+    cursor.execute(f"DELETE FROM {staging} WHERE line = ANY(%s)", (list(conflicts),))
+    return [{"line": line, "error": "The venue is already booked at that time",
+             "conflicts": show_ids, "lines": lines}
+            for line, (show_ids, lines) in sorted(conflicts.items())]
+
+
+def linked_shows(cursor, table, row_ids):
+    """Shows whose bandsplaying/location the 003 triggers may have rewritten
+    or relinked for these bands/venues; None for show imports."""
+    if table == 'bands':
+        cursor.execute("SELECT DISTINCT show_id FROM show_bands WHERE band_id = ANY(%s)", (row_ids,))
+    elif table == 'venues':
+        cursor.execute("SELECT id FROM shows WHERE venue_id = ANY(%s)", (row_ids,))
+    else:
+        return None
+    return [row[0] for row in cursor.fetchall()]
+
+
+def import_rows(table):
+    spec = IMPORT_SPECS[table]
+    strict = request.args.get('strict', '').lower() in ('1', 'true', 'yes')
+    valid_rows = []
+    errors = []
+
+    for line, raw_row in read_import_rows():
+        if len(valid_rows) + len(errors) >= MAX_IMPORT_ROWS:
+            return jsonify({"error": f"Imports are limited to {MAX_IMPORT_ROWS} rows"}), 413
+        try:
+            if isinstance(raw_row, RowError):
+                raise raw_row
+            valid_rows.append((line, validate_row(spec, raw_row)))
+        except RowError as error:
+            errors.append({"line": line, "error": str(error)})
+
+    if errors and strict:
+        return jsonify({"error": "Import rejected", "errors": errors}), 422
+    if not valid_rows:
+        return jsonify({"inserted": 0, "updated": 0, "ids": [], "errors": errors}), 200
+
+    with db_connection() as connection:
+        cursor = connection.cursor()
+        staging, columns = load_staging(cursor, table, spec, valid_rows)
+        if table == 'shows':
+            errors.extend(reject_import_slot_conflicts(cursor, staging))
+        inserted_ids, updated_ids, rejected_lines = merge_staging(cursor, table, spec, staging, columns)
+        errors.extend({"line": line, "error": "Row not found or not permitted"} for line in rejected_lines)
+        errors.sort(key=lambda error: error["line"])
+        if errors and strict:
+            connection.rollback()
+            return jsonify({"error": "Import rejected", "errors": errors}), 422
+        linked_show_ids = linked_shows(cursor, table, inserted_ids + updated_ids)
+        refresh_upcoming(connection, inserted_ids + updated_ids if linked_show_ids is None else linked_show_ids)
+        connection.commit()
+
+    singular = table[:-1]
+    response_cache.invalidate(table, *(f"{singular}:{row_id}" for row_id in updated_ids))
+    if linked_show_ids is not None:
+        response_cache.invalidate(*show_cache_namespaces(linked_show_ids))
+
+    return jsonify({
+        "inserted": len(inserted_ids),
+        "updated": len(updated_ids),
+        "ids": inserted_ids,
+        "errors": errors,
+    }), 200
+
+
+# --- /shows/batch: many creates, updates and deletes in one transaction ---
+BATCH_OPERATIONS = ('create', 'update', 'delete')
+
+
+def parse_batch_operations(operations):
+    """Validate every operation up front.
+
+    Returns ``(results, creates, updates, deletes)``: ``results`` has an error
+    entry for each rejected operation and None for the rest, which are sorted
+    into ``[(index, row)]`` (creates, updates) and ``[(index, id)]`` (deletes).
+    """
+    spec = IMPORT_SPECS['shows']
+    results = [None] * len(operations)
+    creates, updates, deletes = [], [], []
+    seen_ids = set()
+
+    for index, operation in enumerate(operations):
+        op = operation.get('op') if isinstance(operation, dict) else None
+        try:
+            if op not in BATCH_OPERATIONS:
+                raise RowError(f"op must be one of {', '.join(BATCH_OPERATIONS)}")
+            show_id = None
+            if op != 'create':
+                show_id = _integer(operation.get('id'))
+                if show_id is None:
+                    raise RowError("id is required")
+                # One UPDATE ... FROM can only apply one change per row
+                if show_id in seen_ids:
+                    raise RowError(f"show {show_id} appears in more than one operation")
+                seen_ids.add(show_id)
+            if op == 'delete':
+                deletes.append((index, show_id))
+                continue
+            show = operation.get('show')
+            if not isinstance(show, dict):
+                raise RowError("show must be an object")
+            row = validate_row(spec, {**show, 'id': show_id})
+            (creates if op == 'create' else updates).append((index, row))
+        except RowError as error:
+            results[index] = {"index": index, "op": op, "status": 400, "error": str(error)}
+
+    return results, creates, updates, deletes
+
+
+def batch_slot_conflicts(cursor, creates, updates):
+    """``{index: (show ids, operation indexes)}`` for the creates and updates
+    that would double-book their venue (see scheduling.py)."""
+    writes = creates + updates
+    return staged_slot_conflicts(cursor, """
+        SELECT * FROM unnest(%(keys)s::integer[], %(ids)s::integer[], %(showdates)s::date[],
+                             %(showtimes)s::timestamp[], %(locations)s::text[])
+            AS staged (key, id, showdate, showtime, location)
+    """, {
+        'keys': [index for index, _row in writes],
+        'ids': [row['id'] for _index, row in writes],
+        'showdates': [row['showdate'] for _index, row in writes],
+        'showtimes': [row['showtime'] for _index, row in writes],
+        'locations': [row['location'] for _index, row in writes],
+    })
+
+
+def create_shows(cursor, creates):
+    """INSERT every create in one statement; returns ShowRecords in input order."""
+    fields = [column for column, _parse, _required, _sql_type in IMPORT_SPECS['shows']['fields']]
+    rows = []
+    for _index, row in creates:
+        # Same default create_show uses when no showtime is given
+        row['showtime'] = row['showtime'] or datetime(1970, 1, 1)
+        rows.append([row[column] for column in fields] + [g.user['id']])
+    created = execute_values(cursor, f"""
+        INSERT INTO shows ({', '.join(fields)}, user_id) VALUES %s
+        RETURNING {columns(ShowRecord)}
+    """, rows, page_size=len(rows), fetch=True)
+    return [ShowRecord(*row) for row in created]
+
+
+def update_shows(cursor, updates):
+    """UPDATE every permitted update in one statement; ``{index: ShowRecord}``.
+
+    Like the importer, fields an operation leaves out keep their value, and
+    only the show's owner may change it (the rule PUT /shows/<id> applies).
+    """
+    spec_fields = IMPORT_SPECS['shows']['fields']
+    fields = [column for column, _parse, _required, _sql_type in spec_fields]
+    # Casts give the VALUES list column types even when a value is NULL
+    template = "(%s, %s, " + ', '.join(f"%s::{sql_type}" for _column, _parse, _required, sql_type in spec_fields) + ")"
+    assignments = ', '.join(f"{column} = COALESCE(staged.{column}, target.{column})" for column in fields)
+    owner_check = cursor.mogrify("target.user_id = %s", (g.user['id'],)).decode('utf-8')
+    updated = execute_values(cursor, f"""
+        UPDATE shows AS target
+        SET {assignments}
+        FROM (VALUES %s) AS staged (op_index, id, {', '.join(fields)})
+        WHERE target.id = staged.id AND {owner_check}
+        RETURNING staged.op_index, {columns(ShowRecord, 'target')}
+    """, [[index, row['id']] + [row[column] for column in fields] for index, row in updates],
+        template=template, page_size=len(updates), fetch=True)
+    return {index: ShowRecord(*row) for index, *row in updated}
+
+
+def delete_shows(cursor, deletes):
+    """DELETE every permitted delete in one statement; the ids it removed."""
+    cursor.execute("DELETE FROM shows WHERE id = ANY(%s) AND user_id = %s RETURNING id",
+                   ([show_id for _index, show_id in deletes], g.user['id']))
+    return {row[0] for row in cursor.fetchall()}
+
+
+def apply_batch(operations, strict):
+    results, creates, updates, deletes = parse_batch_operations(operations)
+
+    with db_connection() as connection:
+        cursor = connection.cursor()
+        conflicts = batch_slot_conflicts(cursor, creates, updates) if creates or updates else {}
+        for index, row in creates + updates:
+            if index not in conflicts:
+                continue
+            show_ids, indexes = conflicts[index]
+            results[index] = {"index": index, "op": operations[index]['op'], "id": row['id'], "status": 409,
+                              "error": "The venue is already booked at that time",
+                              "conflicts": show_ids, "operations": indexes}
+        creates = [(index, row) for index, row in creates if index not in conflicts]
+        updates = [(index, row) for index, row in updates if index not in conflicts]
+
+        created = create_shows(cursor, creates) if creates else []
+        updated = update_shows(cursor, updates) if updates else {}
+        deleted = delete_shows(cursor, deletes) if deletes else set()
+
+        # Tell "not yours" apart from "no such show" for the ones that didn't apply
+        refused = [(index, row['id']) for index, row in updates if index not in updated]
+        refused += [(index, show_id) for index, show_id in deletes if show_id not in deleted]
+        existing = set()
+        if refused:
+            cursor.execute("SELECT id FROM shows WHERE id = ANY(%s)", ([show_id for _index, show_id in refused],))
+            existing = {row[0] for row in cursor.fetchall()}
+        for index, show_id in refused:
+            op = operations[index]['op']
+            if show_id in existing:
+                results[index] = {"index": index, "op": op, "id": show_id, "status": 403,
+                                  "error": f"You are not authorized to {op} this show."}
+            else:
+                results[index] = {"index": index, "op": op, "id": show_id, "status": 404, "error": "Show not found"}
+
+        errors = [result for result in results if result is not None]
+        if errors and strict:
+            connection.rollback()
+            return jsonify({"error": "Batch rejected", "errors": errors}), 422
+
+        refresh_upcoming(connection, [show.id for show in created] + [show.id for show in updated.values()])
+        connection.commit()
+
+    for (index, _row), show in zip(creates, created):
+        results[index] = {"index": index, "op": "create", "id": show.id, "status": 201, "show": format_show_dates(show)}
+    for index, show in updated.items():
+        results[index] = {"index": index, "op": "update", "id": show.id, "status": 200, "show": format_show_dates(show)}
+    for index, show_id in deletes:
+        if show_id in deleted:
+            results[index] = {"index": index, "op": "delete", "id": show_id, "status": 200}
+
+    if created or updated or deleted:
+        response_cache.invalidate(*show_cache_namespaces([show.id for show in updated.values()] + list(deleted)))
+
+    return jsonify({
+        "created": len(created),
+        "updated": len(updated),
+        "deleted": len(deleted),
+        "results": results,
+    }), 200
+
+
+def export_rows(table):
+    spec = IMPORT_SPECS[table]
+    export_format = request.args.get('format', 'csv')
+    if export_format not in ('csv', 'ndjson'):
+        return jsonify({"error": "format must be csv or ndjson"}), 400
+
+    columns = ['id'] + [column for column, _parse, _required, _sql_type in spec['fields']]
+    if export_format == 'csv':
+        # Arrays go out semicolon-separated, the same shape the CSV importer reads
+        select_list = ', '.join(
+            f"array_to_string({column}, ';') AS {column}" if sql_type == 'text[]' else column
+            for column, _parse, _required, sql_type in [('id', None, False, 'integer')] + list(spec['fields'])
+        )
+        copy_sql = f"COPY (SELECT {select_list} FROM {table} ORDER BY id) TO STDOUT WITH (FORMAT csv, HEADER true)"
+        mimetype = 'text/csv'
+    else:
+        copy_sql = f"COPY (SELECT row_to_json(t) FROM (SELECT {', '.join(columns)} FROM {table} ORDER BY id) t) TO STDOUT"
+        mimetype = 'application/x-ndjson'
+
+    spool = tempfile.SpooledTemporaryFile(max_size=EXPORT_SPOOL_SIZE, mode='w+b')
+    with db_connection() as connection:
+        cursor = connection.cursor()
+        with copy_allowed():
+            cursor.copy_expert(copy_sql, spool)
+        connection.rollback()
+    spool.seek(0)
+
+    def generate():
+        try:
+            if export_format == 'csv':
+                while True:
+                    chunk = spool.read(EXPORT_CHUNK_SIZE)
+                    if not chunk:
+                        break
+                    yield chunk
+            else:
+                # COPY's text format doubles every backslash; row_to_json never
+                # emits raw tabs or newlines, so undoing that is all that's needed
+                for line in spool:
+                    yield line.replace(b'\\\\', b'\\')
+        finally:
+            spool.close()
+
+    response = Response(stream_with_context(generate()), mimetype=mimetype)
+    extension = 'csv' if export_format == 'csv' else 'ndjson'
+    response.headers['Content-Disposition'] = f'attachment; filename="{table}.{extension}"'
+    return response
+
+
+def slot_conflict(prefix, error):
+    """409 for a double booking the pre-check missed (a show booked by a
+    concurrent request in between); names the venue and slot that clashed."""
+    return jsonify({"error": f"{prefix}: the venue is already booked at that time",
+                    "detail": error.diag.message_detail}), 409
+
+
+def write_contention():
+    """503 for a write still deadlocked after retry_on_deadlock's attempts."""
+    response = jsonify({"error": "Too many concurrent writes to the same shows, please retry shortly"})
+    response.headers['Retry-After'] = '1'
+    return response, 503
+
+
+# POST routes to bulk-load NDJSON (application/x-ndjson) or CSV (text/csv) uploads
+@bulk_blueprint.route('/shows/import', methods=['POST'], defaults={'table': 'shows'})
+@bulk_blueprint.route('/bands/import', methods=['POST'], defaults={'table': 'bands'})
+@bulk_blueprint.route('/venues/import', methods=['POST'], defaults={'table': 'venues'})
+@token_required
+def bulk_import(table):
+    try:
+        return retry_on_deadlock(lambda: import_rows(table))
+    except psycopg2.extensions.TransactionRollbackError:
+        return write_contention()
+    except psycopg2.DataError as error:
+        return jsonify({"error": f"Import rejected: {error}"}), 400
+    except psycopg2.IntegrityError as error:
+        if is_slot_conflict(error):
+            return slot_conflict("Import rejected", error)
+        return jsonify({"error": f"Import rejected: {error}"}), 409
+    except Exception as error:
+        return jsonify({"error": str(error)}), 500
+
+
+# POST route to apply a list of show creates/updates/deletes in one transaction:
+# {"operations": [{"op": "create", "show": {...}}, {"op": "update", "id": 1, "show": {...}},
+#                 {"op": "delete", "id": 2}]}
+# Each operation gets a result with its own status (409 for one that would
+# double-book its venue); ?strict=true applies
+# nothing unless every operation succeeds
+@bulk_blueprint.route('/shows/batch', methods=['POST'])
+@token_required
+def shows_batch():
+    try:
+        payload = request.get_json(silent=True)
+        operations = payload.get('operations') if isinstance(payload, dict) else None
+        if not isinstance(operations, list):
+            return jsonify({"error": "Expected a JSON body with an operations list"}), 400
+        if len(operations) > MAX_BATCH_OPERATIONS:
+            return jsonify({"error": f"Batches are limited to {MAX_BATCH_OPERATIONS} operations"}), 413
+        strict = request.args.get('strict', '').lower() in ('1', 'true', 'yes')
+        return retry_on_deadlock(lambda: apply_batch(operations, strict))
+    except psycopg2.extensions.TransactionRollbackError:
+        return write_contention()
+    except psycopg2.DataError as error:
+        return jsonify({"error": f"Batch rejected: {error}"}), 400
+    except psycopg2.IntegrityError as error:
+        if is_slot_conflict(error):
+            return slot_conflict("Batch rejected", error)
+        return jsonify({"error": f"Batch rejected: {error}"}), 409
+    except Exception as error:
+        return jsonify({"error": str(error)}), 500
+
+
+# GET routes to stream a whole table out as CSV (default) or NDJSON
+@bulk_blueprint.route('/shows/export', methods=['GET'], defaults={'table': 'shows'})
+@bulk_blueprint.route('/bands/export', methods=['GET'], defaults={'table': 'bands'})
+@bulk_blueprint.route('/venues/export', methods=['GET'], defaults={'table': 'venues'})
+@token_required
+def bulk_export(table):
+    try:
+        return export_rows(table)
+    except Exception as error:
+        return jsonify({"error": str(error)}), 500
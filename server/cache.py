@@ -0,0 +1,245 @@
+import logging
+import os
+import pickle
+import threading
+import time
+from collections import OrderedDict
+from functools import wraps
+
+from flask import Response, g, make_response, request
+
+from db_helpers import reads_pinned
+
+logger = logging.getLogger(__name__)
+
+
+class LocalCache:
+    """Bounded in-process LRU cache with per-entry TTL (one per gunicorn worker).
+
+    Its generation counters are per worker too, so an invalidation only
+    reaches the worker that made it: the other workers serve their copies
+    for up to CACHE_TTL. gunicorn.conf.py switches to Redis or a short TTL
+    when it starts more than one worker.
+    """
+
+    def __init__(self, max_entries=1024):
+        self.max_entries = max_entries
+        self._entries = OrderedDict()
+        # Generation counters live apart from the LRU so they are never evicted;
+        # losing one would resurrect entries that were already invalidated.
+        self._counters = {}
+        self._lock = threading.Lock()
+
+    def get(self, key):
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                return None
+            value, expires_at = entry
+            if expires_at is not None and expires_at <= time.monotonic():
+                del self._entries[key]
+                return None
+            self._entries.move_to_end(key)
+            return value
+
+    def set(self, key, value, ttl=None):
+        expires_at = time.monotonic() + ttl if ttl else None
+        with self._lock:
+            self._entries[key] = (value, expires_at)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+
+    def delete(self, key):
+        with self._lock:
+            self._entries.pop(key, None)
+
+    def get_counter(self, key):
+        with self._lock:
+            return self._counters.get(key, 0)
+
+    def incr(self, key):
+        with self._lock:
+            self._counters[key] = self._counters.get(key, 0) + 1
+            return self._counters[key]
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+            self._counters.clear()
+
+    def __len__(self):
+        return len(self._entries)
+
+
+class RedisCache:
+    """Cache shared by every worker. Needs the optional ``redis`` package."""
+
+    def __init__(self, url, prefix='grp:'):
+        try:
+            import redis
+        except ImportError:
+            raise RuntimeError("CACHE_BACKEND=redis requires the 'redis' package to be installed")
+        self._client = redis.Redis.from_url(url)
+        self.prefix = prefix
+
+    def get(self, key):
+        raw = self._client.get(self.prefix + key)
+        return pickle.loads(raw) if raw is not None else None
+
+    def set(self, key, value, ttl=None):
+        self._client.set(self.prefix + key, pickle.dumps(value), ex=int(ttl) if ttl else None)
+
+    def delete(self, key):
+        self._client.delete(self.prefix + key)
+
+    def get_counter(self, key):
+        raw = self._client.get(self.prefix + key)
+        return int(raw) if raw is not None else 0
+
+    def incr(self, key):
+        return self._client.incr(self.prefix + key)
+
+    def clear(self):
+        for key in self._client.scan_iter(match=self.prefix + '*'):
+            self._client.delete(key)
+
+
+class ResponseCache:
+    """Read-through cache for GET responses, keyed by route and query string.
+
+    Each cached route belongs to a namespace such as ``"bands"`` or
+    ``"band:{band_id}"``. Invalidating a namespace bumps its generation
+    counter, so every key built from the old generation is simply never read
+    again and ages out through LRU/TTL. This works the same way for the local
+    and the shared backend without having to scan for keys.
+
+    Staleness: with the shared backend an invalidation is seen by every
+    worker at once. With the local one, other workers can answer from the
+    old generation for up to CACHE_TTL seconds (30 by default, 5 under a
+    multi-worker gunicorn, see gunicorn.conf.py).
+    """
+
+    def __init__(self, backend=None, ttl=None):
+        # Resolved from the environment on first use, after load_dotenv() has run
+        self._backend = backend
+        self._ttl = ttl
+        self._stats = {"hits": 0, "misses": 0, "stores": 0, "invalidations": 0, "errors": 0}
+        self._stats_lock = threading.Lock()
+
+    @property
+    def backend(self):
+        if self._backend is None:
+            self._backend = backend_from_env()
+        return self._backend
+
+    @backend.setter
+    def backend(self, backend):
+        self._backend = backend
+
+    @property
+    def ttl(self):
+        if self._ttl is None:
+            self._ttl = float(os.getenv('CACHE_TTL', 30))
+        return self._ttl
+
+    @ttl.setter
+    def ttl(self, ttl):
+        self._ttl = ttl
+
+    def _count(self, name):
+        with self._stats_lock:
+            self._stats[name] += 1
+
+    def _key(self, namespace, related=()):
+        generation = '.'.join(
+            str(self.backend.get_counter(f"gen:{name}")) for name in (namespace, *related)
+        )
+        query = '&'.join(f"{name}={value}" for name, value in sorted(request.args.items(multi=True)))
+        # Under @conditional, the ETag just computed from the database: a body
+        # cached for an older version (by a worker that missed the
+        # invalidation) is never sent out with the newer ETag
+        version = g.get('content_version', '')
+        return f"resp:{namespace}:{generation}:{version}:{request.path}?{query}"
+
+    def cached(self, namespace_template, related=None):
+        """Cache a view's successful responses under ``namespace_template``,
+        formatted with the view's URL arguments.
+
+        ``related(request.args)``, if given, returns further namespaces the
+        response depends on (embedded relations); invalidating any of them
+        also retires the entry.
+        """
+        def decorator(f):
+            @wraps(f)
+            def decorated_function(*args, **kwargs):
+                if self.ttl <= 0:
+                    # CACHE_TTL=0 turns caching off (benchmarks measure the database path)
+                    return f(*args, **kwargs)
+                namespace = namespace_template.format(**kwargs)
+                try:
+                    key = self._key(namespace, related(request.args) if related else ())
+                    # A client that just wrote reads past entries a lagging replica may have filled
+                    entry = None if reads_pinned() else self.backend.get(key)
+                except Exception as error:
+                    # A cache outage degrades to uncached reads instead of failing them
+                    logger.warning("Response cache read failed: %s", error, exc_info=True)
+                    self._count("errors")
+                    return f(*args, **kwargs)
+
+                if entry is not None:
+                    self._count("hits")
+                    body, status, mimetype = entry
+                    response = Response(body, status=status, mimetype=mimetype)
+                    response.headers['X-Cache'] = 'HIT'
+                    return response
+
+                self._count("misses")
+                response = make_response(f(*args, **kwargs))
+                if response.status_code == 200 and not response.is_streamed:
+                    try:
+                        self.backend.set(key, (response.get_data(), response.status_code, response.mimetype), self.ttl)
+                        self._count("stores")
+                    except Exception as error:
+                        logger.warning("Response cache store failed: %s", error, exc_info=True)
+                        self._count("errors")
+                response.headers['X-Cache'] = 'MISS'
+                return response
+
+            return decorated_function
+        return decorator
+
+    def invalidate(self, *namespaces):
+        for namespace in namespaces:
+            self.backend.incr(f"gen:{namespace}")
+            self._count("invalidations")
+
+    def stats(self):
+        with self._stats_lock:
+            stats = dict(self._stats)
+        lookups = stats["hits"] + stats["misses"]
+        stats["hit_ratio"] = stats["hits"] / lookups if lookups else 0.0
+        stats["backend"] = type(self.backend).__name__
+        return stats
+
+    def reset_stats(self):
+        with self._stats_lock:
+            for name in self._stats:
+                self._stats[name] = 0
+
+
+def backend_from_env():
+    if os.getenv('CACHE_BACKEND', 'local') == 'redis':
+        return RedisCache(os.getenv('CACHE_URL', 'redis://localhost:6379/0'))
+    return LocalCache(max_entries=int(os.getenv('CACHE_MAX_ENTRIES', 1024)))
+
+
+response_cache = ResponseCache()
+
+
+def configure_cache(backend, ttl=None):
+    """Swap the cache backend, e.g. for a LocalCache stand-in in tests."""
+    response_cache.backend = backend
+    if ttl is not None:
+        response_cache.ttl = ttl
+    response_cache.reset_stats()
@@ -0,0 +1,106 @@
+import hashlib
+import logging
+from functools import wraps
+
+from flask import Response, g, make_response, request
+
+from db_helpers import db_connection
+from prepared import statements
+
+logger = logging.getLogger(__name__)
+
+# Tables that carry an updated_at column maintained by migrations/002_updated_at.sql
+VERSIONED_TABLES = ('shows', 'bands', 'venues')
+
+# Every conditional GET runs one of these first
+for _table in VERSIONED_TABLES:
+    statements.declare(f"{_table}_list_version", f"SELECT max(updated_at), count(*) FROM {_table}")
+    statements.declare(f"{_table}_row_version", f"SELECT updated_at FROM {_table} WHERE id = %s")
+
+
+def list_version(cursor, table):
+    """Cheap version of a whole table: the newest updated_at plus the row count
+    (the count catches deletes, which leave no updated_at behind)."""
+    statements.execute(cursor, f"{table}_list_version")
+    return cursor.fetchone()
+
+
+def row_version(cursor, table, row_id):
+    statements.execute(cursor, f"{table}_row_version", (row_id,))
+    row = cursor.fetchone()
+    return (row[0], 1) if row else None
+
+
+def _etag(table, versions):
+    parts = [f"{last_modified.isoformat() if last_modified else ''}|{count}" for last_modified, count in versions]
+    token = f"{table}|{'|'.join(parts)}|{request.full_path}"
+    return hashlib.sha1(token.encode('utf-8')).hexdigest()
+
+
+def _not_modified(etag, last_modified):
+    if request.if_none_match:
+        return request.if_none_match.contains_weak(etag)
+    if request.if_modified_since and last_modified:
+        return last_modified.replace(microsecond=0) <= request.if_modified_since
+    return False
+
+
+def conditional(table, id_arg=None, related=None):
+    """Answer GETs with 304 Not Modified when the client's copy is current.
+
+    The version comes from updated_at (a row's, or the table's max plus its
+    row count for list routes), so a match is detected without running the
+    view or serializing anything. ``id_arg`` names the URL argument holding
+    the row id for single-row routes. ``related(request.args)``, if given,
+    names further tables embedded in the response (see relations.py); their
+    list versions are folded into the ETag.
+    """
+    if table not in VERSIONED_TABLES:
+        raise ValueError(f"{table} has no updated_at column")
+
+    def decorator(f):
+        @wraps(f)
+        def decorated_function(*args, **kwargs):
+            try:
+                with db_connection(readonly=True) as connection:
+                    cursor = connection.cursor()
+                    if id_arg is None:
+                        version = list_version(cursor, table)
+                    else:
+                        version = row_version(cursor, table, kwargs[id_arg])
+                    versions = [version]
+                    if version is not None and related is not None:
+                        versions += [
+                            list_version(cursor, related_table)
+                            for related_table in related(request.args)
+                            if related_table in VERSIONED_TABLES
+                        ]
+            except Exception as error:
+                # Let the view produce its own error (bad id, database down, ...)
+                logger.warning("Conditional version lookup failed: %s", error, exc_info=True)
+                version = None
+
+            if version is None:
+                return f(*args, **kwargs)
+
+            etag = _etag(table, versions)
+            # Part of the response cache key (see cache.ResponseCache._key)
+            g.content_version = etag
+            last_modified = max((stamp for stamp, _ in versions if stamp), default=None)
+
+            if _not_modified(etag, last_modified):
+                response = Response(status=304)
+            else:
+                response = make_response(f(*args, **kwargs))
+                if response.status_code != 200:
+                    return response
+
+            response.set_etag(etag, weak=True)
+            if last_modified:
+                response.last_modified = last_modified
+            # Let browsers keep the body but revalidate it on every use
+            response.headers['Cache-Control'] = 'no-cache'
+            return response
+
+        return decorated_function
+    return decorator
@@ -0,0 +1,209 @@
+"""Column projections and compact row records for the catalog read paths.
+
+Each record class declares exactly the columns an endpoint sends, so list
+routes stop dragging wide columns (band photos and descriptions) over the
+wire. Rows are fetched as plain tuples and packed into ``__slots__`` records
+instead of one dict per row.
+
+Fields are declared in alphabetical order on purpose: orjson serializes
+dataclasses in field order, and this keeps the output identical to the
+sorted-key dicts the API returned before.
+"""
+from dataclasses import dataclass, fields
+
+from db_helpers import stream_rows
+
+
+class Record:
+    """Dict-style access for the record dataclasses, so handlers and
+    formatters can keep using ``row['column']``."""
+    __slots__ = ()
+
+    def __getitem__(self, name):
+        return getattr(self, name)
+
+    def __setitem__(self, name, value):
+        setattr(self, name, value)
+
+    def to_dict(self):
+        return {name: getattr(self, name) for name in self.__slots__}
+
+
+# --- Shows ---
+@dataclass(slots=True)
+class ShowListRecord(Record):
+    bandsplaying: list
+    id: int
+    location: str
+    showdate: object
+    showdescription: str
+    showtime: object
+    ticketprice: object
+    tourposter: str
+    venue_id: int
+
+
+@dataclass(slots=True)
+class ShowRecord(Record):
+    bandsplaying: list
+    id: int
+    location: str
+    showdate: object
+    showdescription: str
+    showtime: object
+    ticketprice: object
+    tourposter: str
+    updated_at: object
+    user_id: int
+    venue_id: int
+
+
+# --- Bands ---
+@dataclass(slots=True)
+class BandListRecord(Record):
+    bandname: str
+    genre: str
+    hometown: str
+    id: int
+    membernames: list
+    yearstarted: int
+
+
+@dataclass(slots=True)
+class BandRecord(Record):
+    bandname: str
+    banddescription: str
+    bandphoto: str
+    genre: str
+    hometown: str
+    id: int
+    membernames: list
+    updated_at: object
+    user_id: int
+    yearstarted: int
+
+
+# --- Venues ---
+@dataclass(slots=True)
+class VenueListRecord(Record):
+    capacity: int
+    id: int
+    location: str
+    venuemanager: str
+    venuename: str
+
+
+@dataclass(slots=True)
+class VenueRecord(Record):
+    capacity: int
+    id: int
+    location: str
+    updated_at: object
+    user_id: int
+    venuemanager: str
+    venuename: str
+
+
+# --- Search ---
+@dataclass(slots=True)
+class SearchResultRecord(Record):
+    id: int
+    kind: str
+    rank: float
+    subtitle: str
+    title: str
+
+
+# --- Tickets (tickets.py) ---
+@dataclass(slots=True)
+class TicketHoldRecord(Record):
+    expires_at: object
+    id: int
+    purchased_at: object
+    quantity: int
+    seat_numbers: list
+    show_id: int
+    status: str
+    unit_price: object
+
+
+@dataclass(slots=True)
+class TicketInventoryRecord(Record):
+    available: int
+    held: int
+    show_id: int
+    sold: int
+    total: int
+
+
+# --- Reports (reports.py) ---
+@dataclass(slots=True)
+class ReportMonthRecord(Record):
+    month: str
+    price_average: object
+    price_max: object
+    price_min: object
+    price_total: object
+    priced_shows: int
+    shows: int
+
+
+@dataclass(slots=True)
+class VenueReportRecord(Record):
+    price_average: object
+    price_max: object
+    price_min: object
+    price_total: object
+    priced_shows: int
+    shows: int
+    venue_id: int
+    venuename: str
+
+
+@dataclass(slots=True)
+class BandReportRecord(Record):
+    appearances: int
+    band_id: int
+    bandname: str
+
+
+# What the write routes return (RETURNING rows serialize as lists in this
+# order): every column in table order except the search_vector from
+# migrations/004, which is internal and large
+SHOW_COLUMNS = "id, showdate, showdescription, showtime, location, bandsplaying, ticketprice, user_id, tourposter, updated_at, venue_id"
+BAND_COLUMNS = "id, bandname, hometown, genre, yearstarted, membernames, bandphoto, banddescription, user_id, updated_at"
+VENUE_COLUMNS = "id, capacity, venuename, location, venuemanager, user_id, updated_at"
+
+
+def columns(record_cls, table=None):
+    """The record's column list, qualified with ``table.`` for joins."""
+    prefix = f"{table}." if table else ''
+    return ', '.join(prefix + field.name for field in fields(record_cls))
+
+
+def select_from(record_cls, table):
+    """``SELECT <the record's columns> FROM <table>``; callers add WHERE/ORDER BY."""
+    return f"SELECT {columns(record_cls)} FROM {table}"
+
+
+def fetch_records(cursor, record_cls):
+    """Map every remaining row of a plain (tuple) cursor to ``record_cls``."""
+    return [record_cls(*row) for row in cursor.fetchall()]
+
+
+def fetch_record(cursor, record_cls):
+    row = cursor.fetchone()
+    return record_cls(*row) if row is not None else None
+
+
+def stream_records(query, params, record_cls, batch_size=1000, enrich=None, readonly=False):
+    """Like db_helpers.stream_rows, but yields batches of records.
+
+    ``enrich(cursor, records)`` may replace each batch, e.g. with related rows
+    embedded; it runs on the streaming connection.
+    """
+    def to_records(cursor, rows):
+        records = [record_cls(*row) for row in rows]
+        return enrich(cursor, records) if enrich else records
+
+    yield from stream_rows(query, params, batch_size=batch_size, enrich=to_records, readonly=readonly)
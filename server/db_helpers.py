@@ -1,17 +1,536 @@
+import itertools
+import math
 import os
+import random
+import threading
+import time
+from collections import deque
+from contextlib import contextmanager
+from functools import partial
+
 import psycopg2
+import psycopg2.extensions
+from flask import g, has_request_context, request
+
+import instrumentation
+
+# How long a replica that failed is left out before reads try it again
+REPLICA_RETRY_SECONDS = float(os.getenv('DB_REPLICA_RETRY_SECONDS', 15))
+REPLICA_CONNECT_TIMEOUT = int(os.getenv('DB_REPLICA_CONNECT_TIMEOUT', 3))
 
-def get_db_connection():
-    if 'ON_RENDER' in os.environ:
+# After a successful write, the client's reads stay on the primary this long
+# (comfortably longer than the replicas usually lag), tracked by this cookie
+READ_PRIMARY_SECONDS = float(os.getenv('DB_READ_PRIMARY_SECONDS', 10))
+READ_PRIMARY_COOKIE = 'read_primary_until'
+# Attempts at a transaction that Postgres aborts as a deadlock victim (retry_on_deadlock)
+DEADLOCK_ATTEMPTS = int(os.getenv('DB_DEADLOCK_ATTEMPTS', 3))
+WRITE_METHODS = ('POST', 'PUT', 'PATCH', 'DELETE')
+
+
+def get_db_connection(dsn=None):
+    """Open a brand new connection: to the primary, or to the replica at
+    ``dsn``. Handlers should use db_connection() instead."""
+    # Cursors of a TimedConnection report every statement to instrumentation
+    connection_factory = instrumentation.TimedConnection if instrumentation.enabled() else None
+    if dsn is not None:
+        # A replica that is down should fail fast, so reads can move on
+        connection = psycopg2.connect(dsn, connect_timeout=REPLICA_CONNECT_TIMEOUT,
+                                      connection_factory=connection_factory)
+    elif 'ON_RENDER' in os.environ:
         connection = psycopg2.connect(
             os.getenv('DATABASE_URL'),
-            sslmode='require'
+            sslmode='require',
+            connection_factory=connection_factory
         )
     else:
         connection = psycopg2.connect(
-            host='localhost',
+            connection_factory=connection_factory,
+            host=os.getenv('POSTGRES_HOST', 'localhost'),
+            port=os.getenv('POSTGRES_PORT'),
             database=os.getenv('POSTGRES_DATABASE'),
             user=os.getenv('POSTGRES_USERNAME'),
             password=os.getenv('POSTGRES_PASSWORD')
         )
-    return connection
\ No newline at end of file
+    return connection
+
+
+class PoolTimeout(Exception):
+    """Raised when no connection could be checked out before the timeout."""
+
+
+class _PooledConnection:
+    __slots__ = ('connection', 'created_at', 'last_used_at')
+
+    def __init__(self, connection):
+        self.connection = connection
+        self.created_at = time.monotonic()
+        self.last_used_at = self.created_at
+
+
+class ConnectionPool:
+    """Thread-safe PostgreSQL connection pool.
+
+    Keeps up to ``maxconn`` connections open and hands out up to
+    ``max_overflow`` extra short-lived connections when those are all busy.
+    Idle connections are health-checked before reuse and recycled once they
+    are older than ``max_lifetime`` seconds.
+    """
+
+    def __init__(self, connect=get_db_connection, minconn=1, maxconn=10, max_overflow=5,
+                 timeout=10.0, max_lifetime=1800.0, health_check_interval=30.0):
+        if maxconn < 1 or minconn > maxconn:
+            raise ValueError("Pool size must satisfy 0 <= minconn <= maxconn and maxconn >= 1")
+        self._connect = connect
+        self.minconn = minconn
+        self.maxconn = maxconn
+        self.max_overflow = max_overflow
+        self.timeout = timeout
+        self.max_lifetime = max_lifetime
+        self.health_check_interval = health_check_interval
+
+        self._lock = threading.Condition()
+        self._idle = deque()
+        self._in_use = {}
+        self._overflow = set()
+        self._closed = False
+        self._stats = {
+            "checkouts": 0,
+            "checkout_timeouts": 0,
+            "checkout_wait_seconds_total": 0.0,
+            "checkout_wait_seconds_max": 0.0,
+            "connections_created": 0,
+            "connections_discarded": 0,
+            "overflow_checkouts": 0,
+            "health_check_failures": 0,
+        }
+
+        for _ in range(minconn):
+            self._idle.append(self._new_connection())
+
+    def _new_connection(self):
+        pooled = _PooledConnection(self._connect())
+        self._stats["connections_created"] += 1
+        return pooled
+
+    def _discard(self, pooled):
+        self._stats["connections_discarded"] += 1
+        try:
+            pooled.connection.close()
+        except Exception:
+            pass
+
+    def _is_usable(self, pooled):
+        connection = pooled.connection
+        if connection.closed:
+            return False
+        now = time.monotonic()
+        if self.max_lifetime and now - pooled.created_at > self.max_lifetime:
+            return False
+        if self.health_check_interval is not None and now - pooled.last_used_at > self.health_check_interval:
+            try:
+                with connection.cursor() as cursor:
+                    cursor.execute("SELECT 1")
+                connection.rollback()
+            except Exception:
+                self._stats["health_check_failures"] += 1
+                return False
+        return True
+
+    def getconn(self, timeout=None):
+        """Check a connection out of the pool, waiting up to ``timeout`` seconds."""
+        timeout = self.timeout if timeout is None else timeout
+        started = time.monotonic()
+        deadline = started + timeout
+
+        with self._lock:
+            while True:
+                if self._closed:
+                    raise PoolTimeout("Connection pool is closed")
+
+                candidate = None
+                overflow = False
+                if self._idle:
+                    candidate = self._idle.pop()
+                elif len(self._in_use) < self.maxconn + self.max_overflow:
+                    overflow = len(self._in_use) >= self.maxconn
+                else:
+                    remaining = deadline - time.monotonic()
+                    if remaining <= 0:
+                        self._stats["checkout_timeouts"] += 1
+                        raise PoolTimeout(f"Timed out after {timeout}s waiting for a database connection")
+                    self._lock.wait(remaining)
+                    continue
+
+                # Reserve the slot before doing any I/O outside the lock
+                placeholder = object()
+                self._in_use[id(placeholder)] = placeholder
+                break
+
+        try:
+            if candidate is not None and not self._is_usable(candidate):
+                self._discard(candidate)
+                candidate = None
+            if candidate is None:
+                candidate = self._new_connection()
+        except Exception:
+            with self._lock:
+                del self._in_use[id(placeholder)]
+                self._lock.notify()
+            raise
+
+        waited = time.monotonic() - started
+        with self._lock:
+            del self._in_use[id(placeholder)]
+            self._in_use[id(candidate.connection)] = candidate
+            if overflow:
+                self._overflow.add(id(candidate.connection))
+                self._stats["overflow_checkouts"] += 1
+            self._stats["checkouts"] += 1
+            self._stats["checkout_wait_seconds_total"] += waited
+            self._stats["checkout_wait_seconds_max"] = max(self._stats["checkout_wait_seconds_max"], waited)
+        return candidate.connection
+
+    def putconn(self, connection, discard=False):
+        """Return a connection to the pool, resetting any open transaction."""
+        with self._lock:
+            pooled = self._in_use.pop(id(connection), None)
+            overflow = id(connection) in self._overflow
+            self._overflow.discard(id(connection))
+        if pooled is None:
+            return
+
+        if not discard and not connection.closed:
+            try:
+                if connection.info.transaction_status != psycopg2.extensions.TRANSACTION_STATUS_IDLE:
+                    connection.rollback()
+            except Exception:
+                discard = True
+
+        with self._lock:
+            if discard or overflow or connection.closed or self._closed:
+                self._discard(pooled)
+            else:
+                pooled.last_used_at = time.monotonic()
+                self._idle.append(pooled)
+            self._lock.notify()
+
+    def closeall(self):
+        with self._lock:
+            self._closed = True
+            while self._idle:
+                self._discard(self._idle.pop())
+            for pooled in list(self._in_use.values()):
+                if isinstance(pooled, _PooledConnection):
+                    self._discard(pooled)
+            self._in_use.clear()
+            self._overflow.clear()
+            self._lock.notify_all()
+
+    def stats(self):
+        with self._lock:
+            stats = dict(self._stats)
+            stats.update({
+                "in_use": len(self._in_use),
+                "idle": len(self._idle),
+                "overflow_in_use": len(self._overflow),
+                "maxconn": self.maxconn,
+                "max_overflow": self.max_overflow,
+            })
+        checkouts = stats["checkouts"]
+        stats["checkout_wait_seconds_avg"] = stats["checkout_wait_seconds_total"] / checkouts if checkouts else 0.0
+        return stats
+
+
+class ReplicaSet:
+    """Connection pools for the read replicas in DATABASE_REPLICA_URLS.
+
+    Reads take turns over the replicas that are up. A replica that can't be
+    reached, or whose connection drops mid-request, is left out for
+    ``retry_after`` seconds and then tried again; with none up, reads go to
+    the primary.
+    """
+
+    def __init__(self, dsns, make_pool, retry_after=REPLICA_RETRY_SECONDS):
+        self.dsns = list(dsns)
+        self.pools = [make_pool(dsn) for dsn in self.dsns]
+        self.retry_after = retry_after
+        self._down_until = [0.0] * len(self.pools)
+        self._turns = itertools.count()
+        self._lock = threading.Lock()
+        self._stats = {"replica_checkouts": 0, "primary_fallbacks": 0, "pinned_reads": 0, "failures": 0}
+
+    def _count(self, name):
+        with self._lock:
+            self._stats[name] += 1
+
+    def up(self):
+        """Indexes of the replicas that are up, starting with the next one in turn."""
+        now = time.monotonic()
+        start = next(self._turns)
+        order = [(start + offset) % len(self.pools) for offset in range(len(self.pools))]
+        return [index for index in order if self._down_until[index] <= now]
+
+    def mark_down(self, index):
+        self._down_until[index] = time.monotonic() + self.retry_after
+        self._count("failures")
+
+    def getconn(self, pinned=False):
+        """``(index, connection)`` from the first replica that answers, or
+        ``(None, None)`` when the read should go to the primary: none is up,
+        or the client is ``pinned`` there after a write."""
+        if pinned:
+            self._count("pinned_reads")
+            return None, None
+        for index in self.up():
+            try:
+                connection = self.pools[index].getconn()
+            except PoolTimeout:
+                continue  # busy rather than down
+            except psycopg2.Error:
+                self.mark_down(index)
+                continue
+            self._count("replica_checkouts")
+            return index, connection
+        self._count("primary_fallbacks")
+        return None, None
+
+    def putconn(self, index, connection, discard=False):
+        if discard and connection.closed:
+            self.mark_down(index)
+        self.pools[index].putconn(connection, discard=discard)
+
+    def closeall(self):
+        for pool in self.pools:
+            pool.closeall()
+
+    def stats(self):
+        now = time.monotonic()
+        with self._lock:
+            stats = dict(self._stats)
+        stats["replicas"] = len(self.pools)
+        stats["replicas_up"] = sum(1 for down_until in self._down_until if down_until <= now)
+        for index, pool in enumerate(self.pools):
+            for name, value in pool.stats().items():
+                stats[f"{index}_{name}"] = value
+        return stats
+
+
+_pool = None
+_pool_pid = None
+_pool_lock = threading.Lock()
+_replicas = None
+_replicas_pid = None
+
+
+def _pool_from_env(connect=get_db_connection, minconn=None):
+    return ConnectionPool(
+        connect=connect,
+        minconn=int(os.getenv('DB_POOL_MIN', 1)) if minconn is None else minconn,
+        maxconn=int(os.getenv('DB_POOL_MAX', 10)),
+        max_overflow=int(os.getenv('DB_POOL_OVERFLOW', 5)),
+        timeout=float(os.getenv('DB_POOL_TIMEOUT', 10)),
+        max_lifetime=float(os.getenv('DB_POOL_MAX_LIFETIME', 1800)),
+        health_check_interval=float(os.getenv('DB_POOL_HEALTH_CHECK_INTERVAL', 30)),
+    )
+
+
+def get_pool():
+    """Return this process's pool, creating it on first use.
+
+    Connections must never be shared across a fork, so a gunicorn worker that
+    inherits a pool from the master drops it (without closing the parent's
+    sockets) and builds its own.
+    """
+    global _pool, _pool_pid
+    pid = os.getpid()
+    if _pool is None or _pool_pid != pid:
+        with _pool_lock:
+            if _pool is None or _pool_pid != pid:
+                _pool = _pool_from_env()
+                _pool_pid = pid
+    return _pool
+
+
+def replica_dsns():
+    return [dsn.strip() for dsn in os.getenv('DATABASE_REPLICA_URLS', '').split(',') if dsn.strip()]
+
+
+def get_replicas():
+    """Return this process's ReplicaSet (None without DATABASE_REPLICA_URLS),
+    rebuilt after a fork like the primary's pool."""
+    global _replicas, _replicas_pid
+    pid = os.getpid()
+    if _replicas_pid != pid:
+        with _pool_lock:
+            if _replicas_pid != pid:
+                dsns = replica_dsns()
+                # No connections up front: a replica that is down must not stop the app starting
+                make_pool = lambda dsn: _pool_from_env(partial(get_db_connection, dsn), minconn=0)  # noqa: E731
+                _replicas = ReplicaSet(dsns, make_pool) if dsns else None
+                _replicas_pid = pid
+    return _replicas
+
+
+def _reset_pool_after_fork():
+    global _pool, _pool_pid, _replicas, _replicas_pid
+    _pool = None
+    _pool_pid = None
+    _replicas = None
+    _replicas_pid = None
+
+
+if hasattr(os, 'register_at_fork'):
+    os.register_at_fork(after_in_child=_reset_pool_after_fork)
+
+
+def reads_pinned():
+    """True when this request comes from a client that wrote within the last
+    READ_PRIMARY_SECONDS, so its reads must see the primary (see init_read_routing)."""
+    return has_request_context() and g.get('read_primary', False)
+
+
+def init_read_routing(app):
+    """Pin a client's reads to the primary for READ_PRIMARY_SECONDS after
+    each of its successful writes, so it reads its own writes whatever the
+    replicas' lag.
+
+    The pin travels in a cookie holding the time it runs out; one that
+    claims more than the window (edited by hand) is ignored. The client is
+    on another origin, so its fetches send ``credentials: 'include'`` or the
+    cookie never comes back.
+    """
+    @app.before_request
+    def pin_recent_writers():
+        try:
+            until = float(request.cookies.get(READ_PRIMARY_COOKIE, 0))
+        except ValueError:
+            until = 0.0
+        g.read_primary = time.time() < until <= time.time() + READ_PRIMARY_SECONDS
+
+    @app.after_request
+    def pin_after_write(response):
+        if request.method in WRITE_METHODS and response.status_code < 400 and get_replicas() is not None:
+            # The client is usually on another site, which only gets the cookie back over HTTPS
+            secure = request.is_secure or request.headers.get('X-Forwarded-Proto') == 'https'
+            response.set_cookie(READ_PRIMARY_COOKIE, f"{time.time() + READ_PRIMARY_SECONDS:.3f}",
+                                max_age=math.ceil(READ_PRIMARY_SECONDS), httponly=True, secure=secure,
+                                samesite='None' if secure else 'Lax')
+        return response
+
+
+@contextmanager
+def db_connection(readonly=False):
+    """Check a pooled connection out for the duration of a ``with`` block.
+
+    The connection always goes back to the pool, and any transaction the
+    block left open is rolled back, so early returns can't leak backends.
+
+    ``readonly=True`` marks a block that only reads. With replicas
+    configured it runs on one of them, unless the client is pinned to the
+    primary after a write or no replica is up.
+    """
+    replicas = get_replicas() if readonly else None
+    index = connection = None
+    started = time.perf_counter()
+    if replicas is not None:
+        index, connection = replicas.getconn(pinned=reads_pinned())
+    pool = get_pool()
+    if connection is None:
+        connection = pool.getconn()
+    instrumentation.record_pool_wait(time.perf_counter() - started)
+    discard = False
+    try:
+        yield connection
+    except psycopg2.InterfaceError:
+        discard = True
+        raise
+    except psycopg2.extensions.TransactionRollbackError:
+        # A deadlock or serialization failure: the connection itself is fine
+        raise
+    except psycopg2.OperationalError:
+        discard = True
+        raise
+    finally:
+        if index is not None:
+            replicas.putconn(index, connection, discard=discard)
+        else:
+            pool.putconn(connection, discard=discard)
+
+
+def retry_on_deadlock(work, attempts=None):
+    """Return ``work()``, running it again when Postgres aborts its
+    transaction as a deadlock victim, up to DEADLOCK_ATTEMPTS times.
+
+    ``work`` must do all of its writes in one db_connection() block and
+    nothing outside the database before it commits, so a rerun starts from
+    scratch. Multi-statement show writes need it: the report recounts
+    (migrations/010) lock their months in statement order, so two that touch
+    the same months in a different order can deadlock.
+    """
+    attempts = attempts or DEADLOCK_ATTEMPTS
+    for attempt in range(1, attempts + 1):
+        try:
+            return work()
+        except psycopg2.extensions.TransactionRollbackError as error:
+            if error.pgcode != '40P01' or attempt == attempts:
+                raise
+            # Jittered, so the two transactions don't collide again
+            time.sleep(random.uniform(0, 0.05 * attempt))
+
+
+_stream_cursor_ids = itertools.count(1)
+
+
+def stream_rows(query, params=None, batch_size=1000, cursor_factory=None, enrich=None, readonly=False):
+    """Yield the rows of ``query`` in lists of ``batch_size`` from a server-side cursor.
+
+    The pooled connection is held until the generator is exhausted or closed,
+    so only one batch is ever in memory on the Python side. ``enrich(cursor,
+    rows)``, if given, maps each batch using a second cursor on the same
+    connection, so per-batch lookups don't need another pooled connection.
+    ``readonly`` is passed on to db_connection().
+    """
+    with db_connection(readonly=readonly) as connection:
+        cursor = connection.cursor(name=f"stream_{next(_stream_cursor_ids)}", cursor_factory=cursor_factory)
+        cursor.itersize = batch_size
+        lookup_cursor = connection.cursor() if enrich else None
+        try:
+            cursor.execute(query, params)
+            while True:
+                rows = cursor.fetchmany(batch_size)
+                if not rows:
+                    break
+                yield enrich(lookup_cursor, rows) if enrich else rows
+        finally:
+            try:
+                cursor.close()
+            except psycopg2.Error:
+                pass
+
+
+@contextmanager
+def copy_allowed():
+    """Suspend a green wait callback (the gevent profile) around COPY.
+
+    psycopg2 refuses copy_expert while a wait callback is installed. The COPY
+    then blocks this worker's other greenlets for its duration, as it would
+    under the sync profile.
+    """
+    callback = psycopg2.extensions.get_wait_callback()
+    if callback is None:
+        yield
+        return
+    psycopg2.extensions.set_wait_callback(None)
+    try:
+        yield
+    finally:
+        psycopg2.extensions.set_wait_callback(callback)
+
+
+def pool_stats():
+    return get_pool().stats()
+
+
+def replica_stats():
+    replicas = get_replicas()
+    return replicas.stats() if replicas is not None else {}
@@ -0,0 +1,34 @@
+"""Cooperative psycopg2 for the gevent worker profile.
+
+psycopg2 blocks in C while it waits on the server, which would stall every
+greenlet in the worker. Installing a wait callback makes libpq run in
+non-blocking mode and hands the wait to gevent, so other requests run while
+a query is in flight. Only imported when GUNICORN_PROFILE=gevent.
+"""
+import psycopg2
+from psycopg2 import extensions
+
+from gevent.socket import wait_read, wait_write
+
+
+def gevent_wait_callback(connection, timeout=None):
+    while True:
+        state = connection.poll()
+        if state == extensions.POLL_OK:
+            break
+        elif state == extensions.POLL_READ:
+            wait_read(connection.fileno(), timeout=timeout)
+        elif state == extensions.POLL_WRITE:
+            wait_write(connection.fileno(), timeout=timeout)
+        else:
+            raise psycopg2.OperationalError(f"Bad result from poll: {state!r}")
+
+
+def patch_psycopg():
+    extensions.set_wait_callback(gevent_wait_callback)
+
+
+def run_in_threadpool(function, *args):
+    """Run blocking C code (bcrypt) on gevent's native thread pool."""
+    import gevent
+    return gevent.get_hub().threadpool.spawn(function, *args).get()
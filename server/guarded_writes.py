@@ -0,0 +1,41 @@
+"""Single-statement updates and deletes for the write routes.
+
+The permission check (owner or role) goes into the write's WHERE clause, so
+a row is checked and changed atomically in one round trip instead of being
+read, checked in Python and written by a second statement. A CTE reading the
+row by id in the same statement tells "not found" apart from "not allowed",
+and can carry values out of the statement's pre-write snapshot (the old name,
+the shows a cascade is about to unlink).
+"""
+
+
+def set_clause(data, allowed_columns):
+    """``SET`` assignments and params for just the ``allowed_columns`` present
+    in ``data``; ``('', {})`` when it supplies none of them."""
+    supplied = [column for column in allowed_columns if column in data]
+    assignments = ', '.join(f"{column} = %({column})s" for column in supplied)
+    return assignments, {column: data[column] for column in supplied}
+
+
+def guarded_write(cursor, table, write_sql, params, before=None):
+    """Run one conditional write on row ``%(id)s`` of ``table``.
+
+    ``write_sql`` is an UPDATE or DELETE of that row with the permission
+    check in its WHERE clause and a RETURNING list. ``before`` maps names to
+    SQL expressions evaluated before the write (``target`` is the row as it
+    was). Returns ``(found, row, before_values)``: ``row`` is the RETURNING
+    row as a list, or None when nothing was written, in which case ``found``
+    says whether the check refused it or the row doesn't exist.
+    """
+    before = before or {}
+    expressions = ''.join(f", ({sql}) AS {name}" for name, sql in before.items())
+    cursor.execute(f"""
+        WITH target AS (SELECT * FROM {table} WHERE id = %(id)s),
+             written AS ({write_sql})
+        SELECT EXISTS (SELECT 1 FROM target), EXISTS (SELECT 1 FROM written){expressions}, written.*
+        FROM (VALUES (1)) AS one
+        LEFT JOIN written ON true
+    """, params)
+    found, wrote, *values = cursor.fetchone()
+    before_values = dict(zip(before, values[:len(before)]))
+    return found, (values[len(before):] if wrote else None), before_values
@@ -1,12 +1,104 @@
+import gc
 import os
+import tempfile
+
+# Profiles
+# GUNICORN_PROFILE picks how each worker handles concurrency:
+#   sync    - one request per process (the original setup); simplest, most memory per request
+#   gthread - a few processes with a thread pool each; requests overlap while waiting on Postgres
+#   gevent  - cooperative greenlets; psycopg2 yields to other requests while a query is in flight
+# WEB_CONCURRENCY and GUNICORN_THREADS override the worker/thread counts of any profile.
+cpu_count = os.cpu_count() or 1
+
+PROFILES = {
+    "sync": {
+        "worker_class": "sync",
+        "workers": cpu_count * 2 + 1,
+        "threads": 1,
+        "keepalive": 2,
+        "max_requests": 1000,
+        "max_requests_jitter": 100,
+    },
+    "gthread": {
+        "worker_class": "gthread",
+        "workers": cpu_count + 1,
+        "threads": 8,
+        "keepalive": 5,
+        "max_requests": 2000,
+        "max_requests_jitter": 200,
+    },
+    "gevent": {
+        "worker_class": "gevent",
+        "workers": cpu_count,
+        "threads": 1,
+        "worker_connections": 500,
+        "keepalive": 5,
+        "max_requests": 5000,
+        "max_requests_jitter": 500,
+    },
+}
+
+profile_name = os.getenv("GUNICORN_PROFILE", "sync")
+if profile_name not in PROFILES:
+    raise RuntimeError(f"Unknown GUNICORN_PROFILE {profile_name!r}; expected one of {', '.join(PROFILES)}")
+profile = PROFILES[profile_name]
+
+if profile_name == "gevent":
+    # Patch before the app (and psycopg2) is imported by preload_app
+    from gevent import monkey
+    monkey.patch_all()
+    import gevent_support
+    gevent_support.patch_psycopg()
 
 # Server socket
 # Bind to the port provided by the environment, or default to 5000 if not set
 bind = f"0.0.0.0:{os.getenv('PORT', 5000)}"  # Vercel/Render will set PORT dynamically
 
 # Workers
-workers = os.cpu_count() * 2 + 1  # Auto set number of workers based on CPU cores (Render recommendation)
-worker_class = "sync"  # "sync" is the default; use "gevent" or "eventlet" if asynchronous handling is needed
+worker_class = profile["worker_class"]
+workers = int(os.getenv("WEB_CONCURRENCY", profile["workers"]))
+threads = int(os.getenv("GUNICORN_THREADS", profile["threads"]))
+worker_connections = profile.get("worker_connections", 1000)
+
+# Recycle workers now and then (jittered so they don't all restart at once)
+max_requests = profile["max_requests"]
+max_requests_jitter = profile["max_requests_jitter"]
+
+# Keep connections from the load balancer open between requests
+keepalive = profile["keepalive"]
+
+# Load the app once in the master so workers share its memory copy-on-write.
+# The DB pool, token cache and bcrypt pool are all rebuilt per worker after fork.
+preload_app = os.getenv("GUNICORN_PRELOAD", "true").lower() == "true"
+
+# Each gthread thread needs its own connection; gevent greenlets queue on the pool
+if profile_name == "gthread":
+    os.environ.setdefault("DB_POOL_MAX", str(threads))
+elif profile_name == "gevent":
+    os.environ.setdefault("DB_POOL_MAX", "20")
+    # bcrypt in gevent's native thread pool instead of a process pool
+    os.environ.setdefault("BCRYPT_EXECUTOR", "gevent")
+elif profile_name == "sync":
+    # A sync worker blocks on its hash wherever it runs, so a pool process
+    # per worker only adds a hop (password_hashing.py)
+    os.environ.setdefault("BCRYPT_EXECUTOR", "inline")
+
+# One hashing admission gate for all the workers on this host, so
+# BCRYPT_MAX_PENDING (and its 503s) applies to the host, not to each worker
+if workers > 1:
+    os.environ.setdefault("BCRYPT_SLOTS_DIR", os.path.join(tempfile.gettempdir(), f"grp-bcrypt-{os.getpid()}"))
+
+# The local response cache (cache.py) lives in each worker, and a write only
+# retires the entries of the worker that handled it; the others serve theirs
+# until CACHE_TTL runs out. With several workers, share the cache through
+# Redis when CACHE_URL points at one, and otherwise keep that window short.
+MULTI_WORKER_LOCAL_CACHE_TTL = 5
+
+if workers > 1 and "CACHE_BACKEND" not in os.environ:
+    if os.getenv("CACHE_URL"):
+        os.environ["CACHE_BACKEND"] = "redis"
+    else:
+        os.environ.setdefault("CACHE_TTL", str(MULTI_WORKER_LOCAL_CACHE_TTL))
 
 # Logging
 accesslog = "-"  # Log access to stdout
@@ -20,3 +112,14 @@ timeout = 30  # Restart workers if they hang for more than 30 seconds
 reload = False  # Set to True for development to auto-reload workers when code changes
 
 
+def pre_fork(server, worker):
+    # Move everything the preloaded app allocated out of the collector's
+    # reach, so a GC pass in a worker doesn't write to those pages and
+    # un-share them
+    gc.freeze()
+
+
+def worker_exit(server, worker):
+    # Stop this worker's bcrypt processes along with it
+    import password_hashing
+    password_hashing.get_hasher().shutdown()
@@ -0,0 +1,347 @@
+"""Per-request timing, SQL instrumentation and Prometheus-style metrics.
+
+Every request gets a RequestTiming on ``g``. It collects:
+
+- the time spent waiting for a pooled connection (db_helpers.db_connection)
+- every statement run through a pooled connection, via TimedConnection, whose
+  cursors time execute/executemany/copy_expert (and FETCHes on named cursors)
+- the time spent encoding JSON (json_provider)
+
+When the request finishes, the totals go to the metrics registry (scraped
+from /metrics, see metrics_blueprint.py) and to a ``Server-Timing`` header.
+Statements slower than SLOW_QUERY_MS and requests slower than SLOW_REQUEST_MS
+are logged as JSON lines. Statements are labelled by their normalized text:
+literals and placeholder lists are folded, so cardinality stays at one series
+per distinct query shape.
+
+Settings:
+    INSTRUMENTATION   "false" turns all of this off (default on)
+    SERVER_TIMING     "false" drops the Server-Timing header (default on)
+    SLOW_QUERY_MS     log statements at least this slow (default 200)
+    SLOW_REQUEST_MS   log requests at least this slow (default 1000)
+    LOG_REQUESTS      "true" logs every request as a JSON line (default off;
+                      gunicorn's access log already covers that)
+    LOG_FORMAT        "json" (default) or "text" for the root log handler
+"""
+import bisect
+import json
+import logging
+import os
+import re
+import threading
+import time
+from functools import lru_cache
+
+import psycopg2.extensions
+from flask import g, has_request_context, request
+
+logger = logging.getLogger(__name__)
+
+
+def enabled():
+    return os.getenv('INSTRUMENTATION', 'true').lower() != 'false'
+
+
+SLOW_QUERY_SECONDS = float(os.getenv('SLOW_QUERY_MS', 200)) / 1000
+SLOW_REQUEST_SECONDS = float(os.getenv('SLOW_REQUEST_MS', 1000)) / 1000
+
+
+# --- Metrics registry ---
+DEFAULT_BUCKETS = (0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10)
+
+
+def _label_text(names, values):
+    if not names:
+        return ''
+    escaped = (str(value).replace('\\', '\\\\').replace('"', '\\"').replace('\n', ' ') for value in values)
+    return '{' + ','.join(f'{name}="{value}"' for name, value in zip(names, escaped)) + '}'
+
+
+class Counter:
+    def __init__(self, name, help_text, labels=()):
+        self.name = name
+        self.help_text = help_text
+        self.labels = labels
+        self._values = {}
+        self._lock = threading.Lock()
+
+    def inc(self, amount=1, labels=()):
+        with self._lock:
+            self._values[labels] = self._values.get(labels, 0) + amount
+
+    def render(self):
+        lines = [f"# HELP {self.name} {self.help_text}", f"# TYPE {self.name} counter"]
+        with self._lock:
+            items = list(self._values.items())
+        for labels, value in items:
+            lines.append(f"{self.name}{_label_text(self.labels, labels)} {value}")
+        return lines
+
+
+class Histogram:
+    def __init__(self, name, help_text, labels=(), buckets=DEFAULT_BUCKETS):
+        self.name = name
+        self.help_text = help_text
+        self.labels = labels
+        self.buckets = buckets
+        self._series = {}
+        self._lock = threading.Lock()
+
+    def observe(self, value, labels=()):
+        index = bisect.bisect_left(self.buckets, value)
+        with self._lock:
+            series = self._series.get(labels)
+            if series is None:
+                # per-bucket counts (+Inf last), then sum
+                series = self._series[labels] = [0] * (len(self.buckets) + 1) + [0.0]
+            series[index] += 1
+            series[-1] += value
+
+    def render(self):
+        lines = [f"# HELP {self.name} {self.help_text}", f"# TYPE {self.name} histogram"]
+        with self._lock:
+            items = [(labels, list(series)) for labels, series in self._series.items()]
+        for labels, series in items:
+            cumulative = 0
+            for bound, count in zip(self.buckets + ('+Inf',), series[:-1]):
+                cumulative += count
+                label_text = _label_text(self.labels + ('le',), labels + (bound,))
+                lines.append(f"{self.name}_bucket{label_text} {cumulative}")
+            lines.append(f"{self.name}_sum{_label_text(self.labels, labels)} {series[-1]}")
+            lines.append(f"{self.name}_count{_label_text(self.labels, labels)} {cumulative}")
+        return lines
+
+
+REQUESTS = Counter("http_requests_total", "Requests handled, by route and status.", ("method", "route", "status"))
+REQUEST_SECONDS = Histogram("http_request_duration_seconds", "Time until the view returned.", ("method", "route"))
+POOL_WAIT_SECONDS = Histogram("db_pool_wait_seconds", "Time spent waiting to check out a pooled connection.")
+QUERY_SECONDS = Histogram("db_query_duration_seconds", "Statement time, by normalized query.", ("query",))
+QUERY_ROWS = Counter("db_query_rows_total", "Rows returned or affected, by normalized query.", ("query",))
+SLOW_QUERIES = Counter("db_slow_queries_total", "Statements slower than SLOW_QUERY_MS.", ("query",))
+SERIALIZE_SECONDS = Histogram("json_serialize_duration_seconds", "Time spent encoding JSON responses.")
+
+METRICS = (REQUESTS, REQUEST_SECONDS, POOL_WAIT_SECONDS, QUERY_SECONDS, QUERY_ROWS, SLOW_QUERIES, SERIALIZE_SECONDS)
+
+
+def render_metrics(gauges=None):
+    """The registry (plus ``gauges``: {metric name: value}) in Prometheus text format."""
+    lines = []
+    for metric in METRICS:
+        lines.extend(metric.render())
+    for name, value in (gauges or {}).items():
+        lines.append(f"# TYPE {name} gauge")
+        lines.append(f"{name} {value}")
+    return '\n'.join(lines) + '\n'
+
+
+# --- SQL normalization ---
+_STRING_LITERAL = re.compile(r"'(?:''|[^'])*'")
+_NUMBER = re.compile(r"\b\d+(?:\.\d+)?\b")
+_PLACEHOLDER_LIST = re.compile(r"\(\s*(?:\?|%s)(?:\s*,\s*(?:\?|%s))*\s*\)")
+_VALUES_LIST = re.compile(r"\(\?\)(?:\s*,\s*\(\?\))+")
+_WHITESPACE = re.compile(r"\s+")
+_MAX_QUERY_LENGTH = 4096
+
+
+@lru_cache(maxsize=512)
+def _normalize(query):
+    query = _STRING_LITERAL.sub('?', query)
+    query = _NUMBER.sub('?', query)
+    query = _PLACEHOLDER_LIST.sub('(?)', query)
+    query = _VALUES_LIST.sub('(?), ...', query)
+    return _WHITESPACE.sub(' ', query).strip()
+
+
+def normalize_query(query):
+    """Collapse a statement to its shape: literals and value lists become ``?``."""
+    if isinstance(query, bytes):
+        query = query.decode('utf-8', 'replace')
+    elif not isinstance(query, str):
+        query = str(query)
+    # execute_values() sends one huge literal VALUES list; its prefix is the shape
+    return _normalize(query[:_MAX_QUERY_LENGTH])
+
+
+# --- Per-request timing ---
+class RequestTiming:
+    __slots__ = ('started', 'db', 'queries', 'rows', 'pool_wait', 'serialize')
+
+    def __init__(self):
+        self.started = time.perf_counter()
+        self.db = 0.0
+        self.queries = 0
+        self.rows = 0
+        self.pool_wait = 0.0
+        self.serialize = 0.0
+
+
+def current_timing():
+    if has_request_context():
+        return g.get('_timing')
+    return None
+
+
+def record_query(query, seconds, rows):
+    normalized = normalize_query(query)
+    labels = (normalized,)
+    QUERY_SECONDS.observe(seconds, labels)
+    if rows and rows > 0:
+        QUERY_ROWS.inc(rows, labels)
+
+    timing = current_timing()
+    if timing is not None:
+        timing.db += seconds
+        timing.queries += 1
+        timing.rows += max(rows or 0, 0)
+
+    if seconds >= SLOW_QUERY_SECONDS:
+        SLOW_QUERIES.inc(1, labels)
+        logger.warning("slow query", extra={"fields": {
+            "event": "slow_query",
+            "query": normalized,
+            "duration_ms": round(seconds * 1000, 2),
+            "rows": rows,
+            "route": request.url_rule.rule if has_request_context() and request.url_rule else None,
+        }})
+
+
+def record_pool_wait(seconds):
+    POOL_WAIT_SECONDS.observe(seconds)
+    timing = current_timing()
+    if timing is not None:
+        timing.pool_wait += seconds
+
+
+def record_serialize(seconds):
+    SERIALIZE_SECONDS.observe(seconds)
+    timing = current_timing()
+    if timing is not None:
+        timing.serialize += seconds
+
+
+# --- Timed psycopg2 connections and cursors ---
+class TimedCursorMixin:
+    def execute(self, query, vars=None):
+        started = time.perf_counter()
+        try:
+            return super().execute(query, vars)
+        finally:
+            # Named cursors only DECLARE here; their FETCHes are timed below
+            self._timed_query = query
+            record_query(query, time.perf_counter() - started, self.rowcount if self.name is None else 0)
+
+    def executemany(self, query, vars_list):
+        started = time.perf_counter()
+        try:
+            return super().executemany(query, vars_list)
+        finally:
+            record_query(query, time.perf_counter() - started, self.rowcount)
+
+    def copy_expert(self, sql, file, size=8192):
+        started = time.perf_counter()
+        try:
+            return super().copy_expert(sql, file, size)
+        finally:
+            record_query(sql, time.perf_counter() - started, self.rowcount)
+
+    def fetchmany(self, size=None):
+        if self.name is None:
+            return super().fetchmany(size) if size is not None else super().fetchmany()
+        started = time.perf_counter()
+        rows = super().fetchmany(size) if size is not None else super().fetchmany()
+        record_query(getattr(self, '_timed_query', 'FETCH'), time.perf_counter() - started, len(rows))
+        return rows
+
+
+_timed_cursor_classes = {}
+
+
+def timed_cursor_class(cursor_class):
+    timed = _timed_cursor_classes.get(cursor_class)
+    if timed is None:
+        timed = type(f"Timed{cursor_class.__name__}", (TimedCursorMixin, cursor_class), {})
+        _timed_cursor_classes[cursor_class] = timed
+    return timed
+
+
+class TimedConnection(psycopg2.extensions.connection):
+    """Connection whose cursors (any cursor_factory) report their statements."""
+
+    def cursor(self, *args, **kwargs):
+        factory = kwargs.get('cursor_factory') or self.cursor_factory or psycopg2.extensions.cursor
+        kwargs['cursor_factory'] = timed_cursor_class(factory)
+        return super().cursor(*args, **kwargs)
+
+
+# --- Structured logging ---
+class JsonFormatter(logging.Formatter):
+    def format(self, record):
+        entry = {
+            "time": self.formatTime(record, "%Y-%m-%dT%H:%M:%S"),
+            "level": record.levelname,
+            "logger": record.name,
+            "message": record.getMessage(),
+        }
+        entry.update(getattr(record, 'fields', {}))
+        if record.exc_info:
+            entry["exception"] = self.formatException(record.exc_info)
+        return json.dumps(entry, default=str)
+
+
+def configure_logging():
+    root = logging.getLogger()
+    if root.handlers:
+        return
+    handler = logging.StreamHandler()
+    if os.getenv('LOG_FORMAT', 'json') == 'json':
+        handler.setFormatter(JsonFormatter())
+    root.addHandler(handler)
+    root.setLevel(os.getenv('LOG_LEVEL', 'INFO').upper())
+
+
+# --- Flask hooks ---
+def _before_request():
+    g._timing = RequestTiming()
+
+
+def _after_request(response):
+    timing = g.pop('_timing', None)
+    if timing is None:
+        return response
+    elapsed = time.perf_counter() - timing.started
+    route = request.url_rule.rule if request.url_rule else 'unmatched'
+
+    REQUESTS.inc(1, (request.method, route, str(response.status_code)))
+    REQUEST_SECONDS.observe(elapsed, (request.method, route))
+
+    if os.getenv('SERVER_TIMING', 'true').lower() != 'false':
+        response.headers['Server-Timing'] = (
+            f'app;dur={elapsed * 1000:.1f}, '
+            f'db;dur={timing.db * 1000:.1f};desc="{timing.queries} queries, {timing.rows} rows", '
+            f'pool;dur={timing.pool_wait * 1000:.1f}, '
+            f'serialize;dur={timing.serialize * 1000:.1f}'
+        )
+
+    if elapsed >= SLOW_REQUEST_SECONDS or os.getenv('LOG_REQUESTS', 'false').lower() == 'true':
+        logger.log(logging.WARNING if elapsed >= SLOW_REQUEST_SECONDS else logging.INFO, "request", extra={"fields": {
+            "event": "request",
+            "method": request.method,
+            "route": route,
+            "path": request.path,
+            "status": response.status_code,
+            "duration_ms": round(elapsed * 1000, 2),
+            "db_ms": round(timing.db * 1000, 2),
+            "queries": timing.queries,
+            "rows": timing.rows,
+            "pool_wait_ms": round(timing.pool_wait * 1000, 2),
+            "serialize_ms": round(timing.serialize * 1000, 2),
+        }})
+    return response
+
+
+def init_instrumentation(app):
+    configure_logging()
+    if not enabled():
+        return
+    app.before_request(_before_request)
+    app.after_request(_after_request)
@@ -0,0 +1,107 @@
+import dataclasses
+import decimal
+import json
+import uuid
+from datetime import date, time
+from time import perf_counter
+
+from flask import current_app, stream_with_context
+from flask.json.provider import DefaultJSONProvider
+from werkzeug.http import http_date
+
+from data_access import Record
+from instrumentation import record_serialize
+
+try:
+    import orjson
+except ImportError:  # optional fast backend; the stdlib encoder is used without it
+    orjson = None
+
+
+def _default(o):
+    """Encode the non-JSON types psycopg2 hands back.
+
+    Dates and Decimals are rendered exactly as Flask's default provider does
+    (RFC 1123 dates, Decimal as a string) so switching backends doesn't change
+    any response body.
+    """
+    if isinstance(o, date):
+        return http_date(o)
+    if isinstance(o, time):
+        return o.isoformat()
+    if isinstance(o, (decimal.Decimal, uuid.UUID)):
+        return str(o)
+    if isinstance(o, memoryview):
+        return o.tobytes().decode('utf-8')
+    if isinstance(o, Record):
+        return o.to_dict()
+    if dataclasses.is_dataclass(o) and not isinstance(o, type):
+        return dataclasses.asdict(o)
+    if hasattr(o, '__html__'):
+        return str(o.__html__())
+    raise TypeError(f"Object of type {type(o).__name__} is not JSON serializable")
+
+
+if orjson is not None:
+    _ORJSON_OPTIONS = orjson.OPT_SORT_KEYS | orjson.OPT_PASSTHROUGH_DATETIME | orjson.OPT_NON_STR_KEYS
+
+    def encode(obj):
+        return orjson.dumps(obj, default=_default, option=_ORJSON_OPTIONS)
+else:
+    _encoder = json.JSONEncoder(default=_default, sort_keys=True, separators=(',', ':'), ensure_ascii=True)
+
+    def encode(obj):
+        return _encoder.encode(obj).encode('utf-8')
+
+
+class CatalogJSONProvider(DefaultJSONProvider):
+    """JSON provider for the API: orjson when it is installed, stdlib json otherwise."""
+
+    default = staticmethod(_default)
+
+    def dumps(self, obj, **kwargs):
+        if kwargs:
+            # indent/sort_keys overrides (e.g. pretty printing in debug) use the stdlib path
+            kwargs.setdefault('default', self.default)
+            kwargs.setdefault('ensure_ascii', self.ensure_ascii)
+            kwargs.setdefault('sort_keys', self.sort_keys)
+            return json.dumps(obj, **kwargs)
+        return encode(obj).decode('utf-8')
+
+    def loads(self, s, **kwargs):
+        if orjson is not None and not kwargs:
+            return orjson.loads(s)
+        return json.loads(s, **kwargs)
+
+    def response(self, *args, **kwargs):
+        if (self.compact is None and self._app.debug) or self.compact is False:
+            return super().response(*args, **kwargs)
+        obj = self._prepare_response_obj(args, kwargs)
+        started = perf_counter()
+        body = encode(obj) + b"\n"
+        record_serialize(perf_counter() - started)
+        return self._app.response_class(body, mimetype=self.mimetype)
+
+
+def stream_json_list(key, batches, transform=None):
+    """Stream ``{"<key>": [row, row, ...]}`` one batch of rows at a time.
+
+    ``batches`` yields lists of rows (see db_helpers.stream_rows); each batch
+    is passed through ``transform`` (if given) and encoded as it arrives, so
+    peak memory is one batch no matter how large the listing is.
+    """
+    def generate():
+        yield b'{"' + key.encode('utf-8') + b'":['
+        separator = b''
+        for batch in batches:
+            if transform is not None:
+                transform(batch)
+            if batch:
+                started = perf_counter()
+                chunk = separator + b','.join(encode(row) for row in batch)
+                record_serialize(perf_counter() - started)
+                yield chunk
+                separator = b','
+        yield b']}\n'
+
+    return current_app.response_class(stream_with_context(generate()), mimetype='application/json')
@@ -0,0 +1,60 @@
+import hmac
+import logging
+import os
+
+from flask import Blueprint, Response, jsonify, request
+
+from auth_middleware import token_cache
+from cache import response_cache
+from db_helpers import pool_stats, replica_stats
+from instrumentation import render_metrics
+from password_hashing import hashing_stats
+from prepared import statements
+
+logger = logging.getLogger(__name__)
+
+metrics_blueprint = Blueprint('metrics_blueprint', __name__)
+
+LOOPBACK = {'127.0.0.1', '::1'}
+
+
+def scrape_allowed():
+    """With METRICS_TOKEN set, scrapers must send it as a bearer token;
+    without one, only local scrapes are answered."""
+    expected = os.getenv('METRICS_TOKEN')
+    if expected:
+        supplied = request.headers.get('Authorization', '').removeprefix('Bearer ')
+        return hmac.compare_digest(supplied, expected)
+    return request.remote_addr in LOOPBACK
+
+
+def numeric_gauges(prefix, stats):
+    return {
+        f"{prefix}_{name}": float(value)
+        for name, value in stats.items()
+        if isinstance(value, (int, float)) and not isinstance(value, bool)
+    }
+
+
+# GET route for Prometheus-style metrics (this worker process only)
+@metrics_blueprint.route('/metrics', methods=['GET'])
+def metrics():
+    if not scrape_allowed():
+        return jsonify({"error": "Unauthorized"}), 401
+
+    gauges = {}
+    for prefix, stats in (
+        ("db_pool", pool_stats),
+        ("db_replicas", replica_stats),
+        ("response_cache", response_cache.stats),
+        ("token_cache", token_cache.stats),
+        ("bcrypt", hashing_stats),
+        ("prepared_statements", statements.stats),
+    ):
+        try:
+            gauges.update(numeric_gauges(prefix, stats()))
+        except Exception as error:
+            logger.warning("Metrics gauges %s failed: %s", prefix, error, exc_info=True)
+    gauges["process_pid"] = os.getpid()
+
+    return Response(render_metrics(gauges), mimetype='text/plain; version=0.0.4')
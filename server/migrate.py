@@ -0,0 +1,49 @@
+"""Apply the SQL files in migrations/ that haven't been run against the database yet.
+
+Usage: python migrate.py
+"""
+import os
+from dotenv import load_dotenv
+from db_helpers import get_db_connection
+
+MIGRATIONS_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'migrations')
+
+
+def pending_migrations(cursor, directory=MIGRATIONS_DIR):
+    cursor.execute("""
+        CREATE TABLE IF NOT EXISTS schema_migrations (
+            version TEXT PRIMARY KEY,
+            applied_at TIMESTAMPTZ NOT NULL DEFAULT now()
+        )
+    """)
+    cursor.execute("SELECT version FROM schema_migrations")
+    applied = {row[0] for row in cursor.fetchall()}
+    return [
+        filename for filename in sorted(os.listdir(directory))
+        if filename.endswith('.sql') and filename not in applied
+    ]
+
+
+def run_migrations(connection, directory=MIGRATIONS_DIR):
+    """Run each pending migration in its own transaction. Returns the files applied."""
+    cursor = connection.cursor()
+    pending = pending_migrations(cursor, directory)
+    connection.commit()
+
+    for filename in pending:
+        with open(os.path.join(directory, filename)) as migration_file:
+            cursor.execute(migration_file.read())
+        cursor.execute("INSERT INTO schema_migrations (version) VALUES (%s)", (filename,))
+        connection.commit()
+        print(f"Applied migration {filename}")
+
+    return pending
+
+
+if __name__ == "__main__":
+    load_dotenv()
+    connection = get_db_connection()
+    try:
+        run_migrations(connection)
+    finally:
+        connection.close()
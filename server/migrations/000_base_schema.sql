@@ -0,0 +1,42 @@
+-- Tables the blueprints already read and write. Safe to run against an
+-- existing database: every statement is a no-op when the object exists.
+
+CREATE TABLE IF NOT EXISTS users (
+    id SERIAL PRIMARY KEY,
+    username TEXT NOT NULL UNIQUE,
+    password TEXT NOT NULL,
+    role TEXT NOT NULL DEFAULT 'staff'
+);
+
+CREATE TABLE IF NOT EXISTS bands (
+    id SERIAL PRIMARY KEY,
+    bandname TEXT NOT NULL,
+    hometown TEXT,
+    genre TEXT,
+    yearstarted INTEGER,
+    membernames TEXT[],
+    bandphoto TEXT,
+    banddescription TEXT,
+    user_id INTEGER REFERENCES users (id) ON DELETE SET NULL
+);
+
+CREATE TABLE IF NOT EXISTS venues (
+    id SERIAL PRIMARY KEY,
+    capacity INTEGER,
+    venuename TEXT NOT NULL,
+    location TEXT,
+    venuemanager TEXT,
+    user_id INTEGER REFERENCES users (id) ON DELETE SET NULL
+);
+
+CREATE TABLE IF NOT EXISTS shows (
+    id SERIAL PRIMARY KEY,
+    showdate DATE NOT NULL,
+    showdescription TEXT,
+    showtime TIMESTAMP,
+    location TEXT,
+    bandsplaying TEXT[],
+    ticketprice NUMERIC(10, 2),
+    user_id INTEGER REFERENCES users (id) ON DELETE SET NULL,
+    tourposter TEXT
+);
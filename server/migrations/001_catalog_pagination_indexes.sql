@@ -0,0 +1,28 @@
+-- Composite indexes backing keyset pagination and the filters on
+-- GET /shows, /bands and /venues.
+
+-- Keyset order for /shows, and the from/to date range filter
+CREATE INDEX IF NOT EXISTS shows_showdate_showtime_id_idx
+    ON shows (showdate, showtime, id);
+
+-- /shows?location=... walks one venue's calendar in keyset order
+CREATE INDEX IF NOT EXISTS shows_location_showdate_showtime_id_idx
+    ON shows (location, showdate, showtime, id);
+
+-- /shows?band=... and ?genre=... use array containment/overlap
+CREATE INDEX IF NOT EXISTS shows_bandsplaying_gin_idx
+    ON shows USING GIN (bandsplaying);
+
+-- Keyset order for /bands, plus the genre and hometown filters
+CREATE INDEX IF NOT EXISTS bands_bandname_id_idx
+    ON bands (bandname, id);
+CREATE INDEX IF NOT EXISTS bands_genre_bandname_id_idx
+    ON bands (genre, bandname, id);
+CREATE INDEX IF NOT EXISTS bands_hometown_bandname_id_idx
+    ON bands (hometown, bandname, id);
+
+-- Keyset order for /venues, plus the location filter
+CREATE INDEX IF NOT EXISTS venues_venuename_id_idx
+    ON venues (venuename, id);
+CREATE INDEX IF NOT EXISTS venues_location_venuename_id_idx
+    ON venues (location, venuename, id);
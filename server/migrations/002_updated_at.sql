@@ -0,0 +1,29 @@
+-- Row versions for conditional GETs (ETag / Last-Modified).
+
+ALTER TABLE shows ADD COLUMN IF NOT EXISTS updated_at TIMESTAMPTZ NOT NULL DEFAULT now();
+ALTER TABLE bands ADD COLUMN IF NOT EXISTS updated_at TIMESTAMPTZ NOT NULL DEFAULT now();
+ALTER TABLE venues ADD COLUMN IF NOT EXISTS updated_at TIMESTAMPTZ NOT NULL DEFAULT now();
+
+CREATE OR REPLACE FUNCTION set_updated_at() RETURNS trigger AS $$
+BEGIN
+    NEW.updated_at := now();
+    RETURN NEW;
+END;
+$$ LANGUAGE plpgsql;
+
+DROP TRIGGER IF EXISTS shows_set_updated_at ON shows;
+CREATE TRIGGER shows_set_updated_at BEFORE UPDATE ON shows
+    FOR EACH ROW EXECUTE FUNCTION set_updated_at();
+
+DROP TRIGGER IF EXISTS bands_set_updated_at ON bands;
+CREATE TRIGGER bands_set_updated_at BEFORE UPDATE ON bands
+    FOR EACH ROW EXECUTE FUNCTION set_updated_at();
+
+DROP TRIGGER IF EXISTS venues_set_updated_at ON venues;
+CREATE TRIGGER venues_set_updated_at BEFORE UPDATE ON venues
+    FOR EACH ROW EXECUTE FUNCTION set_updated_at();
+
+-- max(updated_at) for the list version token is a single index probe
+CREATE INDEX IF NOT EXISTS shows_updated_at_idx ON shows (updated_at);
+CREATE INDEX IF NOT EXISTS bands_updated_at_idx ON bands (updated_at);
+CREATE INDEX IF NOT EXISTS venues_updated_at_idx ON venues (updated_at);
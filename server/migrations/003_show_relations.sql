@@ -0,0 +1,141 @@
+-- Real links from shows to bands and venues.
+--
+-- shows.bandsplaying (band names) and shows.location (venue name) stay the
+-- source of truth for what the API returns; show_bands and shows.venue_id
+-- are derived from them by the triggers below, so every write path (the
+-- blueprints, bulk import, psql) keeps them in step. Renaming a band or a
+-- venue rewrites the names stored on its shows instead of orphaning them.
+
+CREATE TABLE IF NOT EXISTS show_bands (
+    show_id INTEGER NOT NULL REFERENCES shows (id) ON DELETE CASCADE,
+    band_id INTEGER NOT NULL REFERENCES bands (id) ON DELETE CASCADE,
+    position SMALLINT NOT NULL,
+    PRIMARY KEY (show_id, band_id)
+);
+
+-- /bands/<id>/shows
+CREATE INDEX IF NOT EXISTS show_bands_band_id_show_id_idx ON show_bands (band_id, show_id);
+
+ALTER TABLE shows ADD COLUMN IF NOT EXISTS venue_id INTEGER REFERENCES venues (id) ON DELETE SET NULL;
+
+-- /venues/<id>/shows walks one venue's calendar in keyset order
+CREATE INDEX IF NOT EXISTS shows_venue_id_showdate_showtime_id_idx
+    ON shows (venue_id, showdate, showtime, id);
+
+-- --- shows -> show_bands / venue_id ---
+
+CREATE OR REPLACE FUNCTION sync_show_bands() RETURNS trigger AS $$
+BEGIN
+    DELETE FROM show_bands WHERE show_id = NEW.id;
+    INSERT INTO show_bands (show_id, band_id, position)
+    SELECT DISTINCT ON (band.id) NEW.id, band.id, lineup.position
+    FROM unnest(NEW.bandsplaying) WITH ORDINALITY AS lineup (bandname, position)
+    JOIN LATERAL (
+        SELECT min(id) AS id FROM bands WHERE bands.bandname = lineup.bandname
+    ) band ON band.id IS NOT NULL
+    ORDER BY band.id, lineup.position;
+    RETURN NULL;
+END;
+$$ LANGUAGE plpgsql;
+
+DROP TRIGGER IF EXISTS shows_sync_bands_insert ON shows;
+CREATE TRIGGER shows_sync_bands_insert AFTER INSERT ON shows
+    FOR EACH ROW EXECUTE FUNCTION sync_show_bands();
+
+DROP TRIGGER IF EXISTS shows_sync_bands_update ON shows;
+CREATE TRIGGER shows_sync_bands_update AFTER UPDATE OF bandsplaying ON shows
+    FOR EACH ROW WHEN (OLD.bandsplaying IS DISTINCT FROM NEW.bandsplaying)
+    EXECUTE FUNCTION sync_show_bands();
+
+CREATE OR REPLACE FUNCTION set_show_venue_id() RETURNS trigger AS $$
+BEGIN
+    -- Keep an explicit venue_id as long as it still names this location
+    IF NEW.venue_id IS NULL
+       OR NOT EXISTS (SELECT 1 FROM venues WHERE id = NEW.venue_id AND venuename = NEW.location) THEN
+        NEW.venue_id := (SELECT min(id) FROM venues WHERE venuename = NEW.location);
+    END IF;
+    RETURN NEW;
+END;
+$$ LANGUAGE plpgsql;
+
+DROP TRIGGER IF EXISTS shows_set_venue_id ON shows;
+CREATE TRIGGER shows_set_venue_id BEFORE INSERT OR UPDATE OF location, venue_id ON shows
+    FOR EACH ROW EXECUTE FUNCTION set_show_venue_id();
+
+-- --- bands / venues -> shows ---
+
+-- Link a band to every show whose lineup already names it
+CREATE OR REPLACE FUNCTION link_band_to_shows(link_band_id INTEGER, link_bandname TEXT) RETURNS void AS $$
+    INSERT INTO show_bands (show_id, band_id, position)
+    SELECT shows.id, link_band_id, array_position(shows.bandsplaying, link_bandname)
+    FROM shows
+    WHERE shows.bandsplaying @> ARRAY[link_bandname]
+    ON CONFLICT DO NOTHING;
+$$ LANGUAGE sql;
+
+CREATE OR REPLACE FUNCTION link_new_band() RETURNS trigger AS $$
+BEGIN
+    PERFORM link_band_to_shows(NEW.id, NEW.bandname);
+    RETURN NULL;
+END;
+$$ LANGUAGE plpgsql;
+
+DROP TRIGGER IF EXISTS bands_link_shows ON bands;
+CREATE TRIGGER bands_link_shows AFTER INSERT ON bands
+    FOR EACH ROW EXECUTE FUNCTION link_new_band();
+
+CREATE OR REPLACE FUNCTION rename_band_on_shows() RETURNS trigger AS $$
+BEGIN
+    -- Rewrite the old name on this band's shows; shows_sync_bands_update relinks them
+    UPDATE shows
+    SET bandsplaying = array_replace(bandsplaying, OLD.bandname, NEW.bandname)
+    WHERE id IN (SELECT show_id FROM show_bands WHERE band_id = NEW.id);
+    PERFORM link_band_to_shows(NEW.id, NEW.bandname);
+    RETURN NULL;
+END;
+$$ LANGUAGE plpgsql;
+
+DROP TRIGGER IF EXISTS bands_rename_on_shows ON bands;
+CREATE TRIGGER bands_rename_on_shows AFTER UPDATE OF bandname ON bands
+    FOR EACH ROW WHEN (OLD.bandname IS DISTINCT FROM NEW.bandname)
+    EXECUTE FUNCTION rename_band_on_shows();
+
+CREATE OR REPLACE FUNCTION link_venue_shows() RETURNS trigger AS $$
+BEGIN
+    IF TG_OP = 'UPDATE' THEN
+        UPDATE shows SET location = NEW.venuename WHERE venue_id = NEW.id;
+    END IF;
+    UPDATE shows SET venue_id = NEW.id WHERE venue_id IS NULL AND location = NEW.venuename;
+    RETURN NULL;
+END;
+$$ LANGUAGE plpgsql;
+
+DROP TRIGGER IF EXISTS venues_link_shows_insert ON venues;
+CREATE TRIGGER venues_link_shows_insert AFTER INSERT ON venues
+    FOR EACH ROW EXECUTE FUNCTION link_venue_shows();
+
+DROP TRIGGER IF EXISTS venues_link_shows_rename ON venues;
+CREATE TRIGGER venues_link_shows_rename AFTER UPDATE OF venuename ON venues
+    FOR EACH ROW WHEN (OLD.venuename IS DISTINCT FROM NEW.venuename)
+    EXECUTE FUNCTION link_venue_shows();
+
+-- --- Backfill ---
+
+INSERT INTO show_bands (show_id, band_id, position)
+SELECT DISTINCT ON (shows.id, band.id) shows.id, band.id, lineup.position
+FROM shows
+CROSS JOIN LATERAL unnest(shows.bandsplaying) WITH ORDINALITY AS lineup (bandname, position)
+JOIN LATERAL (
+    SELECT min(id) AS id FROM bands WHERE bands.bandname = lineup.bandname
+) band ON band.id IS NOT NULL
+ORDER BY shows.id, band.id, lineup.position
+ON CONFLICT DO NOTHING;
+
+UPDATE shows
+SET venue_id = venue.id
+FROM (SELECT venuename, min(id) AS id FROM venues GROUP BY venuename) venue
+WHERE shows.location = venue.venuename
+  AND shows.venue_id IS NULL;
+
+ANALYZE show_bands;
+ANALYZE shows;
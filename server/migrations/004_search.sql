@@ -0,0 +1,121 @@
+-- Full-text search for GET /search.
+--
+-- Each catalog table gets a search_vector column kept current by a BEFORE
+-- trigger, with a GIN index. Names weigh more than descriptions:
+--   bands:  bandname (A), genre (B), hometown (C), banddescription (D)
+--   shows:  bandsplaying (A), location (B), showdescription (C)
+--   venues: venuename (A), location (B)
+--
+-- Typo-tolerant matching on names uses pg_trgm when the server has it. The
+-- extension is optional: without it /search falls back to full-text prefix
+-- matching only. Installing pg_trgm later only needs the last block re-run.
+
+CREATE OR REPLACE FUNCTION band_search_vector(bandname TEXT, genre TEXT, hometown TEXT, banddescription TEXT)
+RETURNS tsvector AS $$
+    SELECT setweight(to_tsvector('english', coalesce(bandname, '')), 'A')
+        || setweight(to_tsvector('english', coalesce(genre, '')), 'B')
+        || setweight(to_tsvector('english', coalesce(hometown, '')), 'C')
+        || setweight(to_tsvector('english', coalesce(banddescription, '')), 'D');
+$$ LANGUAGE sql IMMUTABLE;
+
+CREATE OR REPLACE FUNCTION show_search_vector(bandsplaying TEXT[], location TEXT, showdescription TEXT)
+RETURNS tsvector AS $$
+    SELECT setweight(to_tsvector('english', coalesce(array_to_string(bandsplaying, ' '), '')), 'A')
+        || setweight(to_tsvector('english', coalesce(location, '')), 'B')
+        || setweight(to_tsvector('english', coalesce(showdescription, '')), 'C');
+$$ LANGUAGE sql IMMUTABLE;
+
+CREATE OR REPLACE FUNCTION venue_search_vector(venuename TEXT, location TEXT)
+RETURNS tsvector AS $$
+    SELECT setweight(to_tsvector('english', coalesce(venuename, '')), 'A')
+        || setweight(to_tsvector('english', coalesce(location, '')), 'B');
+$$ LANGUAGE sql IMMUTABLE;
+
+ALTER TABLE bands ADD COLUMN IF NOT EXISTS search_vector tsvector;
+ALTER TABLE shows ADD COLUMN IF NOT EXISTS search_vector tsvector;
+ALTER TABLE venues ADD COLUMN IF NOT EXISTS search_vector tsvector;
+
+-- --- Triggers ---
+
+CREATE OR REPLACE FUNCTION set_band_search_vector() RETURNS trigger AS $$
+BEGIN
+    NEW.search_vector := band_search_vector(NEW.bandname, NEW.genre, NEW.hometown, NEW.banddescription);
+    RETURN NEW;
+END;
+$$ LANGUAGE plpgsql;
+
+DROP TRIGGER IF EXISTS bands_set_search_vector ON bands;
+CREATE TRIGGER bands_set_search_vector
+    BEFORE INSERT OR UPDATE OF bandname, genre, hometown, banddescription ON bands
+    FOR EACH ROW EXECUTE FUNCTION set_band_search_vector();
+
+CREATE OR REPLACE FUNCTION set_show_search_vector() RETURNS trigger AS $$
+BEGIN
+    NEW.search_vector := show_search_vector(NEW.bandsplaying, NEW.location, NEW.showdescription);
+    RETURN NEW;
+END;
+$$ LANGUAGE plpgsql;
+
+-- Also fires for the band/venue rename triggers in 003, which rewrite these columns
+DROP TRIGGER IF EXISTS shows_set_search_vector ON shows;
+CREATE TRIGGER shows_set_search_vector
+    BEFORE INSERT OR UPDATE OF bandsplaying, location, showdescription ON shows
+    FOR EACH ROW EXECUTE FUNCTION set_show_search_vector();
+
+CREATE OR REPLACE FUNCTION set_venue_search_vector() RETURNS trigger AS $$
+BEGIN
+    NEW.search_vector := venue_search_vector(NEW.venuename, NEW.location);
+    RETURN NEW;
+END;
+$$ LANGUAGE plpgsql;
+
+DROP TRIGGER IF EXISTS venues_set_search_vector ON venues;
+CREATE TRIGGER venues_set_search_vector
+    BEFORE INSERT OR UPDATE OF venuename, location ON venues
+    FOR EACH ROW EXECUTE FUNCTION set_venue_search_vector();
+
+-- --- Backfill ---
+
+-- Filling a derived column is not a content change, so leave updated_at
+-- (and with it every client's ETag) alone
+ALTER TABLE bands DISABLE TRIGGER bands_set_updated_at;
+ALTER TABLE shows DISABLE TRIGGER shows_set_updated_at;
+ALTER TABLE venues DISABLE TRIGGER venues_set_updated_at;
+
+UPDATE bands SET search_vector = band_search_vector(bandname, genre, hometown, banddescription);
+UPDATE shows SET search_vector = show_search_vector(bandsplaying, location, showdescription);
+UPDATE venues SET search_vector = venue_search_vector(venuename, location);
+
+ALTER TABLE bands ENABLE TRIGGER bands_set_updated_at;
+ALTER TABLE shows ENABLE TRIGGER shows_set_updated_at;
+ALTER TABLE venues ENABLE TRIGGER venues_set_updated_at;
+
+-- --- Indexes ---
+
+CREATE INDEX IF NOT EXISTS bands_search_vector_idx ON bands USING GIN (search_vector);
+CREATE INDEX IF NOT EXISTS shows_search_vector_idx ON shows USING GIN (search_vector);
+CREATE INDEX IF NOT EXISTS venues_search_vector_idx ON venues USING GIN (search_vector);
+
+-- Trigram indexes for fuzzy name matching (word_similarity / <%), when
+-- pg_trgm is available and this role may install it
+DO $$
+BEGIN
+    IF EXISTS (SELECT 1 FROM pg_available_extensions WHERE name = 'pg_trgm') THEN
+        BEGIN
+            CREATE EXTENSION IF NOT EXISTS pg_trgm;
+        EXCEPTION WHEN insufficient_privilege THEN
+            RAISE NOTICE 'pg_trgm not installed (%); /search will not match typos', SQLERRM;
+        END;
+    END IF;
+
+    IF EXISTS (SELECT 1 FROM pg_extension WHERE extname = 'pg_trgm') THEN
+        EXECUTE 'CREATE INDEX IF NOT EXISTS bands_bandname_trgm_idx ON bands USING GIN (bandname gin_trgm_ops)';
+        EXECUTE 'CREATE INDEX IF NOT EXISTS shows_location_trgm_idx ON shows USING GIN (location gin_trgm_ops)';
+        EXECUTE 'CREATE INDEX IF NOT EXISTS venues_venuename_trgm_idx ON venues USING GIN (venuename gin_trgm_ops)';
+    END IF;
+END;
+$$;
+
+ANALYZE bands;
+ANALYZE shows;
+ANALYZE venues;
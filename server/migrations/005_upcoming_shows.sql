@@ -0,0 +1,19 @@
+-- Precomputed feed for GET /shows/upcoming.
+--
+-- One row per show dated today or later, holding the show exactly as
+-- /shows?include=bands,venue renders it, already serialized. The app keeps
+-- it current in the same transaction as each write (see upcoming.py), and
+-- `python upcoming.py roll-off` drops past shows on a schedule. The rows are
+-- filled by the app, not here: run `python upcoming.py rebuild` once after
+-- this migration.
+
+CREATE TABLE IF NOT EXISTS upcoming_shows (
+    show_id INTEGER PRIMARY KEY REFERENCES shows (id) ON DELETE CASCADE,
+    showdate DATE NOT NULL,
+    showtime TIMESTAMP,
+    payload TEXT NOT NULL  -- JSON; TEXT so reads hand back the bytes untouched
+);
+
+-- Keyset order for the feed
+CREATE INDEX IF NOT EXISTS upcoming_shows_showdate_showtime_show_id_idx
+    ON upcoming_shows (showdate, showtime, show_id);
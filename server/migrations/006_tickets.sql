@@ -0,0 +1,45 @@
+-- Ticket inventory for shows (see tickets.py).
+--
+-- Every sellable ticket is a row in seats, created up to the venue's
+-- capacity when the show's owner puts it on sale, so overselling is
+-- impossible by construction: a seat is sold at most once. Buyers take
+-- seats with SELECT ... FOR UPDATE SKIP LOCKED, so concurrent holds on the
+-- same show grab different rows instead of queueing on one counter.
+--
+-- A hold reserves seats until expires_at. Expired holds are released by
+-- `python tickets.py expire` (and, per show, whenever a hold comes up
+-- short) through the partial index on held_until, which only covers seats
+-- that are currently held.
+
+CREATE TABLE IF NOT EXISTS ticket_holds (
+    id BIGSERIAL PRIMARY KEY,
+    show_id INTEGER NOT NULL REFERENCES shows (id) ON DELETE CASCADE,
+    user_id INTEGER REFERENCES users (id) ON DELETE SET NULL,
+    quantity SMALLINT NOT NULL CHECK (quantity > 0),
+    unit_price NUMERIC(10, 2),
+    status TEXT NOT NULL DEFAULT 'active' CHECK (status IN ('active', 'purchased', 'released', 'expired')),
+    created_at TIMESTAMPTZ NOT NULL DEFAULT now(),
+    expires_at TIMESTAMPTZ NOT NULL,
+    purchased_at TIMESTAMPTZ
+);
+
+CREATE TABLE IF NOT EXISTS seats (
+    id BIGSERIAL PRIMARY KEY,
+    show_id INTEGER NOT NULL REFERENCES shows (id) ON DELETE CASCADE,
+    seat_number INTEGER NOT NULL,
+    status TEXT NOT NULL DEFAULT 'available' CHECK (status IN ('available', 'held', 'sold')),
+    hold_id BIGINT REFERENCES ticket_holds (id) ON DELETE SET NULL,
+    held_until TIMESTAMPTZ,
+    UNIQUE (show_id, seat_number)
+);
+
+-- Allocation: the lowest open seat numbers of one show
+CREATE INDEX IF NOT EXISTS seats_available_idx ON seats (show_id, seat_number) WHERE status = 'available';
+
+-- Expiry: only seats on hold, oldest deadline first
+CREATE INDEX IF NOT EXISTS seats_held_until_idx ON seats (held_until) WHERE status = 'held';
+
+-- Purchase and release find a hold's seats
+CREATE INDEX IF NOT EXISTS seats_hold_id_idx ON seats (hold_id) WHERE hold_id IS NOT NULL;
+
+CREATE INDEX IF NOT EXISTS ticket_holds_user_id_idx ON ticket_holds (user_id);
@@ -0,0 +1,68 @@
+-- Venue slots: no two shows at one venue at the same time (see scheduling.py).
+--
+-- shows.slot is the time range a show occupies at its venue, kept current by
+-- a BEFORE trigger like venue_id and search_vector. A show with a time books
+-- three hours from that time on its showdate; one without (create_show
+-- stores 1970-01-01 00:00 for "no time") books the whole day.
+--
+-- The exclusion constraint refuses a slot that overlaps another at the same
+-- venue, and its GiST index answers "what is booked at venue V between A
+-- and B" for GET /venues/<id>/availability. The venue goes in as a
+-- one-element int4range compared with =, so range_ops covers both columns
+-- and btree_gist is not needed. Shows without a venue have no slot.
+
+CREATE OR REPLACE FUNCTION show_slot(showdate DATE, showtime TIMESTAMP) RETURNS tsrange AS $$
+    SELECT CASE
+        WHEN showtime IS NULL OR showtime::date = DATE '1970-01-01'
+            THEN tsrange(showdate::timestamp, (showdate + 1)::timestamp)
+        ELSE tsrange(showdate + showtime::time, showdate + showtime::time + interval '3 hours')
+    END;
+$$ LANGUAGE sql IMMUTABLE;
+
+ALTER TABLE shows ADD COLUMN IF NOT EXISTS slot tsrange;
+
+CREATE OR REPLACE FUNCTION set_show_slot() RETURNS trigger AS $$
+BEGIN
+    -- Only a new date, time or venue books a new slot, so renaming a venue
+    -- never re-checks its shows
+    IF TG_OP = 'INSERT'
+       OR NEW.showdate IS DISTINCT FROM OLD.showdate
+       OR NEW.showtime IS DISTINCT FROM OLD.showtime
+       OR NEW.venue_id IS DISTINCT FROM OLD.venue_id THEN
+        NEW.slot := CASE WHEN NEW.venue_id IS NOT NULL THEN show_slot(NEW.showdate, NEW.showtime) END;
+    END IF;
+    RETURN NEW;
+END;
+$$ LANGUAGE plpgsql;
+
+-- BEFORE triggers run in name order: this one must follow shows_set_venue_id
+DROP TRIGGER IF EXISTS shows_slot ON shows;
+CREATE TRIGGER shows_slot BEFORE INSERT OR UPDATE OF showdate, showtime, location, venue_id ON shows
+    FOR EACH ROW EXECUTE FUNCTION set_show_slot();
+
+-- --- Backfill ---
+
+-- A show that clashes with an earlier one at its venue is left without a
+-- slot (`python scheduling.py clashes` lists them), so the constraint can be
+-- added; it gets checked again once its date, time or venue is edited.
+-- Not a content change, so updated_at stays as it is.
+ALTER TABLE shows DISABLE TRIGGER shows_set_updated_at;
+
+UPDATE shows
+SET slot = show_slot(showdate, showtime)
+WHERE venue_id IS NOT NULL
+  AND NOT EXISTS (
+      SELECT 1 FROM shows earlier
+      WHERE earlier.venue_id = shows.venue_id
+        AND earlier.showdate BETWEEN shows.showdate - 1 AND shows.showdate + 1
+        AND earlier.id < shows.id
+        AND show_slot(earlier.showdate, earlier.showtime) && show_slot(shows.showdate, shows.showtime)
+  );
+
+ALTER TABLE shows ENABLE TRIGGER shows_set_updated_at;
+
+ALTER TABLE shows DROP CONSTRAINT IF EXISTS shows_venue_slot_excl;
+ALTER TABLE shows ADD CONSTRAINT shows_venue_slot_excl
+    EXCLUDE USING gist (int4range(venue_id, venue_id, '[]') WITH =, slot WITH &&);
+
+ANALYZE shows;
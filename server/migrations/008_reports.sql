@@ -0,0 +1,228 @@
+-- Reporting rollups for /reports (see reports.py).
+--
+--   report_months        shows and ticket prices per calendar month
+--   report_venue_months  the same per venue and month
+--   report_band_months   band appearances per band and month
+--
+-- Statement-level triggers on shows and show_bands keep them current for
+-- every write path (the routes, bulk import, the 003 link triggers, psql).
+-- They don't add and subtract: each statement collects the (month),
+-- (venue, month) and (band, month) keys it touched and recounts just those
+-- from the base tables, so a show that moves month, venue and lineup in one
+-- UPDATE can't leave a count behind. A recount reads one venue-month or
+-- one band's shows through existing indexes, whatever the size of the history.
+--
+-- `python reports.py rebuild` recomputes everything with three GROUP BYs.
+
+CREATE TABLE IF NOT EXISTS report_months (
+    month DATE PRIMARY KEY,
+    shows INTEGER NOT NULL,
+    priced_shows INTEGER NOT NULL,
+    price_total NUMERIC(14, 2) NOT NULL,
+    price_min NUMERIC(10, 2),
+    price_max NUMERIC(10, 2)
+);
+
+CREATE TABLE IF NOT EXISTS report_venue_months (
+    venue_id INTEGER NOT NULL,
+    month DATE NOT NULL,
+    shows INTEGER NOT NULL,
+    priced_shows INTEGER NOT NULL,
+    price_total NUMERIC(14, 2) NOT NULL,
+    price_min NUMERIC(10, 2),
+    price_max NUMERIC(10, 2),
+    PRIMARY KEY (venue_id, month)
+);
+
+CREATE TABLE IF NOT EXISTS report_band_months (
+    band_id INTEGER NOT NULL,
+    month DATE NOT NULL,
+    appearances INTEGER NOT NULL,
+    PRIMARY KEY (band_id, month)
+);
+
+-- /reports/venues and /reports/bands read a range of months across all rows
+CREATE INDEX IF NOT EXISTS report_venue_months_month_idx ON report_venue_months (month);
+CREATE INDEX IF NOT EXISTS report_band_months_month_idx ON report_band_months (month);
+
+-- Month-range scans for the recounts below
+CREATE INDEX IF NOT EXISTS shows_showdate_idx ON shows (showdate);
+
+-- --- Recounts of a set of keys ---
+
+CREATE OR REPLACE FUNCTION recount_report_months(months DATE[]) RETURNS void AS $$
+    DELETE FROM report_months WHERE month = ANY(months);
+    INSERT INTO report_months (month, shows, priced_shows, price_total, price_min, price_max)
+    SELECT key.month, count(*), count(shows.ticketprice), coalesce(sum(shows.ticketprice), 0),
+           min(shows.ticketprice), max(shows.ticketprice)
+    FROM (SELECT DISTINCT month FROM unnest(months) AS month) key
+    JOIN shows ON shows.showdate >= key.month AND shows.showdate < (key.month + interval '1 month')::date
+    GROUP BY key.month;
+$$ LANGUAGE sql;
+
+CREATE OR REPLACE FUNCTION recount_report_venue_months(venue_ids INTEGER[], months DATE[]) RETURNS void AS $$
+    DELETE FROM report_venue_months report
+    USING unnest(venue_ids, months) AS key (venue_id, month)
+    WHERE report.venue_id = key.venue_id AND report.month = key.month;
+    INSERT INTO report_venue_months (venue_id, month, shows, priced_shows, price_total, price_min, price_max)
+    SELECT key.venue_id, key.month, count(*), count(shows.ticketprice), coalesce(sum(shows.ticketprice), 0),
+           min(shows.ticketprice), max(shows.ticketprice)
+    FROM (SELECT DISTINCT venue_id, month FROM unnest(venue_ids, months) AS key (venue_id, month)) key
+    JOIN shows ON shows.venue_id = key.venue_id
+              AND shows.showdate >= key.month AND shows.showdate < (key.month + interval '1 month')::date
+    GROUP BY key.venue_id, key.month;
+$$ LANGUAGE sql;
+
+CREATE OR REPLACE FUNCTION recount_report_band_months(band_ids INTEGER[], months DATE[]) RETURNS void AS $$
+    DELETE FROM report_band_months report
+    USING unnest(band_ids, months) AS key (band_id, month)
+    WHERE report.band_id = key.band_id AND report.month = key.month;
+    INSERT INTO report_band_months (band_id, month, appearances)
+    SELECT key.band_id, key.month, count(*)
+    FROM (SELECT DISTINCT band_id, month FROM unnest(band_ids, months) AS key (band_id, month)) key
+    JOIN show_bands ON show_bands.band_id = key.band_id
+    JOIN shows ON shows.id = show_bands.show_id
+              AND shows.showdate >= key.month AND shows.showdate < (key.month + interval '1 month')::date
+    GROUP BY key.band_id, key.month;
+$$ LANGUAGE sql;
+
+-- --- shows ---
+
+-- Recount everything the given versions of shows count towards. Their bands
+-- are looked up by name as well as through show_bands, which a delete has
+-- already emptied.
+CREATE OR REPLACE FUNCTION recount_show_reports(changed shows[]) RETURNS void AS $$
+DECLARE
+    month_keys DATE[];
+    venue_keys RECORD;
+    band_keys RECORD;
+BEGIN
+    SELECT array_agg(DISTINCT date_trunc('month', showdate)::date) INTO month_keys FROM unnest(changed);
+    IF month_keys IS NULL THEN
+        RETURN;
+    END IF;
+    PERFORM recount_report_months(month_keys);
+
+    SELECT array_agg(venue_id) AS venue_ids, array_agg(month) AS months INTO venue_keys
+    FROM (SELECT DISTINCT venue_id, date_trunc('month', showdate)::date AS month
+          FROM unnest(changed) WHERE venue_id IS NOT NULL) key;
+    IF venue_keys.venue_ids IS NOT NULL THEN
+        PERFORM recount_report_venue_months(venue_keys.venue_ids, venue_keys.months);
+    END IF;
+
+    SELECT array_agg(band_id) AS band_ids, array_agg(month) AS months INTO band_keys
+    FROM (
+        SELECT show_bands.band_id, date_trunc('month', show.showdate)::date AS month
+        FROM unnest(changed) show JOIN show_bands ON show_bands.show_id = show.id
+        UNION
+        SELECT bands.id, date_trunc('month', show.showdate)::date
+        FROM unnest(changed) show JOIN bands ON bands.bandname = ANY(show.bandsplaying)
+    ) key;
+    IF band_keys.band_ids IS NOT NULL THEN
+        PERFORM recount_report_band_months(band_keys.band_ids, band_keys.months);
+    END IF;
+END;
+$$ LANGUAGE plpgsql;
+
+CREATE OR REPLACE FUNCTION shows_inserted_reports() RETURNS trigger AS $$
+BEGIN
+    PERFORM recount_show_reports(ARRAY(SELECT new_shows::shows FROM new_shows));
+    RETURN NULL;
+END;
+$$ LANGUAGE plpgsql;
+
+CREATE OR REPLACE FUNCTION shows_updated_reports() RETURNS trigger AS $$
+BEGIN
+    -- Both versions of each show whose month, venue, price or lineup changed
+    PERFORM recount_show_reports(ARRAY(
+        SELECT version
+        FROM old_shows
+        JOIN new_shows ON new_shows.id = old_shows.id
+        CROSS JOIN LATERAL (VALUES (old_shows::shows), (new_shows::shows)) AS changed (version)
+        WHERE date_trunc('month', old_shows.showdate) IS DISTINCT FROM date_trunc('month', new_shows.showdate)
+           OR old_shows.venue_id IS DISTINCT FROM new_shows.venue_id
+           OR old_shows.ticketprice IS DISTINCT FROM new_shows.ticketprice
+           OR old_shows.bandsplaying IS DISTINCT FROM new_shows.bandsplaying
+    ));
+    RETURN NULL;
+END;
+$$ LANGUAGE plpgsql;
+
+CREATE OR REPLACE FUNCTION shows_deleted_reports() RETURNS trigger AS $$
+BEGIN
+    PERFORM recount_show_reports(ARRAY(SELECT old_shows::shows FROM old_shows));
+    RETURN NULL;
+END;
+$$ LANGUAGE plpgsql;
+
+DROP TRIGGER IF EXISTS shows_reports_insert ON shows;
+CREATE TRIGGER shows_reports_insert AFTER INSERT ON shows
+    REFERENCING NEW TABLE AS new_shows
+    FOR EACH STATEMENT EXECUTE FUNCTION shows_inserted_reports();
+
+DROP TRIGGER IF EXISTS shows_reports_update ON shows;
+CREATE TRIGGER shows_reports_update AFTER UPDATE ON shows
+    REFERENCING OLD TABLE AS old_shows NEW TABLE AS new_shows
+    FOR EACH STATEMENT EXECUTE FUNCTION shows_updated_reports();
+
+DROP TRIGGER IF EXISTS shows_reports_delete ON shows;
+CREATE TRIGGER shows_reports_delete AFTER DELETE ON shows
+    REFERENCING OLD TABLE AS old_shows
+    FOR EACH STATEMENT EXECUTE FUNCTION shows_deleted_reports();
+
+-- --- show_bands (lineup edits, and bands created, renamed or deleted) ---
+
+-- Rows whose show is gone were counted by the shows delete trigger
+CREATE OR REPLACE FUNCTION show_bands_changed_reports() RETURNS trigger AS $$
+DECLARE
+    band_keys RECORD;
+BEGIN
+    IF TG_OP = 'INSERT' THEN
+        SELECT array_agg(band_id) AS band_ids, array_agg(month) AS months INTO band_keys
+        FROM (SELECT DISTINCT changed.band_id, date_trunc('month', shows.showdate)::date AS month
+              FROM new_links changed JOIN shows ON shows.id = changed.show_id) key;
+    ELSE
+        SELECT array_agg(band_id) AS band_ids, array_agg(month) AS months INTO band_keys
+        FROM (SELECT DISTINCT changed.band_id, date_trunc('month', shows.showdate)::date AS month
+              FROM old_links changed JOIN shows ON shows.id = changed.show_id) key;
+    END IF;
+    IF band_keys.band_ids IS NOT NULL THEN
+        PERFORM recount_report_band_months(band_keys.band_ids, band_keys.months);
+    END IF;
+    RETURN NULL;
+END;
+$$ LANGUAGE plpgsql;
+
+DROP TRIGGER IF EXISTS show_bands_reports_insert ON show_bands;
+CREATE TRIGGER show_bands_reports_insert AFTER INSERT ON show_bands
+    REFERENCING NEW TABLE AS new_links
+    FOR EACH STATEMENT EXECUTE FUNCTION show_bands_changed_reports();
+
+DROP TRIGGER IF EXISTS show_bands_reports_delete ON show_bands;
+CREATE TRIGGER show_bands_reports_delete AFTER DELETE ON show_bands
+    REFERENCING OLD TABLE AS old_links
+    FOR EACH STATEMENT EXECUTE FUNCTION show_bands_changed_reports();
+
+-- --- Backfill ---
+
+INSERT INTO report_months (month, shows, priced_shows, price_total, price_min, price_max)
+SELECT date_trunc('month', showdate)::date, count(*), count(ticketprice), coalesce(sum(ticketprice), 0),
+       min(ticketprice), max(ticketprice)
+FROM shows
+GROUP BY 1
+ON CONFLICT DO NOTHING;
+
+INSERT INTO report_venue_months (venue_id, month, shows, priced_shows, price_total, price_min, price_max)
+SELECT venue_id, date_trunc('month', showdate)::date, count(*), count(ticketprice), coalesce(sum(ticketprice), 0),
+       min(ticketprice), max(ticketprice)
+FROM shows
+WHERE venue_id IS NOT NULL
+GROUP BY 1, 2
+ON CONFLICT DO NOTHING;
+
+INSERT INTO report_band_months (band_id, month, appearances)
+SELECT show_bands.band_id, date_trunc('month', shows.showdate)::date, count(*)
+FROM show_bands
+JOIN shows ON shows.id = show_bands.show_id
+GROUP BY 1, 2
+ON CONFLICT DO NOTHING;
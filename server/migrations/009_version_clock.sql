@@ -0,0 +1,19 @@
+-- updated_at from the clock, not the transaction's start (see conditional.py).
+--
+-- now() is fixed when a transaction begins, so one that ran for a while
+-- stamped its rows earlier than rows other transactions had already
+-- committed. Once it committed, max(updated_at) and count(*) could be
+-- unchanged and the list ETag with them, so clients kept a stale body.
+-- clock_timestamp() is read when the row is written, which leaves only the
+-- gap between the write and its commit.
+
+ALTER TABLE shows ALTER COLUMN updated_at SET DEFAULT clock_timestamp();
+ALTER TABLE bands ALTER COLUMN updated_at SET DEFAULT clock_timestamp();
+ALTER TABLE venues ALTER COLUMN updated_at SET DEFAULT clock_timestamp();
+
+CREATE OR REPLACE FUNCTION set_updated_at() RETURNS trigger AS $$
+BEGIN
+    NEW.updated_at := clock_timestamp();
+    RETURN NEW;
+END;
+$$ LANGUAGE plpgsql;
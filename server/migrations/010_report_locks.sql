@@ -0,0 +1,60 @@
+-- Serialize the 008 report recounts per key.
+--
+-- A recount deletes a key's rollup row and inserts it afresh. Two
+-- transactions writing shows in the same month both did that; the second
+-- one's INSERT then hit the primary key of the row the first had inserted
+-- but not yet committed, and the show write failed. An upsert would not
+-- help: the second recount's snapshot can miss the first transaction's
+-- show and overwrite its count.
+--
+-- Each recount now first takes a transaction-level advisory lock on every
+-- key it is about to rewrite, in sorted order, so recounts of the same key
+-- run one after the other and the later one (a new statement, so a new
+-- snapshot) counts both transactions' shows. Keys are hashed into the
+-- 64-bit lock space with the table name; a collision only makes two
+-- unrelated recounts wait for each other.
+
+CREATE OR REPLACE FUNCTION recount_report_months(months DATE[]) RETURNS void AS $$
+    SELECT pg_advisory_xact_lock(key)
+    FROM (SELECT DISTINCT hashtextextended('report_months:' || month, 0) AS key
+          FROM unnest(months) AS month ORDER BY key) keys;
+    DELETE FROM report_months WHERE month = ANY(months);
+    INSERT INTO report_months (month, shows, priced_shows, price_total, price_min, price_max)
+    SELECT key.month, count(*), count(shows.ticketprice), coalesce(sum(shows.ticketprice), 0),
+           min(shows.ticketprice), max(shows.ticketprice)
+    FROM (SELECT DISTINCT month FROM unnest(months) AS month) key
+    JOIN shows ON shows.showdate >= key.month AND shows.showdate < (key.month + interval '1 month')::date
+    GROUP BY key.month;
+$$ LANGUAGE sql;
+
+CREATE OR REPLACE FUNCTION recount_report_venue_months(venue_ids INTEGER[], months DATE[]) RETURNS void AS $$
+    SELECT pg_advisory_xact_lock(key)
+    FROM (SELECT DISTINCT hashtextextended('report_venue_months:' || venue_id || ':' || month, 0) AS key
+          FROM unnest(venue_ids, months) AS key (venue_id, month) ORDER BY key) keys;
+    DELETE FROM report_venue_months report
+    USING unnest(venue_ids, months) AS key (venue_id, month)
+    WHERE report.venue_id = key.venue_id AND report.month = key.month;
+    INSERT INTO report_venue_months (venue_id, month, shows, priced_shows, price_total, price_min, price_max)
+    SELECT key.venue_id, key.month, count(*), count(shows.ticketprice), coalesce(sum(shows.ticketprice), 0),
+           min(shows.ticketprice), max(shows.ticketprice)
+    FROM (SELECT DISTINCT venue_id, month FROM unnest(venue_ids, months) AS key (venue_id, month)) key
+    JOIN shows ON shows.venue_id = key.venue_id
+              AND shows.showdate >= key.month AND shows.showdate < (key.month + interval '1 month')::date
+    GROUP BY key.venue_id, key.month;
+$$ LANGUAGE sql;
+
+CREATE OR REPLACE FUNCTION recount_report_band_months(band_ids INTEGER[], months DATE[]) RETURNS void AS $$
+    SELECT pg_advisory_xact_lock(key)
+    FROM (SELECT DISTINCT hashtextextended('report_band_months:' || band_id || ':' || month, 0) AS key
+          FROM unnest(band_ids, months) AS key (band_id, month) ORDER BY key) keys;
+    DELETE FROM report_band_months report
+    USING unnest(band_ids, months) AS key (band_id, month)
+    WHERE report.band_id = key.band_id AND report.month = key.month;
+    INSERT INTO report_band_months (band_id, month, appearances)
+    SELECT key.band_id, key.month, count(*)
+    FROM (SELECT DISTINCT band_id, month FROM unnest(band_ids, months) AS key (band_id, month)) key
+    JOIN show_bands ON show_bands.band_id = key.band_id
+    JOIN shows ON shows.id = show_bands.show_id
+              AND shows.showdate >= key.month AND shows.showdate < (key.month + interval '1 month')::date
+    GROUP BY key.band_id, key.month;
+$$ LANGUAGE sql;
@@ -0,0 +1,25 @@
+-- shows.showtime NOT NULL, so the keyset pages of /shows (see pagination.py)
+-- can't lose rows.
+--
+-- The listings page on (showdate, showtime, id) > (cursor). With a NULL
+-- showtime that comparison is NULL, so a legacy row without a time, and
+-- every later show on its date, fell out of the pages while ?all=true still
+-- listed them. The app already stores 1970-01-01 00:00 for "no time"
+-- (create_show, the bulk routes, show_slot in 007); rows written before it
+-- did, or from psql, get the same value, and it is now the default.
+
+-- Not a content change, so updated_at stays as it is (as in 007)
+ALTER TABLE shows DISABLE TRIGGER shows_set_updated_at;
+
+UPDATE shows SET showtime = '1970-01-01 00:00:00' WHERE showtime IS NULL;
+
+ALTER TABLE shows ENABLE TRIGGER shows_set_updated_at;
+
+ALTER TABLE shows
+    ALTER COLUMN showtime SET DEFAULT '1970-01-01 00:00:00',
+    ALTER COLUMN showtime SET NOT NULL;
+
+-- The feed's copies were rendered without a time; drop them and the next
+-- `python upcoming.py roll-off` adds them back, rendered from the new value
+DELETE FROM upcoming_shows WHERE showtime IS NULL;
+ALTER TABLE upcoming_shows ALTER COLUMN showtime SET NOT NULL;
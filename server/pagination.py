@@ -0,0 +1,142 @@
+import base64
+import json
+from datetime import date, datetime
+
+DEFAULT_LIMIT = 50
+MAX_LIMIT = 200
+
+
+class PaginationError(ValueError):
+    """Raised for a malformed limit, cursor or filter value. Handlers map it to a 400."""
+
+
+def wants_full_listing(args):
+    """True when the client opted in to the legacy unpaginated response with ?all=true."""
+    return args.get('all', '').lower() in ('1', 'true', 'yes')
+
+
+def parse_limit(args):
+    raw_limit = args.get('limit')
+    if raw_limit is None:
+        return DEFAULT_LIMIT
+    try:
+        limit = int(raw_limit)
+    except ValueError:
+        raise PaginationError("limit must be an integer")
+    if limit < 1:
+        raise PaginationError("limit must be at least 1")
+    return min(limit, MAX_LIMIT)
+
+
+def parse_date_arg(args, name):
+    raw_value = args.get(name)
+    if not raw_value:
+        return None
+    try:
+        return date.fromisoformat(raw_value)
+    except ValueError:
+        raise PaginationError(f"{name} must be a date in YYYY-MM-DD format")
+
+
+def _cursor_value(value):
+    if isinstance(value, (datetime, date)):
+        return value.isoformat()
+    return value
+
+
+def encode_cursor(values):
+    """Turn the sort-key values of the last row on a page into an opaque token."""
+    payload = json.dumps([_cursor_value(value) for value in values], separators=(',', ':'))
+    return base64.urlsafe_b64encode(payload.encode('utf-8')).decode('ascii').rstrip('=')
+
+
+def _parse_cursor_value(kind, value):
+    """A cursor value as ``kind`` (the type of its column's values), undoing
+    _cursor_value; raises ValueError when it isn't one."""
+    if kind is int:
+        if isinstance(value, bool) or not isinstance(value, int):
+            raise ValueError(value)
+        return value
+    if not isinstance(value, str):
+        raise ValueError(value)
+    if kind is date:
+        return date.fromisoformat(value)
+    if kind is datetime:
+        return datetime.fromisoformat(value)
+    return value
+
+
+def decode_cursor(token, size, kinds=None):
+    """The values ``encode_cursor`` packed into ``token``; with ``kinds``
+    (one type per value) each must parse as its type, so a tampered cursor
+    is a 400 rather than a query error."""
+    try:
+        padded = token + '=' * (-len(token) % 4)
+        values = json.loads(base64.urlsafe_b64decode(padded.encode('ascii')))
+    except (ValueError, TypeError):
+        raise PaginationError("after is not a valid cursor")
+    if not isinstance(values, list) or len(values) != size:
+        raise PaginationError("after is not a valid cursor")
+    if kinds is not None:
+        try:
+            values = [_parse_cursor_value(kind, value) for kind, value in zip(kinds, values)]
+        except ValueError:
+            raise PaginationError("after is not a valid cursor")
+    return values
+
+
+def keyset_condition(columns, args):
+    """Build the "row after the cursor" condition for ``?after=``.
+
+    ``columns`` is the ORDER BY key, ``{column: type of its values}``
+    (trusted column names, last one unique, none nullable). Returns
+    ``(sql, params)``, or ``(None, ())`` on the first page.
+    """
+    token = args.get('after')
+    if not token:
+        return None, ()
+    values = decode_cursor(token, len(columns), columns.values())
+    placeholders = ', '.join(['%s'] * len(columns))
+    return f"({', '.join(columns)}) > ({placeholders})", tuple(values)
+
+
+def filtered_query(base_sql, conditions, order_by):
+    """Append the filters and ORDER BY for the unpaginated ``?all=true`` listing."""
+    sql = base_sql
+    if conditions:
+        sql += " WHERE " + " AND ".join(conditions)
+    return f"{sql} ORDER BY {order_by}"
+
+
+def paginate_query(base_sql, conditions, params, order_columns, args):
+    """Append the filters, keyset condition, ORDER BY and LIMIT to ``base_sql``.
+
+    Fetches one row more than the page size so the caller can tell whether a
+    next page exists. Returns ``(sql, params, limit)``.
+    """
+    conditions = list(conditions)
+    params = list(params)
+    keyset_sql, keyset_params = keyset_condition(order_columns, args)
+    if keyset_sql:
+        conditions.append(keyset_sql)
+        params.extend(keyset_params)
+
+    limit = parse_limit(args)
+    sql = base_sql
+    if conditions:
+        sql += " WHERE " + " AND ".join(conditions)
+    sql += f" ORDER BY {', '.join(order_columns)} LIMIT %s"
+    params.append(limit + 1)
+    return sql, params, limit
+
+
+def split_page(rows, limit, cursor_key):
+    """Trim the look-ahead row and return ``(rows, next_cursor)``.
+
+    ``cursor_key`` maps a raw row to its sort-key values; it must be called
+    before the rows are reformatted for the response.
+    """
+    if len(rows) <= limit:
+        return rows, None
+    rows = rows[:limit]
+    return rows, encode_cursor(cursor_key(rows[-1]))
@@ -0,0 +1,231 @@
+"""bcrypt off the request thread.
+
+Hashing and checking passwords is deliberately slow (hundreds of ms at the
+default cost). Under the gthread profile the work goes to a small process
+pool sized separately from the web workers, and under gevent to its native
+thread pool, so the worker keeps serving other requests meanwhile. A sync
+worker waits for its hash whoever runs it, so gunicorn.conf.py has it hash
+inline.
+
+Every hash first takes an admission slot: when BCRYPT_MAX_PENDING hashes are
+already queued or running, new requests fail fast with HashingBusy (surfaced
+as 503 + Retry-After) instead of stacking up behind a login storm and
+starving catalog reads. The slots are per process unless BCRYPT_SLOTS_DIR
+names a directory of lock files shared by the whole host, which
+gunicorn.conf.py sets up whenever it runs several workers: a cap per worker
+never fills under sync, where each worker has one request in flight.
+
+Settings (read on first use):
+    BCRYPT_ROUNDS         work factor for new hashes (default 12)
+    BCRYPT_WORKERS        hashing processes per web worker (default 1)
+    BCRYPT_MAX_PENDING    queued + running hashes before rejecting (default 8)
+    BCRYPT_SLOTS_DIR      directory of lock files that makes that cap host-wide
+    BCRYPT_QUEUE_TIMEOUT  seconds to wait for a slot before rejecting (default 0.25)
+    BCRYPT_EXECUTOR       "process" (default), "gevent" (the gevent profile's native
+                          thread pool) or "inline" (the sync profile, local debugging)
+"""
+import fcntl
+import os
+import random
+import threading
+import time
+
+import bcrypt
+
+
+class HashingBusy(Exception):
+    """The hashing queue is full; the caller should retry later."""
+
+    def __init__(self, retry_after=1):
+        super().__init__("Password hashing is saturated")
+        self.retry_after = retry_after
+
+
+# --- Admission slots ---
+class LocalSlots:
+    """BCRYPT_MAX_PENDING slots for this process's threads."""
+
+    def __init__(self, count):
+        self._semaphore = threading.BoundedSemaphore(count)
+
+    def acquire(self, timeout):
+        return self._semaphore.acquire(timeout=timeout) or None
+
+    def release(self, slot):
+        self._semaphore.release()
+
+
+class HostSlots:
+    """BCRYPT_MAX_PENDING slots shared by every process on the host: one lock
+    file each in ``directory``, held with flock(2) while its hash runs. The
+    kernel drops a lock when its holder exits, so a killed worker can't leak
+    a slot."""
+
+    POLL_SECONDS = 0.01
+
+    def __init__(self, directory, count):
+        os.makedirs(directory, exist_ok=True)
+        self.paths = [os.path.join(directory, f"slot-{index}") for index in range(count)]
+
+    def _try(self, path):
+        # A descriptor per attempt: flock locks belong to the open file, so
+        # threads of one worker compete for slots like separate processes
+        fd = os.open(path, os.O_RDWR | os.O_CREAT, 0o600)
+        try:
+            fcntl.flock(fd, fcntl.LOCK_EX | fcntl.LOCK_NB)
+        except BlockingIOError:
+            os.close(fd)
+            return None
+        return fd
+
+    def acquire(self, timeout):
+        deadline = time.monotonic() + timeout
+        while True:
+            # Start somewhere random so workers don't all contend for slot 0
+            start = random.randrange(len(self.paths))
+            for path in self.paths[start:] + self.paths[:start]:
+                fd = self._try(path)
+                if fd is not None:
+                    return fd
+            if time.monotonic() >= deadline:
+                return None
+            time.sleep(self.POLL_SECONDS)
+
+    def release(self, slot):
+        os.close(slot)
+
+
+# --- Work run in the hashing processes ---
+def _hash(password, rounds):
+    return bcrypt.hashpw(password, bcrypt.gensalt(rounds)).decode('utf-8')
+
+
+def _check(password, hashed):
+    return bcrypt.checkpw(password, hashed)
+
+
+def hash_rounds(hashed):
+    """Work factor of an existing "$2b$<rounds>$..." hash, or None."""
+    try:
+        return int(hashed.split('$')[2])
+    except (AttributeError, IndexError, ValueError):
+        return None
+
+
+class PasswordHasher:
+    def __init__(self, rounds=None, workers=None, max_pending=None, queue_timeout=None, mode=None,
+                 slots_dir=None):
+        self.rounds = rounds or int(os.getenv('BCRYPT_ROUNDS', 12))
+        self.workers = workers or int(os.getenv('BCRYPT_WORKERS', 1))
+        self.max_pending = max_pending or int(os.getenv('BCRYPT_MAX_PENDING', 8))
+        self.queue_timeout = queue_timeout if queue_timeout is not None else float(os.getenv('BCRYPT_QUEUE_TIMEOUT', 0.25))
+        self.mode = mode or os.getenv('BCRYPT_EXECUTOR', 'process')
+        self.slots_dir = slots_dir or os.getenv('BCRYPT_SLOTS_DIR')
+
+        self._slots = HostSlots(self.slots_dir, self.max_pending) if self.slots_dir else LocalSlots(self.max_pending)
+        self._lock = threading.Lock()
+        self._executor = None
+        self._pid = None
+
+        self.pending = 0
+        self.completed = 0
+        self.rejected = 0
+        self.total_seconds = 0.0
+        self.max_seconds = 0.0
+
+    def _get_executor(self):
+        # One pool per web worker process; a pool inherited across fork is unusable
+        if self._executor is None or self._pid != os.getpid():
+            with self._lock:
+                if self._executor is None or self._pid != os.getpid():
+                    # Imported here: it pulls in multiprocessing, which only the hashing pool needs
+                    from concurrent.futures import ProcessPoolExecutor
+                    self._executor = ProcessPoolExecutor(max_workers=self.workers)
+                    self._pid = os.getpid()
+        return self._executor
+
+    def _run(self, function, *args):
+        slot = self._slots.acquire(self.queue_timeout)
+        if slot is None:
+            with self._lock:
+                self.rejected += 1
+            raise HashingBusy(retry_after=max(1, round(self.average_seconds() * self.max_pending / self.workers)))
+
+        with self._lock:
+            self.pending += 1
+        started = time.perf_counter()
+        try:
+            if self.mode == 'inline':
+                return function(*args)
+            if self.mode == 'gevent':
+                from gevent_support import run_in_threadpool
+                return run_in_threadpool(function, *args)
+            return self._get_executor().submit(function, *args).result()
+        finally:
+            elapsed = time.perf_counter() - started
+            with self._lock:
+                self.pending -= 1
+                self.completed += 1
+                self.total_seconds += elapsed
+                self.max_seconds = max(self.max_seconds, elapsed)
+            self._slots.release(slot)
+
+    def hash_password(self, password):
+        return self._run(_hash, password.encode('utf-8'), self.rounds)
+
+    def check_password(self, password, hashed):
+        return self._run(_check, password.encode('utf-8'), hashed.encode('utf-8'))
+
+    def needs_rehash(self, hashed):
+        return hash_rounds(hashed) != self.rounds
+
+    def average_seconds(self):
+        return self.total_seconds / self.completed if self.completed else 0.0
+
+    def stats(self):
+        return {
+            "rounds": self.rounds,
+            "workers": self.workers,
+            "max_pending": self.max_pending,
+            "host_wide": int(self.slots_dir is not None),
+            "pending": self.pending,
+            "completed": self.completed,
+            "rejected": self.rejected,
+            "avg_ms": round(self.average_seconds() * 1000, 1),
+            "max_ms": round(self.max_seconds * 1000, 1),
+        }
+
+    def shutdown(self):
+        with self._lock:
+            if self._executor is not None and self._pid == os.getpid():
+                self._executor.shutdown(wait=False, cancel_futures=True)
+            self._executor = None
+
+
+_hasher = None
+_hasher_lock = threading.Lock()
+
+
+def get_hasher():
+    global _hasher
+    if _hasher is None:
+        with _hasher_lock:
+            if _hasher is None:
+                _hasher = PasswordHasher()
+    return _hasher
+
+
+def hash_password(password):
+    return get_hasher().hash_password(password)
+
+
+def check_password(password, hashed):
+    return get_hasher().check_password(password, hashed)
+
+
+def needs_rehash(hashed):
+    return get_hasher().needs_rehash(hashed)
+
+
+def hashing_stats():
+    return get_hasher().stats()
@@ -0,0 +1,100 @@
+"""Server-side prepared statements for the hot lookups.
+
+psycopg2 sends every statement as text, so Postgres parses and plans the same
+few by-id and by-name lookups on every request. Each of those is declared
+once (with the usual ``%s`` placeholders) on the ``statements`` registry and
+PREPAREd on a pooled connection the first time that connection runs it; after
+that it goes over the wire as ``EXECUTE name (...)``, and once Postgres has
+settled on a generic plan (after five executions) it skips planning entirely.
+
+Prepared statements belong to the database session, so the registry tracks
+which ones each connection has. PREPARE is not transactional: a rollback
+keeps them. PREPARED_STATEMENTS=false sends the plain SQL instead, for
+poolers that share sessions between clients (PgBouncer in transaction mode).
+"""
+import os
+import re
+import threading
+import weakref
+
+_NAME = re.compile(r"[a-z_][a-z0-9_]*")
+_PLACEHOLDER = re.compile(r"%s")
+
+
+class PreparedStatement:
+    __slots__ = ('name', 'sql', 'prepare_sql', 'execute_sql', 'executions', 'prepares')
+
+    def __init__(self, name, sql):
+        self.name = name
+        self.sql = sql
+        numbers = iter(range(1, sql.count('%s') + 1))
+        self.prepare_sql = f"PREPARE {name} AS " + _PLACEHOLDER.sub(lambda match: f"${next(numbers)}", sql)
+        arguments = ', '.join(['%s'] * sql.count('%s'))
+        self.execute_sql = f"EXECUTE {name}" + (f" ({arguments})" if arguments else '')
+        self.executions = 0
+        self.prepares = 0
+
+
+class StatementRegistry:
+    """Named hot statements, prepared lazily per connection, with usage counts."""
+
+    def __init__(self, enabled=None):
+        if enabled is None:
+            enabled = os.getenv('PREPARED_STATEMENTS', 'true').lower() != 'false'
+        self.enabled = enabled
+        self._statements = {}
+        # connection -> names prepared on it; entries go away with the connection
+        self._prepared = weakref.WeakKeyDictionary()
+        self._lock = threading.Lock()
+
+    def declare(self, name, sql):
+        """Register ``sql`` as ``name`` (returned, for use as a constant)."""
+        if not _NAME.fullmatch(name):
+            raise ValueError(f"{name!r} is not a valid statement name")
+        if '%%' in sql or '%(' in sql:
+            raise ValueError(f"{name}: only positional %s placeholders are supported")
+        existing = self._statements.get(name)
+        if existing is not None and existing.sql != sql:
+            raise ValueError(f"{name} is already declared with different SQL")
+        self._statements.setdefault(name, PreparedStatement(name, sql))
+        return name
+
+    def get(self, name):
+        """The PreparedStatement declared as ``name`` (KeyError if none)."""
+        return self._statements[name]
+
+    def execute(self, cursor, name, params=()):
+        """Run statement ``name`` on ``cursor``, preparing it on the cursor's
+        connection first if needed. Fetch the results from the cursor as usual."""
+        statement = self._statements[name]
+        with self._lock:
+            statement.executions += 1
+        if not self.enabled:
+            cursor.execute(statement.sql, params)
+            return
+
+        connection = cursor.connection
+        with self._lock:
+            prepared = self._prepared.setdefault(connection, set())
+        # A pooled connection is only used by one thread at a time
+        if name not in prepared:
+            cursor.execute(statement.prepare_sql)
+            prepared.add(name)
+            with self._lock:
+                statement.prepares += 1
+        cursor.execute(statement.execute_sql, params)
+
+    def usage(self):
+        """``{name: (executions, prepares)}`` for every declared statement."""
+        with self._lock:
+            return {name: (statement.executions, statement.prepares) for name, statement in self._statements.items()}
+
+    def stats(self):
+        stats = {"enabled": self.enabled, "declared": len(self._statements)}
+        for name, (executions, prepares) in self.usage().items():
+            stats[f"{name}_executions"] = executions
+            stats[f"{name}_prepares"] = prepares
+        return stats
+
+
+statements = StatementRegistry()
@@ -0,0 +1,70 @@
+"""``?include=`` support for the show routes.
+
+A show carries its lineup (show_bands) and its venue (shows.venue_id); with
+``?include=bands,venue`` each show in a response gets the related rows
+embedded as ``bands`` (in lineup order) and ``venue``. Every relation is
+loaded with one ``= ANY(%s)`` lookup per page or batch of shows, never one
+query per show.
+"""
+from collections import defaultdict
+
+from data_access import BandListRecord, Record, VenueListRecord, columns, fetch_records, select_from
+
+# Include name -> the table its rows come from (also its cache namespace)
+SHOW_INCLUDES = {'bands': 'bands', 'venue': 'venues'}
+
+
+class IncludeError(ValueError):
+    """A bad ?include= value; the routes answer it with a 400."""
+
+
+def parse_include(args):
+    """The requested include names, in order and without duplicates."""
+    names = [name.strip() for name in args.get('include', '').split(',') if name.strip()]
+    unknown = [name for name in names if name not in SHOW_INCLUDES]
+    if unknown:
+        raise IncludeError(f"Unknown include: {', '.join(unknown)} (expected {', '.join(SHOW_INCLUDES)})")
+    return tuple(dict.fromkeys(names))
+
+
+def included_tables(args):
+    """Tables behind the valid names in ?include=, for the conditional and
+    cache decorators; bad values are left for the view to reject."""
+    names = {name.strip() for name in args.get('include', '').split(',')}
+    return sorted(SHOW_INCLUDES[name] for name in names if name in SHOW_INCLUDES)
+
+
+def embed_show_relations(cursor, shows, include, band_cls=BandListRecord, venue_cls=VenueListRecord):
+    """Return ``shows`` as dicts with the ``include``d relations attached.
+
+    ``band_cls``/``venue_cls`` choose the projection: list records for
+    listings, the full records for the detail route.
+    """
+    embedded = [show.to_dict() if isinstance(show, Record) else dict(show) for show in shows]
+    if not include or not embedded:
+        return embedded
+
+    if 'bands' in include:
+        cursor.execute(f"""
+            SELECT show_bands.show_id, {columns(band_cls, 'bands')}
+            FROM show_bands
+            JOIN bands ON bands.id = show_bands.band_id
+            WHERE show_bands.show_id = ANY(%s)
+            ORDER BY show_bands.show_id, show_bands.position, show_bands.band_id
+        """, ([show['id'] for show in embedded],))
+        lineups = defaultdict(list)
+        for show_id, *band in cursor.fetchall():
+            lineups[show_id].append(band_cls(*band))
+        for show in embedded:
+            show['bands'] = lineups.get(show['id'], [])
+
+    if 'venue' in include:
+        venue_ids = list({show['venue_id'] for show in embedded if show['venue_id'] is not None})
+        venues = {}
+        if venue_ids:
+            cursor.execute(select_from(venue_cls, "venues") + " WHERE id = ANY(%s)", (venue_ids,))
+            venues = {venue.id: venue for venue in fetch_records(cursor, venue_cls)}
+        for show in embedded:
+            show['venue'] = venues.get(show['venue_id'])
+
+    return embedded
@@ -0,0 +1,167 @@
+"""Show, venue and band reports behind GET /reports/... (migrations/008).
+
+The reports read rollup tables, one row per month, per venue and month and
+per band and month, which the 008 triggers recount whenever a statement
+writes shows or show_bands. A report over N months reads N rows of
+report_months, or the venue/band rows of those N months, so its cost
+follows the window and the number of venues and bands, not the years of
+shows behind them. Windows are capped at MAX_REPORT_MONTHS.
+
+Writes that touch the same key take turns recounting it (migrations/010):
+every show write in a month, at a venue in a month or by a band in a month
+is serialized with the others on that key until it commits. A transaction
+of several show statements (/shows/batch, /shows/import) locks its months
+statement by statement, so two of them can deadlock; their handlers rerun
+the loser (db_helpers.retry_on_deadlock).
+
+The triggers cover every write path except TRUNCATE; after one, or to
+check the rollups, rebuild them from the base tables with three GROUP BYs.
+
+Usage: python reports.py rebuild
+"""
+import os
+import sys
+from datetime import date
+
+from data_access import BandReportRecord, ReportMonthRecord, VenueReportRecord, fetch_records
+
+DEFAULT_REPORT_MONTHS = 12
+MAX_REPORT_MONTHS = int(os.getenv('MAX_REPORT_MONTHS', 120))
+
+# Ticket price statistics as the report records name them, from the rollup columns
+PRICE_COLUMNS = """
+    round(sum(price_total) / nullif(sum(priced_shows), 0), 2) AS price_average,
+    max(price_max) AS price_max,
+    min(price_min) AS price_min,
+    coalesce(sum(price_total), 0) AS price_total,
+    coalesce(sum(priced_shows), 0)::integer AS priced_shows,
+    coalesce(sum(shows), 0)::integer AS shows
+"""
+
+REBUILD_SQL = (
+    "TRUNCATE report_months, report_venue_months, report_band_months",
+    """
+    INSERT INTO report_months (month, shows, priced_shows, price_total, price_min, price_max)
+    SELECT date_trunc('month', showdate)::date, count(*), count(ticketprice), coalesce(sum(ticketprice), 0),
+           min(ticketprice), max(ticketprice)
+    FROM shows
+    GROUP BY 1
+    """,
+    """
+    INSERT INTO report_venue_months (venue_id, month, shows, priced_shows, price_total, price_min, price_max)
+    SELECT venue_id, date_trunc('month', showdate)::date, count(*), count(ticketprice), coalesce(sum(ticketprice), 0),
+           min(ticketprice), max(ticketprice)
+    FROM shows
+    WHERE venue_id IS NOT NULL
+    GROUP BY 1, 2
+    """,
+    """
+    INSERT INTO report_band_months (band_id, month, appearances)
+    SELECT show_bands.band_id, date_trunc('month', shows.showdate)::date, count(*)
+    FROM show_bands
+    JOIN shows ON shows.id = show_bands.show_id
+    GROUP BY 1, 2
+    """,
+)
+
+
+class ReportError(ValueError):
+    pass
+
+
+def parse_month_arg(args, name):
+    raw_value = args.get(name)
+    if not raw_value:
+        return None
+    try:
+        return date.fromisoformat(f"{raw_value}-01")
+    except ValueError:
+        raise ReportError(f"{name} must be a month in YYYY-MM format")
+
+
+def add_months(month, count):
+    index = month.year * 12 + month.month - 1 + count
+    return date(index // 12, index % 12 + 1, 1)
+
+
+def report_window(args):
+    """``(first month, last month)`` from ?from=/?to= (default: the last 12 months)."""
+    last = parse_month_arg(args, 'to') or date.today().replace(day=1)
+    first = parse_month_arg(args, 'from') or add_months(last, 1 - DEFAULT_REPORT_MONTHS)
+    if last < first:
+        raise ReportError("to must not be before from")
+    if add_months(first, MAX_REPORT_MONTHS) <= last:
+        raise ReportError(f"Reports cover at most {MAX_REPORT_MONTHS} months at a time")
+    return first, last
+
+
+def fetch_month_report(cursor, first, last):
+    """One ReportMonthRecord (``month`` as YYYY-MM) per month from ``first`` to ``last``,
+    months without shows included."""
+    cursor.execute(f"""
+        SELECT to_char(month, 'YYYY-MM'), {PRICE_COLUMNS}
+        FROM generate_series(%(first)s::date, %(last)s::date, interval '1 month') AS month
+        LEFT JOIN report_months USING (month)
+        GROUP BY month
+        ORDER BY month
+    """, {'first': first, 'last': last})
+    return fetch_records(cursor, ReportMonthRecord)
+
+
+def fetch_venue_report(cursor, first, last, limit):
+    """The ``limit`` venues with the most shows from ``first`` to ``last``."""
+    cursor.execute(f"""
+        SELECT {PRICE_COLUMNS}, report.venue_id, venues.venuename
+        FROM report_venue_months report
+        JOIN venues ON venues.id = report.venue_id
+        WHERE report.month BETWEEN %(first)s AND %(last)s
+        GROUP BY report.venue_id, venues.venuename
+        ORDER BY shows DESC, venues.venuename, report.venue_id
+        LIMIT %(limit)s
+    """, {'first': first, 'last': last, 'limit': limit})
+    return fetch_records(cursor, VenueReportRecord)
+
+
+def fetch_band_report(cursor, first, last, limit):
+    """The ``limit`` bands with the most appearances from ``first`` to ``last``."""
+    cursor.execute("""
+        SELECT sum(report.appearances)::integer AS appearances, report.band_id, bands.bandname
+        FROM report_band_months report
+        JOIN bands ON bands.id = report.band_id
+        WHERE report.month BETWEEN %(first)s AND %(last)s
+        GROUP BY report.band_id, bands.bandname
+        ORDER BY appearances DESC, bands.bandname, report.band_id
+        LIMIT %(limit)s
+    """, {'first': first, 'last': last, 'limit': limit})
+    return fetch_records(cursor, BandReportRecord)
+
+
+def rebuild(connection):
+    """Recompute every rollup from shows and show_bands in one transaction.
+
+    Show writes wait on the TRUNCATE's lock until it commits, then recount
+    the keys they touched as usual.
+    """
+    cursor = connection.cursor()
+    for statement in REBUILD_SQL:
+        cursor.execute(statement)
+    cursor.execute("SELECT count(*) FROM report_months")
+    months = cursor.fetchone()[0]
+    connection.commit()
+    return months
+
+
+if __name__ == "__main__":
+    from dotenv import load_dotenv
+    from db_helpers import get_db_connection
+
+    load_dotenv()
+    command = sys.argv[1] if len(sys.argv) > 1 else ''
+    if command != 'rebuild':
+        sys.exit(__doc__.strip().splitlines()[-1])
+
+    connection = get_db_connection()
+    try:
+        print(f"Rebuilt reports for {rebuild(connection)} month(s)")
+    finally:
+        connection.close()
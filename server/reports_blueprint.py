@@ -0,0 +1,76 @@
+from flask import Blueprint, jsonify, request
+from db_helpers import db_connection
+from auth_middleware import admin_required, token_required
+from cache import response_cache
+from pagination import PaginationError, parse_limit
+from reports import ReportError, fetch_band_report, fetch_month_report, fetch_venue_report, report_window
+from upcoming import upcoming_namespaces
+
+reports_blueprint = Blueprint('reports_blueprint', __name__)
+
+
+def window_body(first, last):
+    return {"from": first.strftime('%Y-%m'), "to": last.strftime('%Y-%m')}
+
+
+# GET route to fetch shows and ticket prices per month (admins only)
+# ?from=YYYY-MM&to=YYYY-MM, the last 12 months by default
+# Cached with the shows; venue and band names come from their namespaces
+@reports_blueprint.route('/reports/months', methods=['GET'])
+@token_required
+@admin_required
+@response_cache.cached('shows', related=upcoming_namespaces)
+def month_report():
+    try:
+        first, last = report_window(request.args)
+
+        with db_connection() as connection:
+            months = fetch_month_report(connection.cursor(), first, last)
+
+        return jsonify({**window_body(first, last), "months": months}), 200
+    except ReportError as error:
+        return jsonify({"error": str(error)}), 400
+    except Exception as error:
+        return jsonify({"error": str(error)}), 500
+
+
+# GET route to fetch the venues with the most shows in a window (admins only)
+# ?from=&to= as above, ?limit= venues (default 50)
+@reports_blueprint.route('/reports/venues', methods=['GET'])
+@token_required
+@admin_required
+@response_cache.cached('shows', related=upcoming_namespaces)
+def venue_report():
+    try:
+        first, last = report_window(request.args)
+        limit = parse_limit(request.args)
+
+        with db_connection() as connection:
+            venues = fetch_venue_report(connection.cursor(), first, last, limit)
+
+        return jsonify({**window_body(first, last), "venues": venues}), 200
+    except (PaginationError, ReportError) as error:
+        return jsonify({"error": str(error)}), 400
+    except Exception as error:
+        return jsonify({"error": str(error)}), 500
+
+
+# GET route to fetch the bands with the most appearances in a window (admins only)
+# ?from=&to= as above, ?limit= bands (default 50)
+@reports_blueprint.route('/reports/bands', methods=['GET'])
+@token_required
+@admin_required
+@response_cache.cached('shows', related=upcoming_namespaces)
+def band_report():
+    try:
+        first, last = report_window(request.args)
+        limit = parse_limit(request.args)
+
+        with db_connection() as connection:
+            bands = fetch_band_report(connection.cursor(), first, last, limit)
+
+        return jsonify({**window_body(first, last), "bands": bands}), 200
+    except (PaginationError, ReportError) as error:
+        return jsonify({"error": str(error)}), 400
+    except Exception as error:
+        return jsonify({"error": str(error)}), 500
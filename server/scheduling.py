@@ -0,0 +1,193 @@
+"""Venue slots: double-booking checks and availability (migrations/007).
+
+Every show at a venue books shows.slot, a tsrange the 007 trigger derives
+from its date and time, and an exclusion constraint refuses two overlapping
+slots at one venue. Single-show writes don't check first: the INSERT or
+UPDATE fails with an ExclusionViolation, and only then does the route look
+up which shows it clashed with for the 409. The bulk routes write many shows
+in one statement, where a single clash would fail them all, so they look
+for clashes first (staged_slot_conflicts) and leave those shows out with an
+error of their own.
+
+The constraint's GiST index serves availability too: the bookings of one
+venue in a date window are a single index range scan, and the free time is
+the window minus their range_agg(), so the cost follows the bookings in the
+window, not the years of history or the number of venues.
+
+Shows that already clashed when 007 was applied were left without a slot.
+
+Usage: python scheduling.py clashes
+"""
+import os
+import sys
+from datetime import date, timedelta
+
+import psycopg2.errors
+
+from data_access import ShowListRecord, columns, fetch_records
+from pagination import parse_date_arg
+
+SLOT_CONSTRAINT = 'shows_venue_slot_excl'
+DEFAULT_AVAILABILITY_DAYS = 30
+MAX_AVAILABILITY_DAYS = int(os.getenv('MAX_AVAILABILITY_DAYS', 366))
+
+# The venue as the constraint indexes it (a one-element range, see 007)
+VENUE_KEY = "int4range(venue_id, venue_id, '[]') = int4range(%(venue_id)s::integer, %(venue_id)s::integer, '[]')"
+
+
+class ScheduleError(ValueError):
+    pass
+
+
+def is_slot_conflict(error):
+    return (isinstance(error, psycopg2.errors.ExclusionViolation)
+            and error.diag.constraint_name == SLOT_CONSTRAINT)
+
+
+def slot_conflicts(cursor, showdate, showtime, location, exclude_id=None):
+    """The shows whose slot a show at ``location`` on ``showdate``/``showtime`` would overlap."""
+    cursor.execute(f"""
+        SELECT {columns(ShowListRecord)}
+        FROM shows
+        WHERE {VENUE_KEY}
+          AND slot && show_slot(%(showdate)s::date, %(showtime)s::timestamp)
+          AND id IS DISTINCT FROM %(exclude_id)s::integer
+        ORDER BY lower(slot)
+    """, {
+        'venue_id': _venue_id(cursor, location),
+        'showdate': showdate,
+        'showtime': showtime,
+        'exclude_id': exclude_id,
+    })
+    return fetch_records(cursor, ShowListRecord)
+
+
+def staged_slot_conflicts(cursor, staged, params=None):
+    """Venue clashes of a set of pending show writes, found before they run.
+
+    ``staged`` is a query with the columns ``key`` (the caller's label for a
+    write: an import line, a batch index), ``id`` (the show an update
+    changes, NULL for a create), ``showdate``, ``showtime`` and
+    ``location``, NULL where an update keeps the show's value. Returns
+    ``{key: (show ids, keys)}`` for the writes that clash: the shows already
+    booked over their slot, and the earlier writes in ``staged`` they
+    overlap (of those that don't clash with a booked show). Slots and venues are derived as the 003 and 007 triggers will.
+    """
+    cursor.execute(f"""
+        WITH candidate AS (
+            SELECT staged.key, staged.id,
+                   CASE WHEN staged.location IS NULL THEN target.venue_id
+                        ELSE (SELECT min(venues.id) FROM venues WHERE venues.venuename = staged.location)
+                   END AS venue_id,
+                   CASE WHEN target.id IS NOT NULL AND staged.showdate IS NULL
+                             AND staged.showtime IS NULL AND staged.location IS NULL THEN target.slot
+                        ELSE show_slot(COALESCE(staged.showdate, target.showdate),
+                                       COALESCE(staged.showtime, target.showtime))
+                   END AS slot
+            FROM ({staged}) AS staged
+            LEFT JOIN shows target ON target.id = staged.id
+        ), booked AS (
+            SELECT candidate.key, shows.id AS show_id, NULL::integer AS other_key
+            FROM candidate
+            JOIN shows ON int4range(shows.venue_id, shows.venue_id, '[]')
+                          = int4range(candidate.venue_id, candidate.venue_id, '[]')
+                      AND shows.slot && candidate.slot
+                      AND shows.id IS DISTINCT FROM candidate.id
+        ), clash AS (
+            SELECT * FROM booked
+            UNION ALL
+            -- An earlier write that is refused itself books nothing
+            SELECT later.key, NULL, earlier.key
+            FROM candidate later
+            JOIN candidate earlier ON earlier.venue_id = later.venue_id AND earlier.slot && later.slot
+                                  AND earlier.key < later.key
+            WHERE earlier.key NOT IN (SELECT key FROM booked)
+        )
+        SELECT key, array_remove(array_agg(DISTINCT show_id), NULL), array_remove(array_agg(DISTINCT other_key), NULL)
+        FROM clash
+        GROUP BY key
+    """, params)
+    return {key: (show_ids, other_keys) for key, show_ids, other_keys in cursor.fetchall()}
+
+
+def _venue_id(cursor, location):
+    # Same lookup as the 003 trigger that sets shows.venue_id
+    cursor.execute("SELECT min(id) FROM venues WHERE venuename = %s", (location,))
+    return cursor.fetchone()[0]
+
+
+def availability_window(args):
+    """``(first day, last day)`` from ?from=/?to= (default: the next 30 days)."""
+    first = parse_date_arg(args, 'from') or date.today()
+    last = parse_date_arg(args, 'to') or first + timedelta(days=DEFAULT_AVAILABILITY_DAYS - 1)
+    if last < first:
+        raise ScheduleError("to must not be before from")
+    if (last - first).days >= MAX_AVAILABILITY_DAYS:
+        raise ScheduleError(f"Availability covers at most {MAX_AVAILABILITY_DAYS} days at a time")
+    return first, last
+
+
+def fetch_availability(cursor, venue_id, first, last):
+    """``(free, booked)`` at a venue from the start of ``first`` to the end of
+    ``last``, in time order.
+
+    ``free`` is ``[{"start", "end"}]``; ``booked`` is ``[{"show_id", "start",
+    "end"}]``, clipped to the window like the free ranges.
+    """
+    cursor.execute(f"""
+        WITH booked AS (
+            SELECT id, slot * tsrange(%(start)s, %(end)s) AS slot
+            FROM shows
+            WHERE {VENUE_KEY} AND slot && tsrange(%(start)s, %(end)s)
+        )
+        SELECT NULL, lower(free), upper(free)
+        FROM unnest(tsmultirange(tsrange(%(start)s, %(end)s))
+                    - (SELECT coalesce(range_agg(slot), '{{}}') FROM booked)) AS free
+        UNION ALL
+        SELECT id, lower(slot), upper(slot) FROM booked
+        ORDER BY 2
+    """, {'venue_id': venue_id, 'start': first, 'end': last + timedelta(days=1)})
+    free, booked = [], []
+    for show_id, slot_start, slot_end in cursor.fetchall():
+        slot = {"start": slot_start.isoformat(), "end": slot_end.isoformat()}
+        if show_id is None:
+            free.append(slot)
+        else:
+            booked.append({"show_id": show_id, **slot})
+    return free, booked
+
+
+def find_clashes(cursor):
+    """``(show_id, showdate, location, [clashing show ids])`` for shows 007 left without a slot."""
+    cursor.execute("""
+        SELECT shows.id, shows.showdate, shows.location, array_agg(other.id ORDER BY other.id)
+        FROM shows
+        JOIN shows other
+          ON other.venue_id = shows.venue_id
+         AND other.id <> shows.id
+         AND other.showdate BETWEEN shows.showdate - 1 AND shows.showdate + 1
+         AND show_slot(other.showdate, other.showtime) && show_slot(shows.showdate, shows.showtime)
+        WHERE shows.venue_id IS NOT NULL AND shows.slot IS NULL
+        GROUP BY shows.id
+        ORDER BY shows.showdate, shows.id
+    """)
+    return cursor.fetchall()
+
+
+if __name__ == "__main__":
+    from dotenv import load_dotenv
+    from db_helpers import get_db_connection
+
+    load_dotenv()
+    command = sys.argv[1] if len(sys.argv) > 1 else ''
+    if command != 'clashes':
+        sys.exit(__doc__.strip().splitlines()[-1])
+
+    connection = get_db_connection()
+    try:
+        clashes = find_clashes(connection.cursor())
+        for show_id, showdate, location, other_ids in clashes:
+            print(f"show {show_id} ({showdate}, {location}) clashes with {', '.join(map(str, other_ids))}")
+        print(f"{len(clashes)} show(s) without a slot; edit their date, time or venue to book one")
+    finally:
+        connection.close()
@@ -0,0 +1,148 @@
+import re
+
+from flask import Blueprint, jsonify, request
+
+from cache import response_cache
+from data_access import SearchResultRecord, fetch_records
+from db_helpers import db_connection
+from pagination import PaginationError, decode_cursor, parse_limit, split_page
+
+search_blueprint = Blueprint('search_blueprint', __name__)
+
+# kind -> (table, title, subtitle, name column for fuzzy matching); the
+# search_vector columns and their triggers are in migrations/004_search.sql
+SEARCH_SOURCES = {
+    'show': ("shows", "array_to_string(shows.bandsplaying, ' & ')", "shows.showdate::text || ' at ' || shows.location",
+             "shows.location"),
+    'band': ("bands", "bands.bandname", "concat_ws(', ', bands.genre, bands.hometown)", "bands.bandname"),
+    'venue': ("venues", "venues.venuename", "venues.location", "venues.venuename"),
+}
+
+# Results depend on all three tables, so writes to any of them retire cached searches
+SEARCH_NAMESPACES = ('shows', 'bands', 'venues')
+
+# Shorter input matches nearly every name by trigram similarity
+FUZZY_MIN_LENGTH = 3
+MAX_TERMS = 8
+
+_trigram_support = {}
+
+
+class SearchError(ValueError):
+    """A bad q or kind value. The route maps it to a 400."""
+
+
+def search_terms(text):
+    """``to_tsquery`` input matching every word of ``text`` as a prefix.
+
+    Only letters and digits are kept, so user input can never inject
+    tsquery operators.
+    """
+    terms = re.findall(r"[^\W_]+", text.lower())[:MAX_TERMS]
+    if not terms:
+        raise SearchError("q must contain at least one letter or digit")
+    return ' & '.join(f"{term}:*" for term in terms)
+
+
+def search_kinds(args):
+    raw_kinds = args.get('kind')
+    if not raw_kinds:
+        return list(SEARCH_SOURCES)
+    kinds = [kind.strip() for kind in raw_kinds.split(',') if kind.strip()]
+    unknown = [kind for kind in kinds if kind not in SEARCH_SOURCES]
+    if unknown or not kinds:
+        raise SearchError(f"kind must be one or more of {', '.join(SEARCH_SOURCES)}")
+    return list(dict.fromkeys(kinds))
+
+
+def trigram_support(cursor):
+    """Whether pg_trgm is installed (checked once per worker process)."""
+    if 'installed' not in _trigram_support:
+        cursor.execute("SELECT EXISTS (SELECT 1 FROM pg_extension WHERE extname = 'pg_trgm')")
+        _trigram_support['installed'] = cursor.fetchone()[0]
+    return _trigram_support['installed']
+
+
+def search_query(kinds, fuzzy, after):
+    """One ranked SELECT per kind, UNION ALLed and cut to a keyset page.
+
+    Full-text matches are ranked by ts_rank (names weigh most); with pg_trgm
+    the name's word similarity to the input is added, so a typo or a partial
+    word still finds the name through its trigram index. Only ids and ranks
+    go through the sort; titles are built for the page's rows alone.
+    """
+    branches = []
+    joins = []
+    titles = []
+    subtitles = []
+    for kind in kinds:
+        table, title, subtitle, name_column = SEARCH_SOURCES[kind]
+        rank = "ts_rank(search_vector, to_tsquery('english', %(tsquery)s))"
+        match = "search_vector @@ to_tsquery('english', %(tsquery)s)"
+        if fuzzy:
+            rank += f" + word_similarity(%(text)s, {name_column})"
+            match = f"({match} OR %(text)s <%% {name_column})"
+        branches.append(f"SELECT id, '{kind}'::text AS kind, ({rank})::real AS rank FROM {table} WHERE {match}")
+        joins.append(f"LEFT JOIN {table} ON page.kind = '{kind}' AND {table}.id = page.id")
+        titles.append(f"WHEN '{kind}' THEN {title}")
+        subtitles.append(f"WHEN '{kind}' THEN {subtitle}")
+
+    page = "SELECT id, kind, rank FROM (" + " UNION ALL ".join(branches) + ") results"
+    if after:
+        page += " WHERE (rank, kind, id) < (%(after_rank)s::real, %(after_kind)s, %(after_id)s)"
+    page += " ORDER BY rank DESC, kind DESC, id DESC LIMIT %(limit)s"
+
+    return f"""
+        SELECT page.id, page.kind, page.rank,
+               CASE page.kind {' '.join(subtitles)} END AS subtitle,
+               CASE page.kind {' '.join(titles)} END AS title
+        FROM ({page}) page
+        {' '.join(joins)}
+        ORDER BY page.rank DESC, page.kind DESC, page.id DESC
+    """
+
+
+def search_cursor(args):
+    token = args.get('after')
+    if not token:
+        return None
+    rank, kind, row_id = decode_cursor(token, 3)
+    if not isinstance(rank, (int, float)) or kind not in SEARCH_SOURCES or not isinstance(row_id, int):
+        raise PaginationError("after is not a valid cursor")
+    return {"after_rank": rank, "after_kind": kind, "after_id": row_id}
+
+
+def search_namespaces(args):
+    return SEARCH_NAMESPACES
+
+
+# GET route to search shows, bands and venues by name, genre, hometown,
+# location and description: ?q=...&kind=show,band,venue&limit=&after=
+@search_blueprint.route('/search', methods=['GET'])
+@response_cache.cached('search', related=search_namespaces)
+def search():
+    try:
+        text = request.args.get('q', '').strip()
+        if not text:
+            raise SearchError("q is required")
+
+        kinds = search_kinds(request.args)
+        after = search_cursor(request.args)
+        limit = parse_limit(request.args)
+        params = {"text": text, "tsquery": search_terms(text), "limit": limit + 1, **(after or {})}
+
+        with db_connection() as connection:
+            cursor = connection.cursor()
+            fuzzy = len(text) >= FUZZY_MIN_LENGTH and trigram_support(cursor)
+            cursor.execute(search_query(kinds, fuzzy, after), params)
+            results, next_cursor = split_page(
+                fetch_records(cursor, SearchResultRecord), limit,
+                lambda result: (result.rank, result.kind, result.id)
+            )
+
+        return jsonify({"results": results, "next_cursor": next_cursor}), 200
+
+    except (SearchError, PaginationError) as error:
+        return jsonify({"error": str(error)}), 400
+    except Exception as error:
+        return jsonify({"error": str(error)}), 500
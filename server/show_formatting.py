@@ -0,0 +1,88 @@
+import logging
+from datetime import date, datetime
+from functools import lru_cache
+
+logger = logging.getLogger(__name__)
+
+# Flask's default JSON provider renders dates as RFC 1123 strings, which is
+# how showdate/showtime come back when a client echoes a show to the API.
+HTTP_DATE_FORMAT = '%a, %d %b %Y %H:%M:%S GMT'
+
+
+@lru_cache(maxsize=4096)
+def _parse_http_date(value):
+    return datetime.strptime(value, HTTP_DATE_FORMAT)
+
+
+# strftime is slow and goes through the C library; these produce the same
+# text for the types psycopg2 actually returns. Years before 1000 are the
+# one place isoformat() pads where strftime('%Y') does not, so they keep
+# the slow path.
+def _date_of_date(value):
+    return value.isoformat() if value.year > 999 else value.strftime('%Y-%m-%d')
+
+
+def _date_of_datetime(value):
+    return value.date().isoformat() if value.year > 999 else value.strftime('%Y-%m-%d')
+
+
+def _time_of_date(value):
+    return '00:00:00'
+
+
+def _time_of_datetime(value):
+    return '%02d:%02d:%02d' % (value.hour, value.minute, value.second)
+
+
+_SHOWDATE_FORMATTERS = {date: _date_of_date, datetime: _date_of_datetime}
+_SHOWTIME_FORMATTERS = {date: _time_of_date, datetime: _time_of_datetime}
+
+
+def _format_showdate(value):
+    if isinstance(value, (datetime, date)):
+        return value.strftime('%Y-%m-%d')
+    return _parse_http_date(value).strftime('%Y-%m-%d')
+
+
+def _format_showtime(value):
+    if isinstance(value, (datetime, date)):
+        return value.strftime('%H:%M:%S')
+    return _parse_http_date(value).strftime('%H:%M:%S')
+
+
+def format_shows_dates(shows):
+    """Format showdate as YYYY-MM-DD and showtime as HH:MM:SS for a whole result set.
+
+    Rows are updated in place in a single pass. A row whose values can't be
+    formatted gets None for both fields, and the failures are logged once
+    for the batch rather than once per row.
+    """
+    showdate_formatters = _SHOWDATE_FORMATTERS
+    showtime_formatters = _SHOWTIME_FORMATTERS
+    failures = 0
+    last_error = None
+
+    for show in shows:
+        try:
+            showdate = show['showdate']
+            formatter = showdate_formatters.get(type(showdate))
+            show['showdate'] = formatter(showdate) if formatter else _format_showdate(showdate)
+
+            showtime = show['showtime']
+            formatter = showtime_formatters.get(type(showtime))
+            show['showtime'] = formatter(showtime) if formatter else _format_showtime(showtime)
+        except Exception as error:
+            failures += 1
+            last_error = error
+            show['showdate'] = None
+            show['showtime'] = None
+
+    if failures:
+        logger.warning("Error formatting dates for %d show(s): %s", failures, last_error)
+    return shows
+
+
+def format_show_dates(show):
+    """Single-row form of format_shows_dates, for create/update/detail responses."""
+    format_shows_dates((show,))
+    return show
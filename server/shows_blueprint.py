@@ -1,56 +1,133 @@
-from flask import Blueprint, jsonify, request, g
-from db_helpers import get_db_connection
+import logging
+from datetime import date, datetime
+from flask import Blueprint, Response, jsonify, request, g
+from itertools import chain
+from db_helpers import db_connection
+from data_access import SHOW_COLUMNS, BandRecord, ShowListRecord, ShowRecord, VenueRecord, fetch_record, fetch_records, select_from, stream_records
 import psycopg2, psycopg2.extras
 from auth_middleware import token_required
-from datetime import datetime, date
-from flask_cors import CORS
+from cache import response_cache
+from conditional import conditional
+from json_provider import stream_json_list
+from show_formatting import format_show_dates, format_shows_dates
+from pagination import PaginationError, filtered_query, paginate_query, parse_date_arg, split_page, wants_full_listing
+from relations import IncludeError, embed_show_relations, included_tables, parse_include
+from upcoming import fetch_upcoming_page, refresh_upcoming, upcoming_body, upcoming_namespaces
+from prepared import statements
+from scheduling import is_slot_conflict, slot_conflicts
+
+logger = logging.getLogger(__name__)
 
 # Define shows_blueprint first
 shows_blueprint = Blueprint('shows_blueprint', __name__)
 
-# Enable CORS for this blueprint
-CORS(shows_blueprint)
+# Keyset order for paginated listings (column: type); id breaks ties between
+# same-time shows, and showtime is NOT NULL (migrations/011)
+SHOW_ORDER_COLUMNS = {'showdate': date, 'showtime': datetime, 'id': int}
 
-def format_show_dates(show):
-    try:
-        # Format showdate and showtime
-        if isinstance(show['showdate'], (datetime, date)):
-            show['showdate'] = show['showdate'].strftime('%Y-%m-%d')
-        else:
-            show['showdate'] = datetime.strptime(show['showdate'], '%a, %d %b %Y %H:%M:%S GMT').strftime('%Y-%m-%d')
-        
-        if isinstance(show['showtime'], (datetime, date)):
-            show['showtime'] = show['showtime'].strftime('%H:%M:%S')
-        else:
-            show['showtime'] = datetime.strptime(show['showtime'], '%a, %d %b %Y %H:%M:%S GMT').strftime('%H:%M:%S')
-    except Exception as e:
-        print(f"Error formatting dates: {e}")
-        show['showdate'] = None
-        show['showtime'] = None
-    return show
+SHOW_BY_ID = statements.declare('show_by_id', select_from(ShowRecord, "shows") + " WHERE id = %s")
+
+def show_date_filters(args):
+    """Just the from/to part of show_filters, for the per-band and per-venue calendars."""
+    conditions = []
+    params = []
+    for arg, operator in (('from', '>='), ('to', '<=')):
+        value = parse_date_arg(args, arg)
+        if value:
+            conditions.append(f"showdate {operator} %s")
+            params.append(value)
+    return conditions, params
+
+
+def show_filters(args):
+    """Translate the /shows query-string filters into SQL conditions and params."""
+    conditions, params = show_date_filters(args)
+
+    if args.get('location'):
+        conditions.append("location = %s")
+        params.append(args['location'])
+
+    if args.get('band'):
+        conditions.append("bandsplaying @> ARRAY[%s]::text[]")
+        params.append(args['band'])
+
+    if args.get('genre'):
+        conditions.append("bandsplaying && ARRAY(SELECT bandname FROM bands WHERE genre = %s)")
+        params.append(args['genre'])
+
+    return conditions, params
+
+
+def paginated_shows(base_sql, conditions, params, include=(), readonly=False):
+    """Fetch one keyset page of ShowListRecords (in SHOW_ORDER_COLUMNS order)
+    for the request's ?limit=/?after=, with dates formatted and any
+    ``include``d relations embedded. ``readonly`` allows a replica."""
+    with db_connection(readonly=readonly) as connection:
+        cursor = connection.cursor()
+
+        query, params, limit = paginate_query(base_sql, conditions, params, SHOW_ORDER_COLUMNS, request.args)
+        cursor.execute(query, params)
+        shows, next_cursor = split_page(
+            fetch_records(cursor, ShowListRecord), limit,
+            lambda show: (show['showdate'], show['showtime'], show['id'])
+        )
+        if include:
+            shows = embed_show_relations(cursor, shows, include)
+
+    format_shows_dates(shows)
+    return shows, next_cursor
+
+
+def show_cache_namespaces(show_ids):
+    """Cache namespaces to invalidate when the given shows change."""
+    return ['shows'] + [f'show:{show_id}' for show_id in show_ids]
 
 
 # GET route to fetch all shows
+# Paginated by default (?limit=&after=); ?all=true returns the legacy full listing
+# ?include=bands,venue embeds each show's lineup and venue
 @shows_blueprint.route('/shows', methods=['GET'])
+@conditional('shows', related=included_tables)
+@response_cache.cached('shows', related=included_tables)
 def shows_index():
     try:
-        connection = get_db_connection()
-        cursor = connection.cursor(cursor_factory=psycopg2.extras.RealDictCursor)
-
-        cursor.execute("SELECT * FROM shows ORDER BY showdate, showtime")
-        shows = cursor.fetchall()
+        conditions, params = show_filters(request.args)
+        include = parse_include(request.args)
+
+        if wants_full_listing(request.args):
+            # Stream the full listing from a server-side cursor so memory stays flat
+            batches = stream_records(
+                filtered_query(select_from(ShowListRecord, "shows"), conditions, "showdate, showtime"), params,
+                ShowListRecord,
+                enrich=(lambda cursor, shows: embed_show_relations(cursor, shows, include)) if include else None,
+                readonly=True
+            )
+            first_batch = next(batches, None)
+            if first_batch is None:
+                return jsonify({"error": "No shows found"}), 404
+            return stream_json_list("shows", chain([first_batch], batches), transform=format_shows_dates)
+
+        shows, next_cursor = paginated_shows(select_from(ShowListRecord, "shows"), conditions, params, include,
+                                             readonly=True)
 
         if not shows:
             return jsonify({"error": "No shows found"}), 404
 
-        shows = [format_show_dates(show) for show in shows]
-
-        connection.close()
-        return jsonify({"shows": shows}), 200
+        return jsonify({"shows": shows, "next_cursor": next_cursor}), 200
 
+    except (PaginationError, IncludeError) as error:
+        return jsonify({"error": str(error)}), 400
     except Exception as error:
         return jsonify({"error": str(error)}), 500
 
+
+def slot_conflict_response(cursor, show, showtime, exclude_id=None):
+    """The 409 for a show whose venue is already booked at that time (see scheduling.py)."""
+    conflicts = slot_conflicts(cursor, show['showdate'], showtime, show['location'], exclude_id)
+    return jsonify({"error": "The venue is already booked at that time",
+                    "conflicts": format_shows_dates(conflicts)}), 409
+
+
 # POST route to create a new show
 @shows_blueprint.route('/shows', methods=['POST'])
 @token_required
@@ -65,26 +142,34 @@ def create_show():
             showtime = str(new_show['showtime']) if new_show['showtime'] else '1970-01-01 00:00:00'
 
         # Connect to the DB and insert the show
-        connection = get_db_connection()
-        cursor = connection.cursor(cursor_factory=psycopg2.extras.DictCursor)
-        cursor.execute("""
-            INSERT INTO shows (showdate, showdescription, showtime, location, bandsplaying, ticketprice, user_id, tourposter)
-            VALUES (%s, %s, %s, %s, %s, %s, %s, %s)
-            RETURNING *
-        """, (
-            new_show['showdate'], 
-            new_show['showdescription'], 
-            showtime,  
-            new_show['location'], 
-            new_show['bandsplaying'],  
-            new_show['ticketprice'],
-            g.user['id'],
-            new_show['tourposter'],
-        ))
-
-        created_show = cursor.fetchone()
-        connection.commit()
-        connection.close()
+        with db_connection() as connection:
+            cursor = connection.cursor(cursor_factory=psycopg2.extras.DictCursor)
+            try:
+                cursor.execute(f"""
+                    INSERT INTO shows (showdate, showdescription, showtime, location, bandsplaying, ticketprice, user_id, tourposter)
+                    VALUES (%s, %s, %s, %s, %s, %s, %s, %s)
+                    RETURNING {SHOW_COLUMNS}
+                """, (
+                    new_show['showdate'], 
+                    new_show['showdescription'], 
+                    showtime,  
+                    new_show['location'], 
+                    new_show['bandsplaying'],  
+                    new_show['ticketprice'],
+                    g.user['id'],
+                    new_show['tourposter'],
+                ))
+            except psycopg2.IntegrityError as error:
+                if not is_slot_conflict(error):
+                    raise
+                connection.rollback()
+                return slot_conflict_response(cursor, new_show, showtime)
+
+            created_show = cursor.fetchone()
+            refresh_upcoming(connection, [created_show['id']])
+            connection.commit()
+
+        response_cache.invalidate('shows')
 
         created_show = format_show_dates(created_show)
 
@@ -92,28 +177,56 @@ def create_show():
     except Exception as error:
         return jsonify({"error": str(error)}), 500
 
+# GET route to fetch upcoming shows, with their bands and venue, from the
+# precomputed feed (see upcoming.py); paginated like /shows, plus ?from=/?to=
+@shows_blueprint.route('/shows/upcoming', methods=['GET'])
+@response_cache.cached('shows', related=upcoming_namespaces)
+def upcoming_shows():
+    try:
+        conditions, params = show_date_filters(request.args)
+
+        with db_connection() as connection:
+            cursor = connection.cursor()
+            payloads, next_cursor = fetch_upcoming_page(cursor, conditions, params, request.args)
+
+        if not payloads:
+            return jsonify({"error": "No upcoming shows found"}), 404
+
+        return Response(upcoming_body(payloads, next_cursor), status=200, mimetype='application/json')
+
+    except PaginationError as error:
+        return jsonify({"error": str(error)}), 400
+    except Exception as error:
+        return jsonify({"error": str(error)}), 500
+
 # GET route to fetch a single show by its ID
+# ?include=bands,venue embeds the full band and venue objects
 @shows_blueprint.route('/shows/<show_id>', methods=['GET'])
+@conditional('shows', id_arg='show_id', related=included_tables)
+@response_cache.cached('show:{show_id}', related=included_tables)
 def show_show(show_id):
     try:
-        connection = get_db_connection()
-        cursor = connection.cursor(cursor_factory=psycopg2.extras.RealDictCursor)
+        include = parse_include(request.args)
+
+        with db_connection(readonly=True) as connection:
+            cursor = connection.cursor()
 
-        cursor.execute("""
-            SELECT * FROM shows WHERE id = %s
-        """, (show_id,))
+            statements.execute(cursor, SHOW_BY_ID, (show_id,))
 
-        show = cursor.fetchone()
+            show = fetch_record(cursor, ShowRecord)
+
+            if show and include:
+                show, = embed_show_relations(cursor, [show], include, band_cls=BandRecord, venue_cls=VenueRecord)
 
         if show:
             show = format_show_dates(show)
 
-        connection.close()
-
         if show:
             return jsonify({"show": show}), 200
         else:
             return jsonify({"error": "Show not found"}), 404
+    except IncludeError as error:
+        return jsonify({"error": str(error)}), 400
     except Exception as error:
         return jsonify({"error": str(error)}), 500
 
@@ -131,31 +244,39 @@ def update_show(show_id):
             showtime = str(updated_show['showtime']) if updated_show['showtime'] else '1970-01-01 00:00:00'
 
         # Connect to the DB and update the show
-        connection = get_db_connection()
-        cursor = connection.cursor(cursor_factory=psycopg2.extras.DictCursor)
-        
-        cursor.execute("""
-            UPDATE shows
-            SET showdate = %s, showdescription = %s, showtime = %s, location = %s, bandsplaying = %s, ticketprice = %s, tourposter = %s
-            WHERE id = %s AND user_id = %s
-            RETURNING *
-        """, (
-            updated_show['showdate'],
-            updated_show['showdescription'],
-            showtime,
-            updated_show['location'],
-            updated_show['bandsplaying'],
-            updated_show['ticketprice'],
-            updated_show['tourposter'],
-            show_id,
-            g.user['id']  # Ensuring only the user who created the show can update it
-        ))
-
-        updated_show_data = cursor.fetchone()
-        connection.commit()
-        connection.close()
+        with db_connection() as connection:
+            cursor = connection.cursor(cursor_factory=psycopg2.extras.DictCursor)
+            
+            try:
+                cursor.execute(f"""
+                    UPDATE shows
+                    SET showdate = %s, showdescription = %s, showtime = %s, location = %s, bandsplaying = %s, ticketprice = %s, tourposter = %s
+                    WHERE id = %s AND user_id = %s
+                    RETURNING {SHOW_COLUMNS}
+                """, (
+                    updated_show['showdate'],
+                    updated_show['showdescription'],
+                    showtime,
+                    updated_show['location'],
+                    updated_show['bandsplaying'],
+                    updated_show['ticketprice'],
+                    updated_show['tourposter'],
+                    show_id,
+                    g.user['id']  # Ensuring only the user who created the show can update it
+                ))
+            except psycopg2.IntegrityError as error:
+                if not is_slot_conflict(error):
+                    raise
+                connection.rollback()
+                return slot_conflict_response(cursor, updated_show, showtime, exclude_id=show_id)
+
+            updated_show_data = cursor.fetchone()
+            if updated_show_data:
+                refresh_upcoming(connection, [updated_show_data['id']])
+            connection.commit()
 
         if updated_show_data:
+            response_cache.invalidate('shows', f'show:{show_id}')
             updated_show_data = format_show_dates(updated_show_data)
             return jsonify({"show": updated_show_data}), 200
         else:
@@ -169,29 +290,25 @@ def update_show(show_id):
 @token_required
 def delete_show(show_id):
     try:
-        connection = get_db_connection()
-        cursor = connection.cursor(cursor_factory=psycopg2.extras.RealDictCursor)
-        
-        # Get the show to be deleted
-        cursor.execute("SELECT * FROM shows WHERE id = %s", (show_id,))
-        show_to_delete = cursor.fetchone()
+        with db_connection() as connection:
+            cursor = connection.cursor()
 
-        if show_to_delete is None:
-            return jsonify({"error": "Show not found"}), 404
+            # The authorization check is now removed, anyone logged in can delete the show
+            # If you want to track who deleted the show, you could optionally log g.user['id'] here.
 
-        # The authorization check is now removed, anyone logged in can delete the show
-        # If you want to track who deleted the show, you could optionally log g.user['id'] here.
+            # Delete the show; nothing comes back if it doesn't exist
+            cursor.execute("DELETE FROM shows WHERE id = %s RETURNING id", (show_id,))
+            if cursor.fetchone() is None:
+                return jsonify({"error": "Show not found"}), 404
+            connection.commit()
 
-        # Delete the show
-        cursor.execute("DELETE FROM shows WHERE id = %s", (show_id,))
-        connection.commit()
+        response_cache.invalidate('shows', f'show:{show_id}')
 
         # Log successful deletion
-        print(f"Successfully deleted show with id: {show_id}")
+        logger.info("Deleted show %s", show_id)
         
-        connection.close()
         return jsonify({"message": "Show deleted successfully"}), 200
 
     except Exception as error:
-        print(f"Error deleting show: {error}")
-        return jsonify({"error": str(error)}), 500
+        logger.exception("Error deleting show %s: %s", show_id, error)
+        return jsonify({"error": str(error)}), 500
\ No newline at end of file
@@ -0,0 +1,7 @@
+import os
+import sys
+
+# The server's modules are imported flat (`import app`), as gunicorn does from this directory
+SERVER_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, SERVER_DIR)
+os.environ.setdefault('JWT_SECRET', 'tests')
@@ -0,0 +1,134 @@
+"""Read-replica routing (db_helpers.init_read_routing) against two local
+Postgres servers: the POSTGRES_* primary and TEST_REPLICA_URL, a hot standby
+of it (e.g. one made with `pg_basebackup -R`). Skipped without
+TEST_REPLICA_URL; benchmarks/read_routing.py runs the same checks with
+latencies.
+
+    TEST_REPLICA_URL="host=localhost port=5433 dbname=grp user=postgres" python -m pytest tests/test_read_routing.py
+"""
+import os
+import time
+import uuid
+
+import pytest
+
+from benchmarks.read_routing import CATALOG_READS, on_replica, routed
+
+REPLICA_URL = os.getenv('TEST_REPLICA_URL')
+DEAD_REPLICA_URL = "host=localhost port=1 dbname=grp user=postgres"
+WINDOW = 1.0
+
+pytestmark = pytest.mark.skipif(not REPLICA_URL, reason="TEST_REPLICA_URL names no replica")
+
+
+@pytest.fixture
+def make_app(monkeypatch):
+    """``make_app(replica_urls)``: a fresh app and its ReplicaSet, caching off."""
+    import app
+    import db_helpers
+    from cache import response_cache
+
+    monkeypatch.setenv('DB_REPLICA_CONNECT_TIMEOUT', '1')
+    monkeypatch.setattr(db_helpers, 'READ_PRIMARY_SECONDS', WINDOW)
+    monkeypatch.setattr(response_cache, 'ttl', 0)
+
+    def build(replica_urls):
+        replicas = db_helpers.get_replicas()
+        if replicas is not None:
+            replicas.closeall()
+        monkeypatch.setenv('DATABASE_REPLICA_URLS', replica_urls)
+        db_helpers._reset_pool_after_fork()
+        return app.create_app(), db_helpers.get_replicas()
+
+    yield build
+    replicas = db_helpers.get_replicas()
+    if replicas is not None:
+        replicas.closeall()
+    db_helpers._reset_pool_after_fork()
+
+
+@pytest.fixture
+def writer(make_app):
+    """An app on REPLICA_URL, and a signed-in admin client with a band of its own."""
+    from db_helpers import get_db_connection
+
+    application, replicas = make_app(REPLICA_URL)
+    client = application.test_client()
+    name = f"read-routing-{uuid.uuid4().hex[:8]}"
+    client.post('/auth/signup', json={"username": name, "password": "pw", "role": "admin"})
+    token = client.post('/auth/signin', json={"username": name, "password": "pw"}).get_json()['token']
+    yield application, replicas, client, {"Authorization": f"Bearer {token}"}, name
+
+    connection = get_db_connection()
+    cursor = connection.cursor()
+    cursor.execute("DELETE FROM bands WHERE bandname = %s", (name,))
+    cursor.execute("DELETE FROM users WHERE username = %s", (name,))
+    connection.commit()
+    connection.close()
+
+
+def create_band(client, headers, name):
+    band = {"bandname": name, "hometown": "Test City", "genre": "rock", "yearstarted": 2000,
+            "membernames": [], "bandphoto": "", "banddescription": ""}
+    response = client.post('/bands', json=band, headers=headers)
+    assert response.status_code == 201, response.get_data(as_text=True)
+    return response.get_json()['band'][0]
+
+
+def test_anonymous_catalog_reads_use_the_replica(make_app):
+    application, replicas = make_app(REPLICA_URL)
+    client = application.test_client()
+    counts = routed(replicas, lambda: [client.get(path) for path in CATALOG_READS])
+    assert on_replica(counts), counts
+
+
+def test_writer_reads_its_write_from_the_primary(writer):
+    application, replicas, client, headers, name = writer
+    created = []
+    counts = routed(replicas, lambda: created.append(create_band(client, headers, name)))
+    assert not counts["replica_checkouts"], counts
+    assert client.get_cookie('read_primary_until') is not None
+
+    responses = []
+    counts = routed(replicas, lambda: responses.append(client.get(f'/bands/{created[0]}')))
+    assert responses[0].status_code == 200, responses[0].get_data(as_text=True)
+    assert counts["pinned_reads"] and not counts["replica_checkouts"], counts
+
+
+def test_other_clients_and_expired_pins_use_the_replica(writer):
+    application, replicas, client, headers, name = writer
+    band_id = create_band(client, headers, name)
+
+    other = application.test_client()
+    counts = routed(replicas, lambda: other.get(f'/bands/{band_id}'))
+    assert on_replica(counts), counts
+
+    time.sleep(WINDOW + 0.2)
+    counts = routed(replicas, lambda: client.get('/auth/me', headers=headers))
+    assert on_replica(counts), counts
+
+
+def test_pin_longer_than_the_window_is_ignored(writer):
+    application, replicas, client, headers, name = writer
+    client.set_cookie('read_primary_until', f"{time.time() + 3600}")
+    counts = routed(replicas, lambda: client.get('/bands'))
+    assert on_replica(counts), counts
+
+
+def test_dead_replica_is_skipped(make_app):
+    application, replicas = make_app(f"{DEAD_REPLICA_URL},{REPLICA_URL}")
+    client = application.test_client()
+    statuses = []
+    counts = routed(replicas, lambda: statuses.extend(client.get(path).status_code for path in CATALOG_READS))
+    assert all(status == 200 for status in statuses), statuses
+    assert counts["failures"] == 1 and replicas.stats()["replicas_up"] == 1, counts
+    assert counts["replica_checkouts"] >= len(CATALOG_READS) and not counts["primary_fallbacks"], counts
+
+
+def test_reads_fall_back_to_the_primary_without_a_live_replica(make_app):
+    application, replicas = make_app(DEAD_REPLICA_URL)
+    client = application.test_client()
+    statuses = []
+    counts = routed(replicas, lambda: statuses.extend(client.get(path).status_code for path in CATALOG_READS))
+    assert all(status == 200 for status in statuses), statuses
+    assert counts["primary_fallbacks"] >= len(CATALOG_READS) and not counts["replica_checkouts"], counts
@@ -0,0 +1,53 @@
+"""Startup budget (benchmarks/startup_budget.py) as a test: create_app()
+must boot within MAX_BOOT_MS and MAX_RSS_MB and leave the on-demand modules
+unloaded. Needs no database.
+"""
+import statistics
+
+import pytest
+
+from benchmarks.startup_budget import MAX_BOOT_MS, MAX_RSS_MB, MAX_WORKER_MB, NOT_AT_BOOT, run_probe
+
+RUNS = 3
+
+
+@pytest.fixture(scope="module")
+def probes():
+    # Each probe is a fresh interpreter, so nothing this test process imported counts
+    return [run_probe() for _ in range(RUNS)]
+
+
+def median(probes, key):
+    values = [probe[key] for probe in probes if probe[key] is not None]
+    return statistics.median(values) if values else None
+
+
+def test_create_app_registers_every_blueprint():
+    import app
+
+    application = app.create_app()
+    registered = set(application.blueprints.values())
+    for path in app.BLUEPRINTS:
+        module_name, attribute = path.split(':')
+        blueprint = getattr(__import__(module_name), attribute)
+        assert blueprint in registered, path
+
+
+def test_boot_time_within_budget(probes):
+    assert median(probes, "boot_ms") <= MAX_BOOT_MS
+
+
+def test_boot_memory_within_budget(probes):
+    assert median(probes, "rss_mb") <= MAX_RSS_MB
+
+
+def test_worker_memory_within_budget(probes):
+    worker_mb = median(probes, "worker_private_mb")
+    if worker_mb is None:
+        pytest.skip("needs fork and /proc/self/smaps_rollup")
+    assert worker_mb <= MAX_WORKER_MB
+
+
+def test_on_demand_modules_not_loaded_at_boot(probes):
+    loaded = sorted({name for probe in probes for name in probe["loaded_too_early"]})
+    assert not loaded, f"loaded at boot but only needed on demand: {', '.join(loaded)} (of {NOT_AT_BOOT})"
@@ -0,0 +1,301 @@
+"""Ticket inventory and seat holds (migrations/006).
+
+A show's owner stocks it with seat rows, numbered 1..n and never more than
+its venue's capacity. Buyers hold seats for HOLD_TTL_SECONDS and then buy
+or release the hold. A seat row can be sold once, so the engine cannot
+oversell however many buyers race for the last seats.
+
+Taking a hold is one statement. It picks the lowest open seat numbers with
+FOR UPDATE SKIP LOCKED, creates the hold only if it got every seat asked
+for, and marks those seats held. Concurrent buyers skip each other's locked
+rows instead of queueing on one counter, so an on-sale rush scales with the
+number of seats rather than serializing on the show.
+
+Expired holds are swept from the partial index on held_until, which covers
+only the seats currently held, never the whole table: by the scheduled
+command (every minute or so) and, for one show, whenever a hold comes up
+short. Reads count a lapsed hold's seats as available in the meantime, and
+a lapsed hold cannot be bought.
+
+Every statement that touches both tables locks the seats before the hold,
+so purchase, release and expiry never deadlock with each other.
+
+Every function runs one transaction on ``connection`` and commits it.
+
+Usage: python tickets.py expire
+"""
+import os
+import sys
+
+from data_access import TicketHoldRecord, TicketInventoryRecord, fetch_record
+
+HOLD_TTL_SECONDS = int(os.getenv('HOLD_TTL_SECONDS', 600))
+MAX_HOLD_QUANTITY = int(os.getenv('MAX_HOLD_QUANTITY', 10))
+EXPIRE_BATCH_SIZE = 5000
+
+
+class TicketError(ValueError):
+    pass
+
+
+class SoldOut(Exception):
+    """Fewer seats are open than a hold asked for."""
+
+    def __init__(self, available):
+        super().__init__(f"Only {available} seat(s) left" if available else "Sold out")
+        self.available = available
+
+
+class HoldUnavailable(Exception):
+    """The hold can no longer be bought or released (already bought, released or lapsed)."""
+
+    def __init__(self, hold):
+        super().__init__(f"Hold is {hold.status}")
+        self.hold = hold
+
+
+def hold_sql(lock_clause="FOR UPDATE SKIP LOCKED"):
+    """The hold statement; benchmarks/bench_onsale.py compares lock clauses."""
+    return f"""
+        WITH picked AS (
+            SELECT id FROM seats
+            WHERE show_id = %(show_id)s AND status = 'available'
+            ORDER BY seat_number
+            LIMIT %(quantity)s
+            {lock_clause}
+        ),
+        hold AS (
+            INSERT INTO ticket_holds (show_id, user_id, quantity, unit_price, expires_at)
+            SELECT %(show_id)s, %(user_id)s, %(quantity)s,
+                   (SELECT ticketprice FROM shows WHERE id = %(show_id)s),
+                   now() + make_interval(secs => %(ttl)s)
+            FROM picked
+            HAVING count(*) = %(quantity)s
+            RETURNING id, expires_at
+        ),
+        held AS (
+            UPDATE seats SET status = 'held', hold_id = hold.id, held_until = hold.expires_at
+            FROM hold
+            WHERE seats.id IN (SELECT id FROM picked)
+        )
+        SELECT id FROM hold
+    """
+
+
+HOLD_SQL = hold_sql()
+
+# A hold as the API returns it; seat_numbers stay on the hold once sold
+HOLD_SELECT = """
+    SELECT expires_at, id, purchased_at, quantity,
+           ARRAY(SELECT seat_number FROM seats WHERE hold_id = ticket_holds.id ORDER BY seat_number),
+           show_id,
+           CASE WHEN status = 'active' AND expires_at <= now() THEN 'expired' ELSE status END,
+           unit_price
+    FROM ticket_holds
+"""
+
+
+def parse_quantity(value, maximum):
+    if isinstance(value, bool) or not isinstance(value, int):
+        raise TicketError("quantity must be an integer")
+    if not 1 <= value <= maximum:
+        raise TicketError(f"quantity must be between 1 and {maximum}")
+    return value
+
+
+def fetch_inventory(cursor, show_id):
+    """Seat counts for a show, or None if it was never stocked."""
+    cursor.execute("""
+        SELECT count(*) FILTER (WHERE status = 'available' OR (status = 'held' AND held_until <= now())),
+               count(*) FILTER (WHERE status = 'held' AND held_until > now()),
+               %s::integer,
+               count(*) FILTER (WHERE status = 'sold'),
+               count(*)
+        FROM seats
+        WHERE show_id = %s
+        HAVING count(*) > 0
+    """, (show_id, show_id))
+    return fetch_record(cursor, TicketInventoryRecord)
+
+
+def fetch_hold(cursor, hold_id, user_id):
+    """One of the user's holds, or None (other users' holds are not found either)."""
+    cursor.execute(HOLD_SELECT + " WHERE id = %s AND user_id = %s", (hold_id, user_id))
+    return fetch_record(cursor, TicketHoldRecord)
+
+
+def stock_show(connection, show_id, user_id, quantity=None):
+    """Put ``quantity`` seats (default: the venue's capacity) on sale for a show.
+
+    Stocking again adds or removes open seats at the top of the range; held
+    and sold seats are never removed. Returns the inventory, None when the
+    show doesn't exist, False when ``user_id`` doesn't own it.
+    """
+    cursor = connection.cursor()
+    try:
+        cursor.execute("""
+            SELECT shows.user_id, venues.capacity
+            FROM shows
+            LEFT JOIN venues ON venues.id = shows.venue_id
+            WHERE shows.id = %s
+            FOR UPDATE OF shows
+        """, (show_id,))
+        row = cursor.fetchone()
+        if row is None:
+            return None
+        owner_id, capacity = row
+        if owner_id != user_id:
+            return False
+        if not capacity:
+            raise TicketError("The show needs a venue with a capacity before tickets go on sale")
+        quantity = capacity if quantity is None else parse_quantity(quantity, capacity)
+
+        cursor.execute("DELETE FROM seats WHERE show_id = %s AND seat_number > %s AND status = 'available'",
+                       (show_id, quantity))
+        cursor.execute("""
+            INSERT INTO seats (show_id, seat_number)
+            SELECT %s, generate_series(1, %s)
+            ON CONFLICT (show_id, seat_number) DO NOTHING
+        """, (show_id, quantity))
+        inventory = fetch_inventory(cursor, show_id)
+        connection.commit()
+        return inventory
+    except Exception:
+        connection.rollback()
+        raise
+
+
+def release_expired(connection, show_id=None):
+    """Put the seats of lapsed holds back on sale; returns how many seats.
+
+    Reads only the held seats whose held_until has passed (oldest first, in
+    batches), skipping any a purchase or release has locked.
+    """
+    show_filter = "AND show_id = %(show_id)s" if show_id is not None else ''
+    cursor = connection.cursor()
+    released = 0
+    while True:
+        cursor.execute(f"""
+            WITH due AS (
+                SELECT id, hold_id FROM seats
+                WHERE status = 'held' AND held_until <= now() {show_filter}
+                ORDER BY held_until
+                LIMIT %(batch)s
+                FOR UPDATE SKIP LOCKED
+            ),
+            freed AS (
+                UPDATE seats SET status = 'available', hold_id = NULL, held_until = NULL
+                FROM due
+                WHERE seats.id = due.id
+                RETURNING due.hold_id
+            ),
+            expired AS (
+                UPDATE ticket_holds SET status = 'expired'
+                WHERE id IN (SELECT hold_id FROM freed) AND status = 'active'
+            )
+            SELECT count(*) FROM freed
+        """, {'show_id': show_id, 'batch': EXPIRE_BATCH_SIZE})
+        count = cursor.fetchone()[0]
+        connection.commit()
+        released += count
+        if count < EXPIRE_BATCH_SIZE:
+            return released
+
+
+def hold_seats(connection, show_id, user_id, quantity):
+    """Hold ``quantity`` seats of a show for ``user_id``.
+
+    Returns the TicketHoldRecord, or None if the show has no tickets on
+    sale. Raises SoldOut when too few seats are open, after releasing the
+    show's lapsed holds once and trying again.
+    """
+    quantity = parse_quantity(quantity, MAX_HOLD_QUANTITY)
+    cursor = connection.cursor()
+    params = {'show_id': show_id, 'user_id': user_id, 'quantity': quantity, 'ttl': HOLD_TTL_SECONDS}
+    for attempt in range(2):
+        cursor.execute(HOLD_SQL, params)
+        row = cursor.fetchone()
+        if row is not None:
+            hold = fetch_hold(cursor, row[0], user_id)
+            connection.commit()
+            return hold
+        connection.rollback()
+        if attempt == 0 and not release_expired(connection, show_id):
+            break
+
+    inventory = fetch_inventory(cursor, show_id)
+    connection.rollback()
+    if inventory is None:
+        return None
+    raise SoldOut(inventory.available)
+
+
+def purchase_hold(connection, hold_id, user_id):
+    """Sell a hold's seats. Returns the purchased hold, or None if the user has
+    no such hold; raises HoldUnavailable once it is bought, released or lapsed."""
+    cursor = connection.cursor()
+    cursor.execute("""
+        WITH sold AS (
+            UPDATE seats SET status = 'sold', held_until = NULL
+            WHERE hold_id = %(hold_id)s AND status = 'held' AND held_until > now()
+            RETURNING id
+        ),
+        purchased AS (
+            UPDATE ticket_holds SET status = 'purchased', purchased_at = now()
+            WHERE id = %(hold_id)s AND user_id = %(user_id)s AND status = 'active'
+              AND quantity = (SELECT count(*) FROM sold)
+            RETURNING id
+        )
+        SELECT id FROM purchased
+    """, {'hold_id': hold_id, 'user_id': user_id})
+    return _finish(connection, cursor, hold_id, user_id)
+
+
+def release_hold(connection, hold_id, user_id):
+    """Give a hold's seats back before it lapses; same results as purchase_hold()."""
+    cursor = connection.cursor()
+    cursor.execute("""
+        WITH freed AS (
+            UPDATE seats SET status = 'available', hold_id = NULL, held_until = NULL
+            WHERE hold_id = %(hold_id)s AND status = 'held'
+            RETURNING id
+        ),
+        released AS (
+            UPDATE ticket_holds SET status = 'released'
+            WHERE id = %(hold_id)s AND user_id = %(user_id)s AND status = 'active' AND expires_at > now()
+            RETURNING id
+        )
+        SELECT id FROM released
+    """, {'hold_id': hold_id, 'user_id': user_id})
+    return _finish(connection, cursor, hold_id, user_id)
+
+
+def _finish(connection, cursor, hold_id, user_id):
+    # Commit only if the hold itself changed; otherwise undo the seat update
+    # (someone else's hold, or one that lapsed or was already settled)
+    if cursor.fetchone() is not None:
+        hold = fetch_hold(cursor, hold_id, user_id)
+        connection.commit()
+        return hold
+    connection.rollback()
+    hold = fetch_hold(cursor, hold_id, user_id)
+    connection.rollback()
+    if hold is None:
+        return None
+    raise HoldUnavailable(hold)
+
+
+if __name__ == "__main__":
+    from dotenv import load_dotenv
+    from db_helpers import get_db_connection
+
+    load_dotenv()
+    command = sys.argv[1] if len(sys.argv) > 1 else ''
+    if command != 'expire':
+        sys.exit(__doc__.strip().splitlines()[-1])
+
+    connection = get_db_connection()
+    try:
+        print(f"Released {release_expired(connection)} seat(s) from lapsed holds")
+    finally:
+        connection.close()
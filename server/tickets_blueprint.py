@@ -0,0 +1,108 @@
+from flask import Blueprint, jsonify, request, g
+from db_helpers import db_connection
+from auth_middleware import token_required
+from tickets import (HoldUnavailable, SoldOut, TicketError, fetch_hold, fetch_inventory, hold_seats,
+                     purchase_hold, release_hold, stock_show)
+
+tickets_blueprint = Blueprint('tickets_blueprint', __name__)
+
+
+# GET route to fetch a show's ticket counts
+# Not cached: counts change with every hold
+@tickets_blueprint.route('/shows/<show_id>/tickets', methods=['GET'])
+def show_tickets(show_id):
+    try:
+        with db_connection() as connection:
+            inventory = fetch_inventory(connection.cursor(), show_id)
+
+        if inventory is None:
+            return jsonify({"error": "Tickets are not on sale for this show"}), 404
+        return jsonify({"tickets": inventory}), 200
+    except Exception as error:
+        return jsonify({"error": str(error)}), 500
+
+
+# PUT route to put a show's tickets on sale (owner only)
+# {"quantity": n} sells fewer than the venue's capacity; without it, every seat
+@tickets_blueprint.route('/shows/<show_id>/tickets', methods=['PUT'])
+@token_required
+def stock_tickets(show_id):
+    try:
+        data = request.get_json(silent=True) or {}
+
+        with db_connection() as connection:
+            inventory = stock_show(connection, show_id, g.user['id'], data.get('quantity'))
+
+        if inventory is None:
+            return jsonify({"error": "Show not found"}), 404
+        if inventory is False:
+            return jsonify({"error": "Unauthorized"}), 401
+        return jsonify({"tickets": inventory}), 200
+    except TicketError as error:
+        return jsonify({"error": str(error)}), 400
+    except Exception as error:
+        return jsonify({"error": str(error)}), 500
+
+
+# POST route to hold seats for a show until the hold expires
+@tickets_blueprint.route('/shows/<show_id>/holds', methods=['POST'])
+@token_required
+def create_hold(show_id):
+    try:
+        data = request.get_json(silent=True) or {}
+
+        with db_connection() as connection:
+            hold = hold_seats(connection, show_id, g.user['id'], data.get('quantity', 1))
+
+        if hold is None:
+            return jsonify({"error": "Tickets are not on sale for this show"}), 404
+        return jsonify({"hold": hold}), 201
+    except SoldOut as error:
+        return jsonify({"error": str(error), "available": error.available}), 409
+    except TicketError as error:
+        return jsonify({"error": str(error)}), 400
+    except Exception as error:
+        return jsonify({"error": str(error)}), 500
+
+
+# GET route to fetch one of the current user's holds
+@tickets_blueprint.route('/holds/<hold_id>', methods=['GET'])
+@token_required
+def hold_show(hold_id):
+    try:
+        with db_connection() as connection:
+            hold = fetch_hold(connection.cursor(), hold_id, g.user['id'])
+
+        if hold is None:
+            return jsonify({"error": "Hold not found"}), 404
+        return jsonify({"hold": hold}), 200
+    except Exception as error:
+        return jsonify({"error": str(error)}), 500
+
+
+# POST route to buy the seats of a hold before it expires
+@tickets_blueprint.route('/holds/<hold_id>/purchase', methods=['POST'])
+@token_required
+def purchase(hold_id):
+    return settle_hold(purchase_hold, hold_id)
+
+
+# DELETE route to give a hold's seats back
+@tickets_blueprint.route('/holds/<hold_id>', methods=['DELETE'])
+@token_required
+def release(hold_id):
+    return settle_hold(release_hold, hold_id)
+
+
+def settle_hold(settle, hold_id):
+    try:
+        with db_connection() as connection:
+            hold = settle(connection, hold_id, g.user['id'])
+
+        if hold is None:
+            return jsonify({"error": "Hold not found"}), 404
+        return jsonify({"hold": hold}), 200
+    except HoldUnavailable as error:
+        return jsonify({"error": str(error), "hold": error.hold}), 409
+    except Exception as error:
+        return jsonify({"error": str(error)}), 500
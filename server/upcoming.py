@@ -0,0 +1,170 @@
+"""The upcoming-shows feed behind GET /shows/upcoming.
+
+upcoming_shows (migrations/005) holds every show dated today or later,
+rendered and serialized exactly as /shows?include=bands,venue would send it,
+so serving a page is one index range scan plus a byte join. Write routes call
+refresh_upcoming() inside their own transaction for the shows they touched
+(directly, or through a band or venue embedded in them), so the feed changes
+atomically with the data.
+
+Past shows are dropped by the scheduled command, run daily just after
+midnight (Heroku Scheduler, cron, ...). The read path also filters on the
+date, so a late run never serves a past show. The same run adds any
+upcoming show the feed is missing, e.g. rows inserted from psql.
+
+Usage: python upcoming.py roll-off | rebuild
+"""
+import sys
+from datetime import date, datetime
+
+from psycopg2.extras import execute_values
+
+from data_access import ShowListRecord, select_from
+from json_provider import encode
+from pagination import paginate_query, split_page
+from relations import embed_show_relations
+from show_formatting import format_shows_dates
+
+UPCOMING_ORDER_COLUMNS = {'showdate': date, 'showtime': datetime, 'show_id': int}
+
+# Embedded bands and venues live in these cache namespaces (shows is the route's own)
+UPCOMING_NAMESPACES = ('bands', 'venues')
+
+REBUILD_BATCH_SIZE = 1000
+
+
+def upcoming_namespaces(args):
+    return UPCOMING_NAMESPACES
+
+
+# Table -> upcoming shows whose feed entry embeds the rows in %(ids)s
+UPCOMING_LINKS = {
+    'shows': "SELECT id FROM shows WHERE id = ANY(%(ids)s::integer[]) AND showdate >= current_date",
+    'bands': """
+        SELECT DISTINCT show_bands.show_id
+        FROM show_bands
+        JOIN shows ON shows.id = show_bands.show_id
+        WHERE show_bands.band_id = ANY(%(ids)s::integer[]) AND shows.showdate >= current_date
+    """,
+    'venues': "SELECT id FROM shows WHERE venue_id = ANY(%(ids)s::integer[]) AND showdate >= current_date",
+}
+
+
+def upcoming_show_ids(connection, table, row_ids):
+    """Upcoming shows whose feed entry embeds these shows, bands or venues.
+
+    Call it before a delete (the links are gone afterwards) and after an
+    insert or update (the 003 triggers may have just linked new shows).
+    """
+    if table not in UPCOMING_LINKS:
+        raise ValueError(f"{table} is not embedded in the upcoming feed")
+    if not row_ids:
+        return []
+    cursor = connection.cursor()
+    cursor.execute(UPCOMING_LINKS[table], {'ids': list(row_ids)})
+    return [row[0] for row in cursor.fetchall()]
+
+
+def render_upcoming(cursor, shows):
+    """(show_id, showdate, showtime, payload) rows for ShowListRecords."""
+    keys = [(show.id, show.showdate, show.showtime) for show in shows]
+    payloads = format_shows_dates(embed_show_relations(cursor, shows, ('bands', 'venue')))
+    return [(show_id, showdate, showtime, encode(payload).decode('utf-8'))
+            for (show_id, showdate, showtime), payload in zip(keys, payloads)]
+
+
+def refresh_upcoming(connection, show_ids):
+    """Re-render the feed entries of ``show_ids`` in the caller's transaction.
+
+    Shows that were deleted or are now in the past just lose their entry.
+    """
+    show_ids = list(set(show_ids))
+    if not show_ids:
+        return 0
+    cursor = connection.cursor()
+    cursor.execute(select_from(ShowListRecord, "shows") + " WHERE id = ANY(%s) AND showdate >= current_date",
+                   (show_ids,))
+    shows = [ShowListRecord(*row) for row in cursor.fetchall()]
+    current_ids = [show.id for show in shows]
+
+    cursor.execute("DELETE FROM upcoming_shows WHERE show_id = ANY(%s) AND NOT (show_id = ANY(%s))",
+                   (show_ids, current_ids))
+    if shows:
+        execute_values(cursor, """
+            INSERT INTO upcoming_shows (show_id, showdate, showtime, payload) VALUES %s
+            ON CONFLICT (show_id) DO UPDATE
+            SET showdate = EXCLUDED.showdate, showtime = EXCLUDED.showtime, payload = EXCLUDED.payload
+        """, render_upcoming(cursor, shows), page_size=REBUILD_BATCH_SIZE)
+    return len(shows)
+
+
+def fill_upcoming(connection, missing_only):
+    """Render upcoming shows in batches: all of them, or only those without an entry."""
+    cursor = connection.cursor()
+    condition = "showdate >= current_date"
+    if missing_only:
+        condition += " AND NOT EXISTS (SELECT 1 FROM upcoming_shows WHERE show_id = shows.id)"
+    cursor.execute(f"SELECT id FROM shows WHERE {condition} ORDER BY id")
+    show_ids = [row[0] for row in cursor.fetchall()]
+    for start in range(0, len(show_ids), REBUILD_BATCH_SIZE):
+        refresh_upcoming(connection, show_ids[start:start + REBUILD_BATCH_SIZE])
+    return len(show_ids)
+
+
+def roll_off(connection):
+    """Drop entries for past shows and add any upcoming show that has none."""
+    cursor = connection.cursor()
+    cursor.execute("DELETE FROM upcoming_shows WHERE showdate < current_date")
+    removed = cursor.rowcount
+    added = fill_upcoming(connection, missing_only=True)
+    connection.commit()
+    return removed, added
+
+
+def rebuild(connection):
+    """Re-render the whole feed, e.g. after the migration or edits made outside the app."""
+    cursor = connection.cursor()
+    cursor.execute("DELETE FROM upcoming_shows")
+    count = fill_upcoming(connection, missing_only=False)
+    connection.commit()
+    return count
+
+
+def fetch_upcoming_page(cursor, conditions, params, args):
+    """One keyset page of feed entries for ?limit=/?after=: ``(payloads, next_cursor)``.
+
+    ``conditions``/``params`` narrow it further (e.g. the from/to date filters).
+    """
+    query, params, limit = paginate_query(
+        "SELECT showdate, showtime, show_id, payload FROM upcoming_shows",
+        ["showdate >= current_date", *conditions], params, UPCOMING_ORDER_COLUMNS, args
+    )
+    cursor.execute(query, params)
+    rows, next_cursor = split_page(cursor.fetchall(), limit, lambda row: row[:3])
+    return [row[3] for row in rows], next_cursor
+
+
+def upcoming_body(payloads, next_cursor):
+    """The response bytes, in the sorted-key layout of the other list routes."""
+    return (b'{"next_cursor":' + encode(next_cursor) + b',"shows":['
+            + ','.join(payloads).encode('utf-8') + b']}\n')
+
+
+if __name__ == "__main__":
+    from dotenv import load_dotenv
+    from db_helpers import get_db_connection
+
+    load_dotenv()
+    command = sys.argv[1] if len(sys.argv) > 1 else ''
+    if command not in ('roll-off', 'rebuild'):
+        sys.exit(__doc__.strip().splitlines()[-1])
+
+    connection = get_db_connection()
+    try:
+        if command == 'roll-off':
+            removed, added = roll_off(connection)
+            print(f"Rolled off {removed} past show(s), added {added} missing show(s)")
+        else:
+            print(f"Rebuilt upcoming feed with {rebuild(connection)} show(s)")
+    finally:
+        connection.close()
@@ -1,23 +1,71 @@
 from flask import Blueprint, jsonify, request, g
-from db_helpers import get_db_connection
+from itertools import chain
+from db_helpers import db_connection
+from data_access import VENUE_COLUMNS, ShowListRecord, VenueListRecord, VenueRecord, fetch_record, fetch_records, select_from, stream_records
 import psycopg2, psycopg2.extras
 from auth_middleware import token_required
+from cache import response_cache
+from conditional import conditional
+from json_provider import stream_json_list
+from pagination import PaginationError, filtered_query, paginate_query, split_page, wants_full_listing
+from shows_blueprint import paginated_shows, show_cache_namespaces, show_date_filters
+from upcoming import refresh_upcoming, upcoming_show_ids
+from guarded_writes import guarded_write, set_clause
+from prepared import statements
+from scheduling import ScheduleError, availability_window, fetch_availability
 
 venues_blueprint = Blueprint('venues_blueprint', __name__)
 
+VENUE_ORDER_COLUMNS = {'venuename': str, 'id': int}
+
+VENUE_BY_ID = statements.declare('venue_by_id', select_from(VenueRecord, "venues") + " WHERE id = %s")
+VENUE_EXISTS = statements.declare('venue_exists', "SELECT 1 FROM venues WHERE id = %s")
+
+# What PUT /venues/<id> may change
+VENUE_UPDATE_COLUMNS = ('capacity', 'venuename', 'location', 'venuemanager')
+
+
+def venue_filters(args):
+    conditions = []
+    params = []
+    if args.get('location'):
+        conditions.append("location = %s")
+        params.append(args['location'])
+    return conditions, params
+
+
 # GET route to fetch all venues
+# Paginated by default (?limit=&after=); ?all=true returns the legacy full listing
 @venues_blueprint.route('/venues', methods=['GET'])
+@conditional('venues')
+@response_cache.cached('venues')
 def venues_index():
     try:
-        connection = get_db_connection()
-        cursor = connection.cursor(cursor_factory=psycopg2.extras.RealDictCursor)
-
-        cursor.execute("SELECT * FROM venues ORDER BY venuename")
-        venues = cursor.fetchall()
-
-        connection.close()
-        return jsonify({"venues": venues}), 200
-
+        conditions, params = venue_filters(request.args)
+
+        if wants_full_listing(request.args):
+            # Stream the full listing from a server-side cursor so memory stays flat
+            batches = stream_records(
+                filtered_query(select_from(VenueListRecord, "venues"), conditions, "venuename"), params,
+                VenueListRecord, readonly=True
+            )
+            first_batch = next(batches, None)
+            return stream_json_list("venues", chain([first_batch], batches) if first_batch else [])
+
+        with db_connection(readonly=True) as connection:
+            cursor = connection.cursor()
+
+            query, params, limit = paginate_query(select_from(VenueListRecord, "venues"), conditions, params, VENUE_ORDER_COLUMNS, request.args)
+            cursor.execute(query, params)
+            venues, next_cursor = split_page(
+                fetch_records(cursor, VenueListRecord), limit,
+                lambda venue: (venue['venuename'], venue['id'])
+            )
+
+        return jsonify({"venues": venues, "next_cursor": next_cursor}), 200
+
+    except PaginationError as error:
+        return jsonify({"error": str(error)}), 400
     except Exception as error:
         return jsonify({"error": str(error)}), 500
 
@@ -29,23 +77,26 @@ def create_venue():
     try:
         new_venue = request.json
 
-        connection = get_db_connection()
-        cursor = connection.cursor(cursor_factory=psycopg2.extras.DictCursor)
+        with db_connection() as connection:
+            cursor = connection.cursor(cursor_factory=psycopg2.extras.DictCursor)
+
+            cursor.execute(f"""
+                INSERT INTO venues (capacity, venuename, location, venuemanager)
+                VALUES (%s, %s, %s, %s)
+                RETURNING {VENUE_COLUMNS}
+            """, (
+                new_venue['capacity'], 
+                new_venue['venuename'], 
+                new_venue['location'], 
+                new_venue['venuemanager']
+            ))
 
-        cursor.execute("""
-            INSERT INTO venues (capacity, venuename, location, venuemanager)
-            VALUES (%s, %s, %s, %s)
-            RETURNING *
-        """, (
-            new_venue['capacity'], 
-            new_venue['venuename'], 
-            new_venue['location'], 
-            new_venue['venuemanager']
-        ))
+            created_venue = cursor.fetchone()
+            # The 003 trigger links the new venue to shows already at its name
+            refresh_upcoming(connection, upcoming_show_ids(connection, 'venues', [created_venue['id']]))
+            connection.commit()
 
-        created_venue = cursor.fetchone()
-        connection.commit()
-        connection.close()
+        response_cache.invalidate('venues')
 
         return jsonify({"venue": created_venue}), 201
     except Exception as error:
@@ -54,18 +105,17 @@ def create_venue():
 
 # GET route to fetch a single venue by its ID
 @venues_blueprint.route('/venues/<venue_id>', methods=['GET'])
+@conditional('venues', id_arg='venue_id')
+@response_cache.cached('venue:{venue_id}')
 def venue_show(venue_id):
     try:
-        connection = get_db_connection()
-        cursor = connection.cursor(cursor_factory=psycopg2.extras.RealDictCursor)
+        with db_connection(readonly=True) as connection:
+            cursor = connection.cursor()
 
-        cursor.execute("""
-            SELECT * FROM venues WHERE id = %s
-        """, (venue_id,))
+            statements.execute(cursor, VENUE_BY_ID, (venue_id,))
 
-        venue = cursor.fetchone()
+            venue = fetch_record(cursor, VenueRecord)
 
-        connection.close()
 
         if venue:
             return jsonify({"venue": venue}), 200
@@ -75,40 +125,96 @@ def venue_show(venue_id):
         return jsonify({"error": str(error)}), 500
 
 
-# PUT route to update a venue
-@venues_blueprint.route('/venues/<venue_id>', methods=['PUT'])
-@token_required
-def update_venue(venue_id):
+# GET route to fetch a venue's calendar, in date order
+# Index scan on shows (venue_id, showdate, showtime, id); paginated like /shows, with optional ?from=/?to=
+@venues_blueprint.route('/venues/<venue_id>/shows', methods=['GET'])
+@response_cache.cached('shows')
+def venue_shows(venue_id):
     try:
-        updated_venue_data = request.json
-        connection = get_db_connection()
-        cursor = connection.cursor(cursor_factory=psycopg2.extras.DictCursor)
+        conditions, params = show_date_filters(request.args)
+        conditions.insert(0, "venue_id = %s")
+        params.insert(0, venue_id)
 
-        cursor.execute("SELECT * FROM venues WHERE id = %s", (venue_id,))
-        venue_to_update = cursor.fetchone()
+        shows, next_cursor = paginated_shows(select_from(ShowListRecord, "shows"), conditions, params)
 
-        if venue_to_update is None:
+        if not shows and not venue_exists(venue_id):
             return jsonify({"error": "Venue not found"}), 404
 
-        if venue_to_update["user_id"] != g.user["id"]:
-            return jsonify({"error": "Unauthorized"}), 401
-
-        cursor.execute("""
-            UPDATE venues 
-            SET capacity = %s, venuename = %s, location = %s, venuemanager = %s
-            WHERE id = %s
-            RETURNING *
-        """, (
-            updated_venue_data.get('capacity', venue_to_update['capacity']),
-            updated_venue_data.get('venuename', venue_to_update['venuename']),
-            updated_venue_data.get('location', venue_to_update['location']),
-            updated_venue_data.get('venuemanager', venue_to_update['venuemanager']),
-            venue_id
-        ))
-
-        updated_venue = cursor.fetchone()
-        connection.commit()
-        connection.close()
+        return jsonify({"shows": shows, "next_cursor": next_cursor}), 200
+
+    except PaginationError as error:
+        return jsonify({"error": str(error)}), 400
+    except Exception as error:
+        return jsonify({"error": str(error)}), 500
+
+
+# GET route to fetch a venue's free and booked time between ?from= and ?to=
+# (default: the next 30 days); one range scan on the venue slot index (see scheduling.py)
+@venues_blueprint.route('/venues/<venue_id>/availability', methods=['GET'])
+@response_cache.cached('shows')
+def venue_availability(venue_id):
+    try:
+        first, last = availability_window(request.args)
+
+        with db_connection() as connection:
+            free, booked = fetch_availability(connection.cursor(), venue_id, first, last)
+
+        if not booked and not venue_exists(venue_id):
+            return jsonify({"error": "Venue not found"}), 404
+
+        return jsonify({"venue_id": int(venue_id), "from": first.isoformat(), "to": last.isoformat(),
+                        "free": free, "booked": booked}), 200
+
+    except (PaginationError, ScheduleError) as error:
+        return jsonify({"error": str(error)}), 400
+    except Exception as error:
+        return jsonify({"error": str(error)}), 500
+
+
+def venue_exists(venue_id):
+    with db_connection() as connection:
+        cursor = connection.cursor()
+        statements.execute(cursor, VENUE_EXISTS, (venue_id,))
+        return cursor.fetchone() is not None
+
+
+# PUT route to update a venue
+# Only the fields sent are changed; the owner check is part of the UPDATE itself
+@venues_blueprint.route('/venues/<venue_id>', methods=['PUT'])
+@token_required
+def update_venue(venue_id):
+    try:
+        assignments, params = set_clause(request.get_json(silent=True) or {}, VENUE_UPDATE_COLUMNS)
+        if not assignments:
+            return jsonify({"error": f"Nothing to update (expected any of {', '.join(VENUE_UPDATE_COLUMNS)})"}), 400
+
+        with db_connection() as connection:
+            cursor = connection.cursor()
+            found, updated_venue, before = guarded_write(cursor, "venues", f"""
+                UPDATE venues SET {assignments}
+                WHERE id = %(id)s AND user_id = %(user_id)s
+                RETURNING {VENUE_COLUMNS}
+            """, {**params, 'id': venue_id, 'user_id': g.user["id"]},
+                before={'venuename': "SELECT venuename FROM target"})
+
+            if updated_venue is None:
+                connection.rollback()
+                if not found:
+                    return jsonify({"error": "Venue not found"}), 404
+                return jsonify({"error": "Unauthorized"}), 401
+
+            # A rename rewrites location on this venue's shows (see migrations/003)
+            renamed_show_ids = []
+            if 'venuename' in params and params['venuename'] != before['venuename']:
+                cursor.execute("SELECT id FROM shows WHERE venue_id = %s", (venue_id,))
+                renamed_show_ids = [row[0] for row in cursor.fetchall()]
+
+            refresh_upcoming(connection, upcoming_show_ids(connection, 'venues', [venue_id]))
+            connection.commit()
+
+        response_cache.invalidate('venues', f'venue:{venue_id}')
+        if renamed_show_ids:
+            response_cache.invalidate(*show_cache_namespaces(renamed_show_ids))
 
         return jsonify({"venue": updated_venue}), 200
     except Exception as error:
@@ -120,19 +226,27 @@ def update_venue(venue_id):
 @token_required
 def delete_venue(venue_id):
     try:
-        connection = get_db_connection()
-        cursor = connection.cursor(cursor_factory=psycopg2.extras.RealDictCursor)
-        cursor.execute("SELECT * FROM venues WHERE id = %s", (venue_id,))
-        venue_to_delete = cursor.fetchone()
-        if venue_to_delete is None:
-            return jsonify({"error": "Venue not found"}), 404
-
-        if venue_to_delete["user_id"] != g.user["id"]:
-            return jsonify({"error": "Unauthorized"}), 401
-
-        cursor.execute("DELETE FROM venues WHERE id = %s", (venue_id,))
-        connection.commit()
-        connection.close()
+        with db_connection() as connection:
+            cursor = connection.cursor()
+            # Its shows lose their venue_id (ON DELETE SET NULL), so they are read in the same statement
+            found, deleted_venue, before = guarded_write(cursor, "venues", """
+                DELETE FROM venues
+                WHERE id = %(id)s AND user_id = %(user_id)s
+                RETURNING id
+            """, {'id': venue_id, 'user_id': g.user["id"]},
+                before={'unlinked_show_ids': "ARRAY(SELECT id FROM shows WHERE venue_id = %(id)s)"})
+
+            if deleted_venue is None:
+                connection.rollback()
+                if not found:
+                    return jsonify({"error": "Venue not found"}), 404
+                return jsonify({"error": "Unauthorized"}), 401
+
+            unlinked_show_ids = before['unlinked_show_ids']
+            refresh_upcoming(connection, unlinked_show_ids)
+            connection.commit()
+
+        response_cache.invalidate('venues', f'venue:{venue_id}', *show_cache_namespaces(unlinked_show_ids))
 
         return jsonify({"message": "Venue deleted successfully"}), 200
     except Exception as error: